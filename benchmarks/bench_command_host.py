@@ -0,0 +1,47 @@
+# benchmarks/bench_command_host.py
+"""
+Compara lanzar un proceso por comando (el antiguo _run_command con shell=True) con el
+CommandHost persistente. En Windows el intérprete es cmd.exe; en el resto, bash:
+
+    python -m benchmarks.bench_command_host
+"""
+
+import subprocess
+import sys
+import time
+
+from core.command_host import CommandHost
+
+COMMANDS = 100
+
+
+def run_spawned(command):
+    kwargs = {'creationflags': subprocess.CREATE_NO_WINDOW} if sys.platform == "win32" else {}
+    return subprocess.check_output(command, shell=True, text=True, stderr=subprocess.PIPE, **kwargs).strip()
+
+
+def main():
+    commands = [f"echo velocityos {i}" for i in range(COMMANDS)]
+
+    start = time.perf_counter()
+    spawned = [run_spawned(command) for command in commands]
+    spawn_seconds = time.perf_counter() - start
+
+    host = CommandHost()
+    start = time.perf_counter()
+    hosted = [host.run(command).stdout.strip() for command in commands]
+    host_seconds = time.perf_counter() - start
+    failing = host.run("exit_code_test_does_not_exist")
+    host.close()
+
+    assert spawned == hosted, "La salida del CommandHost no coincide con la del proceso por comando"
+    assert failing.exit_code != 0 and failing.stderr
+
+    print(f"Comandos: {COMMANDS} ({host.shell[0]})")
+    print(f"Un proceso por comando: {spawn_seconds:.2f} s ({spawn_seconds / COMMANDS * 1000:.1f} ms/comando)")
+    print(f"CommandHost persistente: {host_seconds:.2f} s ({host_seconds / COMMANDS * 1000:.1f} ms/comando)"
+          f"  (x{spawn_seconds / host_seconds:.1f}, incluye el arranque)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_core_episodes.py
+"""
+Mide lo que cuesta buscar episodios de núcleo saturado sobre el historial por núcleo del
+monitor (10 minutos a 1 Hz) con find_saturated_episodes frente a recorrerlo muestra a
+muestra en Python:
+
+    python -m benchmarks.bench_core_episodes
+"""
+
+import time
+
+import numpy as np
+
+from core.core_load import find_saturated_episodes
+
+REPEATS = 200
+
+
+def naive_episodes(loads, threshold=95.0, min_samples=5):
+    episodes = []
+    for core in range(loads.shape[1]):
+        start = None
+        for row in range(loads.shape[0] + 1):
+            saturated = row < loads.shape[0] and loads[row, core] >= threshold
+            if saturated and start is None:
+                start = row
+            elif not saturated and start is not None:
+                if row - start >= min_samples:
+                    episodes.append((core, start, row))
+                start = None
+    return episodes
+
+
+def make_history(samples, cores, rng):
+    loads = rng.uniform(0, 40, (samples, cores))
+    for _ in range(cores):
+        core, start = rng.integers(cores), rng.integers(samples - 30)
+        loads[start:start + rng.integers(3, 30), core] = 100
+    return np.arange(samples, dtype=np.float64), loads
+
+
+def main():
+    rng = np.random.default_rng(1)
+    for cores in (8, 16, 32, 64):
+        timestamps, loads = make_history(600, cores, rng)
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            episodes = find_saturated_episodes(timestamps, loads)
+        vectorized = (time.perf_counter() - start) / REPEATS * 1000
+        start = time.perf_counter()
+        for _ in range(REPEATS // 10):
+            expected = naive_episodes(loads)
+        naive = (time.perf_counter() - start) / (REPEATS // 10) * 1000
+        assert len(episodes) == len(expected)
+        print(f"{cores:3d} núcleos: {len(episodes):3d} episodios | vectorizado {vectorized:6.3f} ms | bucle {naive:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_gui_startup.py
+"""
+Mide con la plataforma 'offscreen' de Qt el coste de arranque de MainWindow (solo se
+construye la pestaña visible) y la CPU del hilo de la GUI con la pestaña Monitor a la
+vista frente a la ventana minimizada u oculta, donde no se entrega ninguna muestra:
+
+    python -m benchmarks.bench_gui_startup [segundos_por_escenario]
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QEventLoop, QTimer
+
+from gui.main_window import MainWindow
+
+
+def run_loop(seconds):
+    """Corre el bucle de eventos y devuelve la CPU consumida por el hilo de la GUI (s)."""
+    start = time.thread_time()
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+    return time.thread_time() - start
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    app = QApplication(sys.argv)
+
+    start = time.perf_counter()
+    window = MainWindow()
+    construct_seconds = time.perf_counter() - start
+
+    deliveries = []
+    original_update = window.update_monitor_data
+    window.update_monitor_data = lambda data: (deliveries.append(data), original_update(data))
+    window.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    for index in range(window.tabs.count()):
+        window.ensure_tab_built(window.tabs.widget(index))
+    deferred_seconds = time.perf_counter() - start
+
+    results = {}
+    window.tabs.setCurrentWidget(window.monitor_tab)
+    for label, prepare in (("Pestaña Monitor visible", window.showNormal),
+                           ("Ventana minimizada", window.showMinimized),
+                           ("Otra pestaña", lambda: (window.showNormal(), window.tabs.setCurrentWidget(window.optimization_tab))),
+                           ("Ventana oculta", window.hide)):
+        prepare()
+        app.processEvents()
+        deliveries.clear()
+        history_before = len(window.monitor_thread.history)
+        cpu = run_loop(seconds)
+        results[label] = (cpu, len(deliveries), len(window.monitor_thread.history) - history_before)
+
+    window.close()
+    app.processEvents()
+
+    print(f"Construcción de MainWindow: {construct_seconds * 1000:.0f} ms "
+          f"(+{deferred_seconds * 1000:.0f} ms al abrir el resto de pestañas)")
+    for label, (cpu, delivered, recorded) in results.items():
+        print(f"{label:<24} CPU GUI {cpu * 1000 / seconds:6.2f} ms/s  "
+              f"muestras entregadas {delivered:3d}  guardadas en historial {recorded:3d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# benchmarks/bench_monitor_delta.py
+"""
+Simula muestras del monitor con muchos dispositivos (GPUs, discos, interfaces) en las
+que solo una parte cambia de verdad, y compara lo que le llega a la GUI enviando la
+muestra completa en cada tick frente a los MonitorDelta con umbrales:
+
+    python -m benchmarks.bench_monitor_delta
+"""
+
+import random
+
+from core.monitor_delta import DeltaEncoder
+
+TICKS = 600
+
+
+def make_sample(tick, devices, active):
+    """Los 'active' primeros dispositivos cambian de verdad; el resto solo tiene ruido."""
+    noise = lambda: random.uniform(-0.2, 0.2)
+    moving = lambda i: (tick * 7 + i * 13) % 100 if i < active else 40 + noise()
+    return {
+        'timestamp': tick,
+        'cpu_usage': moving(0), 'ram_usage': 55 + noise(), 'gpu_usage': moving(1), 'gpu_temp': 60,
+        'gpus': [{'index': i, 'usage': moving(i), 'temperature': 60 + noise(), 'graphics_clock_mhz': 1800,
+                  'throttle_reasons': []} for i in range(devices)],
+        'disk_io': {f"disk{i}": {'read_bps': moving(i) * 1e6, 'write_bps': 1e5} for i in range(devices)},
+        'net_io': {f"nic{i}": {'recv_bps': moving(i) * 1e5, 'sent_bps': 2e4} for i in range(devices)},
+    }
+
+
+def main():
+    random.seed(1)
+    for devices, active in ((1, 1), (8, 1), (32, 1), (32, 8)):
+        encoder = DeltaEncoder()
+        full_metrics = delta_metrics = events = 0
+        for tick in range(TICKS):
+            sample = make_sample(tick, devices, active)
+            delta = encoder.encode(sample, now=tick)
+            full_metrics += len(encoder.sent)
+            delta_metrics += len(delta)
+            events += 1 if len(delta) else 0
+        print(f"{devices:3d} dispositivos ({active} cambiando): muestra completa {full_metrics / TICKS:6.1f} métricas/tick | "
+              f"delta {delta_metrics / TICKS:6.1f} métricas/tick, {events / TICKS:.2f} eventos/tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_service_orchestrator.py
+"""
+Compara la detención secuencial (un servicio tras otro, como el antiguo manage_services)
+con la detención concurrente del ServiceOrchestrator, sobre un SCM simulado.
+Se puede ejecutar en cualquier sistema operativo:
+
+    python -m benchmarks.bench_service_orchestrator
+"""
+
+import random
+import time
+
+from core.service_orchestrator import FakeServiceControlManager, ServiceOrchestrator
+
+
+def build_services(count=12, seed=7):
+    """Genera servicios con retardos de detención entre 0.2 y 0.8 s y algunas dependencias."""
+    rng = random.Random(seed)
+    services = {}
+    for i in range(count):
+        dependencies = set()
+        if i >= 3 and rng.random() < 0.4:
+            dependencies.add(f"svc{rng.randrange(0, i)}")
+        services[f"svc{i}"] = {
+            'start_type': rng.choice(['automatic', 'manual']),
+            'status': 'running',
+            'dependencies': dependencies,
+            'stop_delay': rng.uniform(0.2, 0.8),
+        }
+    return services
+
+
+def run(max_workers, services):
+    scm = FakeServiceControlManager(services)
+    orchestrator = ServiceOrchestrator(scm, lambda message: None, max_workers=max_workers, poll_interval=0.02)
+    original = {name: scm.start_type(name) for name in services}
+
+    start = time.perf_counter()
+    report = orchestrator.stop_and_disable(list(services))
+    stop_seconds = time.perf_counter() - start
+
+    assert all(r['outcome'] == 'stopped' for r in report), report
+    orchestrator.restore_start_types(original)
+    assert all(scm.start_type(name) == start_type for name, start_type in original.items())
+    return stop_seconds, report
+
+
+def main():
+    services = build_services()
+    sequential, _ = run(1, services)
+    concurrent, report = run(4, services)
+
+    print(f"Servicios: {len(services)}")
+    print(f"Secuencial (1 hilo):   {sequential:.2f} s")
+    print(f"Concurrente (4 hilos): {concurrent:.2f} s  (x{sequential / concurrent:.1f})")
+    for result in sorted(report, key=lambda r: r['service']):
+        print(f"  {result['service']:<6} {result['outcome']:<8} {result['seconds']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
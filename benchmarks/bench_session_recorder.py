@@ -0,0 +1,69 @@
+# benchmarks/bench_session_recorder.py
+"""
+Graba una sesión sintética de varias horas (una muestra por segundo, con una GPU y
+sondas de latencia) y mide el tamaño en disco, lo que cuesta abrirla y lo que cuesta
+saltar a un punto cualquiera o recorrer una columna entera:
+
+    python -m benchmarks.bench_session_recorder [horas]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+from core.session_recorder import SessionRecorder, SessionReader
+
+
+def make_sample(tick):
+    return {
+        'timestamp': 1_700_000_000 + tick,
+        'cpu_usage': random.uniform(20, 90), 'ram_usage': 60 + random.uniform(-1, 1),
+        'gpu_usage': random.uniform(60, 99), 'gpu_temp': random.randint(60, 80),
+        'disk_read_bps': random.uniform(0, 5e7), 'disk_write_bps': random.uniform(0, 1e7),
+        'net_recv_bps': random.uniform(0, 2e6), 'net_sent_bps': random.uniform(0, 5e5),
+        'gpus': [{'index': 0, 'name': "GPU sintética", 'usage': random.uniform(60, 99),
+                  'memory_usage': 40, 'temperature': random.randint(60, 80),
+                  'graphics_clock_mhz': 1800, 'memory_clock_mhz': 7000, 'power_watts': random.uniform(150, 250),
+                  'power_limit_watts': 300, 'vram_used_bytes': 6e9, 'vram_total_bytes': 8e9,
+                  'pcie_tx_bps': 1e8, 'pcie_rx_bps': 2e8, 'throttle_mask': random.choice((0, 0, 0, 0x20))}],
+    }
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    ticks = int(hours * 3600)
+    random.seed(1)
+    session_dir = os.path.join(tempfile.mkdtemp(), "session")
+
+    recorder = SessionRecorder(session_dir, meta={'gpu_brand': "NVIDIA"})
+    recorder.start()
+    start = time.perf_counter()
+    for tick in range(ticks):
+        sample = make_sample(tick)
+        recorder.record_sample(sample)
+        if tick % 5 == 0:
+            recorder.record_latency("Servidor sintético", random.uniform(10, 40), timestamp=sample['timestamp'])
+    recorder.stop()
+    write_us = (time.perf_counter() - start) / ticks * 1e6
+    size = sum(os.path.getsize(os.path.join(session_dir, name)) for name in os.listdir(session_dir))
+    print(f"{hours:g} h ({ticks} muestras): {size / 1024**2:.2f} MB en disco, {write_us:.1f} µs por muestra grabada")
+
+    start = time.perf_counter()
+    reader = SessionReader(session_dir)
+    print(f"Abrir la sesión: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        reader.sample(random.randrange(len(reader)))
+    print(f"Saltar a una muestra al azar: {(time.perf_counter() - start) * 1000:.3f} µs de media")
+
+    start = time.perf_counter()
+    peak = int(reader.ticks['cpu_usage'].argmax())
+    events = reader.events_between(reader.ticks['timestamp'][peak] - 30, reader.ticks['timestamp'][peak])
+    print(f"Pico de CPU y sus eventos de los 30 s previos ({len(events)}): {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_speed_test_runs.py
+"""
+Ejecuta el modo de varios tests de SpeedTestWorker contra el CLI simulado
+(utils/fake_speedtest.py), que reproduce una grabación jsonl, y muestra el resumen de
+cada modo de selección de servidor:
+
+    python -m benchmarks.bench_speed_test_runs [grabacion.jsonl] [tests]
+"""
+
+import os
+import sys
+import tempfile
+
+from PyQt6.QtCore import QCoreApplication
+
+from core.speed_test_worker import SpeedTestServerCache, SpeedTestWorker
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_mode(app, mode, runs, cli_command, cache):
+    worker = SpeedTestWorker(runs=runs, server_mode=mode, cli_command=cli_command, server_cache=cache)
+    outcome = {}
+    worker.runs_finished.connect(lambda summary: outcome.update(summary))
+    worker.test_error.connect(lambda message: outcome.update(error=message))
+    worker.finished.connect(app.quit)
+    worker.start()
+    app.exec()
+    worker.wait()
+    return outcome
+
+
+def main():
+    recording = sys.argv[1] if len(sys.argv) > 1 else os.path.join(HERE, "data", "speedtest_sample.jsonl")
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    os.environ.setdefault('APPDATA', tempfile.mkdtemp())
+    app = QCoreApplication(sys.argv)
+    cli_command = [sys.executable, os.path.join(HERE, "..", "utils", "fake_speedtest.py"), "--replay", recording]
+    cache = SpeedTestServerCache(app_name="VelocityOS-bench")
+
+    for mode in SpeedTestWorker.SERVER_MODES:
+        summary = run_mode(app, mode, runs, cli_command, cache)
+        if 'error' in summary:
+            print(f"{mode}: error: {summary['error']}")
+            continue
+        print(f"Modo '{mode}': {summary['runs']} tests en {sorted(set(summary['servers']))}")
+        for name, stats in summary['metrics'].items():
+            print(f"  {name:<16} mediana {stats['median']:8.2f}  IQR {stats['iqr']:7.2f}  peor {stats['worst']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
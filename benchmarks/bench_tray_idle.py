@@ -0,0 +1,77 @@
+# benchmarks/bench_tray_idle.py
+"""
+Mide el consumo del modo bandeja con la plataforma 'offscreen' de Qt: memoria y CPU en
+reposo tras arrancar, coste de construir la ventana al abrirla y memoria que queda tras
+cerrarla. Compara los valores con los objetivos de AppSettings ('tray'):
+
+    python -m benchmarks.bench_tray_idle [segundos_de_reposo]
+
+La ventana importa el backend de Windows (winreg, WMI): fuera de Windows solo se mide el
+reposo en la bandeja y las fases de la ventana se omiten.
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import psutil
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QEventLoop, QTimer
+
+from gui.tray import TrayController
+
+
+def idle(app, seconds):
+    """Deja correr el bucle de eventos sin hacer nada y devuelve el % de CPU del proceso."""
+    process = psutil.Process()
+    process.cpu_percent(None)
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+    return process.cpu_percent(None)
+
+
+def main():
+    idle_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+
+    start = time.perf_counter()
+    tray = TrayController()
+    tray.start()
+    startup_seconds = time.perf_counter() - start
+    tray_cpu = idle(app, idle_seconds)
+    tray_rss = tray.idle_usage()[0]
+
+    settings = tray.tray_settings
+    rss_target = settings.get('idle_rss_mb_target', 80)
+    cpu_target = settings.get('idle_cpu_percent_target', 0.5)
+    print(f"Arranque en bandeja:     {startup_seconds * 1000:.0f} ms")
+    print(f"Reposo en bandeja:       {tray_rss:.1f} MB, CPU {tray_cpu:.2f} %  (objetivo {rss_target} MB / {cpu_target} %)")
+    ok = tray_rss <= rss_target and tray_cpu <= cpu_target
+
+    if sys.platform == "win32":
+        start = time.perf_counter()
+        tray.open_window()
+        app.processEvents()
+        open_seconds = time.perf_counter() - start
+        window_rss = tray.idle_usage()[0]
+
+        tray.window.close()
+        app.processEvents()
+        closed_cpu = idle(app, idle_seconds)
+        closed_rss = tray.idle_usage()[0]
+        print(f"Abrir la ventana:        {open_seconds * 1000:.0f} ms, {window_rss:.1f} MB")
+        print(f"Reposo tras cerrarla:    {closed_rss:.1f} MB, CPU {closed_cpu:.2f} %")
+        ok = ok and closed_cpu <= cpu_target
+    else:
+        print("Abrir la ventana:        omitido (solo en Windows).")
+    print("Dentro del objetivo." if ok else "FUERA DEL OBJETIVO.")
+    tray.quit()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
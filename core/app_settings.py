@@ -0,0 +1,86 @@
+# core/app_settings.py
+import copy
+import json
+import os
+import logging
+
+class AppSettings:
+    """
+    Gestiona los ajustes propios de la aplicación (exportador de métricas, umbrales, etc.).
+    A diferencia de StateManager, aquí no se guarda estado del sistema que haya que revertir.
+    """
+
+    DEFAULTS = {
+        "metrics_exporter": {
+            "enabled": False,
+            "host": "127.0.0.1",
+            "port": 9435
+        },
+        "gpu_telemetry": {
+            "slow_interval_seconds": 5.0
+        },
+        "memory_growth": {
+            "enabled": True,
+            "interval_seconds": 10,
+            "window_samples": 360,
+            "slope_mb_per_hour": 50,
+            "min_growth_mb": 25
+        },
+        "tracing": {
+            "enabled": False
+        },
+        "tray": {
+            "background_monitoring": False,
+            "idle_check_seconds": 60,
+            "idle_rss_mb_target": 80,
+            "idle_cpu_percent_target": 0.5
+        },
+        "speed_test": {
+            "runs": 1,
+            "server_mode": "auto",
+            "top_k": 3,
+            "server_cache_hours": 24,
+            "cli_command": None
+        },
+        "session_recording": {
+            "flush_every_samples": 30
+        }
+    }
+
+    def __init__(self, app_name="VelocityOS"):
+        self.settings_dir = os.path.join(os.getenv('APPDATA'), app_name)
+        self.settings_file = os.path.join(self.settings_dir, 'settings.json')
+        os.makedirs(self.settings_dir, exist_ok=True)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.settings = self._load_settings()
+
+    def _load_settings(self):
+        """Carga los ajustes desde disco y completa las claves que falten con los valores por defecto."""
+        settings = copy.deepcopy(self.DEFAULTS)
+        if os.path.exists(self.settings_file):
+            try:
+                with open(self.settings_file, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                for key, value in stored.items():
+                    if isinstance(value, dict) and isinstance(settings.get(key), dict):
+                        settings[key].update(value)
+                    else:
+                        settings[key] = value
+            except (json.JSONDecodeError, IOError) as e:
+                self.logger.error(f"No se pudo cargar el archivo de ajustes: {e}")
+        return settings
+
+    def get(self, key, default=None):
+        """Obtiene un ajuste. Los diccionarios se devuelven como copia para evitar modificaciones accidentales."""
+        value = self.settings.get(key, default)
+        return copy.deepcopy(value) if isinstance(value, dict) else value
+
+    def set(self, key, value):
+        """Guarda un ajuste y lo persiste inmediatamente."""
+        self.settings[key] = value
+        try:
+            with open(self.settings_file, 'w', encoding='utf-8') as f:
+                json.dump(self.settings, f, indent=4, ensure_ascii=False)
+            self.logger.info(f"Ajuste guardado: {key} = {value}")
+        except IOError as e:
+            self.logger.error(f"No se pudo guardar el archivo de ajustes: {e}")
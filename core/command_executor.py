@@ -0,0 +1,134 @@
+# core/command_executor.py
+
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .tracing import tracer
+from .command_host import CommandHost, CommandHostError, CommandResult, CommandTimeout, detect_console_encoding
+
+
+class CommandExecutor:
+    """
+    Capa asíncrona para todos los comandos externos de core/.
+
+    Los comandos se ejecutan en un grupo de CommandHost persistentes (uno por cada comando
+    simultáneo permitido), coordinados desde un bucle asyncio propio que corre en un hilo
+    de fondo. Así cada comando tiene tiempo máximo y se puede cancelar, varios comandos
+    independientes pueden lanzarse juntos, y ninguna llamada bloquea el hilo de la GUI más
+    de lo que dure su propio timeout.
+
+    Desde código síncrono (los optimizadores) se usan run_sync() y run_group(); desde
+    corrutinas, run() y gather().
+    """
+
+    def __init__(self, max_concurrency=4, default_timeout=30.0, encoding=None):
+        """
+        Args:
+            max_concurrency (int): Número máximo de comandos ejecutándose a la vez.
+            default_timeout (float): Segundos por comando si no se indica otro.
+            encoding (str | None): Codificación de la salida. Por defecto la página de códigos de la consola.
+        """
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.encoding = encoding or detect_console_encoding()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._idle_hosts = [CommandHost(encoding=self.encoding, watchdog_timeout=default_timeout)
+                            for _ in range(max_concurrency)]
+        # Fila de cada intérprete en las trazas: los comandos en paralelo se ven uno junto a otro.
+        self._host_lanes = {id(host): f"CommandHost {index}" for index, host in enumerate(self._idle_hosts)}
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="CommandExecutor")
+        self._loop = None
+        self._loop_thread = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Bucle de eventos
+    # ------------------------------------------------------------------
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="CommandExecutorLoop", daemon=True)
+                self._loop_thread.start()
+                self._semaphore = asyncio.run_coroutine_threadsafe(self._create_semaphore(), self._loop).result()
+        return self._loop
+
+    async def _create_semaphore(self):
+        return asyncio.Semaphore(self.max_concurrency)
+
+    def close(self):
+        """Detiene el bucle y cierra los intérpretes."""
+        with self._start_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join(timeout=2)
+                self._loop.close()
+                self._loop = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="CommandExecutor")
+        for host in self._idle_hosts:
+            host.close()
+
+    # ------------------------------------------------------------------
+    # API asíncrona
+    # ------------------------------------------------------------------
+    async def run(self, command, timeout=None):
+        """
+        Ejecuta un comando y devuelve un CommandResult. Un timeout no lanza excepción:
+        el resultado llega con timed_out=True y exit_code=None.
+        """
+        timeout = timeout or self.default_timeout
+        async with self._semaphore:
+            host = self._idle_hosts.pop()
+            start = time.perf_counter()
+            start_ns, result = time.perf_counter_ns(), None
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(self._pool, host.run, command, timeout)
+                return result
+            except CommandTimeout:
+                result = CommandResult(command, "", "", None, time.perf_counter() - start, timed_out=True)
+                return result
+            except CommandHostError as e:
+                result = CommandResult(command, "", str(e), None, time.perf_counter() - start)
+                return result
+            except asyncio.CancelledError:
+                # El hilo sigue bloqueado en host.run(): matar el intérprete lo libera.
+                host.abort()
+                raise
+            finally:
+                self._idle_hosts.append(host)
+                if tracer.enabled:
+                    self._trace(command, host, start_ns, result)
+
+    def _trace(self, command, host, start_ns, result):
+        if result is None:
+            outcome, exit_code = "cancelled", None
+        else:
+            outcome = "timeout" if result.timed_out else ("ok" if result.ok else "error")
+            exit_code = result.exit_code
+        tracer.record("command", "command", start_ns, time.perf_counter_ns(), outcome,
+                      lane=self._host_lanes.get(id(host)), command=command[:200], exit_code=exit_code)
+
+    async def gather(self, commands, timeout=None):
+        """Lanza varios comandos independientes a la vez y devuelve sus resultados en el mismo orden."""
+        return await asyncio.gather(*(self.run(command, timeout) for command in commands))
+
+    # ------------------------------------------------------------------
+    # API síncrona
+    # ------------------------------------------------------------------
+    def submit(self, command, timeout=None):
+        """Programa un comando y devuelve un concurrent.futures.Future (admite cancel())."""
+        return asyncio.run_coroutine_threadsafe(self.run(command, timeout), self._ensure_loop())
+
+    def run_sync(self, command, timeout=None):
+        return self.submit(command, timeout).result()
+
+    def run_group(self, commands, timeout=None):
+        """Ejecuta un grupo de comandos independientes en paralelo y espera a todos."""
+        if not commands:
+            return []
+        return asyncio.run_coroutine_threadsafe(self.gather(commands, timeout), self._ensure_loop()).result()
@@ -0,0 +1,233 @@
+# core/command_host.py
+
+import ctypes
+import locale
+import queue
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import logging
+
+import psutil
+
+
+def detect_console_encoding():
+    """
+    Codificación con la que escriben las herramientas de consola (powercfg, sc...).
+    En Windows es la página de códigos de la consola (o la OEM si el proceso no tiene
+    consola, como la GUI), no la ANSI que devuelve locale: cp850 en español, cp437 en inglés...
+    """
+    if sys.platform == "win32":
+        try:
+            kernel32 = ctypes.windll.kernel32
+            code_page = kernel32.GetConsoleOutputCP() or kernel32.GetOEMCP()
+            if code_page:
+                return f"cp{code_page}" if code_page != 65001 else "utf-8"
+        except (AttributeError, OSError):
+            pass
+        return "cp850"
+    return locale.getpreferredencoding(False) or "utf-8"
+
+
+class CommandHostError(RuntimeError):
+    """El intérprete persistente no arrancó o dejó de responder."""
+
+
+class CommandTimeout(CommandHostError):
+    """El comando superó su tiempo máximo; el intérprete se reinicia."""
+
+
+class CommandResult:
+    """Resultado enmarcado de un comando ejecutado en el CommandHost."""
+
+    def __init__(self, command, stdout, stderr, exit_code, duration, timed_out=False):
+        self.command = command
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+        self.duration = duration
+        self.timed_out = timed_out
+
+    @property
+    def ok(self):
+        return self.exit_code == 0
+
+
+class CommandHost:
+    """
+    Un único intérprete de larga duración (cmd.exe en Windows, bash en el resto) al que se
+    le envían los comandos por stdin, en vez de lanzar un proceso nuevo por cada llamada.
+
+    Cada comando va seguido de un marcador único en stdout (con el código de salida) y otro
+    en stderr; así se separa la salida de cada comando. Si un comando no termina dentro del
+    tiempo del watchdog, el intérprete se mata y se arranca uno nuevo en la siguiente llamada.
+
+    Los comandos no deben ser interactivos: leerían de la misma tubería que los comandos.
+    """
+
+    def __init__(self, shell=None, encoding=None, watchdog_timeout=60.0):
+        """
+        Args:
+            shell (list[str] | None): Línea de arranque del intérprete. Por defecto cmd.exe o bash.
+            encoding (str | None): Codificación de la salida. Por defecto la de la consola.
+            watchdog_timeout (float): Segundos máximos por comando antes de reiniciar el intérprete.
+        """
+        self.is_windows = sys.platform == "win32"
+        # Sin expansión retardada (/V:ON): destrozaría cualquier '!' de los comandos reenviados.
+        self.shell = shell or (["cmd.exe", "/Q", "/K"] if self.is_windows else ["bash", "--noprofile", "--norc"])
+        self.encoding = encoding or detect_console_encoding()
+        self.watchdog_timeout = watchdog_timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.lock = threading.Lock()
+        self.process = None
+        self.restarts = 0
+        self._token = uuid.uuid4().hex
+        self._counter = 0
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    def _start(self):
+        creationflags = subprocess.CREATE_NO_WINDOW if self.is_windows else 0
+        try:
+            self.process = subprocess.Popen(
+                self.shell, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                creationflags=creationflags,
+            )
+        except OSError as e:
+            self.process = None
+            raise CommandHostError(f"No se pudo iniciar el intérprete {self.shell[0]}: {e}") from e
+
+        self._stdout_lines = queue.Queue()
+        self._stderr_lines = queue.Queue()
+        for stream, target in ((self.process.stdout, self._stdout_lines), (self.process.stderr, self._stderr_lines)):
+            threading.Thread(target=self._pump, args=(stream, target), daemon=True).start()
+
+        # Sincronización inicial: descarta el banner o cualquier salida previa al primer marcador.
+        self._execute("echo ready")
+
+    def _pump(self, stream, target):
+        for line in iter(stream.readline, b''):
+            target.put(line.decode(self.encoding, errors='replace'))
+        target.put(None) # El intérprete terminó.
+
+    def _kill(self):
+        if self.process is None:
+            return
+        self._kill_tree(self.process)
+        try:
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        self.process = None
+
+    def _kill_tree(self, process):
+        """Mata el intérprete y sus hijos (p. ej. un 'sc.exe' colgado, que sobreviviría a cmd.exe)."""
+        try:
+            children = psutil.Process(process.pid).children(recursive=True)
+        except psutil.Error:
+            children = []
+        for child in children:
+            try:
+                child.kill()
+            except psutil.Error:
+                pass
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+    def abort(self):
+        """
+        Interrumpe el comando en curso desde otro hilo (cancelación). La llamada bloqueada en
+        run() termina con CommandHostError y el intérprete se reinicia en la siguiente.
+        """
+        process = self.process
+        if process is not None and process.poll() is None:
+            self._kill_tree(process)
+
+    def close(self):
+        """Cierra el intérprete. Se volverá a arrancar si se ejecuta otro comando."""
+        with self.lock:
+            if self.process is not None:
+                try:
+                    self.process.stdin.write(b"exit\n")
+                    self.process.stdin.flush()
+                    self.process.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+                self._kill()
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+    def run(self, command, timeout=None):
+        """
+        Ejecuta un comando en el intérprete persistente.
+
+        Raises:
+            CommandTimeout: El comando superó 'timeout' (o el watchdog); el intérprete se
+                reinicia en la siguiente llamada.
+            CommandHostError: El intérprete no arrancó o terminó durante el comando.
+        """
+        if "\n" in command or "\r" in command:
+            raise ValueError("El CommandHost solo acepta comandos de una línea.")
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                if self.process is not None:
+                    self.restarts += 1
+                    self.logger.warning("El intérprete de comandos terminó inesperadamente. Reiniciando.")
+                self._start()
+            return self._execute(command, timeout)
+
+    def _frame(self, command, marker):
+        if self.is_windows:
+            # 'echo.' garantiza que el marcador empiece en una línea nueva. El código de salida se
+            # lee con 'call' y %^errorlevel%: el primer análisis solo quita el '^' y 'call' expande
+            # la variable al ejecutarse, después del comando (un %errorlevel% normal se expandiría
+            # al leer la línea, antes de ejecutarla).
+            return (f"{command} & echo. & call echo {marker}:%^errorlevel% "
+                    f"& echo. 1>&2 & echo {marker} 1>&2\n")
+        # Subshell: un 'exit' o un 'cd' del comando no afecta al intérprete persistente.
+        return (f"( {command}\n) </dev/null; __vos_rc=$?; "
+                f"printf '\\n{marker}:%d\\n' $__vos_rc; printf '\\n{marker}\\n' >&2\n")
+
+    def _execute(self, command, timeout=None):
+        self._counter += 1
+        marker = f"__VOS_{self._token}_{self._counter}__"
+        deadline = time.monotonic() + (timeout or self.watchdog_timeout)
+        start = time.perf_counter()
+        try:
+            self.process.stdin.write(self._frame(command, marker).encode(self.encoding, errors='replace'))
+            self.process.stdin.flush()
+        except OSError as e:
+            self._kill()
+            raise CommandHostError(f"No se pudo enviar el comando al intérprete: {e}") from e
+
+        stdout, exit_code = self._read_until(self._stdout_lines, marker, deadline, command)
+        stderr, _ = self._read_until(self._stderr_lines, marker, deadline, command)
+        return CommandResult(command, stdout, stderr, exit_code, time.perf_counter() - start)
+
+    def _read_until(self, lines, marker, deadline, command):
+        collected = []
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                line = lines.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                # Watchdog: el comando (o el intérprete) está colgado.
+                self.restarts += 1
+                self._kill()
+                raise CommandTimeout(f"El comando '{command}' no terminó a tiempo; se reinicia el intérprete.")
+            if line is None:
+                self._kill()
+                raise CommandHostError(f"El intérprete terminó mientras ejecutaba '{command}'.")
+            stripped = line.strip()
+            if stripped.startswith(marker):
+                exit_code = None
+                if stripped.startswith(marker + ":"):
+                    exit_code = int(stripped[len(marker) + 1:] or 0)
+                return "".join(collected).rstrip("\r\n"), exit_code
+            collected.append(line)
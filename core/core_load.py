@@ -0,0 +1,177 @@
+# core/core_load.py
+
+import os
+import time
+import logging
+
+import numpy as np
+import psutil
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+def find_saturated_episodes(timestamps, loads, threshold=95.0, min_samples=5, max_average=50.0):
+    """
+    Busca, de forma vectorizada, los tramos en los que un núcleo estuvo saturado.
+
+    Args:
+        timestamps (np.ndarray): (T,) momento de cada muestra.
+        loads (np.ndarray): (T, núcleos) carga de cada núcleo en %.
+        threshold (float): Carga a partir de la cual un núcleo está saturado.
+        min_samples (int): Muestras seguidas necesarias para contar un episodio.
+        max_average (float): Si la carga media de todos los núcleos durante el episodio no
+            la supera, el episodio es un cuello de botella de un solo hilo.
+
+    Returns:
+        list[dict]: {'core', 'start', 'end', 'seconds', 'samples', 'core_load', 'average_load',
+            'single_thread', 'ongoing'}, del más largo al más corto.
+    """
+    if loads.size == 0:
+        return []
+    saturated = loads >= threshold
+    # Un borde de subida (+1) abre un episodio y uno de bajada (-1) lo cierra; se recorre
+    # núcleo a núcleo (traspuesta) para que inicios y finales salgan emparejados.
+    padded = np.zeros((loads.shape[1], loads.shape[0] + 2), dtype=np.int8)
+    padded[:, 1:-1] = saturated.T
+    edges = np.diff(padded, axis=1)
+    start_cores, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    lengths = ends - starts
+    keep = lengths >= min_samples
+    start_cores, starts, ends, lengths = start_cores[keep], starts[keep], ends[keep], lengths[keep]
+    if not len(starts):
+        return []
+
+    # Medias por episodio con sumas acumuladas: sin bucles sobre las muestras.
+    average = np.concatenate(([0.0], np.cumsum(loads.mean(axis=1))))
+    core_sums = np.vstack((np.zeros((1, loads.shape[1])), np.cumsum(loads, axis=0)))
+    average_load = (average[ends] - average[starts]) / lengths
+    core_load = (core_sums[ends, start_cores] - core_sums[starts, start_cores]) / lengths
+
+    episodes = [{
+        'core': int(core),
+        'start': float(timestamps[start]),
+        'end': float(timestamps[end - 1]),
+        'seconds': float(timestamps[end - 1] - timestamps[start]),
+        'samples': int(length),
+        'core_load': float(load),
+        'average_load': float(avg),
+        'single_thread': bool(avg <= max_average),
+        'ongoing': bool(end == loads.shape[0]),
+    } for core, start, end, length, load, avg in zip(start_cores, starts, ends, lengths, core_load, average_load)]
+    return sorted(episodes, key=lambda episode: episode['samples'], reverse=True)
+
+
+class CoreLoadHistory:
+    """Historial circular (T x núcleos) de la carga de cada CPU lógica."""
+
+    def __init__(self, cores, capacity=600):
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.loads = np.zeros((capacity, cores), dtype=np.float32)
+        self.head = 0
+        self.count = 0
+
+    @property
+    def cores(self):
+        return self.loads.shape[1]
+
+    def append(self, timestamp, loads):
+        self.timestamps[self.head] = timestamp
+        self.loads[self.head] = loads
+        self.head = (self.head + 1) % len(self.timestamps)
+        self.count = min(self.count + 1, len(self.timestamps))
+
+    def ordered(self):
+        """(timestamps, cargas) en orden cronológico (copias)."""
+        if self.count < len(self.timestamps):
+            return self.timestamps[:self.count].copy(), self.loads[:self.count].copy()
+        return np.roll(self.timestamps, -self.head), np.roll(self.loads, -self.head, axis=0)
+
+    def episodes(self, **kwargs):
+        """Episodios de saturación de todo el historial (ver find_saturated_episodes)."""
+        timestamps, loads = self.ordered()
+        return find_saturated_episodes(timestamps, loads.astype(np.float64), **kwargs)
+
+
+class ThreadCpuSampler:
+    """
+    Atribuye la carga de CPU a hilos concretos: mide el tiempo de CPU (usuario + sistema)
+    de cada hilo de los procesos que más consumen en un intervalo corto. Un hilo cerca del
+    100 % de un núcleo es el candidato a cuello de botella de un solo hilo.
+    """
+
+    def __init__(self, top_processes=5):
+        self.top_processes = top_processes
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _busiest_processes(self, interval):
+        own_pid = os.getpid()
+        processes = []
+        for proc in psutil.process_iter(['pid', 'name']):
+            if proc.info['pid'] in (0, own_pid):
+                continue
+            try:
+                proc.cpu_percent(None) # Primera lectura: fija la referencia.
+                processes.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        time.sleep(interval)
+        usage = []
+        for proc in processes:
+            try:
+                usage.append((proc.cpu_percent(None), proc))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        usage.sort(key=lambda item: item[0], reverse=True)
+        return [proc for percent, proc in usage[:self.top_processes] if percent > 0]
+
+    def _thread_times(self, processes):
+        times = {}
+        for proc in processes:
+            try:
+                name = proc.name()
+                for thread in proc.threads():
+                    times[(proc.pid, thread.id)] = (name, thread.user_time + thread.system_time)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return times
+
+    def sample(self, interval=1.0, limit=5):
+        """
+        Returns:
+            list[dict]: {'pid', 'name', 'tid', 'core_percent'} de los hilos que más CPU
+                consumieron (core_percent = % de un núcleo), del que más al que menos.
+        """
+        processes = self._busiest_processes(interval)
+        before, start = self._thread_times(processes), time.monotonic()
+        time.sleep(interval)
+        after, elapsed = self._thread_times(processes), time.monotonic() - start
+        threads = []
+        for (pid, tid), (name, cpu_time) in after.items():
+            if (pid, tid) in before:
+                percent = (cpu_time - before[(pid, tid)][1]) / elapsed * 100
+                if percent < 1:
+                    continue
+                threads.append({'pid': pid, 'name': name, 'tid': tid, 'core_percent': percent})
+        threads.sort(key=lambda thread: thread['core_percent'], reverse=True)
+        return threads[:limit]
+
+
+class ThreadAttributionWorker(QThread):
+    """Mide los hilos más activos en segundo plano y devuelve el episodio con su atribución."""
+
+    threads_ready = pyqtSignal(dict)
+
+    def __init__(self, episode, sampler=None, interval=1.0, parent=None):
+        super().__init__(parent)
+        self.episode = episode
+        self.sampler = sampler or ThreadCpuSampler()
+        self.interval = interval
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def run(self):
+        try:
+            threads = self.sampler.sample(self.interval)
+        except Exception as e:
+            self.logger.error(f"No se pudo medir la CPU por hilo: {e}", exc_info=True)
+            threads = []
+        self.threads_ready.emit(dict(self.episode, threads=threads))
@@ -1,50 +1,30 @@
 # core/gpu_optimizer.py
 
-import wmi
+from .hardware_inventory import HardwareInventory
 
 class GpuOptimizer:
-    def __init__(self, console_logger):
+    def __init__(self, console_logger, inventory=None):
         """
         Inicializa el optimizador de GPU.
 
         Args:
             console_logger (function): Una función callback para imprimir mensajes en la GUI.
+            inventory (HardwareInventory | None): Inventario de hardware compartido.
         """
         self.log = console_logger
-        try:
-            self.wmi_connection = wmi.WMI()
-        except wmi.x_wmi as e:
-            self.log(f"[ERROR] No se pudo inicializar WMI. La detección de GPU no funcionará: {e}")
-            self.wmi_connection = None
+        self.inventory = inventory or HardwareInventory(console_logger)
 
     def detect_gpu(self):
         """
-        Detecta la marca de la GPU principal (NVIDIA o AMD) usando WMI.
-        Devuelve 'NVIDIA', 'AMD', o 'UNKNOWN'.
+        Detecta la marca de la GPU principal (NVIDIA o AMD) a partir del inventario de hardware,
+        sin volver a consultar WMI. Devuelve 'NVIDIA', 'AMD', o 'UNKNOWN'.
         """
-        if not self.wmi_connection:
-            self.log("[WARN] Conexión WMI no disponible. Saltando detección de GPU.")
-            return "UNKNOWN"
-            
-        try:
-            # Consultamos todos los controladores de video del sistema
-            for video_controller in self.wmi_connection.Win32_VideoController():
-                # El nombre del adaptador suele contener la marca
-                adapter_name = video_controller.Name.upper()
-                if "NVIDIA" in adapter_name:
-                    self.log("[INFO] GPU NVIDIA detectada.")
-                    return "NVIDIA"
-                if "AMD" in adapter_name or "RADEON" in adapter_name:
-                    self.log("[INFO] GPU AMD detectada.")
-                    return "AMD"
-                if "INTEL" in adapter_name:
-                    # Podríamos añadir soporte para Intel en el futuro, por ahora lo ignoramos
-                    continue
-        except Exception as e:
-            self.log(f"[ERROR] No se pudo detectar la GPU a través de WMI: {e}")
-        
-        self.log("[WARN] No se detectó una GPU NVIDIA o AMD principal.")
-        return "UNKNOWN"
+        brand = self.inventory.primary_gpu_brand()
+        if brand == "UNKNOWN":
+            self.log("[WARN] No se detectó una GPU NVIDIA o AMD principal.")
+        else:
+            self.log(f"[INFO] GPU {brand} detectada.")
+        return brand
 
     def get_recommendations(self, gpu_brand):
         """
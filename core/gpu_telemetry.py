@@ -0,0 +1,250 @@
+# core/gpu_telemetry.py
+
+import time
+import logging
+
+try:
+    import pynvml
+    PYNVML_AVAILABLE = True
+except ImportError:
+    PYNVML_AVAILABLE = False
+
+
+# Bits de nvmlDeviceGetCurrentClocksThrottleReasons -> (identificador, descripción).
+THROTTLE_REASONS = {
+    0x0001: ("gpu_idle", "GPU en reposo"),
+    0x0002: ("applications_clocks", "Relojes fijados por la aplicación"),
+    0x0004: ("sw_power_cap", "Límite de potencia (software)"),
+    0x0008: ("hw_slowdown", "Ralentización por hardware"),
+    0x0010: ("sync_boost", "Sync Boost"),
+    0x0020: ("sw_thermal", "Límite térmico (software)"),
+    0x0040: ("hw_thermal", "Límite térmico (hardware)"),
+    0x0080: ("hw_power_brake", "Freno de potencia (hardware)"),
+    0x0100: ("display_clocks", "Relojes fijados por la pantalla"),
+}
+
+
+def decode_throttle_reasons(mask, include_idle=False):
+    """Convierte la máscara de NVML en la lista de identificadores activos."""
+    if not mask:
+        return []
+    return [name for bit, (name, _) in THROTTLE_REASONS.items()
+            if mask & bit and (include_idle or name != "gpu_idle")]
+
+
+def describe_throttle_reasons(reasons):
+    labels = {name: label for name, label in THROTTLE_REASONS.values()}
+    return ", ".join(labels.get(reason, reason) for reason in reasons)
+
+
+class MetricNotSupported(Exception):
+    """La GPU o el driver no ofrecen esta métrica; no se vuelve a consultar."""
+
+
+class NvmlProvider:
+    """
+    Acceso mínimo a NVML. GpuTelemetryCollector solo habla con esta interfaz, de modo que
+    se puede sustituir por FakeNvmlProvider en pruebas o en equipos sin GPU NVIDIA.
+    Las unidades ya vienen normalizadas: MHz, W, bytes y bytes/s.
+    """
+
+    brand = "NVIDIA"
+
+    def __init__(self):
+        self._handles = []
+
+    def init(self):
+        pynvml.nvmlInit()
+        try:
+            self._handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+        except Exception:
+            pynvml.nvmlShutdown()
+            raise
+        return len(self._handles)
+
+    def shutdown(self):
+        pynvml.nvmlShutdown()
+
+    def _call(self, function, *args):
+        try:
+            return function(*args)
+        except pynvml.NVMLError_NotSupported as e:
+            raise MetricNotSupported(str(e)) from e
+
+    def name(self, index):
+        name = self._call(pynvml.nvmlDeviceGetName, self._handles[index])
+        return name.decode() if isinstance(name, bytes) else name
+
+    def utilization(self, index):
+        rates = self._call(pynvml.nvmlDeviceGetUtilizationRates, self._handles[index])
+        return rates.gpu, rates.memory
+
+    def temperature(self, index):
+        return self._call(pynvml.nvmlDeviceGetTemperature, self._handles[index], pynvml.NVML_TEMPERATURE_GPU)
+
+    def clocks(self, index):
+        handle = self._handles[index]
+        return (self._call(pynvml.nvmlDeviceGetClockInfo, handle, pynvml.NVML_CLOCK_GRAPHICS),
+                self._call(pynvml.nvmlDeviceGetClockInfo, handle, pynvml.NVML_CLOCK_MEM))
+
+    def power_usage(self, index):
+        return self._call(pynvml.nvmlDeviceGetPowerUsage, self._handles[index]) / 1000
+
+    def power_limit(self, index):
+        return self._call(pynvml.nvmlDeviceGetEnforcedPowerLimit, self._handles[index]) / 1000
+
+    def throttle_reasons(self, index):
+        return self._call(pynvml.nvmlDeviceGetCurrentClocksThrottleReasons, self._handles[index])
+
+    def memory(self, index):
+        info = self._call(pynvml.nvmlDeviceGetMemoryInfo, self._handles[index])
+        return info.used, info.total
+
+    def pcie_throughput(self, index):
+        # Cada contador bloquea ~20 ms en el driver: por eso va en la cadencia lenta.
+        handle = self._handles[index]
+        tx = self._call(pynvml.nvmlDeviceGetPcieThroughput, handle, pynvml.NVML_PCIE_UTIL_TX_BYTES)
+        rx = self._call(pynvml.nvmlDeviceGetPcieThroughput, handle, pynvml.NVML_PCIE_UTIL_RX_BYTES)
+        return tx * 1024, rx * 1024 # NVML informa en KB/s.
+
+
+class FakeNvmlProvider:
+    """
+    Proveedor simulado con los mismos métodos que NvmlProvider. Cada GPU es un diccionario
+    con los valores a devolver; una clave ausente se comporta como métrica no soportada.
+    Cuenta las llamadas para poder comprobar las cadencias.
+    """
+
+    brand = "NVIDIA"
+
+    def __init__(self, devices):
+        self.devices = devices
+        self.calls = {}
+        self.initialized = False
+
+    def init(self):
+        self.initialized = True
+        return len(self.devices)
+
+    def shutdown(self):
+        self.initialized = False
+
+    def _get(self, metric, index):
+        self.calls[metric] = self.calls.get(metric, 0) + 1
+        value = self.devices[index].get(metric)
+        if value is None:
+            raise MetricNotSupported(metric)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def name(self, index): return self._get('name', index)
+    def utilization(self, index): return self._get('utilization', index)
+    def temperature(self, index): return self._get('temperature', index)
+    def clocks(self, index): return self._get('clocks', index)
+    def power_usage(self, index): return self._get('power_usage', index)
+    def power_limit(self, index): return self._get('power_limit', index)
+    def throttle_reasons(self, index): return self._get('throttle_reasons', index)
+    def memory(self, index): return self._get('memory', index)
+    def pcie_throughput(self, index): return self._get('pcie_throughput', index)
+
+
+class GpuTelemetryCollector:
+    """
+    Telemetría ampliada de GPU con dos cadencias:
+
+      - rápida (cada tick): uso, temperatura, relojes, consumo y motivos de throttling.
+      - lenta (cada 'slow_interval' segundos): límite de potencia, VRAM y tráfico PCIe,
+        cuyas llamadas a NVML son caras.
+
+    Cada valor se guarda con el momento en que se leyó; entre lecturas lentas se reutiliza
+    el valor en caché. Las métricas que el driver no soporta se dejan de consultar.
+    """
+
+    FAST_METRICS = ("utilization", "temperature", "clocks", "power_usage", "throttle_reasons")
+    SLOW_METRICS = ("power_limit", "memory", "pcie_throughput")
+
+    def __init__(self, provider, slow_interval=5.0, clock=time.monotonic):
+        """
+        Args:
+            provider: NvmlProvider o un proveedor compatible (FakeNvmlProvider).
+            slow_interval (float): Segundos entre lecturas de las métricas caras.
+            clock (function): Reloj monotónico (inyectable para pruebas).
+        """
+        self.provider = provider
+        self.slow_interval = slow_interval
+        self.clock = clock
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.device_count = provider.init()
+        self.cache = {index: {} for index in range(self.device_count)}   # índice -> métrica -> (valor, momento)
+        self.unsupported = {index: set() for index in range(self.device_count)}
+        self.names = {index: self._read_name(index) for index in range(self.device_count)}
+        self._last_slow = None
+
+    def _read_name(self, index):
+        try:
+            return self.provider.name(index)
+        except Exception:
+            return f"GPU {index}"
+
+    def _read(self, index, metric, now):
+        if metric in self.unsupported[index]:
+            return
+        try:
+            self.cache[index][metric] = (getattr(self.provider, metric)(index), now)
+        except MetricNotSupported:
+            self.unsupported[index].add(metric)
+        except Exception as e:
+            # Error puntual del driver: se conserva el último valor conocido.
+            self.logger.debug(f"No se pudo leer '{metric}' de la GPU {index}: {e}")
+
+    def get_cached(self, index, metric):
+        """Devuelve (valor, momento de lectura) o (None, None) si nunca se leyó."""
+        return self.cache.get(index, {}).get(metric, (None, None))
+
+    def sample(self):
+        """Lee las métricas que tocan en este tick y devuelve una lista de diccionarios, uno por GPU."""
+        now = self.clock()
+        read_slow = self._last_slow is None or now - self._last_slow >= self.slow_interval
+        if read_slow:
+            self._last_slow = now
+        metrics = self.FAST_METRICS + (self.SLOW_METRICS if read_slow else ())
+        for index in range(self.device_count):
+            for metric in metrics:
+                self._read(index, metric, now)
+        return [self._build(index, now) for index in range(self.device_count)]
+
+    def _build(self, index, now):
+        value = lambda metric: self.get_cached(index, metric)[0]
+        usage, memory_usage = value('utilization') or (0, 0)
+        graphics_clock, memory_clock = value('clocks') or (None, None)
+        vram_used, vram_total = value('memory') or (None, None)
+        pcie_tx, pcie_rx = value('pcie_throughput') or (None, None)
+        mask = value('throttle_reasons') or 0
+        slow_timestamp = max((self.get_cached(index, m)[1] or 0 for m in self.SLOW_METRICS), default=0)
+        return {
+            'index': index,
+            'brand': self.provider.brand,
+            'name': self.names[index],
+            'usage': usage,
+            'memory_usage': memory_usage,
+            'temperature': value('temperature') or 0,
+            'graphics_clock_mhz': graphics_clock,
+            'memory_clock_mhz': memory_clock,
+            'power_watts': value('power_usage'),
+            'power_limit_watts': value('power_limit'),
+            'vram_used_bytes': vram_used,
+            'vram_total_bytes': vram_total,
+            'pcie_tx_bps': pcie_tx,
+            'pcie_rx_bps': pcie_rx,
+            'throttle_mask': mask,
+            'throttle_reasons': decode_throttle_reasons(mask),
+            # Antigüedad (s) de las métricas lentas, para saber cuánto de "viejas" son.
+            'slow_metrics_age': now - slow_timestamp if slow_timestamp else None,
+        }
+
+    def shutdown(self):
+        try:
+            self.provider.shutdown()
+        except Exception as e:
+            self.logger.error(f"Error al cerrar el proveedor de telemetría de GPU: {e}")
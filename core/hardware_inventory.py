@@ -0,0 +1,325 @@
+# core/hardware_inventory.py
+
+import ctypes
+import glob
+import hashlib
+import json
+import os
+import platform
+import socket
+import sys
+import time
+import logging
+
+import psutil
+
+# --- Importaciones seguras para las APIs de Windows ---
+try:
+    import winreg
+    WINREG_AVAILABLE = True
+except ImportError:
+    WINREG_AVAILABLE = False
+
+try:
+    import wmi
+    WMI_AVAILABLE = True
+except ImportError:
+    WMI_AVAILABLE = False
+
+from .operation_journal import write_json_atomically
+
+DISPLAY_CLASS_KEY = r"SYSTEM\CurrentControlSet\Control\Class\{4d36e968-e325-11ce-bfc1-08002be10318}"
+CPU_KEY = r"HARDWARE\DESCRIPTION\System\CentralProcessor\0"
+
+
+def gpu_brand_from_name(name):
+    """Marca de un adaptador de vídeo a partir de su nombre: 'NVIDIA', 'AMD', 'INTEL' o 'UNKNOWN'."""
+    upper = (name or "").upper()
+    if "NVIDIA" in upper:
+        return "NVIDIA"
+    if "AMD" in upper or "RADEON" in upper:
+        return "AMD"
+    if "INTEL" in upper:
+        return "INTEL"
+    return "UNKNOWN"
+
+
+class HardwareInventory:
+    """
+    Inventario de hardware (GPUs, CPU y su topología, RAM y NICs) que se recopila una sola
+    vez y se guarda en disco junto con una huella del hardware.
+
+    La huella solo usa datos baratos de leer (núcleos, RAM, MACs, nombres de los adaptadores
+    de vídeo en el registro, versión del sistema); mientras no cambie se reutiliza el
+    inventario guardado sin lanzar consultas WMI. Todos los consumidores (recomendaciones de
+    GPU, monitor, afinidad/prioridad) deben leer de aquí en vez de hacer sus propias consultas.
+    """
+
+    VERSION = 1
+
+    def __init__(self, console_logger=None, app_name="VelocityOS", cache_file=None):
+        """
+        Args:
+            console_logger (function | None): Una función callback para imprimir mensajes en la GUI.
+            cache_file (str | None): Ruta del inventario en disco. Por defecto en %APPDATA%.
+        """
+        self.log = console_logger or (lambda message: None)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.cache_file = cache_file or os.path.join(os.getenv('APPDATA'), app_name, 'hardware_inventory.json')
+        self._inventory = None
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def get(self, refresh=False):
+        """Devuelve el inventario, recopilándolo solo si la huella del hardware cambió."""
+        if self._inventory is not None and not refresh:
+            return self._inventory
+        fingerprint = self.fingerprint()
+        cached = None if refresh else self._load()
+        if cached and cached.get('fingerprint') == fingerprint:
+            self._inventory = cached
+            return cached
+
+        self.logger.info("Huella de hardware nueva o cambiada. Recopilando inventario...")
+        start = time.perf_counter()
+        inventory = self.collect()
+        inventory.update({'version': self.VERSION, 'fingerprint': fingerprint, 'collected_at': time.time()})
+        self.logger.info(f"Inventario de hardware recopilado en {time.perf_counter() - start:.2f} s.")
+        self._save(inventory)
+        self._inventory = inventory
+        return inventory
+
+    def gpus(self):
+        return self.get()['gpus']
+
+    def primary_gpu_brand(self):
+        """'NVIDIA' o 'AMD' si hay una GPU dedicada de esas marcas; si no, 'UNKNOWN'."""
+        brands = [gpu['brand'] for gpu in self.gpus()]
+        for brand in ("NVIDIA", "AMD"):
+            if brand in brands:
+                return brand
+        return "UNKNOWN"
+
+    def cpu(self):
+        return self.get()['cpu']
+
+    def smt_siblings(self):
+        """Lista de núcleos físicos, cada uno con los índices de sus procesadores lógicos."""
+        return self.cpu()['smt_siblings']
+
+    # ------------------------------------------------------------------
+    # Huella y persistencia
+    # ------------------------------------------------------------------
+    def fingerprint(self):
+        parts = {
+            'machine': platform.machine(),
+            'system': platform.platform(),
+            'logical': psutil.cpu_count(logical=True),
+            'physical': psutil.cpu_count(logical=False),
+            'ram': psutil.virtual_memory().total,
+            'macs': sorted(nic['mac'] for nic in self._collect_nics() if nic['mac']),
+            'display_adapters': sorted(self._registry_display_adapters()),
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if data.get('version') == self.VERSION else None
+        except (json.JSONDecodeError, IOError) as e:
+            self.logger.warning(f"Inventario de hardware ilegible, se recopilará de nuevo: {e}")
+            return None
+
+    def _save(self, inventory):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            write_json_atomically(self.cache_file, inventory, indent=2)
+        except IOError as e:
+            self.logger.error(f"No se pudo guardar el inventario de hardware: {e}")
+
+    # ------------------------------------------------------------------
+    # Recopilación
+    # ------------------------------------------------------------------
+    def collect(self):
+        return {
+            'cpu': self._collect_cpu(),
+            'ram_bytes': psutil.virtual_memory().total,
+            'gpus': self._collect_gpus(),
+            'nics': self._collect_nics(),
+        }
+
+    def _collect_cpu(self):
+        logical = psutil.cpu_count(logical=True) or 1
+        physical = psutil.cpu_count(logical=False) or logical
+        if sys.platform == "win32":
+            siblings, caches = self._windows_topology()
+        else:
+            siblings, caches = self._sysfs_topology()
+        if not siblings:
+            siblings = [[cpu] for cpu in range(logical)]
+        return {
+            'model': self._cpu_model(),
+            'physical_cores': physical,
+            'logical_cores': logical,
+            'smt_enabled': logical > physical,
+            'smt_siblings': siblings,
+            'caches': caches,
+        }
+
+    def _cpu_model(self):
+        if WINREG_AVAILABLE and sys.platform == "win32":
+            try:
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, CPU_KEY) as key:
+                    return winreg.QueryValueEx(key, "ProcessorNameString")[0].strip()
+            except OSError:
+                pass
+        try:
+            with open("/proc/cpuinfo", 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith("model name"):
+                        return line.split(":", 1)[1].strip()
+        except OSError:
+            pass
+        return platform.processor() or "Desconocido"
+
+    def _windows_topology(self):
+        """Núcleos (con sus hermanos SMT) y cachés desde GetLogicalProcessorInformation."""
+
+        class CACHE_DESCRIPTOR(ctypes.Structure):
+            _fields_ = [("Level", ctypes.c_ubyte), ("Associativity", ctypes.c_ubyte),
+                        ("LineSize", ctypes.c_ushort), ("Size", ctypes.c_ulong), ("Type", ctypes.c_int)]
+
+        class _INFO_UNION(ctypes.Union):
+            _fields_ = [("Flags", ctypes.c_ubyte), ("Cache", CACHE_DESCRIPTOR), ("Reserved", ctypes.c_ulonglong * 2)]
+
+        class SYSTEM_LOGICAL_PROCESSOR_INFORMATION(ctypes.Structure):
+            _fields_ = [("ProcessorMask", ctypes.c_size_t), ("Relationship", ctypes.c_int), ("Info", _INFO_UNION)]
+
+        RELATION_PROCESSOR_CORE, RELATION_CACHE = 0, 2
+        CACHE_TYPES = {0: "unified", 1: "instruction", 2: "data", 3: "trace"}
+        try:
+            kernel32 = ctypes.windll.kernel32
+            length = ctypes.c_ulong(0)
+            kernel32.GetLogicalProcessorInformation(None, ctypes.byref(length))
+            count = length.value // ctypes.sizeof(SYSTEM_LOGICAL_PROCESSOR_INFORMATION)
+            buffer = (SYSTEM_LOGICAL_PROCESSOR_INFORMATION * count)()
+            if not kernel32.GetLogicalProcessorInformation(buffer, ctypes.byref(length)):
+                return [], []
+        except (AttributeError, OSError) as e:
+            self.logger.debug(f"GetLogicalProcessorInformation no disponible: {e}")
+            return [], []
+
+        mask_to_cpus = lambda mask: [bit for bit in range(mask.bit_length()) if mask >> bit & 1]
+        siblings, caches = [], {}
+        for info in buffer:
+            if info.Relationship == RELATION_PROCESSOR_CORE:
+                siblings.append(mask_to_cpus(info.ProcessorMask))
+            elif info.Relationship == RELATION_CACHE:
+                cache = info.Info.Cache
+                key = (cache.Level, CACHE_TYPES.get(cache.Type, "unified"), cache.Size)
+                entry = caches.setdefault(key, {'level': cache.Level, 'type': key[1], 'size_bytes': cache.Size,
+                                                'line_size': cache.LineSize, 'instances': 0})
+                entry['instances'] += 1
+        return sorted(siblings), sorted(caches.values(), key=lambda c: (c['level'], c['type']))
+
+    def _sysfs_topology(self):
+        """Equivalente en Linux, leyendo /sys/devices/system/cpu."""
+        def read(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+
+        def parse_list(text):
+            cpus = []
+            for part in text.split(','):
+                if '-' in part:
+                    first, last = part.split('-')
+                    cpus.extend(range(int(first), int(last) + 1))
+                elif part:
+                    cpus.append(int(part))
+            return cpus
+
+        siblings = set()
+        for path in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/topology/thread_siblings_list"):
+            try:
+                siblings.add(tuple(parse_list(read(path))))
+            except (OSError, ValueError):
+                continue
+
+        caches = {}
+        for index in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cache/index[0-9]*"):
+            try:
+                level, cache_type, size = int(read(f"{index}/level")), read(f"{index}/type").lower(), read(f"{index}/size")
+                shared = read(f"{index}/shared_cpu_list")
+                multiplier = {'K': 1024, 'M': 1024 ** 2}.get(size[-1], 1)
+                size_bytes = int(size.rstrip('KM')) * multiplier
+            except (OSError, ValueError):
+                continue
+            key = (level, cache_type, shared)
+            caches[key] = {'level': level, 'type': cache_type, 'size_bytes': size_bytes, 'shared_cpus': shared}
+        merged = {}
+        for (level, cache_type, _), cache in caches.items():
+            entry = merged.setdefault((level, cache_type, cache['size_bytes']),
+                                      {'level': level, 'type': cache_type, 'size_bytes': cache['size_bytes'], 'instances': 0})
+            entry['instances'] += 1
+        return sorted(list(group) for group in siblings), sorted(merged.values(), key=lambda c: (c['level'], c['type']))
+
+    def _registry_display_adapters(self):
+        """Nombres de los adaptadores de vídeo según el registro (mucho más barato que WMI)."""
+        if not WINREG_AVAILABLE or sys.platform != "win32":
+            return []
+        names = []
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, DISPLAY_CLASS_KEY) as class_key:
+                index = 0
+                while True:
+                    try:
+                        subkey_name = winreg.EnumKey(class_key, index)
+                    except OSError:
+                        break
+                    index += 1
+                    try:
+                        with winreg.OpenKey(class_key, subkey_name) as subkey:
+                            names.append(winreg.QueryValueEx(subkey, "DriverDesc")[0])
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return names
+
+    def _collect_gpus(self):
+        gpus = []
+        if WMI_AVAILABLE:
+            try:
+                for controller in wmi.WMI().Win32_VideoController():
+                    gpus.append({
+                        'name': controller.Name,
+                        'brand': gpu_brand_from_name(controller.Name),
+                        'driver_version': controller.DriverVersion,
+                        'adapter_ram_bytes': controller.AdapterRAM,
+                    })
+                return gpus
+            except Exception as e:
+                self.log(f"[WARN] No se pudieron consultar las GPUs por WMI: {e}")
+        # Sin WMI: al menos los nombres del registro.
+        for name in self._registry_display_adapters():
+            gpus.append({'name': name, 'brand': gpu_brand_from_name(name), 'driver_version': None, 'adapter_ram_bytes': None})
+        return gpus
+
+    def _collect_nics(self):
+        nics = []
+        link_family = getattr(psutil, 'AF_LINK', getattr(socket, 'AF_PACKET', None))
+        try:
+            addresses, stats = psutil.net_if_addrs(), psutil.net_if_stats()
+        except Exception:
+            return nics
+        for name, addrs in addresses.items():
+            mac = next((addr.address for addr in addrs if addr.family == link_family), None)
+            if mac in ("00:00:00:00:00:00", "00-00-00-00-00-00"):
+                mac = None
+            speed = stats[name].speed if name in stats else 0
+            nics.append({'name': name, 'mac': mac, 'speed_mbps': speed})
+        return sorted(nics, key=lambda nic: nic['name'])
@@ -0,0 +1,91 @@
+# core/headless.py
+
+import logging
+import signal
+import sys
+
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+from .app_settings import AppSettings
+from .instance_bridge import InstanceCommandService
+from .metrics_exporter import MetricsExporter
+from .monitor import SystemMonitor
+
+class HeadlessRunner:
+    """
+    Ejecuta los servicios de fondo de VelocityOS (monitor y exportador de métricas)
+    sin construir ninguna ventana. Pensado para equipos que se supervisan de forma remota.
+    """
+
+    def __init__(self, metrics_port=None, instance_lock=None):
+        """
+        Args:
+            metrics_port (int | None): Puerto del exportador OpenMetrics. Si se indica,
+                tiene prioridad sobre el valor guardado en los ajustes y fuerza su activación.
+            instance_lock (InstanceLock | None): Cerrojo de instancia única ya adquirido; si se
+                indica, se atienden las órdenes de otras instancias (solo 'status').
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.app_settings = AppSettings()
+        self.metrics_port = metrics_port
+        self.monitor_thread = None
+        self.metrics_exporter = None
+        self.instance_lock = instance_lock
+        self.instance_service = None
+
+    def handle_instance_command(self, message):
+        if message.get('command') == 'status':
+            return {'ok': True, 'monitoring': self.monitor_thread is not None and self.monitor_thread.isRunning(),
+                    'metrics_exporter': self.metrics_exporter is not None}
+        return {'ok': False, 'error': "La instancia en marcha no tiene interfaz (modo --headless); ciérrala antes."}
+
+    def run(self):
+        """Arranca el bucle de eventos sin GUI. Devuelve el código de salida."""
+        app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+        exporter_settings = self.app_settings.get('metrics_exporter', {})
+        if self.metrics_port is not None or exporter_settings.get('enabled', False):
+            self.metrics_exporter = MetricsExporter(
+                host=exporter_settings.get('host', MetricsExporter.DEFAULT_HOST),
+                port=self.metrics_port or exporter_settings.get('port', MetricsExporter.DEFAULT_PORT)
+            )
+            if not self.metrics_exporter.start():
+                return 1
+        else:
+            self.logger.warning("Modo sin interfaz iniciado sin exportador de métricas (usa --metrics-port).")
+
+        self.monitor_thread = SystemMonitor(
+            io_alerts=self.app_settings.get('io_alerts'),
+            gpu_slow_interval=self.app_settings.get('gpu_telemetry')['slow_interval_seconds'],
+            throttle=self.app_settings.get('throttle_detection'),
+            core_bottleneck=self.app_settings.get('core_bottleneck'))
+        if self.metrics_exporter:
+            self.monitor_thread.add_listener(self.metrics_exporter.update_monitor_sample)
+        self.monitor_thread.start()
+        if self.instance_lock is not None:
+            self.instance_service = InstanceCommandService(self.instance_lock, self.handle_instance_command, mode="headless")
+            self.instance_service.start()
+
+        # Qt no devuelve el control a Python mientras espera eventos; el temporizador permite
+        # que Ctrl+C / SIGTERM se procesen a tiempo.
+        signal.signal(signal.SIGINT, lambda *_: app.quit())
+        signal.signal(signal.SIGTERM, lambda *_: app.quit())
+        signal_timer = QTimer()
+        signal_timer.timeout.connect(lambda: None)
+        signal_timer.start(500)
+
+        self.logger.info("VelocityOS en ejecución sin interfaz.")
+        exit_code = app.exec()
+        self.shutdown()
+        return exit_code
+
+    def shutdown(self):
+        """Detiene los hilos y el servidor de métricas."""
+        if self.instance_service:
+            self.instance_service.stop()
+        if self.monitor_thread:
+            self.monitor_thread.stop()
+            self.monitor_thread.wait(2000)
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+        self.logger.info("Servicios en segundo plano detenidos.")
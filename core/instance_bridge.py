@@ -0,0 +1,84 @@
+# core/instance_bridge.py
+
+import os
+import threading
+import logging
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .single_instance import InstanceServer
+
+
+class _PendingCommand:
+    __slots__ = ('message', 'reply', 'done', 'lock', 'started', 'abandoned')
+
+    def __init__(self, message):
+        self.message = message
+        self.reply = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.started = False
+        self.abandoned = False
+
+
+class InstanceCommandService(QObject):
+    """
+    Atiende en la instancia principal las órdenes de las siguientes (ver InstanceServer).
+
+    Las órdenes llegan por el hilo del servidor y se ejecutan en el hilo principal de Qt
+    (una señal entre hilos se encola en su bucle de eventos). El hilo del servidor espera la
+    respuesta como mucho 'timeout' segundos: si el hilo principal está ocupado, la orden se
+    descarta y se responde que la instancia está ocupada, para que no se ejecute más tarde
+    sin que nadie lo sepa.
+    """
+
+    _received = pyqtSignal(object)
+
+    def __init__(self, lock, handler, mode="gui", timeout=1.5, parent=None):
+        """
+        Args:
+            lock (InstanceLock): Cerrojo de instancia ya adquirido.
+            handler (function): Se llama en el hilo principal con la orden y devuelve la respuesta.
+            mode (str): 'gui', 'tray' o 'headless'.
+        """
+        super().__init__(parent)
+        self.handler = handler
+        self.mode = mode
+        self.timeout = timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._received.connect(self._dispatch)
+        self.server = InstanceServer(lock, self._handle, mode)
+
+    def start(self):
+        self.server.start()
+        if self.server.is_alive():
+            self.logger.info(f"Esperando órdenes de otras instancias en {self.server.address}.")
+
+    def stop(self):
+        self.server.stop()
+
+    def _handle(self, message):
+        """Hilo del servidor: pasa la orden al hilo principal y espera su respuesta."""
+        pending = _PendingCommand(message)
+        self._received.emit(pending)
+        if not pending.done.wait(self.timeout):
+            with pending.lock:
+                if not pending.started:
+                    pending.abandoned = True
+                    return {'ok': False, 'pid': os.getpid(), 'mode': self.mode,
+                            'error': "La instancia en marcha está ocupada; inténtalo de nuevo en unos segundos."}
+            pending.done.wait()
+        return pending.reply
+
+    def _dispatch(self, pending):
+        with pending.lock:
+            if pending.abandoned:
+                return
+            pending.started = True
+        try:
+            reply = self.handler(pending.message)
+        except Exception as e:
+            self.logger.error(f"Error al ejecutar la orden {pending.message}: {e}", exc_info=True)
+            reply = {'ok': False, 'error': str(e)}
+        pending.reply = {'mode': self.mode, **reply, 'pid': os.getpid()}
+        pending.done.set()
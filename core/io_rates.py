@@ -0,0 +1,115 @@
+# core/io_rates.py
+
+import time
+
+class CounterRateTracker:
+    """
+    Convierte contadores acumulativos por dispositivo (psutil.disk_io_counters(perdisk=True),
+    psutil.net_io_counters(pernic=True)) en tasas por segundo.
+
+    - Un dispositivo nuevo (conexión en caliente) solo establece su línea base: su primera
+      tasa se calcula en la siguiente muestra.
+    - Un dispositivo que desaparece se olvida, y si vuelve empieza de cero.
+    - Si un contador retrocede se interpreta como desbordamiento de 32 bits (habitual en
+      contadores de red de algunos drivers); si la corrección no es plausible se trata como
+      un reinicio del contador y se vuelve a tomar la línea base.
+    """
+
+    WRAP_32 = 2 ** 32
+
+    def __init__(self, fields):
+        """
+        Args:
+            fields (dict): Atributo del contador -> nombre de la tasa resultante
+                (p. ej. {'read_bytes': 'read_bps'}).
+        """
+        self.fields = fields
+        self._previous = {}
+        self._previous_time = None
+
+    def update(self, counters, timestamp=None):
+        """
+        Args:
+            counters (dict): Nombre del dispositivo -> namedtuple de contadores de psutil.
+            timestamp (float | None): Momento de la lectura (time.monotonic()).
+
+        Returns:
+            dict: Nombre del dispositivo -> {nombre_tasa: bytes/s}. Solo incluye los
+            dispositivos con una línea base anterior.
+        """
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        rates = {}
+        elapsed = timestamp - self._previous_time if self._previous_time is not None else 0
+        current = {}
+
+        for device, counter in (counters or {}).items():
+            values = {field: getattr(counter, field, 0) for field in self.fields}
+            current[device] = values
+            previous = self._previous.get(device)
+            if previous is None or elapsed <= 0:
+                continue
+
+            device_rates = {}
+            for field, rate_name in self.fields.items():
+                delta = self._delta(previous[field], values[field])
+                if delta is None:
+                    device_rates = None
+                    break
+                device_rates[rate_name] = delta / elapsed
+            if device_rates is not None:
+                rates[device] = device_rates
+
+        # Los dispositivos que ya no aparecen se descartan al sustituir el estado completo.
+        self._previous = current
+        self._previous_time = timestamp
+        return rates
+
+    def _delta(self, previous, value):
+        if value >= previous:
+            return value - previous
+        if previous < self.WRAP_32:
+            wrapped = value + self.WRAP_32 - previous
+            # Un salto de más de la mitad del rango no es un desbordamiento, es un reinicio.
+            if wrapped < self.WRAP_32 // 2:
+                return wrapped
+        return None
+
+    def reset(self):
+        self._previous = {}
+        self._previous_time = None
+
+
+class SaturationDetector:
+    """
+    Genera una alerta cuando un dispositivo supera su umbral durante varias muestras
+    seguidas, y se rearma cuando vuelve a estar por debajo.
+    """
+
+    def __init__(self, sustain_samples=3):
+        self.sustain_samples = max(1, sustain_samples)
+        self._streaks = {}
+        self._active = set()
+
+    def update(self, key, rate, threshold):
+        """
+        Returns:
+            bool: True solo en la muestra en la que la saturación se confirma.
+        """
+        if threshold is None or threshold <= 0 or rate < threshold:
+            self._streaks.pop(key, None)
+            self._active.discard(key)
+            return False
+
+        streak = self._streaks.get(key, 0) + 1
+        self._streaks[key] = streak
+        if streak >= self.sustain_samples and key not in self._active:
+            self._active.add(key)
+            return True
+        return False
+
+    def forget_missing(self, present_keys):
+        """Descarta el estado de los dispositivos desconectados."""
+        for key in list(self._streaks):
+            if key not in present_keys:
+                del self._streaks[key]
+        self._active &= set(present_keys)
@@ -0,0 +1,233 @@
+# core/memory_growth.py
+
+import os
+import time
+import logging
+import threading
+
+import numpy as np
+import psutil
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class _ProcessSeries:
+    """Búfer circular de muestras (tiempo, RSS, bytes privados) de un proceso."""
+
+    __slots__ = ("name", "pid", "data", "head", "count", "last_seen")
+
+    def __init__(self, name, pid, capacity):
+        self.name = name
+        self.pid = pid
+        self.data = np.zeros((capacity, 3), dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.last_seen = 0.0
+
+    def append(self, timestamp, rss, private):
+        self.data[self.head] = (timestamp, rss, private)
+        self.head = (self.head + 1) % len(self.data)
+        self.count = min(self.count + 1, len(self.data))
+        self.last_seen = timestamp
+
+    def ordered(self):
+        """Las muestras en orden cronológico (copia)."""
+        if self.count < len(self.data):
+            return self.data[:self.count].copy()
+        return np.roll(self.data, -self.head, axis=0)
+
+
+class MemoryGrowthTracker:
+    """
+    Sigue el RSS y los bytes privados de cada proceso a baja frecuencia y ajusta una recta
+    (mínimos cuadrados) a cada serie para detectar los que no dejan de crecer.
+
+    Cada proceso ocupa un array fijo de 'window' muestras y el número de procesos seguidos
+    está acotado, así que la memoria del detector no crece con la duración de la sesión.
+
+    sample() y analyze() se llaman desde el hilo del detector y reset() desde la GUI: las
+    series se protegen con un cerrojo.
+    """
+
+    def __init__(self, window=360, slope_mb_per_hour=50.0, min_growth_mb=25.0, min_samples=30,
+                 min_r2=0.8, max_processes=512, excluded_names=()):
+        """
+        Args:
+            window (int): Muestras por proceso (p. ej. 360 a 10 s = 1 hora).
+            slope_mb_per_hour (float): Pendiente de crecimiento a partir de la cual se avisa.
+            min_growth_mb (float): Crecimiento total mínimo dentro de la ventana. Debe quedar
+                por debajo de slope_mb_per_hour x la duración de la ventana (50 MB en una hora);
+                si no, anula la pendiente: un proceso que crece justo al umbral nunca llega.
+            min_samples (int): Muestras necesarias antes de evaluar un proceso.
+            min_r2 (float): Ajuste mínimo de la recta; descarta los picos puntuales
+                (solo interesa la memoria que crece de forma sostenida).
+            max_processes (int): Máximo de procesos seguidos a la vez.
+            excluded_names (iterable): Procesos que nunca se evalúan (críticos del sistema).
+        """
+        self.window = window
+        self.slope_mb_per_hour = slope_mb_per_hour
+        self.min_growth_mb = min_growth_mb
+        self.min_samples = min_samples
+        self.min_r2 = min_r2
+        self.max_processes = max_processes
+        self.excluded_names = {name.lower() for name in excluded_names}
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.series = {}      # (pid, create_time) -> _ProcessSeries
+        self.flagged = set()  # Claves ya notificadas; no se repite el aviso.
+        self._lock = threading.Lock()
+
+    def _private_bytes(self, memory_info):
+        # Windows: bytes privados (commit). En otros sistemas, 'data' (heap + pila) es la aproximación más cercana.
+        for field in ("private", "data"):
+            value = getattr(memory_info, field, None)
+            if value is not None:
+                return value
+        return memory_info.rss
+
+    def sample(self, now=None):
+        """Toma una muestra de todos los procesos. Devuelve el número de procesos seguidos."""
+        now = time.time() if now is None else now
+        own_pid, readings = os.getpid(), []
+        # La tabla de procesos se recorre fuera del cerrojo: es lo lento y no toca las series.
+        for proc in psutil.process_iter(['pid', 'name', 'create_time', 'memory_info']):
+            info = proc.info
+            if info['memory_info'] is None or info['pid'] == own_pid:
+                continue
+            name = info['name'] or ""
+            if name.lower() in self.excluded_names:
+                continue
+            readings.append(((info['pid'], info['create_time']), name, info['memory_info']))
+
+        with self._lock:
+            seen = set()
+            for key, name, memory_info in readings:
+                series = self.series.get(key)
+                if series is None:
+                    if len(self.series) >= self.max_processes:
+                        self._evict_oldest()
+                    series = self.series[key] = _ProcessSeries(name, key[0], self.window)
+                series.append(now, memory_info.rss, self._private_bytes(memory_info))
+                seen.add(key)
+            # Los procesos que terminaron dejan de ocupar memoria en el detector.
+            for key in set(self.series) - seen:
+                del self.series[key]
+                self.flagged.discard(key)
+            return len(self.series)
+
+    def _evict_oldest(self):
+        oldest = min(self.series, key=lambda key: self.series[key].last_seen)
+        del self.series[oldest]
+        self.flagged.discard(oldest)
+
+    def _fit(self, hours, megabytes):
+        """Pendiente (MB/h) y coeficiente de determinación de la recta ajustada."""
+        slope, intercept = np.polyfit(hours, megabytes, 1)
+        residuals = megabytes - (slope * hours + intercept)
+        total = np.sum((megabytes - megabytes.mean()) ** 2)
+        r2 = 1.0 - np.sum(residuals ** 2) / total if total > 0 else 0.0
+        return float(slope), float(r2)
+
+    def analyze(self):
+        """
+        Returns:
+            list[dict]: Procesos cuya memoria crece de forma sostenida, del que más crece al que menos.
+        """
+        with self._lock:
+            ready = [(key, series.pid, series.name, series.ordered())
+                     for key, series in self.series.items() if series.count >= self.min_samples]
+        suspects = []
+        for key, pid, name, samples in ready:
+            hours = (samples[:, 0] - samples[0, 0]) / 3600
+            if hours[-1] <= 0:
+                continue
+            rss_mb, private_mb = samples[:, 1] / (1024 * 1024), samples[:, 2] / (1024 * 1024)
+            # Se evalúa la serie que más crece: los bytes privados delatan las fugas aunque el
+            # sistema haya recortado el working set (RSS).
+            candidates = []
+            for label, values in (("private", private_mb), ("rss", rss_mb)):
+                slope, r2 = self._fit(hours, values)
+                candidates.append((slope, r2, label, float(values[-1] - values[0])))
+            slope, r2, metric, growth = max(candidates)
+            if slope >= self.slope_mb_per_hour and r2 >= self.min_r2 and growth >= self.min_growth_mb:
+                suspects.append({
+                    'key': key,
+                    'pid': pid,
+                    'name': name,
+                    'metric': metric,
+                    'rss_mb': float(rss_mb[-1]),
+                    'private_mb': float(private_mb[-1]),
+                    'slope_mb_per_hour': slope,
+                    'r2': r2,
+                    'growth_mb': growth,
+                    'minutes': float(hours[-1] * 60),
+                })
+        return sorted(suspects, key=lambda suspect: suspect['slope_mb_per_hour'], reverse=True)
+
+    def new_suspects(self):
+        """Como analyze(), pero solo los procesos que aún no se habían notificado."""
+        suspects = self.analyze()
+        with self._lock:
+            suspects = [s for s in suspects if s['key'] not in self.flagged and s['key'] in self.series]
+            self.flagged.update(s['key'] for s in suspects)
+        return suspects
+
+    def reset(self, key):
+        """Olvida la serie de un proceso (p. ej. tras recortar su memoria) para volver a medir desde cero."""
+        with self._lock:
+            self.series.pop(key, None)
+            self.flagged.discard(key)
+
+
+class MemoryGrowthMonitor(QThread):
+    """Hilo de muestreo de baja frecuencia que avisa cuando un proceso parece tener una fuga."""
+
+    growth_detected = pyqtSignal(dict)
+
+    def __init__(self, tracker, interval_seconds=10.0, parent=None):
+        super().__init__(parent)
+        self.tracker = tracker
+        self.interval = interval_seconds
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._is_running = True
+
+    def run(self):
+        self.logger.info("Detector de crecimiento de memoria iniciado.")
+        while self._is_running:
+            start = time.monotonic()
+            try:
+                self.tracker.sample()
+                for suspect in self.tracker.new_suspects():
+                    self.growth_detected.emit(suspect)
+            except Exception as e:
+                self.logger.error(f"Error en el detector de crecimiento de memoria: {e}", exc_info=True)
+            # Espera en pasos cortos para que stop() responda rápido.
+            while self._is_running and time.monotonic() - start < self.interval:
+                time.sleep(0.2)
+        self.logger.info("Detector de crecimiento de memoria finalizado.")
+
+    def stop(self):
+        self._is_running = False
+        self.wait(2000)
+
+
+class ProcessRestartWorker(QThread):
+    """
+    Cierra en segundo plano el árbol de un proceso que se va a reiniciar: la espera a que
+    termine (y la escalada a kill) puede durar varios segundos. El relanzamiento, que sí
+    informa por la consola, se hace en la GUI al recibir 'restart_closed'.
+    """
+
+    restart_closed = pyqtSignal(dict, list)
+
+    def __init__(self, system_optimizer, target, parent=None):
+        super().__init__(parent)
+        self.system_optimizer = system_optimizer
+        self.target = target
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def run(self):
+        try:
+            report = self.system_optimizer.close_for_restart(self.target)
+        except Exception as e:
+            self.logger.error(f"No se pudo cerrar {self.target['name']} para reiniciarlo: {e}", exc_info=True)
+            report = []
+        self.restart_closed.emit(self.target, report)
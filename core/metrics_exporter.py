@@ -0,0 +1,300 @@
+# core/metrics_exporter.py
+
+import logging
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .gpu_telemetry import THROTTLE_REASONS
+
+THROTTLE_REASON_NAMES = [name for name, _ in THROTTLE_REASONS.values()]
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape_label(value):
+    """Escapa un valor de etiqueta según el formato de texto de OpenMetrics."""
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels)
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class MetricsExporter:
+    """
+    Expone la telemetría del monitor y de los optimizadores en formato de texto OpenMetrics
+    a través de un endpoint HTTP local (GET /metrics).
+
+    El texto se serializa una sola vez por cada muestra del monitor y se guarda ya codificado.
+    Las peticiones de Prometheus solo leen esa referencia, por lo que un scrape nunca bloquea
+    al hilo de muestreo ni obliga a recalcular nada.
+    """
+
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_PORT = 9435
+    PREFIX = "velocityos"
+    LATENCY_BUCKETS = (0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)
+
+    # Clave del diccionario del monitor -> (nombre de la métrica, ayuda, factor de escala)
+    MONITOR_METRICS = {
+        'cpu_usage': ("cpu_usage_ratio", "Uso total de CPU.", 0.01),
+        'ram_usage': ("memory_usage_ratio", "Uso de memoria RAM.", 0.01),
+    }
+
+    # Clave de la muestra por GPU (GpuTelemetryCollector) -> (nombre de la métrica, ayuda, factor de escala)
+    GPU_METRICS = {
+        'graphics_clock_mhz': ("gpu_graphics_clock_hertz", "Reloj del núcleo de la GPU.", 1_000_000),
+        'memory_clock_mhz': ("gpu_memory_clock_hertz", "Reloj de la memoria de la GPU.", 1_000_000),
+        'power_watts': ("gpu_power_watts", "Consumo de la GPU.", 1),
+        'power_limit_watts': ("gpu_power_limit_watts", "Límite de potencia aplicado a la GPU.", 1),
+        'vram_used_bytes': ("gpu_memory_used_bytes", "VRAM en uso.", 1),
+        'vram_total_bytes': ("gpu_memory_total_bytes", "VRAM total.", 1),
+        'pcie_tx_bps': ("gpu_pcie_transmit_bytes_per_second", "Tráfico PCIe enviado por la GPU.", 1),
+        'pcie_rx_bps': ("gpu_pcie_receive_bytes_per_second", "Tráfico PCIe recibido por la GPU.", 1),
+    }
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.host = host
+        self.port = port
+
+        # El lock protege únicamente el estado mutable; los scrapes no lo toman nunca.
+        self._lock = threading.Lock()
+        self._monitor_sample = {}
+        self._monitor_timestamp = None
+        self._gpu_stats = {}
+        self._speed_test = {}
+        self._latency_histograms = {}
+        self._step_durations = {}
+
+        self._payload = b"# EOF\n"
+        self._server = None
+        self._server_thread = None
+        self.publish()
+
+    # ------------------------------------------------------------------
+    # Actualización de datos
+    # ------------------------------------------------------------------
+    def update_monitor_sample(self, data):
+        """Recibe una muestra de SystemMonitor. Marca el 'tick' en el que se regenera el texto."""
+        with self._lock:
+            self._monitor_sample = dict(data)
+            self._monitor_timestamp = time.time()
+            gpus = data.get('gpus')
+            if gpus is None and 'gpu_usage' in data:
+                gpus = [{
+                    'index': 0,
+                    'brand': data.get('gpu_brand', 'UNKNOWN'),
+                    'usage': data.get('gpu_usage', 0),
+                    'temperature': data.get('gpu_temp', 0),
+                }]
+            if gpus is not None:
+                self._gpu_stats = {str(gpu.get('index', i)): dict(gpu) for i, gpu in enumerate(gpus)}
+        self.publish()
+
+    def update_speed_test(self, results):
+        """Recibe el evento 'result' del CLI de Ookla (mismo diccionario que emite SpeedTestWorker)."""
+        download = results.get('download', {})
+        upload = results.get('upload', {})
+        ping = results.get('ping', {})
+        with self._lock:
+            self._speed_test = {
+                'server': results.get('server', {}).get('name', 'N/A'),
+                'isp': results.get('isp', 'N/A'),
+                'download_bps': download.get('bandwidth', 0) * 8,
+                'upload_bps': upload.get('bandwidth', 0) * 8,
+                'latency_seconds': ping.get('latency', 0) / 1000,
+                'jitter_seconds': ping.get('jitter', 0) / 1000,
+                'packet_loss_ratio': (results.get('packetLoss') or 0) / 100,
+                'timestamp': time.time(),
+            }
+        self.publish()
+
+    def observe_latency(self, target, latency_ms):
+        """
+        Añade una observación a la histograma de latencia del destino indicado.
+        No regenera el texto: las observaciones se acumulan y se publican en el siguiente tick.
+        """
+        seconds = latency_ms / 1000
+        with self._lock:
+            histogram = self._latency_histograms.get(target)
+            if histogram is None:
+                histogram = {'buckets': [0] * len(self.LATENCY_BUCKETS), 'count': 0, 'sum': 0.0}
+                self._latency_histograms[target] = histogram
+            for i, bound in enumerate(self.LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+
+    def record_step_duration(self, operation, step, seconds, outcome="ok"):
+        """Registra la duración del último paso de aplicar/restaurar ejecutado."""
+        with self._lock:
+            self._step_durations[(operation, step)] = {
+                'seconds': seconds,
+                'outcome': outcome,
+                'timestamp': time.time(),
+            }
+        self.publish()
+
+    # ------------------------------------------------------------------
+    # Serialización
+    # ------------------------------------------------------------------
+    def publish(self):
+        """Regenera y cachea el texto OpenMetrics a partir del estado actual."""
+        with self._lock:
+            text = self._render()
+        # Intercambio atómico de la referencia: los scrapes en curso siguen usando la anterior.
+        self._payload = text.encode('utf-8')
+
+    def get_payload(self):
+        """Devuelve el último texto serializado (bytes). Nunca bloquea."""
+        return self._payload
+
+    def _render(self):
+        lines = []
+
+        def family(name, metric_type, help_text, samples):
+            full_name = f"{self.PREFIX}_{name}"
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            lines.append(f"# HELP {full_name} {help_text}")
+            for suffix, labels, value in samples:
+                lines.append(f"{full_name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+
+        sample = self._monitor_sample
+        for key, (name, help_text, scale) in self.MONITOR_METRICS.items():
+            if key in sample:
+                family(name, "gauge", help_text, [("", (), sample[key] * scale)])
+        disk_io, net_io = sample.get('disk_io') or {}, sample.get('net_io') or {}
+        if disk_io:
+            family("disk_read_bytes_per_second", "gauge", "Tasa de lectura por disco.",
+                   [("", (("disk", disk),), rates['read_bps']) for disk, rates in disk_io.items()])
+            family("disk_write_bytes_per_second", "gauge", "Tasa de escritura por disco.",
+                   [("", (("disk", disk),), rates['write_bps']) for disk, rates in disk_io.items()])
+        if net_io:
+            family("network_receive_bytes_per_second", "gauge", "Tasa de recepción por interfaz.",
+                   [("", (("interface", nic),), rates['recv_bps']) for nic, rates in net_io.items()])
+            family("network_transmit_bytes_per_second", "gauge", "Tasa de envío por interfaz.",
+                   [("", (("interface", nic),), rates['sent_bps']) for nic, rates in net_io.items()])
+        if self._monitor_timestamp is not None:
+            family("monitor_last_sample_timestamp_seconds", "gauge",
+                   "Momento de la última muestra del monitor.", [("", (), self._monitor_timestamp)])
+
+        if self._gpu_stats:
+            gpu_labels = {idx: (("gpu", idx), ("brand", gpu.get('brand', 'UNKNOWN'))) for idx, gpu in self._gpu_stats.items()}
+            family("gpu_usage_ratio", "gauge", "Uso de la GPU.",
+                   [("", gpu_labels[idx], gpu.get('usage', 0) / 100) for idx, gpu in self._gpu_stats.items()])
+            family("gpu_temperature_celsius", "gauge", "Temperatura de la GPU.",
+                   [("", gpu_labels[idx], gpu.get('temperature', 0)) for idx, gpu in self._gpu_stats.items()])
+            for key, (name, help_text, scale) in self.GPU_METRICS.items():
+                samples = [("", gpu_labels[idx], gpu[key] * scale)
+                           for idx, gpu in self._gpu_stats.items() if gpu.get(key) is not None]
+                if samples:
+                    family(name, "gauge", help_text, samples)
+            throttling = [("", gpu_labels[idx] + (("reason", reason),), 1 if reason in gpu['throttle_reasons'] else 0)
+                          for idx, gpu in self._gpu_stats.items() if 'throttle_reasons' in gpu
+                          for reason in THROTTLE_REASON_NAMES]
+            if throttling:
+                family("gpu_throttle_reason_active", "gauge", "Motivos de limitación de relojes activos en la GPU.", throttling)
+
+        if self._speed_test:
+            st = self._speed_test
+            labels = (("server", st['server']), ("isp", st['isp']))
+            family("speedtest_download_bits_per_second", "gauge", "Velocidad de descarga del último test.",
+                   [("", labels, st['download_bps'])])
+            family("speedtest_upload_bits_per_second", "gauge", "Velocidad de subida del último test.",
+                   [("", labels, st['upload_bps'])])
+            family("speedtest_latency_seconds", "gauge", "Latencia del último test.",
+                   [("", labels, st['latency_seconds'])])
+            family("speedtest_jitter_seconds", "gauge", "Jitter del último test.",
+                   [("", labels, st['jitter_seconds'])])
+            family("speedtest_packet_loss_ratio", "gauge", "Pérdida de paquetes del último test.",
+                   [("", labels, st['packet_loss_ratio'])])
+            family("speedtest_last_run_timestamp_seconds", "gauge", "Momento del último test de velocidad.",
+                   [("", labels, st['timestamp'])])
+
+        if self._latency_histograms:
+            samples = []
+            for target, histogram in self._latency_histograms.items():
+                for bound, count in zip(self.LATENCY_BUCKETS, histogram['buckets']):
+                    samples.append(("_bucket", (("target", target), ("le", repr(float(bound)))), count))
+                samples.append(("_bucket", (("target", target), ("le", "+Inf")), histogram['count']))
+                samples.append(("_count", (("target", target),), histogram['count']))
+                samples.append(("_sum", (("target", target),), histogram['sum']))
+            family("latency_probe_seconds", "histogram", "Latencia observada por las sondas.", samples)
+
+        if self._step_durations:
+            family("step_duration_seconds", "gauge", "Duración de la última ejecución de cada paso de aplicar/restaurar.",
+                   [("", (("operation", op), ("step", step), ("outcome", info['outcome'])), info['seconds'])
+                    for (op, step), info in self._step_durations.items()])
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    # ------------------------------------------------------------------
+    # Servidor HTTP
+    # ------------------------------------------------------------------
+    def start(self):
+        """Arranca el servidor HTTP en un hilo daemon. Devuelve True si está escuchando."""
+        if self._server is not None:
+            return True
+
+        exporter = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                payload = exporter._payload
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                exporter.logger.debug("Scrape %s: %s", self.client_address[0], format % args)
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+            self._server.daemon_threads = True
+        except OSError as e:
+            self.logger.error(f"No se pudo abrir el exportador de métricas en {self.host}:{self.port}: {e}")
+            self._server = None
+            return False
+
+        self._server_thread = threading.Thread(target=self._serve, name="MetricsExporter", daemon=True)
+        self._server_thread.start()
+        self.logger.info(f"Exportador OpenMetrics escuchando en http://{self.host}:{self.port}/metrics")
+        return True
+
+    def _serve(self):
+        server = self._server
+        if server is not None:
+            server.serve_forever(poll_interval=0.5)
+
+    def stop(self):
+        """Detiene el servidor HTTP si está en marcha."""
+        if self._server is None:
+            return
+        server, self._server = self._server, None
+        server.shutdown()
+        server.server_close()
+        self.logger.info("Exportador de métricas detenido.")
+
+    def is_running(self):
+        return self._server is not None
@@ -2,15 +2,10 @@
 
 import time
 import logging
+from collections import deque
 import psutil
 
 # --- Importaciones seguras para librerías de GPU ---
-try:
-    import pynvml
-    PYNVML_AVAILABLE = True
-except ImportError:
-    PYNVML_AVAILABLE = False
-
 try:
     from pyadl import ADLManager
     PYADL_AVAILABLE = True
@@ -19,23 +14,102 @@ except ImportError:
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from .io_rates import CounterRateTracker, SaturationDetector
+from .monitor_delta import DeltaPublisher
+from .gpu_telemetry import GpuTelemetryCollector, NvmlProvider, PYNVML_AVAILABLE
+from .throttle_detector import ThrottleDetector, ThrottleSampler
+from .core_load import CoreLoadHistory
+
 class SystemMonitor(QThread):
     """
     Un hilo de monitoreo agnóstico a la marca de la GPU.
     Detecta si hay una GPU NVIDIA o AMD y utiliza la librería correspondiente.
+
+    Cada muestra completa va al historial y a los oyentes registrados con add_listener(),
+    que se ejecutan en este mismo hilo (exportador de métricas, grabadores). A la GUI solo
+    le llegan MonitorDelta con las métricas que cambiaron más que su umbral (o que llevan
+    demasiado sin enviarse), fusionados en un único evento pendiente: 'delta_available'
+    avisa y take_delta() recoge.
     """
-    system_data_updated = pyqtSignal(dict)
+    delta_available = pyqtSignal()
     gpu_detected = pyqtSignal(str) # Señal para informar a la GUI qué GPU se encontró
+    io_saturation_alert = pyqtSignal(dict) # Un disco o interfaz de red sostiene una tasa por encima del umbral
+    throttle_event = pyqtSignal(dict) # La CPU o una GPU empieza o deja de estar limitada (ver ThrottleDetector)
+    core_bottleneck = pyqtSignal(dict) # Un núcleo saturado con el resto casi libre (ver core_load.find_saturated_episodes)
 
     UPDATE_INTERVAL = 1  # segundos
+    HISTORY_LENGTH = 600  # muestras (10 minutos a 1 Hz)
+
+    DEFAULT_IO_ALERTS = {
+        "enabled": True,
+        "disk_bytes_per_sec": 150 * 1024 * 1024,
+        "net_link_ratio": 0.8,           # Fracción de la velocidad del enlace, si el driver la informa.
+        "net_bytes_per_sec": 10 * 1024 * 1024,  # Umbral fijo cuando no se conoce la velocidad del enlace.
+        "sustain_samples": 3
+    }
+
+    DEFAULT_THROTTLE = {
+        "enabled": True,
+        "window_samples": 10,
+        "sustain_ratio": 0.6,
+        "cpu_load_percent": 50,
+        "cpu_freq_ratio": 0.9,
+        "cpu_temp_limit": 95,
+        "gpu_temp_limit": 85
+    }
 
-    def __init__(self, parent=None):
+    DEFAULT_CORE_BOTTLENECK = {
+        "enabled": True,
+        "saturation_percent": 95,
+        "min_samples": 5,
+        "max_average_percent": 50
+    }
+
+    def __init__(self, parent=None, io_alerts=None, gpu_provider=None, gpu_slow_interval=5.0, inventory=None,
+                 delta_thresholds=None, max_staleness=30.0, throttle=None, core_bottleneck=None):
+        """
+        Args:
+            core_bottleneck (dict | None): Detección de núcleos saturados (ver DEFAULT_CORE_BOTTLENECK).
+            throttle (dict | None): Ajustes del detector de throttling (ver DEFAULT_THROTTLE).
+            delta_thresholds (dict | None): Umbrales por métrica para enviar un cambio a la GUI
+                (ver monitor_delta.DEFAULT_THRESHOLDS).
+            max_staleness (float): Segundos tras los que una métrica se reenvía aunque no cambie.
+            inventory (HardwareInventory | None): Si se indica, solo se inicializa la librería
+                de la marca de GPU que el inventario conoce (evita intentos inútiles de NVML/ADL).
+            io_alerts (dict | None): Umbrales de saturación de E/S (ver DEFAULT_IO_ALERTS).
+            gpu_provider: Proveedor NVML alternativo (p. ej. FakeNvmlProvider). Por defecto, pynvml.
+            gpu_slow_interval (float): Segundos entre lecturas de las métricas caras de la GPU.
+        """
         super().__init__(parent)
         self.logger = logging.getLogger(self.__class__.__name__)
         self._is_running = True
+
+        # Historial acotado de muestras emitidas (incluye las tasas de disco y red).
+        self.history = deque(maxlen=self.HISTORY_LENGTH)
+        self._listeners = []
+        self._deltas = DeltaPublisher(delta_thresholds, max_staleness)
+
+        self.io_alerts = dict(self.DEFAULT_IO_ALERTS, **(io_alerts or {}))
+        self._disk_rates = CounterRateTracker({'read_bytes': 'read_bps', 'write_bytes': 'write_bps'})
+        self._net_rates = CounterRateTracker({'bytes_recv': 'recv_bps', 'bytes_sent': 'sent_bps'})
+        self._saturation = SaturationDetector(self.io_alerts['sustain_samples'])
+        self._link_speeds = {}
+        self._link_speeds_time = 0
+
+        throttle = dict(self.DEFAULT_THROTTLE, **(throttle or {}))
+        enabled = throttle.pop('enabled')
+        self.throttle_sampler = ThrottleSampler(ThrottleDetector(**throttle)) if enabled else None
+
+        # Carga por CPU lógica (T x núcleos); se crea con la primera muestra.
+        self.core_history = None
+        self.core_bottleneck_settings = dict(self.DEFAULT_CORE_BOTTLENECK, **(core_bottleneck or {}))
+        self._bottleneck_cores = set()
         
         self.gpu_brand = "NONE"
-        self.gpu_device = None # Almacenará el 'handle' de pynvml o el 'device' de pyadl
+        self.gpu_device = None # Almacenará el GpuTelemetryCollector (NVIDIA) o el 'device' de pyadl
+        self.gpu_provider = gpu_provider
+        self.gpu_slow_interval = gpu_slow_interval
+        self.inventory = inventory
         
         # La inicialización de la GPU ahora se hace en el constructor
         # para que la señal 'gpu_detected' se emita al principio.
@@ -46,20 +120,33 @@ class SystemMonitor(QThread):
         Intenta inicializar primero NVIDIA, y si falla, intenta con AMD.
         Emite una señal con la marca de la GPU detectada.
         """
-        # 1. Intentar con NVIDIA
-        if PYNVML_AVAILABLE:
+        known_brands = None
+        if self.inventory is not None and self.gpu_provider is None:
+            try:
+                known_brands = {gpu['brand'] for gpu in self.inventory.gpus()}
+            except Exception as e:
+                self.logger.debug(f"Inventario de hardware no disponible: {e}")
+
+        # 1. Intentar con NVIDIA (telemetría ampliada a través del proveedor NVML)
+        provider = self.gpu_provider or (NvmlProvider() if PYNVML_AVAILABLE else None)
+        if known_brands is not None and "NVIDIA" not in known_brands:
+            provider = None
+        if provider is not None:
             try:
-                pynvml.nvmlInit()
-                self.gpu_device = pynvml.nvmlDeviceGetHandleByIndex(0)
-                self.gpu_brand = "NVIDIA"
-                self.logger.info("NVML inicializado. GPU NVIDIA detectada.")
-                self.gpu_detected.emit("NVIDIA")
-                return
-            except pynvml.NVMLError:
+                collector = GpuTelemetryCollector(provider, slow_interval=self.gpu_slow_interval)
+                if collector.device_count > 0:
+                    self.gpu_device = collector
+                    self.gpu_brand = "NVIDIA"
+                    self.logger.info(f"NVML inicializado. {collector.device_count} GPU(s) NVIDIA detectada(s).")
+                    self.gpu_detected.emit("NVIDIA")
+                    return
+                # NVML arrancó pero no hay GPUs: se cierra antes de probar con AMD.
+                collector.shutdown()
+            except Exception:
                 self.logger.warning("No se detectó una GPU NVIDIA. Buscando AMD...")
         
         # 2. Si NVIDIA falla, intentar con AMD
-        if PYADL_AVAILABLE:
+        if PYADL_AVAILABLE and (known_brands is None or "AMD" in known_brands):
             try:
                 adl_devices = ADLManager.getInstance().getDevices()
                 if adl_devices:
@@ -77,20 +164,24 @@ class SystemMonitor(QThread):
         self.gpu_detected.emit("NONE")
 
     def _get_gpu_stats(self):
-        """Devuelve una tupla (uso, temperatura) de la GPU según la marca detectada."""
-        usage, temp = 0, 0
+        """
+        Devuelve una tupla (uso, temperatura, gpus) según la marca detectada. 'gpus' es la
+        lista de muestras por GPU; con NVIDIA incluye relojes, consumo, VRAM, PCIe y throttling.
+        """
+        usage, temp, gpus = 0, 0, []
         if not self.gpu_device:
-            return usage, temp
+            return usage, temp, gpus
             
         try:
             if self.gpu_brand == "NVIDIA":
-                utilization = pynvml.nvmlDeviceGetUtilizationRates(self.gpu_device)
-                usage = utilization.gpu
-                temp = pynvml.nvmlDeviceGetTemperature(self.gpu_device, pynvml.NVML_TEMPERATURE_GPU)
+                gpus = self.gpu_device.sample()
+                if gpus:
+                    usage, temp = gpus[0]['usage'], gpus[0]['temperature']
             
             elif self.gpu_brand == "AMD":
                 usage = self.gpu_device.getCurrentUsage()
                 temp = self.gpu_device.getCurrentTemperature()
+                gpus = [{'index': 0, 'brand': "AMD", 'usage': usage, 'temperature': temp}]
 
         except Exception as e:
             self.logger.warning(f"Error temporal al leer datos de la GPU {self.gpu_brand}: {e}")
@@ -99,7 +190,137 @@ class SystemMonitor(QThread):
             self.gpu_brand = "NONE"
             self.gpu_detected.emit("NONE") # Informar a la GUI del fallo
         
-        return usage, temp
+        return usage, temp, gpus
+
+    def _get_io_rates(self):
+        """
+        Lee los contadores de disco y red por dispositivo y los convierte en tasas (bytes/s).
+        Se usa nowrap=False porque los desbordamientos los gestiona CounterRateTracker.
+        """
+        now = time.monotonic()
+        try:
+            disk_counters = psutil.disk_io_counters(perdisk=True, nowrap=False)
+        except Exception as e:
+            self.logger.debug(f"No se pudieron leer los contadores de disco: {e}")
+            disk_counters = {}
+        try:
+            net_counters = psutil.net_io_counters(pernic=True, nowrap=False)
+        except Exception as e:
+            self.logger.debug(f"No se pudieron leer los contadores de red: {e}")
+            net_counters = {}
+        return self._disk_rates.update(disk_counters, now), self._net_rates.update(net_counters, now)
+
+    def _get_link_speeds(self):
+        """Velocidad de enlace (bytes/s) por interfaz. Se refresca cada 30 s por si cambia la conexión."""
+        now = time.monotonic()
+        if now - self._link_speeds_time > 30:
+            try:
+                self._link_speeds = {nic: stats.speed * 1_000_000 / 8
+                                     for nic, stats in psutil.net_if_stats().items() if stats.speed > 0}
+            except Exception:
+                self._link_speeds = {}
+            self._link_speeds_time = now
+        return self._link_speeds
+
+    def _check_io_saturation(self, disk_io, net_io):
+        if not self.io_alerts.get('enabled', True):
+            return
+        present = set()
+        for disk, rates in disk_io.items():
+            key = ('disk', disk)
+            present.add(key)
+            rate = rates['read_bps'] + rates['write_bps']
+            threshold = self.io_alerts['disk_bytes_per_sec']
+            if self._saturation.update(key, rate, threshold):
+                self.io_saturation_alert.emit({'kind': 'disk', 'device': disk, 'rate': rate, 'threshold': threshold})
+
+        link_speeds = self._get_link_speeds()
+        for nic, rates in net_io.items():
+            key = ('net', nic)
+            present.add(key)
+            rate = max(rates['recv_bps'], rates['sent_bps'])
+            if nic in link_speeds:
+                threshold = link_speeds[nic] * self.io_alerts['net_link_ratio']
+            else:
+                threshold = self.io_alerts['net_bytes_per_sec']
+            if self._saturation.update(key, rate, threshold):
+                self.io_saturation_alert.emit({'kind': 'net', 'device': nic, 'rate': rate, 'threshold': threshold})
+        self._saturation.forget_missing(present)
+
+    def _check_throttling(self, data):
+        if self.throttle_sampler is None:
+            return
+        try:
+            for event in self.throttle_sampler.sample(data):
+                self.throttle_event.emit(event)
+        except Exception as e:
+            self.logger.error(f"Error en el detector de throttling: {e}", exc_info=True)
+
+    def _check_core_bottleneck(self, data):
+        per_core = data['cpu_cores']
+        if not per_core:
+            return
+        if self.core_history is None or self.core_history.cores != len(per_core):
+            self.core_history = CoreLoadHistory(len(per_core), self.HISTORY_LENGTH)
+        self.core_history.append(data['timestamp'], per_core)
+
+        settings = self.core_bottleneck_settings
+        if not settings.get('enabled', True):
+            return
+        if max(per_core) < settings['saturation_percent'] and not self._bottleneck_cores:
+            return # Ningún núcleo saturado ahora ni antes: nada que evaluar.
+        ongoing = [episode for episode in self.core_history.episodes(
+                       threshold=settings['saturation_percent'], min_samples=settings['min_samples'],
+                       max_average=settings['max_average_percent'])
+                   if episode['ongoing'] and episode['single_thread']]
+        for episode in ongoing:
+            if episode['core'] not in self._bottleneck_cores:
+                self.logger.warning(f"CPU {episode['core']} saturada ({episode['core_load']:.0f} %) con una media de "
+                                    f"{episode['average_load']:.0f} %: posible cuello de botella de un solo hilo.")
+                self.core_bottleneck.emit(episode)
+        self._bottleneck_cores = {episode['core'] for episode in ongoing}
+
+    def get_core_history(self):
+        """(timestamps, cargas T x núcleos) del historial por núcleo, o None si aún no hay muestras."""
+        return self.core_history.ordered() if self.core_history is not None else None
+
+    def add_listener(self, callback):
+        """Registra una función que recibe cada muestra completa, llamada desde el hilo del monitor."""
+        self._listeners = self._listeners + [callback]
+
+    def remove_listener(self, callback):
+        self._listeners = [listener for listener in self._listeners if listener != callback]
+
+    def _notify_listeners(self, data):
+        for listener in self._listeners:
+            try:
+                listener(data)
+            except Exception as e:
+                self.logger.error(f"Error en un oyente del monitor: {e}", exc_info=True)
+
+    def _publish_delta(self, data):
+        # Sin nadie conectado no se codifica nada; al conectarse, la GUI pide resync_delta().
+        if not self.receivers(self.delta_available):
+            return
+        if self._deltas.publish(data, time.monotonic()):
+            self.delta_available.emit()
+
+    def take_delta(self):
+        """Recoge (y vacía) la actualización pendiente para la GUI, o None."""
+        return self._deltas.take()
+
+    def resync_delta(self):
+        """
+        Descarta lo pendiente y devuelve un MonitorDelta completo con la última muestra, o
+        None si aún no hay ninguna. Los siguientes cambios se calculan respecto a ella.
+        """
+        if not self.history:
+            return None
+        return self._deltas.resync(self.history[-1], time.monotonic())
+
+    def get_history(self):
+        """Devuelve una copia del historial de muestras (la más antigua primero)."""
+        return list(self.history)
 
     def run(self):
         """
@@ -107,16 +328,33 @@ class SystemMonitor(QThread):
         """
         self.logger.info("Hilo de monitoreo iniciado.")
         while self._is_running:
-            gpu_usage, gpu_temp = self._get_gpu_stats()
+            gpu_usage, gpu_temp, gpus = self._get_gpu_stats()
+            disk_io, net_io = self._get_io_rates()
             
+            per_core = psutil.cpu_percent(percpu=True)
             data = {
-                'cpu_usage': psutil.cpu_percent(),
+                'timestamp': time.time(),
+                'cpu_usage': sum(per_core) / len(per_core) if per_core else 0.0,
+                'cpu_cores': per_core,
                 'ram_usage': psutil.virtual_memory().percent,
                 'gpu_usage': gpu_usage,
                 'gpu_temp': gpu_temp,
+                'gpu_brand': self.gpu_brand,
+                'gpus': gpus,
+                'disk_io': disk_io,
+                'net_io': net_io,
+                'disk_read_bps': sum(r['read_bps'] for r in disk_io.values()),
+                'disk_write_bps': sum(r['write_bps'] for r in disk_io.values()),
+                'net_recv_bps': sum(r['recv_bps'] for r in net_io.values()),
+                'net_sent_bps': sum(r['sent_bps'] for r in net_io.values()),
             }
             
-            self.system_data_updated.emit(data)
+            self.history.append(data)
+            self._notify_listeners(data)
+            self._check_io_saturation(disk_io, net_io)
+            self._check_throttling(data)
+            self._check_core_bottleneck(data)
+            self._publish_delta(data)
             time.sleep(self.UPDATE_INTERVAL)
         
         self.logger.info("Bucle de monitoreo finalizado.")
@@ -129,9 +367,6 @@ class SystemMonitor(QThread):
         self._is_running = False
         
         # Limpieza de recursos de la librería de NVIDIA
-        if self.gpu_brand == "NVIDIA" and PYNVML_AVAILABLE:
-            try:
-                pynvml.nvmlShutdown()
-                self.logger.info("NVML cerrado correctamente.")
-            except pynvml.NVMLError as e:
-                self.logger.error(f"Error al cerrar NVML: {e}")
\ No newline at end of file
+        if self.gpu_brand == "NVIDIA" and self.gpu_device is not None:
+            self.gpu_device.shutdown()
+            self.logger.info("NVML cerrado correctamente.")
\ No newline at end of file
@@ -0,0 +1,210 @@
+# core/monitor_delta.py
+
+import threading
+
+# Claves que cambian en cada muestra sin aportar nada a la GUI.
+IGNORED_KEYS = {'timestamp', 'slow_metrics_age'}
+
+# Umbral absoluto por nombre de métrica (la última parte de la ruta).
+DEFAULT_THRESHOLDS = {
+    'cpu_usage': 1.0, 'ram_usage': 0.5, 'gpu_usage': 1.0, 'gpu_temp': 1.0,
+    'cpu_cores': 2.0,
+    'usage': 1.0, 'memory_usage': 1.0, 'temperature': 1.0,
+    'graphics_clock_mhz': 15, 'memory_clock_mhz': 15,
+    'power_watts': 1.0, 'power_limit_watts': 1.0,
+    'vram_used_bytes': 16 * 1024 * 1024,
+}
+
+# Las tasas (bytes/s) varían en órdenes de magnitud: su umbral es relativo al último valor enviado.
+RATE_RELATIVE_THRESHOLD = 0.05
+RATE_MIN_THRESHOLD = 4 * 1024
+
+
+def flatten_sample(sample, prefix=()):
+    """
+    Convierte una muestra anidada del monitor en {ruta: valor}, donde la ruta es una tupla
+    (p. ej. ('gpus', 0, 'temperature')). Las listas de escalares se tratan como un valor.
+    """
+    flat = {}
+    items = enumerate(sample) if isinstance(sample, list) else sample.items()
+    for key, value in items:
+        if key in IGNORED_KEYS:
+            continue
+        path = prefix + (key,)
+        if isinstance(value, dict) or (isinstance(value, list) and value and isinstance(value[0], dict)):
+            flat.update(flatten_sample(value, path))
+        elif isinstance(value, list):
+            flat[path] = tuple(value)
+        else:
+            flat[path] = value
+    return flat
+
+
+class MonitorDelta:
+    """
+    Registro compacto de una actualización del monitor: solo las métricas que cambiaron
+    ({ruta: valor}) y las que desaparecieron (un disco o una interfaz que ya no está).
+    """
+
+    __slots__ = ("timestamp", "changes", "removed", "full")
+
+    def __init__(self, timestamp, changes, removed=(), full=False):
+        self.timestamp = timestamp
+        self.changes = changes
+        self.removed = set(removed)
+        self.full = full
+
+    def merge(self, newer):
+        """Acumula una actualización posterior sobre esta (coalescencia)."""
+        self.timestamp = newer.timestamp
+        if newer.full:
+            self.changes, self.removed, self.full = dict(newer.changes), set(newer.removed), True
+            return
+        for path in newer.removed:
+            self.changes.pop(path, None)
+        self.removed = (self.removed - set(newer.changes)) | newer.removed
+        self.changes.update(newer.changes)
+
+    def touches(self, *prefixes):
+        """True si alguna métrica cambiada o eliminada empieza por alguno de los prefijos indicados."""
+        return any(path[0] in prefixes for path in self.changes) or any(path[0] in prefixes for path in self.removed)
+
+    def __len__(self):
+        return len(self.changes) + len(self.removed)
+
+
+class DeltaEncoder:
+    """
+    Decide qué métricas de una muestra hay que enviar: las que se movieron más que su
+    umbral respecto al último valor enviado, o las que llevan 'max_staleness' segundos sin
+    enviarse (así un valor que se quedó justo por debajo del umbral acaba mostrándose).
+    """
+
+    def __init__(self, thresholds=None, max_staleness=30.0):
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.max_staleness = max_staleness
+        self.sent = {}     # ruta -> último valor enviado
+        self.sent_at = {}  # ruta -> momento del último envío
+
+    def _threshold(self, path, last):
+        name = path[-1]
+        if isinstance(name, str) and name.endswith('_bps'):
+            return max(abs(last) * RATE_RELATIVE_THRESHOLD, RATE_MIN_THRESHOLD)
+        return self.thresholds.get(name, 0)
+
+    def _changed(self, path, value, last):
+        if isinstance(value, (int, float)) and isinstance(last, (int, float)) and not isinstance(value, bool):
+            return abs(value - last) > self._threshold(path, last)
+        if isinstance(value, tuple) and isinstance(last, tuple) and len(value) == len(last) and value \
+                and all(isinstance(v, (int, float)) for v in value):
+            # Series de números (p. ej. la carga por núcleo): cambia si alguno supera el umbral.
+            threshold = self.thresholds.get(path[-1], 0)
+            return any(abs(v - l) > threshold for v, l in zip(value, last))
+        return value != last
+
+    def encode(self, sample, now):
+        """Devuelve un MonitorDelta (vacío si no hay nada que enviar)."""
+        flat = flatten_sample(sample)
+        changes = {}
+        for path, value in flat.items():
+            if (path not in self.sent or self._changed(path, value, self.sent[path])
+                    or now - self.sent_at[path] >= self.max_staleness):
+                changes[path] = value
+        removed = set(self.sent) - set(flat)
+        for path in removed:
+            del self.sent[path], self.sent_at[path]
+        for path, value in changes.items():
+            self.sent[path] = value
+            self.sent_at[path] = now
+        return MonitorDelta(sample.get('timestamp', now), changes, removed)
+
+    def snapshot(self, sample, now):
+        """
+        Un MonitorDelta completo de la muestra (para quien se conecta tarde o se resincroniza).
+        Pasa a ser la referencia respecto a la que se calculan los siguientes cambios.
+        """
+        flat = flatten_sample(sample)
+        self.sent = dict(flat)
+        self.sent_at = dict.fromkeys(flat, now)
+        return MonitorDelta(sample.get('timestamp', now), flat, full=True)
+
+
+class DeltaMailbox:
+    """
+    Buzón de una sola entrada entre el hilo del monitor y la GUI. Si la GUI aún no recogió
+    la actualización anterior, la nueva se fusiona con ella en lugar de encolar otro evento:
+    como mucho hay un evento en vuelo, sea cual sea el número de métricas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = None
+
+    def put(self, delta):
+        """Devuelve True si hay que avisar al consumidor (no había nada pendiente)."""
+        with self._lock:
+            if self._pending is None:
+                self._pending = delta
+                return True
+            self._pending.merge(delta)
+            return False
+
+    def take(self):
+        with self._lock:
+            delta, self._pending = self._pending, None
+            return delta
+
+
+class DeltaPublisher:
+    """
+    Encoder y buzón juntos: lo que una fuente de muestras (el monitor en vivo o una
+    grabación reproducida) necesita para alimentar a la GUI con MonitorDelta.
+    """
+
+    def __init__(self, thresholds=None, max_staleness=30.0):
+        self._encoder = DeltaEncoder(thresholds, max_staleness)
+        self._mailbox = DeltaMailbox()
+        self._lock = threading.Lock()
+
+    def publish(self, sample, now):
+        """Codifica la muestra; devuelve True si hay que avisar al consumidor."""
+        with self._lock:
+            delta = self._encoder.encode(sample, now)
+        return bool(len(delta)) and self._mailbox.put(delta)
+
+    def take(self):
+        return self._mailbox.take()
+
+    def resync(self, sample, now):
+        """Descarta lo pendiente y devuelve un MonitorDelta completo de la muestra."""
+        with self._lock:
+            self._mailbox.take()
+            return self._encoder.snapshot(sample, now)
+
+
+class SampleState:
+    """Reconstruye, en el lado de la GUI, la muestra anidada a partir de los MonitorDelta recibidos."""
+
+    def __init__(self):
+        self.values = {}
+
+    def apply(self, delta):
+        if delta.full:
+            self.values = {}
+        for path in delta.removed:
+            self.values.pop(path, None)
+        self.values.update(delta.changes)
+
+    def get(self, *path, default=None):
+        return self.values.get(path, default)
+
+    def collection(self, key):
+        """
+        Las entradas bajo una clave de primer nivel como {subclave: {métrica: valor}}
+        (p. ej. 'gpus' -> {0: {...}, 1: {...}}).
+        """
+        result = {}
+        for path, value in self.values.items():
+            if path[0] == key and len(path) == 3:
+                result.setdefault(path[1], {})[path[2]] = value
+        return result
@@ -3,6 +3,7 @@
 import winreg
 from .state_manager import StateManager
 from .registry_manager import RegistryManager
+from .nic_tuner import NicPropertyTuner
 
 class NetworkOptimizer:
     def __init__(self, state_manager: StateManager, reg_manager: RegistryManager, console_logger):
@@ -22,6 +23,7 @@ class NetworkOptimizer:
             "TcpAckFrequency": 1,
             "TCPNoDelay": 1
         }
+        self.nic_tuner = NicPropertyTuner(reg_manager, state_manager, console_logger)
 
     def _get_network_interface_guids(self):
         """
@@ -60,7 +62,7 @@ class NetworkOptimizer:
 
     def manage_nagle_algorithm(self, action='disable', profile=None):
         """Desactiva o restaura el Algoritmo de Nagle basándose en el perfil."""
-        if not profile or not profile.get('enabled', False):
+        if action == 'disable' and (not profile or not profile.get('enabled', False)):
             self.log("\n[INFO] La optimización del Algoritmo de Nagle está desactivada en este perfil.")
             return
 
@@ -73,6 +75,7 @@ class NetworkOptimizer:
             return
 
         self.log(f"[INFO] Encontradas {len(interface_guids)} interfaces de red para analizar.")
+        restored = []
         
         for guid in interface_guids:
             reg_path = fr"HKEY_LOCAL_MACHINE\SYSTEM\CurrentControlSet\Services\Tcpip\Parameters\Interfaces\{guid}"
@@ -101,8 +104,46 @@ class NetworkOptimizer:
                             self.reg_manager.delete_value(reg_path, key_name)
                         else:
                             self.reg_manager.set_value(reg_path, key_name, saved_state["value"], saved_state["type"])
+                        restored.append(state_key)
         
+        if restored:
+            self.state_manager.remove_state(*restored)
         if action == 'disable':
             self.log(f"[OK] Tweaks de red aplicados a {len(interface_guids)} interfaces.")
         elif action == 'restore':
-            self.log(f"[OK] Tweaks de red restaurados en {len(interface_guids)} interfaces.")
\ No newline at end of file
+            self.log(f"[OK] Tweaks de red restaurados en {len(interface_guids)} interfaces.")
+
+    def manage_nic_properties(self, action='disable', profile=None):
+        """Aplica o restaura las propiedades avanzadas de los adaptadores de red definidas en el perfil."""
+        if action == 'disable' and (not profile or not profile.get('enabled', False)):
+            self.log("\n[INFO] El ajuste de propiedades del adaptador de red está desactivado en este perfil.")
+            return
+
+        if action == 'restore':
+            self.log("\n[+] Restaurando propiedades avanzadas de los adaptadores de red...")
+            restored = self.nic_tuner.restore()
+            self.log(f"[OK] {restored} propiedades de adaptador restauradas." if restored else
+                     "[INFO] No había propiedades de adaptador que restaurar.")
+            return
+
+        self.log("\n[+] Ajustando propiedades avanzadas de los adaptadores de red...")
+        applied = self.nic_tuner.apply(profile.get('properties', {}))
+        if not applied:
+            self.log("[OK] Los adaptadores ya tenían los valores del perfil (o no admiten esas propiedades).")
+            return
+        for change in applied:
+            self.log(f"[INFO] {change['adapter']}: {change['keyword']} = {change['value']}")
+        self.log(f"[OK] {len(applied)} propiedades ajustadas. Se aplicarán al reiniciar el adaptador o el equipo.")
+
+    def update_nic_properties(self, previous, profile):
+        """
+        Pasa de las propiedades de adaptador de un perfil a las de otro: las que solo ajustaba
+        el anterior vuelven a su valor original y el resto se aplica encima, sin restaurar antes
+        las comunes (los originales guardados se conservan).
+        """
+        dropped = [keyword for keyword in previous.get('properties', {}) if keyword not in profile.get('properties', {})]
+        if dropped:
+            self.log(f"\n[+] Restaurando propiedades de adaptador que el nuevo perfil no usa: {', '.join(dropped)}")
+            restored = self.nic_tuner.restore(dropped)
+            self.log(f"[OK] {restored} propiedades de adaptador restauradas.")
+        self.manage_nic_properties('disable', profile)
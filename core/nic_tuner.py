@@ -0,0 +1,221 @@
+# core/nic_tuner.py
+
+import logging
+
+try:
+    import winreg
+    REG_SZ = winreg.REG_SZ
+except ImportError:
+    REG_SZ = 1 # Mismo valor que winreg.REG_SZ, para poder usar InMemoryRegistry fuera de Windows.
+
+NET_CLASS_PATH = r"HKEY_LOCAL_MACHINE\SYSTEM\CurrentControlSet\Control\Class\{4d36e972-e325-11ce-bfc1-08002be10318}"
+
+
+class InMemoryRegistry:
+    """
+    Registro simulado con la misma interfaz que RegistryManager (get_value, set_value,
+    delete_value, enum_subkeys, enum_values). Permite ejecutar NicPropertyTuner con un
+    registro de prueba en cualquier sistema operativo.
+
+    Como en el registro real, las rutas no distinguen mayúsculas pero conservan su forma
+    original al enumerarlas. Cada clave guarda {nombre: (valor, tipo)}.
+    """
+
+    def __init__(self, keys=None):
+        self.keys = {}   # ruta en minúsculas -> valores
+        self.names = {}  # ruta en minúsculas -> ruta original
+        for path, values in (keys or {}).items():
+            self._key(path, create=True)
+            for name, value in values.items():
+                self.set_value(path, name, *(value if isinstance(value, tuple) else (value, REG_SZ)))
+
+    def _key(self, path, create=False):
+        if create:
+            # Crear una clave crea también sus padres, igual que CreateKeyEx.
+            parts = path.split('\\')
+            for i in range(1, len(parts) + 1):
+                partial = '\\'.join(parts[:i])
+                self.keys.setdefault(partial.lower(), {})
+                self.names.setdefault(partial.lower(), partial)
+        return self.keys.get(path.lower())
+
+    def get_value(self, key_path, value_name):
+        return self.keys.get(key_path.lower(), {}).get(value_name, (None, None))
+
+    def set_value(self, key_path, value_name, value, value_type=REG_SZ):
+        self._key(key_path, create=True)[value_name] = (value, value_type)
+        return True
+
+    def delete_value(self, key_path, value_name):
+        self.keys.get(key_path.lower(), {}).pop(value_name, None)
+        return True
+
+    def enum_subkeys(self, key_path):
+        prefix = key_path.lower() + '\\'
+        return sorted({self.names[path][len(prefix):].split('\\', 1)[0] for path in self.keys if path.startswith(prefix)})
+
+    def enum_values(self, key_path):
+        return dict(self.keys.get(key_path.lower(), {}))
+
+
+class NicPropertyTuner:
+    """
+    Ajusta las propiedades avanzadas estandarizadas (palabras clave con '*') de los
+    adaptadores de red: moderación de interrupciones, RSS, búferes, EEE, control de flujo, LSO...
+
+    En una sola pasada por la clase de red se lee, para cada adaptador, el valor actual de
+    cada palabra clave y su definición en 'Ndi\\Params' (tipo, valor por defecto, rango u
+    opciones del enum). Solo se escriben los objetivos que el driver soporta, que son válidos
+    y que difieren del valor actual; el valor original se guarda en StateManager.
+    """
+
+    STATE_KEY = "nic_properties"
+    DELETE_MARKER = "__DELETE__"
+
+    def __init__(self, registry, state_manager, console_logger):
+        """
+        Args:
+            registry: RegistryManager o un registro compatible (InMemoryRegistry).
+            state_manager (StateManager): Donde se guardan los valores originales.
+            console_logger (function): Una función callback para imprimir mensajes en la GUI.
+        """
+        self.registry = registry
+        self.state_manager = state_manager
+        self.log = console_logger
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def read_adapters(self):
+        """
+        Returns:
+            list[dict]: Adaptadores con 'path', 'guid', 'description' y 'properties'
+                ({palabra_clave: {'current', 'default', 'type', 'options', 'min', 'max'}}).
+        """
+        adapters = []
+        for subkey in self.registry.enum_subkeys(NET_CLASS_PATH):
+            if not subkey.isdigit():
+                continue # 'Properties' y similares no son adaptadores.
+            path = f"{NET_CLASS_PATH}\\{subkey}"
+            values = self.registry.enum_values(path)
+            # Los nombres de valor del registro no distinguen mayúsculas.
+            current_values = {name.lower(): value for name, (value, _) in values.items()}
+            if "netcfginstanceid" not in current_values:
+                continue
+            params_path = f"{path}\\Ndi\\Params"
+            properties = {}
+            for keyword in self.registry.enum_subkeys(params_path):
+                if not keyword.startswith("*"):
+                    continue
+                param = self.registry.enum_values(f"{params_path}\\{keyword}")
+                options = {name: value for name, (value, _) in
+                           self.registry.enum_values(f"{params_path}\\{keyword}\\Enum").items()}
+                current = current_values.get(keyword.lower())
+                default = param.get("default", (None, None))[0]
+                properties[keyword] = {
+                    'description': param.get("ParamDesc", (keyword, None))[0],
+                    'type': str(param.get("type", ("enum" if options else "edit", None))[0]).lower(),
+                    'current': None if current is None else str(current),
+                    'default': None if default is None else str(default),
+                    'options': options,
+                    'min': self._to_int(param.get("min", (None, None))[0]),
+                    'max': self._to_int(param.get("max", (None, None))[0]),
+                }
+            adapters.append({
+                'path': path,
+                'guid': current_values["netcfginstanceid"],
+                'description': current_values.get("driverdesc", subkey),
+                'properties': properties,
+            })
+        return adapters
+
+    def _to_int(self, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _is_valid(self, definition, target):
+        if definition['options']:
+            return target in definition['options']
+        if definition['type'] in ("int", "long", "dword", "word"):
+            number = self._to_int(target)
+            if number is None:
+                return False
+            if definition['min'] is not None and number < definition['min']:
+                return False
+            if definition['max'] is not None and number > definition['max']:
+                return False
+        return True
+
+    def plan(self, targets, adapters=None):
+        """
+        Calcula los cambios sin aplicarlos.
+
+        Returns:
+            list[dict]: {'adapter', 'path', 'keyword', 'original', 'value'} por cada cambio necesario.
+        """
+        changes = []
+        for adapter in adapters if adapters is not None else self.read_adapters():
+            supported = {name.lower(): name for name in adapter['properties']}
+            for keyword, target in (targets or {}).items():
+                if keyword.lower() not in supported:
+                    continue # El driver no expone esta propiedad.
+                keyword = supported[keyword.lower()]
+                definition = adapter['properties'][keyword]
+                target = str(target)
+                if not self._is_valid(definition, target):
+                    self.logger.info(f"'{target}' no es un valor admitido de {keyword} en '{adapter['description']}'.")
+                    continue
+                effective = definition['current'] if definition['current'] is not None else definition['default']
+                if effective == target:
+                    continue
+                changes.append({
+                    'adapter': adapter['description'],
+                    'path': adapter['path'],
+                    'keyword': keyword,
+                    'original': definition['current'],
+                    'value': target,
+                })
+        return changes
+
+    def apply(self, targets):
+        """Aplica los objetivos del perfil. Devuelve la lista de cambios realizados."""
+        changes = self.plan(targets)
+        saved = self.state_manager.get_state(self.STATE_KEY) or {}
+        applied = []
+        for change in changes:
+            originals = saved.setdefault(change['path'], {})
+            # Solo se guarda el primer original: reaplicar no debe pisar el valor de fábrica.
+            originals.setdefault(change['keyword'],
+                                 self.DELETE_MARKER if change['original'] is None else change['original'])
+            if self.registry.set_value(change['path'], change['keyword'], change['value'], REG_SZ):
+                applied.append(change)
+        if changes:
+            self.state_manager.save_state(self.STATE_KEY, saved)
+        return applied
+
+    def restore(self, keywords=None):
+        """
+        Restaura los valores originales guardados (todos, o solo los de 'keywords') y los
+        quita del backup. Devuelve el número de propiedades restauradas.
+        """
+        saved = self.state_manager.get_state(self.STATE_KEY) or {}
+        wanted = None if keywords is None else {keyword.lower() for keyword in keywords}
+        restored, remaining = 0, {}
+        for path, originals in saved.items():
+            for keyword, original in originals.items():
+                if wanted is not None and keyword.lower() not in wanted:
+                    remaining.setdefault(path, {})[keyword] = original
+                    continue
+                if original == self.DELETE_MARKER:
+                    ok = self.registry.delete_value(path, keyword)
+                else:
+                    ok = self.registry.set_value(path, keyword, original, REG_SZ)
+                if ok:
+                    restored += 1
+                else:
+                    remaining.setdefault(path, {})[keyword] = original
+        if remaining:
+            self.state_manager.save_state(self.STATE_KEY, remaining)
+        else:
+            self.state_manager.remove_state(self.STATE_KEY)
+        return restored
@@ -0,0 +1,91 @@
+# core/operation_journal.py
+import json
+import os
+import time
+import logging
+
+def write_json_atomically(path, data, indent=None):
+    """
+    Escribe un JSON de forma que, si el proceso o el equipo caen a mitad, en disco quede
+    o la versión anterior completa o la nueva completa, nunca un archivo truncado.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class OperationJournal:
+    """
+    Registro persistente de la operación de aplicar/restaurar en curso.
+
+    Cada paso se marca como 'started' justo antes de ejecutarse (intención) y como 'done'
+    al terminar (confirmación). Si la aplicación o el equipo caen a mitad, el archivo sigue
+    en disco y permite saber exactamente qué pasos terminaron y cuál quedó a medias.
+    """
+
+    PENDING, STARTED, DONE = "pending", "started", "done"
+
+    def __init__(self, app_name="VelocityOS"):
+        self.journal_dir = os.path.join(os.getenv('APPDATA'), app_name)
+        self.journal_file = os.path.join(self.journal_dir, 'operation_journal.json')
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.current = None
+
+    def load_interrupted(self):
+        """Devuelve la operación que quedó sin terminar en una ejecución anterior, o None."""
+        if not os.path.exists(self.journal_file):
+            return None
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            self.logger.error(f"No se pudo leer el registro de operaciones: {e}")
+            return None
+        if not isinstance(journal, dict) or 'steps' not in journal:
+            return None
+        return journal
+
+    def begin(self, operation, steps, **details):
+        """
+        Inicia (o reanuda) una operación.
+
+        Args:
+            operation (str): 'apply', 'transition', 'restore' o 'rollback'.
+            steps (list[dict]): Pasos con al menos la clave 'step'. Si ya traen 'status'
+                (reanudación) se conserva.
+            **details: Datos adicionales que se guardan con la operación (p. ej. profile_id).
+        """
+        self.current = {
+            'operation': operation,
+            'started_at': time.time(),
+            'steps': [dict(step, status=step.get('status', self.PENDING)) for step in steps],
+            **details,
+        }
+        self._persist()
+        return self.current
+
+    def mark(self, index, status, outcome=None):
+        step = self.current['steps'][index]
+        step['status'] = status
+        if outcome is not None:
+            step['outcome'] = outcome
+        self._persist()
+
+    def finish(self):
+        """Elimina el registro: la operación terminó por completo."""
+        self.current = None
+        try:
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+        except OSError as e:
+            self.logger.error(f"No se pudo eliminar el registro de operaciones: {e}")
+
+    def _persist(self):
+        try:
+            write_json_atomically(self.journal_file, self.current)
+        except IOError as e:
+            self.logger.error(f"No se pudo guardar el registro de operaciones: {e}")
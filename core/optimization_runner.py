@@ -0,0 +1,245 @@
+# core/optimization_runner.py
+
+import time
+import logging
+
+from .operation_journal import OperationJournal
+from .profile_compiler import ProfileCompiler
+from .tracing import tracer
+
+class OptimizationRunner:
+    """
+    Ejecuta las acciones compiladas de un perfil (aplicar), el cambio directo a otro perfil
+    (transición) o la restauración como transacciones con puntos de control: cada paso queda
+    registrado en el OperationJournal antes y después de ejecutarse, de modo que una
+    operación interrumpida se puede reanudar o deshacer exactamente desde donde se quedó.
+
+    El perfil aplicado se guarda en el backup ('active_profile') con sus optimizaciones tal
+    como se aplicaron; es el punto de partida de la siguiente transición.
+    """
+
+    ACTIVE_PROFILE_KEY = 'active_profile'
+
+    def __init__(self, state_manager, system_optimizer, network_optimizer, console_logger,
+                 journal=None, step_observer=None):
+        """
+        Args:
+            state_manager (StateManager): El gestor del backup de estado.
+            system_optimizer (SystemOptimizer): Optimizador del sistema.
+            network_optimizer (NetworkOptimizer): Optimizador de red.
+            console_logger (function): Una función callback para imprimir mensajes en la GUI.
+            journal (OperationJournal | None): Registro de operaciones. Se crea uno si no se indica.
+            step_observer (function | None): Se llama con (operación, paso, segundos, resultado)
+                al terminar cada paso (p. ej. para el exportador de métricas).
+        """
+        self.state_manager = state_manager
+        self.system_optimizer = system_optimizer
+        self.network_optimizer = network_optimizer
+        self.log = console_logger
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.journal = journal or OperationJournal()
+        self.step_observer = step_observer
+
+    # ------------------------------------------------------------------
+    # Pasos
+    # ------------------------------------------------------------------
+    def _apply_handlers(self):
+        """Relaciona cada paso de las acciones compiladas con la función del optimizador que lo aplica."""
+        return {
+            'power_plan': lambda opts: self.system_optimizer.optimize_power_plan(opts),
+            'services': lambda opts: self.system_optimizer.manage_services('disable', opts),
+            'app_killer': lambda opts: self.system_optimizer.manage_background_apps(opts),
+            'ram_optimizer': lambda opts: self.system_optimizer.free_up_ram(),
+            'gaming_features': lambda opts: self.system_optimizer.manage_gaming_features('disable', opts),
+            'nagle_algorithm': lambda opts: self.network_optimizer.manage_nagle_algorithm('disable', opts),
+            'nic_tuning': lambda opts: self.network_optimizer.manage_nic_properties('disable', opts),
+            'temp_files': lambda opts: self.system_optimizer.clean_temp_files(opts),
+        }
+
+    def _restore_handlers(self):
+        return {
+            'power_plan': lambda opts: self.system_optimizer.restore_power_plan(),
+            'services': lambda opts: self.system_optimizer.manage_services('restore'),
+            'gaming_features': lambda opts: self.system_optimizer.manage_gaming_features('restore'),
+            'nagle_algorithm': lambda opts: self.network_optimizer.manage_nagle_algorithm('restore'),
+            'nic_tuning': lambda opts: self.network_optimizer.manage_nic_properties('restore'),
+        }
+
+    def _update_handlers(self):
+        """Pasos que pueden pasar de las opciones de un perfil a las de otro sin restaurar antes."""
+        return {
+            'power_plan': self.system_optimizer.update_power_plan,
+            'services': self.system_optimizer.update_services,
+            'nic_tuning': self.network_optimizer.update_nic_properties,
+        }
+
+    def _handlers_for(self, operation):
+        return self._apply_handlers() if operation == 'apply' else self._restore_handlers()
+
+    def _run_step(self, operation, step):
+        if operation == 'transition':
+            if step['action'] == 'update':
+                return self._update_handlers()[step['step']](step['previous'], step['options'])
+            return self._handlers_for(step['action'])[step['step']](step.get('options'))
+        return self._handlers_for('apply' if operation == 'apply' else 'restore')[step['step']](step.get('options'))
+
+    def plan_transition(self, current, target):
+        """
+        Compara el estado efectivo del perfil activo con el del perfil de destino.
+
+        Args:
+            current (dict): Perfil activo ({'optimizations'} tal como se aplicaron).
+            target (dict): Perfil compilado de destino.
+
+        Returns:
+            list[dict]: Solo los pasos necesarios, en el orden de aplicación:
+                {'step', 'action': 'apply' | 'restore' | 'update', 'options'} y, en 'update',
+                'previous' con las opciones del perfil activo.
+        """
+        disabled = {'enabled': False}
+        updatable = self._update_handlers()
+        steps = []
+        for key in ProfileCompiler.APPLY_ORDER:
+            before = current['optimizations'].get(key, disabled)
+            after = target['optimizations'].get(key, disabled)
+            was_enabled, enabled = before.get('enabled', False), after.get('enabled', False)
+            if before == after or not (was_enabled or enabled):
+                continue
+            if key not in ProfileCompiler.RESTORE_ORDER:
+                # Acciones puntuales (cerrar aplicaciones, liberar RAM, limpiar temporales):
+                # se ejecutan si el destino las pide y el perfil activo no lo hacía igual.
+                if enabled:
+                    steps.append({'step': key, 'action': 'apply', 'options': after})
+            elif not enabled:
+                steps.append({'step': key, 'action': 'restore'})
+            elif not was_enabled:
+                steps.append({'step': key, 'action': 'apply', 'options': after})
+            elif key in updatable:
+                steps.append({'step': key, 'action': 'update', 'options': after, 'previous': before})
+        return steps
+
+    def active_profile(self):
+        """El perfil aplicado ahora mismo ({'id', 'name', 'optimizations'}), o None."""
+        return self.state_manager.get_state(self.ACTIVE_PROFILE_KEY)
+
+    # ------------------------------------------------------------------
+    # Operaciones
+    # ------------------------------------------------------------------
+    def apply(self, profile):
+        """Aplica las acciones compiladas del perfil como una transacción."""
+        steps = [{'step': action['step'], 'options': action['options']} for action in profile['actions']['apply']]
+        self.journal.begin('apply', steps, profile_id=profile['id'], profile_name=profile['name'],
+                           optimizations=profile['optimizations'])
+        self._execute()
+
+    def transition(self, profile):
+        """
+        Cambia directamente del perfil activo a 'profile' aplicando solo la diferencia. Los
+        valores originales del backup (de antes del primer perfil) se conservan, de modo que
+        una restauración posterior sigue volviendo al estado inicial del sistema.
+        """
+        current = self.active_profile()
+        if current is None:
+            raise ValueError("No hay un perfil activo desde el que cambiar.")
+        steps = self.plan_transition(current, profile)
+        labels = {'apply': "aplicar", 'restore': "restaurar", 'update': "ajustar"}
+        summary = ", ".join(f"{step['step']} ({labels[step['action']]})" for step in steps) or "ninguno"
+        self.log(f"[INFO] Cambio de '{current['name']}' a '{profile['name']}'. Pasos necesarios: {summary}.")
+        if not profile['optimizations'].get('temp_files', {}).get('enabled', False):
+            # La limpieza no es reversible, pero la programada por el perfil anterior no debe seguir.
+            self.system_optimizer.cancel_temp_cleanup()
+        self.journal.begin('transition', steps, profile_id=profile['id'], profile_name=profile['name'],
+                           from_profile_id=current['id'], optimizations=profile['optimizations'])
+        self._execute()
+
+    def restore(self):
+        """Restaura todos los pasos reversibles y elimina el backup al terminar."""
+        steps = [{'step': step} for step in ProfileCompiler.RESTORE_ORDER]
+        self.system_optimizer.cancel_temp_cleanup()
+        self.journal.begin('restore', steps)
+        self._execute()
+
+    def interrupted_operation(self):
+        """Devuelve la operación que quedó a medias en una ejecución anterior, o None."""
+        return self.journal.load_interrupted()
+
+    def resume(self, interrupted):
+        """Continúa una operación interrumpida, saltando los pasos que ya terminaron."""
+        details = {k: v for k, v in interrupted.items() if k not in ('operation', 'steps', 'started_at')}
+        done = sum(1 for step in interrupted['steps'] if step['status'] == OperationJournal.DONE)
+        self.log(f"[INFO] Reanudando '{interrupted['operation']}': {done}/{len(interrupted['steps'])} pasos ya completados.")
+        self.journal.begin(interrupted['operation'], interrupted['steps'], **details)
+        self._execute()
+
+    def rollback(self, interrupted):
+        """
+        Deshace una aplicación interrumpida: restaura, en orden inverso, solo los pasos
+        reversibles que llegaron a empezar. Los que nunca se ejecutaron no se tocan.
+        """
+        if interrupted['operation'] == 'rollback':
+            return self.resume(interrupted)
+        if interrupted['operation'] != 'apply':
+            raise ValueError("Solo se puede deshacer una aplicación interrumpida; una restauración se reanuda.")
+
+        touched = [step['step'] for step in interrupted['steps'] if step['status'] != OperationJournal.PENDING]
+        reversible = [{'step': step} for step in reversed(touched) if step in ProfileCompiler.RESTORE_ORDER]
+        self.log(f"[INFO] Deshaciendo la aplicación interrumpida ({len(reversible)} pasos reversibles).")
+        self.system_optimizer.cancel_temp_cleanup()
+        self.journal.begin('rollback', reversible, profile_id=interrupted.get('profile_id'))
+        self._execute()
+
+    def discard_interrupted(self):
+        """Olvida una operación interrumpida sin tocar el sistema."""
+        self.journal.finish()
+
+    def _execute(self):
+        operation = self.journal.current['operation']
+
+        with tracer.span(operation, "operation", profile_id=self.journal.current.get('profile_id')):
+            for index, step in enumerate(self.journal.current['steps']):
+                if step['status'] == OperationJournal.DONE:
+                    self.logger.info(f"Paso '{step['step']}' ya completado, se omite.")
+                    continue
+
+                self.journal.mark(index, OperationJournal.STARTED)
+                start = time.perf_counter()
+                outcome = "ok"
+                with tracer.span(step['step'], "step", operation=operation) as span:
+                    try:
+                        self._run_step(operation, step)
+                    except Exception as e:
+                        outcome = "error"
+                        span.set(error=str(e))
+                        self.log(f"[ERROR] El paso '{step['step']}' falló: {e}")
+                        self.logger.error(f"Paso '{step['step']}' de '{operation}' fallido", exc_info=True)
+                    finally:
+                        span.set_outcome(outcome)
+                        if self.step_observer:
+                            self.step_observer(operation, step['step'], time.perf_counter() - start, outcome)
+                # Un fallo controlado también cierra el paso: reintentarlo al reanudar no lo arreglaría.
+                self.journal.mark(index, OperationJournal.DONE, outcome)
+
+            if operation in ('restore', 'rollback'):
+                self.state_manager.clear_backup()
+            else:
+                self._save_active_profile()
+        self.journal.finish()
+        self._export_trace(operation)
+
+    def _save_active_profile(self):
+        current = self.journal.current
+        # Registros de versiones anteriores no guardaban las optimizaciones: se deducen de los pasos.
+        optimizations = current.get('optimizations') or {
+            step['step']: step['options'] for step in current['steps'] if step.get('options')}
+        self.state_manager.save_state(self.ACTIVE_PROFILE_KEY, {
+            'id': current.get('profile_id'),
+            'name': current.get('profile_name'),
+            'optimizations': optimizations,
+        })
+
+    def _export_trace(self, operation):
+        if not tracer.enabled:
+            return
+        path = tracer.export_chrome_trace(label=operation)
+        if path:
+            self.log(f"[INFO] Traza de la operación guardada en: {path}")
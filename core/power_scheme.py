@@ -0,0 +1,340 @@
+# core/power_scheme.py
+
+import re
+import logging
+
+GUID_PATTERN = r'[a-fA-F0-9]{8}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}'
+_GUID_LINE = re.compile(rf':\s*({GUID_PATTERN})\s*(?:\((.*)\))?\s*(\*)?\s*$')
+_HEX_LINE = re.compile(r':\s*0x([0-9a-fA-F]+)\s*$')
+_INDEX_LINE = re.compile(r':\s*(\d{3})\s*$')
+_TEXT_LINE = re.compile(r':\s*(.+?)\s*$')
+
+
+class PowerSetting:
+    """Un ajuste de energía con sus valores actuales en corriente alterna (AC) y batería (DC)."""
+
+    def __init__(self, guid, name):
+        self.guid = guid
+        self.name = name
+        self.alias = None
+        self.minimum = None
+        self.maximum = None
+        self.increment = None
+        self.units = None
+        self.options = {}   # Índice -> nombre, para los ajustes enumerados.
+        self.ac_value = None
+        self.dc_value = None
+
+    def accepts(self, value):
+        """Comprueba si el valor está dentro del rango o entre las opciones del ajuste."""
+        if self.options:
+            return value in self.options
+        if self.minimum is not None and value < self.minimum:
+            return False
+        if self.maximum is not None and value > self.maximum:
+            return False
+        return True
+
+
+class PowerSubgroup:
+    def __init__(self, guid, name):
+        self.guid = guid
+        self.name = name
+        self.alias = None
+        self.settings = {}
+
+
+class PowerScheme:
+    def __init__(self, guid, name):
+        self.guid = guid
+        self.name = name
+        self.alias = None
+        self.subgroups = {}
+
+    def find_setting(self, subgroup_guid, setting_guid):
+        subgroup = self.subgroups.get(subgroup_guid.lower())
+        return subgroup.settings.get(setting_guid.lower()) if subgroup else None
+
+
+def parse_powercfg_query(output):
+    """
+    Convierte la salida de 'powercfg /query' o '/qh' en un PowerScheme.
+
+    Las etiquetas de powercfg están traducidas al idioma del sistema, así que el análisis
+    no depende de ellas: se basa en la sangría (plan > subgrupo > ajuste) y en la forma
+    de cada valor (GUID, hexadecimal, índice de tres cifras o texto).
+    """
+    scheme = subgroup = setting = None
+    scheme_indent = subgroup_indent = setting_indent = None
+    detail_hex_count = current_hex_count = 0
+    pending_index = None
+
+    for raw_line in output.splitlines():
+        if not raw_line.strip():
+            continue
+        indent = len(raw_line) - len(raw_line.lstrip())
+        line = raw_line.rstrip()
+
+        guid_match = _GUID_LINE.search(line)
+        if guid_match:
+            guid, name = guid_match.group(1).lower(), (guid_match.group(2) or "").strip()
+            if scheme is None or indent <= scheme_indent:
+                scheme, scheme_indent = PowerScheme(guid, name), indent
+                subgroup = setting = None
+            elif subgroup_indent is None or indent <= subgroup_indent:
+                subgroup, subgroup_indent = PowerSubgroup(guid, name), indent
+                scheme.subgroups[guid] = subgroup
+                setting = None
+            else:
+                setting, setting_indent = PowerSetting(guid, name), indent
+                subgroup.settings[guid] = setting
+                detail_hex_count = current_hex_count = 0
+                pending_index = None
+            continue
+
+        if scheme is None:
+            continue
+
+        hex_match = _HEX_LINE.search(line)
+        if hex_match and setting is not None:
+            value = int(hex_match.group(1), 16)
+            if indent > setting_indent:
+                # Detalle del ajuste: mínimo, máximo e incremento, en ese orden.
+                if detail_hex_count == 0:
+                    setting.minimum = value
+                elif detail_hex_count == 1:
+                    setting.maximum = value
+                elif detail_hex_count == 2:
+                    setting.increment = value
+                detail_hex_count += 1
+            else:
+                # Valores actuales: primero AC, después DC.
+                if current_hex_count == 0:
+                    setting.ac_value = value
+                else:
+                    setting.dc_value = value
+                current_hex_count += 1
+            continue
+
+        index_match = _INDEX_LINE.search(line)
+        if index_match and setting is not None and indent > setting_indent:
+            pending_index = int(index_match.group(1))
+            continue
+
+        text_match = _TEXT_LINE.search(line)
+        if not text_match:
+            continue
+        text = text_match.group(1)
+        if pending_index is not None:
+            setting.options[pending_index] = text
+            pending_index = None
+        elif re.fullmatch(r'[A-Z0-9_]+', text):
+            # Alias de GUID (SCHEME_BALANCED, SUB_PROCESSOR, PROCTHROTTLEMIN...).
+            target = setting or subgroup or scheme
+            if target is setting and indent <= setting_indent:
+                target = subgroup
+            target.alias = text
+        elif setting is not None and detail_hex_count >= 3 and indent > setting_indent:
+            setting.units = text
+
+    return scheme
+
+
+def parse_powercfg_list(output):
+    """Convierte la salida de 'powercfg /list' en una lista de (guid, nombre, activo)."""
+    schemes = []
+    for line in output.splitlines():
+        match = _GUID_LINE.search(line.rstrip())
+        if match:
+            schemes.append((match.group(1).lower(), (match.group(2) or "").strip(), bool(match.group(3))))
+    return schemes
+
+
+class PowerSchemeManager:
+    """
+    Gestiona los planes de energía a partir de un modelo estructurado de 'powercfg /qh'.
+
+    Cada plan se analiza una sola vez y se guarda en caché hasta que se modifica.
+    Los ajustes se aplican en lote (una única invocación de la consola) y se guarda el
+    valor original de cada uno para poder restaurarlos exactamente.
+    """
+
+    HIGH_PERFORMANCE_GUID = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+    ULTIMATE_PERFORMANCE_GUID = "e9a42b02-d5df-448d-aa00-03f14749eb61"
+    BALANCED_GUID = "381b4222-f694-41f0-9685-ff5bb260df2e"
+
+    # Nombre usado en los perfiles -> (subgrupo, ajuste).
+    KNOWN_SETTINGS = {
+        "core_parking_min_cores": ("54533251-82be-4824-96c1-47b60b740d00", "0cc5b647-c1df-4637-891a-dec35c318583"),
+        "min_processor_state": ("54533251-82be-4824-96c1-47b60b740d00", "893dee8e-2bef-41e0-89c6-b55d0929964c"),
+        "pcie_link_state": ("501a4d13-42af-4429-9fd1-a8218c268e20", "ee12f906-d277-404b-b6da-e5fa1a576df5"),
+        "usb_selective_suspend": ("2a737441-1930-4402-8d77-b2bebba308a3", "48e6b7a6-50f5-4782-a5d4-53bb8f07e226"),
+    }
+
+    def __init__(self, run_command, console_logger):
+        """
+        Args:
+            run_command (function): El ejecutor de comandos de SystemOptimizer (_run_command).
+            console_logger (function): Una función callback para imprimir mensajes en la GUI.
+        """
+        self.run_command = run_command
+        self.log = console_logger
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._models = {}
+
+    def list_schemes(self):
+        output = self.run_command("powercfg /list")
+        return parse_powercfg_list(output) if output else []
+
+    def active_scheme_guid(self):
+        output = self.run_command("powercfg /getactivescheme")
+        match = re.search(GUID_PATTERN, output or "")
+        return match.group(0).lower() if match else None
+
+    def query(self, scheme_guid):
+        """Devuelve el modelo del plan (incluidos los ajustes ocultos), usando la caché si existe."""
+        scheme_guid = scheme_guid.lower()
+        if scheme_guid not in self._models:
+            output = self.run_command(f"powercfg /qh {scheme_guid}")
+            if not output:
+                return None
+            self._models[scheme_guid] = parse_powercfg_query(output)
+        return self._models[scheme_guid]
+
+    def invalidate(self, scheme_guid=None):
+        if scheme_guid is None:
+            self._models.clear()
+        else:
+            self._models.pop(scheme_guid.lower(), None)
+
+    def duplicate(self, source_guid, name=None):
+        """Clona un plan (también las plantillas ocultas, como Máximo rendimiento). Devuelve el GUID nuevo."""
+        output = self.run_command(f"powercfg /duplicatescheme {source_guid}")
+        match = re.search(GUID_PATTERN, output or "")
+        if not match:
+            return None
+        new_guid = match.group(0).lower()
+        if name:
+            self.run_command(f'powercfg /changename {new_guid} "{name}"')
+        return new_guid
+
+    def resolve_target_scheme(self, preference, created_scheme=None):
+        """
+        Elige (o crea) el plan de destino según la preferencia del perfil.
+
+        Args:
+            preference (str): 'ultimate', 'high_performance' o 'active'.
+            created_scheme (str | None): Plan creado en una aplicación anterior; se reutiliza
+                si sigue existiendo para no clonar uno nuevo cada vez.
+
+        Returns:
+            tuple[str | None, bool]: (GUID del plan, True si lo ha creado VelocityOS).
+        """
+        existing = {guid for guid, _, _ in self.list_schemes()}
+        if created_scheme in existing and preference != "active":
+            return created_scheme, True
+        if preference == "ultimate":
+            if self.ULTIMATE_PERFORMANCE_GUID in existing:
+                return self.ULTIMATE_PERFORMANCE_GUID, False
+            new_guid = self.duplicate(self.ULTIMATE_PERFORMANCE_GUID, "VelocityOS - Máximo rendimiento")
+            if new_guid:
+                return new_guid, True
+            self.log("[INFO] No se pudo crear 'Máximo rendimiento'. Probando con 'Alto rendimiento'.")
+            preference = "high_performance"
+
+        if preference == "high_performance":
+            if self.HIGH_PERFORMANCE_GUID in existing:
+                return self.HIGH_PERFORMANCE_GUID, False
+            # En portátiles y equipos con Modern Standby solo suele existir 'Equilibrado':
+            # se clona el plan activo y se ajusta con los valores del perfil.
+            self.log("[INFO] 'Alto rendimiento' no existe en este equipo. Se creará un plan propio a partir del actual.")
+            source = self.active_scheme_guid() or self.BALANCED_GUID
+            new_guid = self.duplicate(source, "VelocityOS - Rendimiento")
+            return new_guid, new_guid is not None
+
+        return self.active_scheme_guid(), False
+
+    def plan_changes(self, scheme_guid, settings):
+        """
+        Calcula qué ajustes hay que cambiar realmente en el plan. El valor del perfil se
+        aplica tanto en corriente alterna (AC) como con batería (DC).
+
+        Returns:
+            list[dict]: Cambios con subgrupo, ajuste, valores originales y valores nuevos.
+                'dc_value' es None si el ajuste no tiene valor de batería.
+        """
+        model = self.query(scheme_guid)
+        if model is None:
+            return []
+        changes = []
+        for name, value in (settings or {}).items():
+            if name not in self.KNOWN_SETTINGS:
+                self.log(f"[WARN] Ajuste de energía desconocido '{name}'. Omitiendo.")
+                continue
+            subgroup_guid, setting_guid = self.KNOWN_SETTINGS[name]
+            setting = model.find_setting(subgroup_guid, setting_guid)
+            if setting is None:
+                self.log(f"[INFO] El ajuste '{name}' no existe en este equipo. Omitiendo.")
+                continue
+            if not setting.accepts(value):
+                self.log(f"[WARN] El valor {value} no es válido para '{name}'. Omitiendo.")
+                continue
+            dc_value = value if setting.dc_value is not None else None
+            if setting.ac_value == value and setting.dc_value == dc_value:
+                continue
+            changes.append({
+                'name': name,
+                'subgroup': subgroup_guid,
+                'setting': setting_guid,
+                'original': setting.ac_value,
+                'original_dc': setting.dc_value,
+                'value': value,
+                'dc_value': dc_value,
+            })
+        return changes
+
+    def _value_commands(self, scheme_guid, subgroup, setting, ac_value, dc_value):
+        """Comandos para fijar los valores AC y DC de un ajuste. Un valor None no se toca."""
+        commands = []
+        if ac_value is not None:
+            commands.append(f"powercfg /setacvalueindex {scheme_guid} {subgroup} {setting} {ac_value}")
+        if dc_value is not None:
+            commands.append(f"powercfg /setdcvalueindex {scheme_guid} {subgroup} {setting} {dc_value}")
+        return commands
+
+    def apply_batch(self, scheme_guid, changes, activate=True):
+        """Aplica todos los cambios (y la activación del plan) en una sola invocación de la consola."""
+        commands = []
+        for c in changes:
+            commands += self._value_commands(scheme_guid, c['subgroup'], c['setting'], c['value'], c.get('dc_value'))
+        if activate:
+            commands.append(f"powercfg /setactive {scheme_guid}")
+        if not commands:
+            return True
+        result = self.run_command(" && ".join(commands))
+        self.invalidate(scheme_guid)
+        return result is not None
+
+    def restore(self, saved):
+        """
+        Restaura exactamente el estado guardado por SystemOptimizer.optimize_power_plan:
+        valores originales de cada ajuste, plan activo y eliminación del plan creado.
+
+        Un original desconocido (None) no se restaura: powercfg rechazaría el comando y con
+        él todo el lote. Los backups anteriores no guardaban el valor DC ('original_dc').
+        """
+        commands = []
+        for change in saved.get('settings', []):
+            if saved.get('created_scheme') == change['scheme']:
+                continue # El plan se va a eliminar; no tiene sentido restaurar sus valores.
+            commands += self._value_commands(change['scheme'], change['subgroup'], change['setting'],
+                                             change.get('original'), change.get('original_dc'))
+        if saved.get('active_guid'):
+            commands.append(f"powercfg /setactive {saved['active_guid']}")
+        if saved.get('created_scheme'):
+            commands.append(f"powercfg /delete {saved['created_scheme']}")
+        if not commands:
+            return True
+        result = self.run_command(" && ".join(commands))
+        self.invalidate()
+        return result is not None
@@ -0,0 +1,205 @@
+# core/process_terminator.py
+
+import os
+import time
+import logging
+
+import psutil
+
+
+class ProcessTreeTerminator:
+    """
+    Cierra aplicaciones como árboles de procesos completos.
+
+    1. Resuelve los árboles: un proceso de la lista cuyo ancestro también está en la lista
+       (p. ej. 'steamwebhelper.exe' bajo 'steam.exe') forma parte del árbol del ancestro,
+       en lugar de tratarse por separado y competir con él. De los descendientes solo se
+       incluyen los que están en la lista o son auxiliares conocidos de la aplicación
+       (HELPER_PROCESSES): nunca un hijo cualquiera, que en un launcher suele ser el juego.
+    2. Envía terminate() a todos los procesos de todos los árboles a la vez.
+    3. Espera con psutil.wait_procs hasta 'grace_period'; los que sigan vivos reciben kill().
+    4. Informa de la memoria (RSS) que liberó realmente cada árbol: solo cuenta la de los
+       procesos que se confirmó que terminaron.
+    """
+
+    # Procesos auxiliares que una aplicación lanza y que mueren con ella. Claves en minúsculas.
+    HELPER_PROCESSES = {
+        "steam.exe": ("steamwebhelper.exe", "steamerrorreporter.exe"),
+        "epicgameslauncher.exe": ("epicwebhelper.exe", "unrealcefsubprocess.exe"),
+        "eadesktop.exe": ("eacefsubprocess.exe",),
+        "battle.net.exe": ("battle.net helper.exe",),
+        "galaxyclient.exe": ("galaxyclient helper.exe",),
+        "upc.exe": ("upcwebhelper.exe", "uplaywebcore.exe"),
+        "ms-teams.exe": ("msedgewebview2.exe",),
+    }
+
+    def __init__(self, grace_period=5.0, kill_timeout=3.0):
+        """
+        Args:
+            grace_period (float): Segundos de espera tras terminate() antes de escalar a kill().
+            kill_timeout (float): Segundos de espera tras kill().
+        """
+        self.grace_period = grace_period
+        self.kill_timeout = kill_timeout
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _protected_pids(self):
+        """Nuestro propio proceso y sus ancestros: nunca se deben cerrar."""
+        protected = {os.getpid()}
+        try:
+            protected.update(parent.pid for parent in psutil.Process().parents())
+        except psutil.Error:
+            pass
+        return protected
+
+    def resolve_trees(self, names):
+        """
+        Returns:
+            list[dict]: Un árbol por cada proceso raíz que coincide con la lista:
+                {'name', 'root': psutil.Process, 'processes': [psutil.Process, ...]}.
+        """
+        wanted = {name.lower() for name in names}
+        protected = self._protected_pids()
+        snapshot = {}
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'status']):
+            snapshot[proc.info['pid']] = proc
+
+        def matches(proc):
+            # Un zombi ya terminó (no ocupa memoria); solo falta que su padre lo recoja.
+            return ((proc.info['name'] or "").lower() in wanted and proc.info['pid'] not in protected
+                    and proc.info['status'] != psutil.STATUS_ZOMBIE)
+
+        def has_matching_ancestor(proc):
+            seen, ppid = set(), proc.info['ppid']
+            while ppid in snapshot and ppid not in seen:
+                seen.add(ppid)
+                parent = snapshot[ppid]
+                if matches(parent):
+                    return True
+                ppid = parent.info['ppid']
+            return False
+
+        return [self.tree_of(proc, wanted, protected) for proc in snapshot.values()
+                if matches(proc) and not has_matching_ancestor(proc)]
+
+    def tree_of(self, root, names=(), protected=None):
+        """
+        El árbol de un proceso concreto, con las mismas reglas que resolve_trees: la raíz y
+        los descendientes que son auxiliares conocidos de la aplicación o están en 'names'.
+
+        Returns:
+            dict | None: {'name', 'root', 'processes'}, o None si la raíz está protegida.
+        """
+        if protected is None:
+            protected = self._protected_pids()
+        if root.pid in protected:
+            return None
+        name = self._name(root)
+        try:
+            descendants = root.children(recursive=True)
+        except psutil.Error:
+            descendants = []
+        allowed = {n.lower() for n in names}.union(self.HELPER_PROCESSES.get(name.lower(), ()))
+        processes = [root] + [child for child in descendants
+                              if child.pid not in protected and self._name(child).lower() in allowed]
+        return {'name': name, 'root': root, 'processes': processes}
+
+    def _name(self, proc):
+        try:
+            return proc.name()
+        except psutil.Error:
+            return ""
+
+    def _rss(self, proc):
+        try:
+            return proc.memory_info().rss
+        except psutil.Error:
+            return 0
+
+    def _wait(self, procs, timeout):
+        """
+        psutil.wait_procs que además da por terminados los zombis: un hijo huérfano que aún
+        no se ha recogido (en Linux) ya no ocupa memoria aunque su PID siga existiendo.
+        """
+        deadline = time.monotonic() + timeout
+        gone, alive = [], list(procs)
+        while alive:
+            newly_gone, alive = psutil.wait_procs(alive, timeout=min(0.1, max(deadline - time.monotonic(), 0)))
+            gone.extend(newly_gone)
+            zombies = [proc for proc in alive if self._is_zombie(proc)]
+            gone.extend(zombies)
+            alive = [proc for proc in alive if proc not in zombies]
+            if time.monotonic() >= deadline:
+                break
+        return gone, alive
+
+    def _is_zombie(self, proc):
+        try:
+            return proc.status() == psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.Error:
+            return False
+
+    def terminate_trees(self, trees):
+        """
+        Cierra los árboles y espera a que terminen.
+
+        Returns:
+            list[dict]: Por árbol: 'name', 'pid', 'processes', 'exited', 'killed',
+                'survivors', 'access_denied', 'rss_bytes' (antes) y 'freed_bytes'.
+        """
+        if not trees:
+            return []
+        rss_before = {proc.pid: self._rss(proc) for tree in trees for proc in tree['processes']}
+        targets, denied = [], set()
+
+        for tree in trees:
+            for proc in tree['processes']:
+                try:
+                    proc.terminate()
+                    targets.append(proc)
+                except psutil.NoSuchProcess:
+                    targets.append(proc) # Ya terminó: cuenta como liberado.
+                except psutil.AccessDenied:
+                    denied.add(proc.pid)
+
+        gone, alive = self._wait(targets, self.grace_period)
+        killed = set()
+        if alive:
+            self.logger.info(f"{len(alive)} procesos no respondieron a terminate(); se fuerza su cierre.")
+            for proc in alive:
+                try:
+                    proc.kill()
+                    killed.add(proc.pid)
+                except psutil.NoSuchProcess:
+                    pass
+                except psutil.AccessDenied:
+                    denied.add(proc.pid)
+            more_gone, alive = self._wait(alive, self.kill_timeout)
+            gone = gone + more_gone
+
+        gone_pids = {proc.pid for proc in gone}
+        survivors = {proc.pid for proc in alive} | denied
+        report = []
+        for tree in trees:
+            pids = [proc.pid for proc in tree['processes']]
+            report.append({
+                'name': tree['name'],
+                'pid': tree['root'].pid,
+                'processes': len(pids),
+                'exited': sum(1 for pid in pids if pid in gone_pids),
+                'killed': sum(1 for pid in pids if pid in killed and pid in gone_pids),
+                'survivors': sum(1 for pid in pids if pid in survivors),
+                'access_denied': sum(1 for pid in pids if pid in denied),
+                'rss_bytes': sum(rss_before[pid] for pid in pids),
+                'freed_bytes': sum(rss_before[pid] for pid in pids if pid in gone_pids),
+            })
+        return report
+
+    def close_applications(self, names):
+        """Resuelve los árboles de las aplicaciones indicadas y los cierra. Devuelve el informe."""
+        start = time.perf_counter()
+        report = self.terminate_trees(self.resolve_trees(names))
+        self.logger.info(f"Cierre de {len(report)} árboles de procesos en {time.perf_counter() - start:.2f} s.")
+        return report
@@ -0,0 +1,326 @@
+# core/profile_compiler.py
+
+import copy
+import hashlib
+import json
+import os
+import logging
+
+class ProfileValidationError(ValueError):
+    """Se lanza cuando un perfil no cumple el esquema o su cadena 'extends' no se puede resolver."""
+
+
+class ProfileCompiler:
+    """
+    Compila los perfiles JSON de 'config/' a una forma única y tipada:
+      - Valida cada archivo contra el esquema de perfiles.
+      - Resuelve las cadenas 'extends' (un perfil hereda y sobrescribe a otro).
+      - Normaliza cada optimización a un diccionario {"enabled": bool, ...}.
+      - Genera la lista de acciones ya resueltas que ejecutan los optimizadores.
+
+    El resultado se guarda en disco junto con el mtime, el tamaño y el hash de cada archivo
+    fuente, de modo que en el siguiente arranque no hace falta leer ni parsear los perfiles
+    si ninguno ha cambiado.
+    """
+
+    CACHE_VERSION = 5
+
+    # Optimización -> parámetros admitidos además de 'enabled'.
+    # Cada parámetro es (tipo, tipo de los elementos si es una lista).
+    OPTIMIZATION_SCHEMA = {
+        "power_plan": {
+            "scheme": (str, None),
+            "settings": (dict, None),
+        },
+        "services": {"list": (list, str)},
+        "app_killer": {"list": (list, str)},
+        "ram_optimizer": {},
+        "gaming_features": {},
+        "nagle_algorithm": {},
+        "nic_tuning": {"properties": (dict, None)},
+        "temp_files": {
+            "min_age_hours": ((int, float), None),
+            "max_age_days": ((int, float), None),
+            "size_budget_mb": ((int, float), None),
+            "patterns": (list, dict),
+            "repeat_hours": ((int, float), None),
+        },
+    }
+
+    # Orden en el que se aplican las optimizaciones. Coincide con el flujo histórico de la GUI.
+    APPLY_ORDER = ["power_plan", "services", "app_killer", "ram_optimizer", "gaming_features", "nagle_algorithm", "nic_tuning", "temp_files"]
+
+    # Pasos reversibles, en el orden en que se restauran.
+    RESTORE_ORDER = ["power_plan", "services", "gaming_features", "nagle_algorithm", "nic_tuning"]
+
+    def __init__(self, config_dir, console_logger, cache_dir=None, user_dir=None):
+        """
+        Args:
+            config_dir (str): Carpeta con los archivos JSON de perfiles.
+            console_logger (function): Una función callback para imprimir mensajes en la GUI.
+            cache_dir (str | None): Carpeta del caché compilado. Por defecto, %APPDATA%\\VelocityOS.
+            user_dir (str | None): Carpeta de los perfiles generados en este equipo (p. ej. el
+                recomendado), que se cargan junto a los de 'config_dir'. La carpeta de instalación
+                puede no admitir escritura. Por defecto, %APPDATA%\\VelocityOS\\profiles.
+        """
+        self.config_dir = config_dir
+        self.log = console_logger
+        self.logger = logging.getLogger(self.__class__.__name__)
+        cache_dir = cache_dir or os.path.join(os.getenv('APPDATA'), 'VelocityOS')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_file = os.path.join(cache_dir, 'profile_cache.json')
+        self.user_dir = user_dir or os.path.join(os.getenv('APPDATA'), 'VelocityOS', 'profiles')
+        os.makedirs(self.user_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def load(self):
+        """
+        Devuelve un diccionario {id: perfil_compilado}. Usa el caché si los archivos no han cambiado.
+        Los errores de validación se notifican a través del logger de consola.
+        """
+        if not os.path.exists(self.config_dir):
+            self.log(f"[ERROR-FATAL] ¡El directorio de perfiles no existe! Ruta buscada: {self.config_dir}")
+            return {}
+
+        fingerprints = self._stat_sources()
+        cache = self._read_cache()
+        if cache is not None and self._cache_is_fresh(cache, fingerprints):
+            self.logger.info("Perfiles cargados desde el caché compilado.")
+            for error in cache.get('errors', []):
+                self.log(error)
+            return cache['profiles']
+
+        raw_profiles, sources, errors = self._read_sources(fingerprints)
+        profiles = {}
+        for profile_id in raw_profiles:
+            try:
+                profiles[profile_id] = self._compile(profile_id, raw_profiles)
+            except ProfileValidationError as e:
+                errors.append(f"[ERROR-FATAL] El perfil '{profile_id}' no es válido: {e}")
+
+        for error in errors:
+            self.log(error)
+        self._write_cache({
+            'version': self.CACHE_VERSION,
+            'sources': sources,
+            'profiles': profiles,
+            'errors': errors,
+        })
+        return profiles
+
+    def set_enabled_flags(self, profile_id, flags):
+        """
+        Guarda en el archivo fuente del perfil los interruptores 'enabled' indicados.
+        Solo se escriben las claves cuyo valor difiere del heredado, para no romper la herencia.
+
+        Returns:
+            str: La ruta del archivo modificado.
+        """
+        raw_profiles = {}
+        for file_path in self._list_sources():
+            raw = self._read_json(file_path)
+            if isinstance(raw, dict) and 'id' in raw:
+                raw_profiles[raw['id']] = (file_path, raw)
+
+        if profile_id not in raw_profiles:
+            raise ProfileValidationError(f"No existe un archivo fuente para el perfil '{profile_id}'.")
+        file_path, raw = raw_profiles[profile_id]
+
+        parent_opts = {}
+        if raw.get('extends'):
+            parent_opts = self._compile(raw['extends'], {pid: data for pid, (_, data) in raw_profiles.items()})['optimizations']
+
+        own_opts = raw.setdefault('optimizations', {})
+        for key, enabled in flags.items():
+            if key in own_opts:
+                if isinstance(own_opts[key], dict):
+                    own_opts[key]['enabled'] = enabled
+                else:
+                    own_opts[key] = enabled
+            elif parent_opts.get(key, {}).get('enabled', False) != enabled:
+                own_opts[key] = {"enabled": enabled}
+
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(raw, f, indent=4, ensure_ascii=False)
+        return file_path
+
+    # ------------------------------------------------------------------
+    # Fuentes y caché
+    # ------------------------------------------------------------------
+    def _list_sources(self):
+        """Rutas de los perfiles: primero los de 'config_dir' y después los del usuario."""
+        sources = []
+        for directory in (self.config_dir, self.user_dir):
+            if os.path.isdir(directory):
+                sources += [os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.endswith(".json")]
+        return sources
+
+    def _stat_sources(self):
+        fingerprints = {}
+        for file_path in self._list_sources():
+            st = os.stat(file_path)
+            fingerprints[file_path] = {'mtime': st.st_mtime_ns, 'size': st.st_size}
+        return fingerprints
+
+    def _cache_is_fresh(self, cache, fingerprints):
+        """
+        Compara los archivos actuales con los del caché. Si solo cambió el mtime (p. ej. el
+        archivo se copió), se comprueba el hash antes de invalidar.
+        """
+        if cache.get('version') != self.CACHE_VERSION:
+            return False
+        cached_sources = cache.get('sources', {})
+        if set(cached_sources) != set(fingerprints):
+            return False
+
+        touched = False
+        for file_path, fp in fingerprints.items():
+            cached = cached_sources[file_path]
+            if cached['mtime'] == fp['mtime'] and cached['size'] == fp['size']:
+                continue
+            if cached['size'] != fp['size']:
+                return False
+            with open(file_path, 'rb') as f:
+                if hashlib.sha256(f.read()).hexdigest() != cached['sha256']:
+                    return False
+            cached['mtime'] = fp['mtime']
+            touched = True
+
+        if touched:
+            self._write_cache(cache)
+        return True
+
+    def _read_sources(self, fingerprints):
+        raw_profiles, sources, errors = {}, {}, []
+        for file_path, fp in fingerprints.items():
+            filename = os.path.basename(file_path)
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            sources[file_path] = dict(fp, sha256=hashlib.sha256(content).hexdigest())
+            try:
+                raw = json.loads(content.decode('utf-8'))
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                errors.append(f"[ERROR-FATAL] El archivo de perfil '{filename}' tiene un error de sintaxis: {e}")
+                continue
+            problems = self._validate_raw(raw)
+            if problems:
+                errors.append(f"[ERROR-FATAL] El archivo de perfil '{filename}' no cumple el esquema: {'; '.join(problems)}")
+                continue
+            if raw['id'] in raw_profiles:
+                errors.append(f"[ERROR-FATAL] El id '{raw['id']}' de '{filename}' está duplicado.")
+                continue
+            raw_profiles[raw['id']] = raw
+        return raw_profiles, sources, errors
+
+    def _read_cache(self):
+        if not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            self.logger.warning(f"Caché de perfiles ilegible, se recompilará: {e}")
+            return None
+
+    def _write_cache(self, cache):
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+        except IOError as e:
+            self.logger.error(f"No se pudo guardar el caché de perfiles: {e}")
+
+    def _read_json(self, file_path):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+
+    # ------------------------------------------------------------------
+    # Validación, herencia y normalización
+    # ------------------------------------------------------------------
+    def _validate_raw(self, raw):
+        """Devuelve la lista de problemas encontrados en un perfil sin resolver."""
+        if not isinstance(raw, dict):
+            return ["el perfil debe ser un objeto JSON"]
+        problems = []
+        if not isinstance(raw.get('id'), str) or not raw.get('id'):
+            problems.append("falta la clave 'id' o no es un texto")
+        for field in ('name', 'description', 'extends'):
+            if field in raw and not isinstance(raw[field], str):
+                problems.append(f"'{field}' debe ser un texto")
+        if 'extends' not in raw:
+            for field in ('name', 'description'):
+                if field not in raw:
+                    problems.append(f"falta la clave '{field}'")
+
+        optimizations = raw.get('optimizations', {})
+        if not isinstance(optimizations, dict):
+            return problems + ["'optimizations' debe ser un objeto"]
+        for key, value in optimizations.items():
+            if key not in self.OPTIMIZATION_SCHEMA:
+                problems.append(f"optimización desconocida '{key}'")
+                continue
+            if isinstance(value, bool):
+                continue
+            if not isinstance(value, dict):
+                problems.append(f"'{key}' debe ser un booleano o un objeto")
+                continue
+            if 'enabled' in value and not isinstance(value['enabled'], bool):
+                problems.append(f"'{key}.enabled' debe ser un booleano")
+            allowed = self.OPTIMIZATION_SCHEMA[key]
+            for param, param_value in value.items():
+                if param == 'enabled':
+                    continue
+                if param not in allowed:
+                    problems.append(f"parámetro desconocido '{key}.{param}'")
+                    continue
+                expected_type, item_type = allowed[param]
+                if isinstance(param_value, bool) or not isinstance(param_value, expected_type):
+                    problems.append(f"'{key}.{param}' tiene un tipo no válido")
+                elif item_type is not None and not all(isinstance(item, item_type) for item in param_value):
+                    problems.append(f"'{key}.{param}' debe ser una lista de {item_type.__name__}")
+        return problems
+
+    def _normalize(self, value):
+        """Convierte 'true'/'false' o un diccionario parcial en el fragmento que se fusiona sobre el perfil base."""
+        if isinstance(value, bool):
+            return {"enabled": value}
+        # Si falta 'enabled' se conserva el valor heredado (o False en perfiles base).
+        return copy.deepcopy(value)
+
+    def _compile(self, profile_id, raw_profiles, chain=()):
+        if profile_id in chain:
+            raise ProfileValidationError(f"herencia circular: {' -> '.join(chain + (profile_id,))}")
+        if profile_id not in raw_profiles:
+            raise ProfileValidationError(f"extiende el perfil inexistente '{profile_id}'")
+        raw = raw_profiles[profile_id]
+
+        if raw.get('extends'):
+            parent = self._compile(raw['extends'], raw_profiles, chain + (profile_id,))
+            compiled = {
+                'id': profile_id,
+                'name': raw.get('name', parent['name']),
+                'description': raw.get('description', parent['description']),
+                'optimizations': copy.deepcopy(parent['optimizations']),
+            }
+        else:
+            compiled = {
+                'id': profile_id,
+                'name': raw['name'],
+                'description': raw['description'],
+                'optimizations': {key: {"enabled": False} for key in self.OPTIMIZATION_SCHEMA},
+            }
+
+        # Cada clave del hijo se fusiona sobre la del padre: basta con escribir lo que cambia.
+        for key, value in raw.get('optimizations', {}).items():
+            compiled['optimizations'][key].update(self._normalize(value))
+
+        compiled['actions'] = {
+            'apply': [{"step": key, "options": compiled['optimizations'][key]}
+                      for key in self.APPLY_ORDER if compiled['optimizations'][key]['enabled']],
+            'restore': [{"step": key} for key in self.RESTORE_ORDER],
+        }
+        return compiled
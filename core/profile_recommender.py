@@ -0,0 +1,404 @@
+# core/profile_recommender.py
+
+import os
+import re
+import time
+import logging
+
+import psutil
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .operation_journal import write_json_atomically
+from .power_scheme import PowerSchemeManager
+
+
+class ProfileRecommender:
+    """
+    Genera un perfil a medida del equipo a partir de lo que se observa en él, en lugar de
+    los perfiles escritos a mano de 'config/':
+      - Tabla de procesos: la RAM y la CPU que ocupan los árboles de las aplicaciones que
+        'app_killer' podría cerrar (y la Game Bar, para 'gaming_features').
+      - Servicios instalados (SCM): CPU y RAM del proceso de cada servicio prescindible que
+        está en marcha. Un svchost compartido se reparte entre los servicios que aloja.
+      - Historial del monitor: qué interfaces llevan tráfico y la carga media de CPU y RAM.
+      - Inventario de hardware: velocidad de las interfaces y modelo de CPU.
+
+    Cada optimización recibe una puntuación = % de la RAM total que liberaría + % de la CPU
+    total que liberaría. Las que no liberan un recurso medible (red, plan de energía) usan
+    una estimación heurística que se explica en su resumen. El perfil resultante es un JSON
+    válido para ProfileCompiler, con las optimizaciones ordenadas de más a menos impacto y
+    un bloque 'recommendation' con el detalle (el compilador lo ignora).
+    """
+
+    PROFILE_ID = "recommended"
+    FILE_NAME = "recommended.json"
+
+    # Aplicaciones que solo trabajan en segundo plano (sincronización, asistentes de
+    # actualización): cerrarlas no interrumpe nada que el usuario esté usando.
+    BACKGROUND_APPS = (
+        "OneDrive.exe", "Dropbox.exe", "GoogleDriveFS.exe", "CCXProcess.exe", "AdobeCollabSync.exe",
+        "PhoneExperienceHost.exe", "Widgets.exe",
+    )
+    # Nunca se recomienda cerrarlas aunque otro perfil las liste: launchers (el juego es su
+    # hijo y depende de ellos), navegadores, chat de voz y música que el usuario puede estar usando.
+    PROTECTED_APPS = (
+        "steam.exe", "steamwebhelper.exe", "EpicGamesLauncher.exe", "EADesktop.exe", "Battle.net.exe",
+        "GalaxyClient.exe", "upc.exe", "msedge.exe", "chrome.exe", "firefox.exe", "Discord.exe",
+        "Teams.exe", "ms-teams.exe", "Slack.exe", "Zoom.exe", "Spotify.exe",
+    )
+    # Servicios prescindibles para jugar: ninguno hace falta para arrancar ni para la red.
+    OPTIONAL_SERVICES = (
+        "SysMain", "DiagTrack", "WSearch", "dmwappushservice", "MapsBroker", "WerSvc", "RemoteRegistry", "Fax",
+    )
+    # Servicios de periféricos que el usuario puede necesitar (mandos Xbox, impresora, Bluetooth, audio).
+    PROTECTED_SERVICES = ("XboxGipSvc", "XblAuthManager", "Spooler", "bthserv", "BTAGService", "Audiosrv")
+    GAME_BAR_PROCESSES = ("GameBar.exe", "GameBarFTServer.exe", "GameBarPresenceWriter.exe")
+    DEFAULT_NIC_PROPERTIES = {"*InterruptModeration": "0", "*EEE": "0", "*FlowControl": "0"}
+    WIRELESS_NIC = re.compile(r"wi-?fi|wlan|wireless|802\.11", re.IGNORECASE)
+
+    def __init__(self, system_optimizer, hardware_inventory, monitor_history=None,
+                 profiles=None, active_power_scheme=None, cpu_interval=1.0, min_score=0.5, min_traffic_bps=20 * 1024,
+                 ram_pressure_percent=75, min_temp_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            system_optimizer (SystemOptimizer): Para el índice de temporales y los procesos
+                que nunca se deben cerrar.
+            hardware_inventory (HardwareInventory): Inventario de CPU e interfaces de red.
+            monitor_history (list[dict] | None): Muestras recientes de SystemMonitor.get_history().
+            profiles (dict | None): Perfiles compilados; sus listas de servicios y aplicaciones
+                se añaden a los candidatos.
+            active_power_scheme (str | None): GUID del plan de energía activo. Si no se indica,
+                se lee con powercfg durante el análisis (en el hilo del análisis).
+            cpu_interval (float): Segundos durante los que se mide la CPU de los candidatos.
+            min_score (float): Puntuación mínima para activar una optimización.
+            min_traffic_bps (float): Tráfico medio a partir del cual una interfaz se considera en uso.
+            ram_pressure_percent (float): Uso medio de RAM a partir del cual conviene liberarla.
+            min_temp_bytes (int): Temporales borrables a partir de los que conviene limpiar. Es
+                el único criterio: esa cantidad puntúa exactamente 'min_score'.
+        """
+        self.system_optimizer = system_optimizer
+        self.inventory = hardware_inventory
+        self.history = list(monitor_history or [])
+        self.profiles = profiles or {}
+        self.active_power_scheme = active_power_scheme
+        self.cpu_interval = cpu_interval
+        self.min_score = min_score
+        self.min_traffic_bps = min_traffic_bps
+        self.ram_pressure_percent = ram_pressure_percent
+        self.min_temp_bytes = min_temp_bytes
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.total_ram = psutil.virtual_memory().total
+        self.cpu_count = psutil.cpu_count() or 1
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def analyze(self):
+        """
+        Mide el equipo y evalúa cada optimización.
+
+        Returns:
+            list[dict]: {'optimization', 'enabled', 'options', 'score', 'ram_bytes',
+                'cpu_percent', 'summary'}, de mayor a menor puntuación.
+        """
+        app_trees = self._resolve_trees(self._candidates('app_killer', self.BACKGROUND_APPS, self.PROTECTED_APPS))
+        game_bar_trees = self._resolve_trees(self.GAME_BAR_PROCESSES)
+        if self.active_power_scheme is None:
+            self.active_power_scheme = self._read_active_power_scheme()
+        services = self._running_services(self._candidates('services', self.OPTIONAL_SERVICES, self.PROTECTED_SERVICES))
+        cpu = self._measure_cpu([proc for tree in app_trees + game_bar_trees for proc in tree['processes']]
+                                + [service['process'] for service in services])
+
+        findings = [
+            self._evaluate_apps(app_trees, cpu),
+            self._evaluate_services(services, cpu),
+            self._evaluate_game_bar(game_bar_trees, cpu),
+            self._evaluate_power_plan(),
+            self._evaluate_ram(),
+            self._evaluate_temp_files(),
+        ] + self._evaluate_network()
+        for finding in findings:
+            finding['enabled'] = finding['enabled'] and finding['score'] >= self.min_score
+        return sorted(findings, key=lambda finding: finding['score'], reverse=True)
+
+    def build_profile(self, findings):
+        """Convierte el análisis en un perfil JSON compatible con ProfileCompiler."""
+        enabled = [finding for finding in findings if finding['enabled']]
+        highlights = "; ".join(finding['summary'] for finding in enabled[:3]) or "no se encontró nada que liberar"
+        return {
+            'id': self.PROFILE_ID,
+            'name': "Recomendado",
+            'description': f"Generado el {time.strftime('%d/%m/%Y %H:%M')} a partir de lo observado en este equipo: {highlights}.",
+            'optimizations': {finding['optimization']: dict(finding['options'], enabled=finding['enabled'])
+                              for finding in findings},
+            'recommendation': {
+                'generated_at': time.time(),
+                'cpu': (self.inventory.cpu() or {}).get('model'),
+                'total_ram_bytes': self.total_ram,
+                'monitor_samples': len(self.history),
+                'ranking': [{key: finding[key] for key in ('optimization', 'enabled', 'score', 'ram_bytes', 'cpu_percent', 'summary')}
+                            for finding in findings],
+            },
+        }
+
+    def save(self, profile, profiles_dir):
+        """
+        Guarda el perfil en la carpeta de perfiles del usuario (ProfileCompiler.user_dir, en
+        %APPDATA%; la de instalación puede no admitir escritura). Devuelve la ruta del archivo.
+        """
+        os.makedirs(profiles_dir, exist_ok=True)
+        file_path = os.path.join(profiles_dir, self.FILE_NAME)
+        write_json_atomically(file_path, profile, indent=4)
+        return file_path
+
+    def recommend(self, profiles_dir):
+        """Analiza, genera y guarda el perfil. Devuelve (perfil, ruta)."""
+        profile = self.build_profile(self.analyze())
+        file_path = self.save(profile, profiles_dir)
+        self.logger.info(f"Perfil recomendado guardado en {file_path}.")
+        return profile, file_path
+
+    # ------------------------------------------------------------------
+    # Medición
+    # ------------------------------------------------------------------
+    def _candidates(self, optimization, defaults, protected):
+        """Catálogo propio más lo que ya listan los perfiles existentes, sin duplicados ni protegidos."""
+        excluded = {name.lower() for name in protected}
+        names = {name.lower(): name for name in defaults}
+        for profile in self.profiles.values():
+            for name in profile['optimizations'].get(optimization, {}).get('list', []):
+                names.setdefault(name.lower(), name)
+        return [name for key, name in names.items() if key not in excluded]
+
+    def _read_active_power_scheme(self):
+        """
+        powercfg /getactivescheme sin pasar por SystemOptimizer._run_command, que informa de
+        los errores en la consola de la GUI y no se puede usar desde el hilo del análisis.
+        """
+        def run_command(command):
+            result = self.system_optimizer.command_executor.run_sync(command, 10)
+            if not result.ok:
+                self.logger.warning(f"'{command}' falló: {result.stderr.strip() or result.stdout.strip()}")
+                return None
+            return result.stdout
+        return PowerSchemeManager(run_command, self.logger.info).active_scheme_guid()
+
+    def _resolve_trees(self, names):
+        critical = set(self.system_optimizer.SYSTEM_CRITICAL_PROCESSES)
+        names = [name for name in names if name.lower() not in critical]
+        return self.system_optimizer.process_terminator.resolve_trees(names)
+
+    def _running_services(self, names):
+        """
+        Servicios candidatos instalados y en marcha, con su proceso y el número de servicios
+        que comparten ese proceso (svchost agrupa varios en un mismo PID).
+        """
+        if not hasattr(psutil, "win_service_iter"):
+            return []
+        wanted = {name.lower() for name in names}
+        by_pid, running = {}, []
+        for service in psutil.win_service_iter():
+            try:
+                pid = service.pid()
+            except psutil.Error:
+                continue
+            if not pid:
+                continue
+            by_pid[pid] = by_pid.get(pid, 0) + 1
+            if service.name().lower() in wanted:
+                running.append((service.name(), pid))
+        services = []
+        for name, pid in running:
+            try:
+                services.append({'name': name, 'process': psutil.Process(pid), 'shared_by': by_pid[pid]})
+            except psutil.Error:
+                continue
+        return services
+
+    def _measure_cpu(self, processes):
+        """% de la CPU total de cada proceso durante 'cpu_interval' segundos, por PID."""
+        primed = {}
+        for proc in processes:
+            try:
+                proc.cpu_percent(None)
+                primed[proc.pid] = proc
+            except psutil.Error:
+                continue
+        if not primed:
+            return {}
+        time.sleep(self.cpu_interval)
+        usage = {}
+        for pid, proc in primed.items():
+            try:
+                usage[pid] = proc.cpu_percent(None) / self.cpu_count
+            except psutil.Error:
+                continue
+        return usage
+
+    def _rss(self, proc):
+        try:
+            return proc.memory_info().rss
+        except psutil.Error:
+            return 0
+
+    def _history_mean(self, key):
+        values = [sample[key] for sample in self.history if sample.get(key) is not None]
+        return sum(values) / len(values) if values else None
+
+    def _score(self, ram_bytes, cpu_percent):
+        return round(ram_bytes / self.total_ram * 100 + cpu_percent, 2)
+
+    def _finding(self, optimization, enabled, summary, options=None, score=None, ram_bytes=0, cpu_percent=0.0):
+        return {
+            'optimization': optimization,
+            'enabled': bool(enabled),
+            'options': options or {},
+            'score': self._score(ram_bytes, cpu_percent) if score is None else round(score, 2),
+            'ram_bytes': int(ram_bytes),
+            'cpu_percent': round(cpu_percent, 2),
+            'summary': summary,
+        }
+
+    # ------------------------------------------------------------------
+    # Evaluación de cada optimización
+    # ------------------------------------------------------------------
+    def _tree_usage(self, tree, cpu):
+        return (sum(self._rss(proc) for proc in tree['processes']),
+                sum(cpu.get(proc.pid, 0.0) for proc in tree['processes']))
+
+    def _evaluate_apps(self, trees, cpu):
+        apps = {}
+        for tree in trees:
+            ram, load = self._tree_usage(tree, cpu)
+            total_ram, total_cpu = apps.get(tree['name'], (0, 0.0))
+            apps[tree['name']] = (total_ram + ram, total_cpu + load)
+        ranked = sorted(apps.items(), key=lambda item: self._score(*item[1]), reverse=True)
+        if not ranked:
+            return self._finding('app_killer', False, "ninguna aplicación de fondo conocida en ejecución", {'list': []})
+        ram = sum(usage[0] for _, usage in ranked)
+        load = sum(usage[1] for _, usage in ranked)
+        top = ", ".join(f"{name} {usage[0] / 1024**2:.0f} MB" for name, usage in ranked[:3])
+        return self._finding('app_killer', True, f"cerrar {len(ranked)} {'aplicación' if len(ranked) == 1 else 'aplicaciones'} liberaría {ram / 1024**2:.0f} MB ({top})",
+                             {'list': [name for name, _ in ranked]}, ram_bytes=ram, cpu_percent=load)
+
+    def _evaluate_services(self, services, cpu):
+        if not hasattr(psutil, "win_service_iter"):
+            return self._finding('services', False, "no se pudo consultar el administrador de servicios", {'list': []})
+        if not services:
+            return self._finding('services', False, "ningún servicio prescindible en marcha", {'list': []})
+        usage = []
+        for service in services:
+            # Un svchost compartido se reparte a partes iguales entre sus servicios.
+            ram = self._rss(service['process']) / service['shared_by']
+            load = cpu.get(service['process'].pid, 0.0) / service['shared_by']
+            usage.append((service['name'], ram, load))
+        usage.sort(key=lambda item: self._score(item[1], item[2]), reverse=True)
+        ram = sum(item[1] for item in usage)
+        load = sum(item[2] for item in usage)
+        return self._finding('services', True,
+                             f"{len(usage)} servicios prescindibles en marcha ({load:.1f} % de CPU, ~{ram / 1024**2:.0f} MB)",
+                             {'list': [item[0] for item in usage]}, ram_bytes=ram, cpu_percent=load)
+
+    def _evaluate_game_bar(self, trees, cpu):
+        if not trees:
+            return self._finding('gaming_features', False, "la Game Bar no está en ejecución")
+        ram, load = map(sum, zip(*(self._tree_usage(tree, cpu) for tree in trees)))
+        return self._finding('gaming_features', True, f"la Game Bar ocupa {ram / 1024**2:.0f} MB en segundo plano",
+                             ram_bytes=ram, cpu_percent=load)
+
+    def _evaluate_power_plan(self):
+        active = self.active_power_scheme
+        if active is None:
+            return self._finding('power_plan', False, "no se pudo leer el plan de energía activo", {'scheme': "high_performance"})
+        if active in (PowerSchemeManager.HIGH_PERFORMANCE_GUID, PowerSchemeManager.ULTIMATE_PERFORMANCE_GUID):
+            return self._finding('power_plan', False, "ya hay un plan de alto rendimiento activo", {'scheme': "high_performance"})
+        # Heurística: cuanto más cargada va la CPU, más pesa que no baje la frecuencia.
+        cpu_mean = self._history_mean('cpu_usage') or 0.0
+        return self._finding('power_plan', True, f"plan de alto rendimiento (CPU media del {cpu_mean:.0f} %)",
+                             {'scheme': "high_performance"}, score=1.0 + cpu_mean / 20)
+
+    def _evaluate_ram(self):
+        ram_mean = self._history_mean('ram_usage')
+        if ram_mean is None:
+            return self._finding('ram_optimizer', False, "sin historial de uso de RAM")
+        pressure = ram_mean - self.ram_pressure_percent
+        if pressure < 0:
+            return self._finding('ram_optimizer', False, f"uso medio de RAM del {ram_mean:.0f} %, sin presión")
+        return self._finding('ram_optimizer', True, f"uso medio de RAM del {ram_mean:.0f} %", score=1.0 + pressure / 5)
+
+    def _evaluate_temp_files(self):
+        cleaner = self.system_optimizer.temp_cleaner
+        report = cleaner.dry_run() if cleaner is not None else None
+        if not report or report['last_refresh'] is None:
+            return self._finding('temp_files', False, "el índice de temporales aún no está listo")
+        candidate = report['candidate_bytes']
+        # Solo libera disco: la puntuación escala 'min_temp_bytes' a 'min_score', de modo que
+        # se activa justo a partir de ese umbral y no desplaza a lo que libera RAM o CPU.
+        return self._finding('temp_files', True, f"{candidate / 1024**2:.0f} MB de temporales borrables",
+                             score=candidate / self.min_temp_bytes * self.min_score)
+
+    def _evaluate_network(self):
+        traffic = {}
+        for sample in self.history:
+            for nic, rates in (sample.get('net_io') or {}).items():
+                traffic[nic] = traffic.get(nic, 0.0) + rates['recv_bps'] + rates['sent_bps']
+        samples = max(len(self.history), 1)
+        active = sorted(((nic, total / samples) for nic, total in traffic.items() if total / samples >= self.min_traffic_bps),
+                        key=lambda item: item[1], reverse=True)
+        if not active:
+            summary = "ninguna interfaz con tráfico en el historial del monitor"
+            return [self._finding('nagle_algorithm', False, summary),
+                    self._finding('nic_tuning', False, summary, {'properties': self._nic_properties()})]
+
+        speeds = {nic['name']: nic['speed_mbps'] for nic in (self.inventory.get() or {}).get('nics', [])}
+        described = ", ".join(f"{nic} {bps / 1024:.0f} KB/s" + (f" ({speeds[nic]} Mbps)" if speeds.get(nic) else "")
+                              for nic, bps in active)
+        wired = [nic for nic, _ in active if not self.WIRELESS_NIC.search(nic)]
+        # Heurística: la latencia no se mide aquí; se da peso fijo a las interfaces en uso.
+        nagle = self._finding('nagle_algorithm', True, f"tráfico en {described}", score=1.0)
+        if wired:
+            tuning = self._finding('nic_tuning', True, f"adaptador con cable en uso: {', '.join(wired)}",
+                                   {'properties': self._nic_properties()}, score=0.75)
+        else:
+            tuning = self._finding('nic_tuning', False, "solo hay tráfico por Wi-Fi; sus controladores rara vez admiten estos ajustes",
+                                   {'properties': self._nic_properties()}, score=0.0)
+        return [nagle, tuning]
+
+    def _nic_properties(self):
+        """Las propiedades que ya usa algún perfil, o un conjunto conservador."""
+        for profile in self.profiles.values():
+            properties = profile['optimizations'].get('nic_tuning', {}).get('properties')
+            if properties:
+                return dict(properties)
+        return dict(self.DEFAULT_NIC_PROPERTIES)
+
+
+def describe_recommendation(profile):
+    """Una línea de consola por optimización, en el orden del ranking."""
+    lines = []
+    for entry in profile['recommendation']['ranking']:
+        marker = "[OK]" if entry['enabled'] else "[-]"
+        lines.append(f"{marker} {entry['optimization']} (impacto {entry['score']:.1f}): {entry['summary']}")
+    return lines
+
+
+class ProfileRecommendationWorker(QThread):
+    """Ejecuta ProfileRecommender en segundo plano (medir la CPU lleva un segundo)."""
+
+    recommendation_ready = pyqtSignal(dict, str)
+    recommendation_failed = pyqtSignal(str)
+
+    def __init__(self, recommender, profiles_dir, parent=None):
+        super().__init__(parent)
+        self.recommender = recommender
+        self.profiles_dir = profiles_dir
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def run(self):
+        try:
+            profile, file_path = self.recommender.recommend(self.profiles_dir)
+        except Exception as e:
+            self.logger.error(f"No se pudo generar el perfil recomendado: {e}", exc_info=True)
+            self.recommendation_failed.emit(str(e))
+            return
+        self.recommendation_ready.emit(profile, file_path)
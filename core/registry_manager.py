@@ -1,6 +1,8 @@
 # core/registry_manager.py
 import winreg
 
+from .tracing import tracer
+
 class RegistryManager:
     """Una clase de utilidad para interactuar de forma segura con el Registro de Windows."""
 
@@ -41,26 +43,70 @@ class RegistryManager:
         """
         Establece un valor en el registro. Crea la clave si no existe.
         """
-        try:
-            hkey, sub_key = self._parse_path(key_path)
-            # AKEY_ALL_ACCESS da todos los permisos necesarios
-            with winreg.CreateKeyEx(hkey, sub_key, 0, winreg.KEY_ALL_ACCESS) as key:
-                winreg.SetValueEx(key, value_name, 0, value_type, value)
-            return True
-        except Exception as e:
-            self.log(f"[ERROR-REG] No se pudo establecer el valor '{value_name}' en '{key_path}': {e}")
-            return False
+        with tracer.span("registry.set_value", "registry", key=key_path, value=value_name) as span:
+            try:
+                hkey, sub_key = self._parse_path(key_path)
+                # AKEY_ALL_ACCESS da todos los permisos necesarios
+                with winreg.CreateKeyEx(hkey, sub_key, 0, winreg.KEY_ALL_ACCESS) as key:
+                    winreg.SetValueEx(key, value_name, 0, value_type, value)
+                return True
+            except Exception as e:
+                span.set_outcome("error")
+                self.log(f"[ERROR-REG] No se pudo establecer el valor '{value_name}' en '{key_path}': {e}")
+                return False
             
     def delete_value(self, key_path, value_name):
         """Elimina un valor del registro."""
+        with tracer.span("registry.delete_value", "registry", key=key_path, value=value_name) as span:
+            try:
+                hkey, sub_key = self._parse_path(key_path)
+                with winreg.OpenKey(hkey, sub_key, 0, winreg.KEY_ALL_ACCESS) as key:
+                    winreg.DeleteValue(key, value_name)
+                return True
+            except FileNotFoundError:
+                # Si no existe, consideramos la operación un éxito.
+                span.set_outcome("not_found")
+                return True
+            except Exception as e:
+                span.set_outcome("error")
+                self.log(f"[ERROR-REG] No se pudo eliminar el valor '{value_name}' de '{key_path}': {e}")
+                return False
+
+    def enum_subkeys(self, key_path):
+        """Devuelve los nombres de las sub-claves de una clave ([] si no existe)."""
+        names = []
+        try:
+            hkey, sub_key = self._parse_path(key_path)
+            with winreg.OpenKey(hkey, sub_key, 0, winreg.KEY_READ) as key:
+                index = 0
+                while True:
+                    try:
+                        names.append(winreg.EnumKey(key, index))
+                    except OSError:
+                        break # No hay más sub-claves.
+                    index += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.log(f"[ERROR-REG] No se pudieron enumerar las sub-claves de '{key_path}': {e}")
+        return names
+
+    def enum_values(self, key_path):
+        """Devuelve {nombre: (valor, tipo)} con todos los valores de una clave ({} si no existe)."""
+        values = {}
         try:
             hkey, sub_key = self._parse_path(key_path)
-            with winreg.OpenKey(hkey, sub_key, 0, winreg.KEY_ALL_ACCESS) as key:
-                winreg.DeleteValue(key, value_name)
-            return True
+            with winreg.OpenKey(hkey, sub_key, 0, winreg.KEY_READ) as key:
+                index = 0
+                while True:
+                    try:
+                        name, value, value_type = winreg.EnumValue(key, index)
+                    except OSError:
+                        break # No hay más valores.
+                    values[name] = (value, value_type)
+                    index += 1
         except FileNotFoundError:
-            # Si no existe, consideramos la operación un éxito.
-            return True
+            pass
         except Exception as e:
-            self.log(f"[ERROR-REG] No se pudo eliminar el valor '{value_name}' de '{key_path}': {e}")
-            return False
\ No newline at end of file
+            self.log(f"[ERROR-REG] No se pudieron enumerar los valores de '{key_path}': {e}")
+        return values
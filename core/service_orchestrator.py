@@ -0,0 +1,397 @@
+# core/service_orchestrator.py
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import psutil
+
+from .tracing import tracer
+
+class ServiceOperationError(Exception):
+    """Se lanza cuando el SCM rechaza una operación sobre un servicio."""
+
+
+class WindowsServiceControlManager:
+    """
+    Acceso al Service Control Manager de Windows usando psutil para las consultas
+    y 'sc' para las operaciones, igual que el resto de SystemOptimizer.
+    """
+
+    # psutil devuelve 'automatic'/'manual'/'disabled', pero 'sc config' espera 'auto'/'demand'/'disabled'.
+    SC_START_TYPES = {"automatic": "auto", "manual": "demand", "disabled": "disabled"}
+
+    def __init__(self, command_executor):
+        """
+        Args:
+            command_executor (CommandExecutor): El ejecutor de comandos de SystemOptimizer.
+                Se usa directamente y no su _run_command, que informa de los errores por la
+                consola de la GUI: las detenciones se ejecutan en los hilos del orquestador.
+        """
+        self.command_executor = command_executor
+
+    def _interpret(self, result, ignore_errors=()):
+        """Devuelve (salida, error). Nunca registra: el error viaja en el informe del servicio."""
+        if result.timed_out:
+            return None, f"'{result.command}' no terminó en {result.duration:.1f} s"
+        if result.ok:
+            return result.stdout.strip(), None
+        # 'sc' escribe el código de error en stdout, no en stderr.
+        if any(code in result.stderr or code in result.stdout for code in ignore_errors):
+            return "", None
+        return None, result.stderr.strip() or result.stdout.strip()
+
+    def exists(self, name):
+        try:
+            psutil.win_service_get(name)
+            return True
+        except psutil.NoSuchProcess:
+            return False
+
+    def status(self, name):
+        return psutil.win_service_get(name).status()
+
+    def start_type(self, name):
+        return psutil.win_service_get(name).start_type()
+
+    def dependencies(self, name):
+        """Devuelve los servicios de los que depende 'name', leyendo la salida de 'sc qc'."""
+        output, _ = self._interpret(self.command_executor.run_sync(f'sc qc "{name}"'), ["1060"])
+        return self._parse_dependencies(output)
+
+    def dependencies_of(self, names):
+        """Como dependencies(), pero consulta todos los servicios a la vez. Devuelve {servicio: dependencias}."""
+        results = self.command_executor.run_group([f'sc qc "{name}"' for name in names])
+        return {name: self._parse_dependencies(self._interpret(result, ["1060"])[0])
+                for name, result in zip(names, results)}
+
+    def _parse_dependencies(self, output):
+        if not output:
+            return set()
+        dependencies, in_block = set(), False
+        for line in output.splitlines():
+            # La etiqueta está traducida (DEPENDENCIES / DEPENDENCIAS), las continuaciones empiezan por ':'.
+            label_match = re.match(r'\s*([A-Z_]+)\s*:\s*(.*)$', line)
+            if label_match:
+                in_block = label_match.group(1).startswith("DEPEND")
+                value = label_match.group(2).strip() if in_block else ""
+            elif in_block and re.match(r'\s*:\s*', line):
+                value = line.split(':', 1)[1].strip()
+            else:
+                in_block = False
+                continue
+            if value:
+                dependencies.add(value)
+        return dependencies
+
+    def request_stop(self, name):
+        # 1062: el servicio no se ha iniciado (ya estaba detenido).
+        output, error = self._interpret(self.command_executor.run_sync(f'sc stop "{name}"'), ["1062"])
+        if output is None:
+            raise ServiceOperationError(f"El SCM rechazó la detención de '{name}': {error}")
+
+    def set_start_type(self, name, start_type):
+        sc_type = self.SC_START_TYPES.get(start_type, start_type)
+        output, error = self._interpret(self.command_executor.run_sync(f'sc config "{name}" start= {sc_type}'), ["1060"])
+        if output is None:
+            raise ServiceOperationError(f"No se pudo configurar '{name}' como '{sc_type}': {error}")
+
+
+class FakeServiceControlManager:
+    """
+    SCM simulado en memoria, con retardos de detención configurables. Permite ejecutar y medir
+    el orquestador en cualquier sistema operativo (p. ej. Linux).
+
+    Reproduce la restricción real del SCM: un servicio no se puede detener mientras
+    alguno de sus dependientes siga en ejecución (error 1051).
+    """
+
+    def __init__(self, services):
+        """
+        Args:
+            services (dict): nombre -> {'start_type', 'status', 'dependencies', 'stop_delay'}.
+        """
+        self._lock = threading.Lock()
+        self.services = {
+            name: {
+                'start_type': info.get('start_type', 'automatic'),
+                'status': info.get('status', 'running'),
+                'dependencies': set(info.get('dependencies', ())),
+                'stop_delay': info.get('stop_delay', 0.0),
+            }
+            for name, info in services.items()
+        }
+
+    def exists(self, name):
+        return name in self.services
+
+    def status(self, name):
+        self._check(name)
+        with self._lock:
+            return self.services[name]['status']
+
+    def start_type(self, name):
+        self._check(name)
+        return self.services[name]['start_type']
+
+    def dependencies(self, name):
+        self._check(name)
+        return set(self.services[name]['dependencies'])
+
+    def dependencies_of(self, names):
+        return {name: self.dependencies(name) for name in names}
+
+    def request_stop(self, name):
+        self._check(name)
+        with self._lock:
+            service = self.services[name]
+            if service['status'] != 'running':
+                return
+            for other_name, other in self.services.items():
+                if name in other['dependencies'] and other['status'] != 'stopped':
+                    raise ServiceOperationError(f"1051: '{other_name}' depende de '{name}' y sigue en ejecución.")
+            service['status'] = 'stop_pending'
+        timer = threading.Timer(service['stop_delay'], self._finish_stop, args=(name,))
+        timer.daemon = True
+        timer.start()
+
+    def _finish_stop(self, name):
+        with self._lock:
+            self.services[name]['status'] = 'stopped'
+
+    def set_start_type(self, name, start_type):
+        self._check(name)
+        with self._lock:
+            self.services[name]['start_type'] = start_type
+
+    def _check(self, name):
+        if name not in self.services:
+            raise psutil.NoSuchProcess(pid=None, name=name, msg="servicio no encontrado")
+
+
+class ServiceOrchestrator:
+    """
+    Detiene y restaura grupos de servicios respetando sus dependencias:
+      - Los dependientes se detienen antes que los servicios de los que dependen.
+      - Los servicios independientes se detienen en paralelo (con un límite de hilos).
+      - Cada detención espera al estado STOPPED con un tiempo límite.
+      - La restauración de tipos de inicio sigue el orden topológico inverso
+        (primero las dependencias, después los dependientes).
+
+    Los hilos de trabajo nunca llaman al logger de consola (que toca la GUI): los resultados
+    se registran desde el hilo que invoca al orquestador a medida que terminan.
+    """
+
+    def __init__(self, scm, console_logger, max_workers=4, stop_timeout=20.0, poll_interval=0.1):
+        """
+        Args:
+            scm: WindowsServiceControlManager o FakeServiceControlManager.
+            console_logger (function): Una función callback para imprimir mensajes en la GUI.
+            max_workers (int): Número máximo de servicios que se detienen a la vez.
+            stop_timeout (float): Segundos que se espera a que cada servicio llegue a STOPPED.
+            poll_interval (float): Intervalo de sondeo del estado del servicio.
+        """
+        self.scm = scm
+        self.log = console_logger
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.max_workers = max(1, max_workers)
+        self.stop_timeout = stop_timeout
+        self.poll_interval = poll_interval
+
+    def build_graph(self, names):
+        """
+        Devuelve {servicio: dependencias dentro del grupo}. Los servicios que no existen
+        en el sistema se excluyen del grafo.
+        """
+        present = [name for name in names if self.scm.exists(name)]
+        present_set = set(present)
+        try:
+            dependencies = self.scm.dependencies_of(present)
+        except Exception as e:
+            self.logger.warning(f"No se pudieron leer las dependencias de los servicios: {e}")
+            dependencies = {}
+        return {name: dependencies.get(name, set()) & present_set for name in present}
+
+    def topological_order(self, graph):
+        """Orden en el que cada servicio aparece después de sus dependencias. Los ciclos se rompen en orden de lista."""
+        order, visited, visiting = [], set(), set()
+
+        def visit(name):
+            if name in visited or name in visiting:
+                return
+            visiting.add(name)
+            for dependency in sorted(graph.get(name, ())):
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in graph:
+            visit(name)
+        return order
+
+    def break_cycles(self, graph):
+        """
+        Copia del grafo sin las aristas que cierran un ciclo, recorriéndolo en orden de lista
+        como topological_order(). Sin ellas, los servicios de un ciclo nunca quedarían libres
+        de dependientes y no se llegarían a detener.
+        """
+        acyclic, visited, visiting = {name: set() for name in graph}, set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            visiting.add(name)
+            for dependency in sorted(graph.get(name, ())):
+                if dependency in visiting:
+                    self.logger.warning(f"Dependencia circular entre '{name}' y '{dependency}'; se ignora para el orden de detención.")
+                    continue
+                acyclic[name].add(dependency)
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in graph:
+            visit(name)
+        return acyclic
+
+    def stop_and_disable(self, names):
+        """
+        Detiene los servicios en ejecución y los configura como deshabilitados.
+
+        Returns:
+            list[dict]: Un informe por servicio con 'service', 'outcome' y 'seconds'.
+        """
+        graph = self.break_cycles(self.build_graph(names))
+        report = [{'service': name, 'outcome': 'not_found', 'seconds': 0.0} for name in names if name not in graph]
+
+        # Un servicio está listo para detenerse cuando todos sus dependientes del grupo ya se detuvieron.
+        dependents = {name: set() for name in graph}
+        for name, dependencies in graph.items():
+            for dependency in dependencies:
+                dependents[dependency].add(name)
+        pending_dependents = {name: len(dependents[name]) for name in graph}
+
+        failed = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ServiceStop") as executor:
+            futures = {}
+            for name in graph:
+                if pending_dependents[name] == 0:
+                    futures[executor.submit(self._stop_one, name)] = name
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    result = future.result()
+                    report.append(result)
+                    self._log_result(result)
+                    if result['outcome'] in ('timeout', 'error'):
+                        failed.add(name)
+
+                    for dependency in graph[name]:
+                        pending_dependents[dependency] -= 1
+                        if pending_dependents[dependency] != 0:
+                            continue
+                        blocked_by = dependents[dependency] & failed
+                        if blocked_by:
+                            skipped = {'service': dependency, 'outcome': 'skipped', 'seconds': 0.0,
+                                       'detail': f"depende de él '{sorted(blocked_by)[0]}', que no se detuvo"}
+                            report.append(skipped)
+                            self._log_result(skipped)
+                            failed.add(dependency)
+                            self._release_dependencies(dependency, graph, pending_dependents, dependents, failed, report)
+                        else:
+                            futures[executor.submit(self._stop_one, dependency)] = dependency
+        return report
+
+    def _release_dependencies(self, name, graph, pending_dependents, dependents, failed, report):
+        """Propaga un servicio omitido a sus dependencias para que también se omitan."""
+        for dependency in graph[name]:
+            pending_dependents[dependency] -= 1
+            if pending_dependents[dependency] == 0:
+                skipped = {'service': dependency, 'outcome': 'skipped', 'seconds': 0.0,
+                           'detail': f"depende de él '{name}', que no se detuvo"}
+                report.append(skipped)
+                self._log_result(skipped)
+                failed.add(dependency)
+                self._release_dependencies(dependency, graph, pending_dependents, dependents, failed, report)
+
+    def _stop_one(self, name):
+        """Se ejecuta en un hilo de trabajo: detiene, espera a STOPPED y deshabilita. No registra en la GUI."""
+        with tracer.span("service.stop", "service", service=name) as span:
+            result = self._stop_and_disable(name)
+            span.set_outcome(result['outcome'])
+            return result
+
+    def _stop_and_disable(self, name):
+        start = time.perf_counter()
+        try:
+            outcome = 'already_stopped'
+            if self.scm.status(name) != 'stopped':
+                self.scm.request_stop(name)
+                deadline = start + self.stop_timeout
+                while self.scm.status(name) != 'stopped':
+                    if time.perf_counter() >= deadline:
+                        return {'service': name, 'outcome': 'timeout', 'seconds': time.perf_counter() - start}
+                    time.sleep(self.poll_interval)
+                outcome = 'stopped'
+            if self.scm.start_type(name) != 'disabled':
+                self.scm.set_start_type(name, 'disabled')
+            return {'service': name, 'outcome': outcome, 'seconds': time.perf_counter() - start}
+        except psutil.NoSuchProcess:
+            return {'service': name, 'outcome': 'not_found', 'seconds': time.perf_counter() - start}
+        except Exception as e:
+            return {'service': name, 'outcome': 'error', 'seconds': time.perf_counter() - start, 'detail': str(e)}
+
+    def restore_start_types(self, original_states):
+        """
+        Restaura los tipos de inicio guardados, primero las dependencias y luego sus dependientes.
+
+        Args:
+            original_states (dict): servicio -> tipo de inicio original.
+
+        Returns:
+            list[dict]: Un informe por servicio con 'service', 'outcome' y 'seconds'.
+        """
+        graph = self.build_graph(list(original_states))
+        report = []
+        for name in original_states:
+            if name not in graph:
+                result = {'service': name, 'outcome': 'not_found', 'seconds': 0.0}
+                report.append(result)
+                self._log_result(result)
+
+        for name in self.topological_order(graph):
+            start = time.perf_counter()
+            with tracer.span("service.restore", "service", service=name, start_type=original_states[name]) as span:
+                try:
+                    self.scm.set_start_type(name, original_states[name])
+                    result = {'service': name, 'outcome': 'restored', 'seconds': time.perf_counter() - start,
+                              'detail': original_states[name]}
+                except Exception as e:
+                    result = {'service': name, 'outcome': 'error', 'seconds': time.perf_counter() - start, 'detail': str(e)}
+                span.set_outcome(result['outcome'])
+            report.append(result)
+            self._log_result(result)
+        return report
+
+    def _log_result(self, result):
+        name, seconds = result['service'], result['seconds']
+        outcome = result['outcome']
+        if outcome == 'stopped':
+            self.log(f"[OK] Servicio '{name}' detenido y deshabilitado ({seconds:.2f} s).")
+        elif outcome == 'already_stopped':
+            self.log(f"[OK] Servicio '{name}' ya estaba detenido; deshabilitado ({seconds:.2f} s).")
+        elif outcome == 'restored':
+            self.log(f"[OK] Servicio '{name}' restaurado a '{result['detail']}' ({seconds:.2f} s).")
+        elif outcome == 'not_found':
+            self.log(f"[INFO] Servicio '{name}' no encontrado. Omitiendo.")
+        elif outcome == 'timeout':
+            self.log(f"[WARN] Servicio '{name}' no se detuvo en {self.stop_timeout:g} s.")
+        elif outcome == 'skipped':
+            self.log(f"[WARN] Servicio '{name}' omitido: {result['detail']}.")
+        else:
+            self.log(f"[-] Error con el servicio '{name}': {result.get('detail', '')}")
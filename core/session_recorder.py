@@ -0,0 +1,394 @@
+# core/session_recorder.py
+
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from .gpu_telemetry import decode_throttle_reasons
+from .monitor_delta import DeltaPublisher
+
+MAGIC = b"VOSREC\x01\n"
+HEADER_SIZE = 4096 # Cabecera fija: los registros empiezan siempre en el mismo desplazamiento.
+
+# Cuántas GPUs y CPUs lógicas caben en cada registro (las demás no se graban).
+MAX_GPUS = 2
+MAX_CORES = 64
+GPU_FIELDS = (
+    ('usage', 'f4'), ('memory_usage', 'f4'), ('temperature', 'f4'),
+    ('graphics_clock_mhz', 'f4'), ('memory_clock_mhz', 'f4'),
+    ('power_watts', 'f4'), ('power_limit_watts', 'f4'),
+    ('vram_used_bytes', 'f8'), ('vram_total_bytes', 'f8'),
+    ('pcie_tx_bps', 'f8'), ('pcie_rx_bps', 'f8'),
+    ('throttle_mask', 'u4'),
+)
+TICK_FIELDS = (
+    ('timestamp', 'f8'),
+    ('cpu_usage', 'f4'), ('ram_usage', 'f4'), ('gpu_usage', 'f4'), ('gpu_temp', 'f4'),
+    ('disk_read_bps', 'f8'), ('disk_write_bps', 'f8'), ('net_recv_bps', 'f8'), ('net_sent_bps', 'f8'),
+    ('gpu_count', 'u1'),
+)
+TICK_DTYPE = np.dtype(list(TICK_FIELDS) + [
+    (f"gpu{index}_{name}", kind) for index in range(MAX_GPUS) for name, kind in GPU_FIELDS] + [
+    # Carga por CPU lógica redondeada al entero (0-100): un byte por núcleo.
+    ('core_count', 'u1'), ('cpu_cores', 'u1', (MAX_CORES,)),
+])
+
+# Eventos sueltos: sondas de latencia, tiempos de frame, pasos de aplicar/restaurar y throttling.
+EVENT_LATENCY, EVENT_FRAME_TIME, EVENT_STEP, EVENT_MARKER, EVENT_THROTTLE = 1, 2, 3, 4, 5
+EVENT_DTYPE = np.dtype([
+    ('timestamp', 'f8'), ('kind', 'u1'), ('value', 'f8'), ('label', 'S48'), ('detail', 'S16'),
+])
+
+# Métricas que el monitor en vivo entrega como enteros.
+INTEGER_FIELDS = {'gpu_temp', 'temperature', 'graphics_clock_mhz', 'memory_clock_mhz'}
+
+
+def _write_header(f, stream, dtype, created, meta):
+    header = json.dumps({'stream': stream, 'dtype': dtype.descr, 'created': created, 'meta': meta or {}},
+                        ensure_ascii=False).encode('utf-8')
+    if len(MAGIC) + len(header) + 1 > HEADER_SIZE:
+        raise ValueError("Los metadatos de la sesión no caben en la cabecera.")
+    f.write(MAGIC + header.ljust(HEADER_SIZE - len(MAGIC) - 1) + b"\n")
+
+
+def _open_stream(path):
+    """
+    Devuelve (cabecera, registros) de un flujo grabado. Los registros se proyectan en
+    memoria (np.memmap): abrir una sesión de horas no lee nada del disco hasta que se
+    consultan. Un último registro a medias (la grabación se cortó) se ignora.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read(HEADER_SIZE)
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"'{path}' no es una grabación de VelocityOS.")
+    header = json.loads(raw[len(MAGIC):].decode('utf-8'))
+    dtype = np.dtype([tuple(field) for field in header['dtype']])
+    count = max(0, (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize)
+    if count == 0:
+        return header, np.zeros(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def _text(value, size):
+    """Codifica a UTF-8 recortando al ancho del campo sin partir un carácter."""
+    return str(value).encode('utf-8')[:size].decode('utf-8', 'ignore').encode('utf-8')
+
+
+def _value(number, name):
+    number = float(number)
+    if np.isnan(number):
+        return None
+    return int(number) if name in INTEGER_FIELDS else number
+
+
+class _StreamWriter:
+    """Añade registros de ancho fijo a un archivo, acumulándolos en un búfer de NumPy."""
+
+    def __init__(self, path, stream, dtype, flush_every, meta=None):
+        self.path = path
+        self.stream = stream
+        self.created = time.time()
+        self.buffer = np.zeros(flush_every, dtype=dtype)
+        # Registro en blanco: los campos que una muestra no trae quedan a NaN.
+        self.blank = np.zeros((), dtype=dtype)
+        for name in dtype.names:
+            if dtype[name].kind == 'f':
+                self.blank[name] = np.nan
+        self.count = 0
+        self.written = 0
+        self.file = open(path, 'wb')
+        _write_header(self.file, stream, dtype, self.created, meta)
+
+    def next_record(self):
+        """Devuelve el siguiente registro del búfer (en blanco); None si hay que vaciarlo antes."""
+        if self.count == len(self.buffer):
+            return None
+        self.buffer[self.count] = self.blank
+        self.count += 1
+        return self.buffer[self.count - 1]
+
+    def rewrite_header(self, meta):
+        """La cabecera tiene tamaño fijo: se puede actualizar sin mover los registros."""
+        self.file.seek(0)
+        _write_header(self.file, self.stream, self.buffer.dtype, self.created, meta)
+        self.file.seek(0, os.SEEK_END)
+
+    def flush(self):
+        if self.count:
+            self.file.write(self.buffer[:self.count].tobytes())
+            self.written += self.count
+            self.count = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class SessionRecorder:
+    """
+    Graba la telemetría de una sesión (p. ej. una partida) en una carpeta con dos flujos
+    binarios de solo escritura al final:
+
+        ticks.bin   un registro de ancho fijo (TICK_DTYPE) por muestra del monitor.
+        events.bin  sondas de latencia, tiempos de frame y pasos de aplicar/restaurar (EVENT_DTYPE).
+
+    Cada flujo empieza con una cabecera de HEADER_SIZE bytes (JSON con el dtype y los
+    metadatos) seguida de los registros, de modo que SessionReader puede abrirlo con
+    np.memmap y leer cualquier columna sin cargar el archivo. record_sample() está pensado
+    como oyente de SystemMonitor y se ejecuta en el hilo del monitor.
+    """
+
+    def __init__(self, session_dir=None, app_name="VelocityOS", flush_every=30, meta=None):
+        """
+        Args:
+            session_dir (str | None): Carpeta de la sesión. Por defecto, una nueva en
+                %APPDATA%/VelocityOS/sessions con la fecha y hora de inicio.
+            flush_every (int): Registros que se acumulan en memoria antes de escribirlos.
+            meta (dict | None): Metadatos que se guardan en la cabecera (marca de GPU...).
+        """
+        if session_dir is None:
+            session_dir = os.path.join(os.getenv('APPDATA'), app_name, 'sessions',
+                                       time.strftime("session-%Y%m%d-%H%M%S"))
+        self.session_dir = session_dir
+        self.flush_every = max(1, flush_every)
+        self.meta = meta or {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._ticks = None
+        self._events = None
+
+    @property
+    def recording(self):
+        return self._ticks is not None
+
+    def start(self):
+        os.makedirs(self.session_dir, exist_ok=True)
+        meta = dict(self.meta, max_gpus=MAX_GPUS)
+        with self._lock:
+            self._ticks = _StreamWriter(os.path.join(self.session_dir, 'ticks.bin'), 'ticks', TICK_DTYPE,
+                                        self.flush_every, meta)
+            self._events = _StreamWriter(os.path.join(self.session_dir, 'events.bin'), 'events', EVENT_DTYPE,
+                                         self.flush_every, meta)
+        self.logger.info(f"Grabando la sesión en {self.session_dir}")
+
+    def _append(self, writer, fill):
+        with self._lock:
+            if writer is None or (writer is not self._ticks and writer is not self._events):
+                return # Se detuvo mientras llegaba la muestra.
+            record = writer.next_record()
+            if record is None:
+                self._ticks.flush()
+                self._events.flush()
+                record = writer.next_record()
+            fill(record)
+
+    def record_sample(self, sample):
+        """Oyente del monitor: guarda una muestra completa."""
+        if self._ticks is None:
+            return
+        def fill(record):
+            for name, _ in TICK_FIELDS:
+                value = sample.get(name)
+                if value is not None:
+                    record[name] = value
+            gpus = sample.get('gpus') or []
+            record['gpu_count'] = min(len(gpus), MAX_GPUS)
+            for index, gpu in enumerate(gpus[:MAX_GPUS]):
+                for name, _ in GPU_FIELDS:
+                    value = gpu.get(name)
+                    if value is not None:
+                        record[f"gpu{index}_{name}"] = value
+            cores = (sample.get('cpu_cores') or [])[:MAX_CORES]
+            record['core_count'] = len(cores)
+            record['cpu_cores'][:len(cores)] = np.rint(cores)
+            if gpus and 'gpu_names' not in self.meta:
+                self.meta['gpu_names'] = [gpu.get('name') for gpu in gpus[:MAX_GPUS]]
+        self._append(self._ticks, fill)
+
+    def record_event(self, kind, value, label="", detail="", timestamp=None):
+        if self._events is None:
+            return
+        def fill(record):
+            record['timestamp'] = time.time() if timestamp is None else timestamp
+            record['kind'] = kind
+            record['value'] = value
+            record['label'] = _text(label, EVENT_DTYPE['label'].itemsize)
+            record['detail'] = _text(detail, EVENT_DTYPE['detail'].itemsize)
+        self._append(self._events, fill)
+
+    def record_latency(self, target, latency_ms, timestamp=None):
+        self.record_event(EVENT_LATENCY, latency_ms, target, timestamp=timestamp)
+
+    def record_frame_time(self, frame_time_ms, source=""):
+        self.record_event(EVENT_FRAME_TIME, frame_time_ms, source)
+
+    def record_step(self, operation, step, seconds, outcome):
+        """Firma de step_observer de OptimizationRunner."""
+        self.record_event(EVENT_STEP, seconds, f"{operation}/{step}", outcome)
+
+    def record_throttle(self, event):
+        """Un evento de ThrottleDetector: inicio (valor 0) o fin (valor = duración en segundos)."""
+        self.record_event(EVENT_THROTTLE, event.get('duration', 0.0), f"{event['device']} {event['cause']}",
+                          "inicio" if event['active'] else "fin", timestamp=event['timestamp'])
+
+    def flush(self):
+        with self._lock:
+            if self._ticks is not None:
+                self._ticks.flush()
+                self._events.flush()
+
+    def stop(self):
+        """Escribe lo pendiente y cierra los archivos. Devuelve la carpeta de la sesión."""
+        with self._lock:
+            if self._ticks is None:
+                return self.session_dir
+            # Los nombres de las GPUs se conocen con la primera muestra, después de crear los archivos.
+            self._ticks.rewrite_header(dict(self.meta, max_gpus=MAX_GPUS))
+            self._ticks.close()
+            self._events.close()
+            ticks, events = self._ticks.written, self._events.written
+            self._ticks = self._events = None
+        self.logger.info(f"Sesión grabada: {ticks} muestras y {events} eventos en {self.session_dir}")
+        return self.session_dir
+
+
+class SessionReader:
+    """
+    Abre una sesión grabada por SessionRecorder. 'ticks' y 'events' son arrays
+    estructurados proyectados en memoria: reader.ticks['cpu_usage'] es la columna entera.
+    """
+
+    def __init__(self, session_dir):
+        self.session_dir = session_dir
+        self.header, self.ticks = _open_stream(os.path.join(session_dir, 'ticks.bin'))
+        events_path = os.path.join(session_dir, 'events.bin')
+        if os.path.exists(events_path):
+            _, self.events = _open_stream(events_path)
+        else:
+            self.events = np.zeros(0, dtype=EVENT_DTYPE)
+        self.meta = self.header.get('meta', {})
+        self.max_gpus = self.meta.get('max_gpus', MAX_GPUS)
+
+    def __len__(self):
+        return len(self.ticks)
+
+    @property
+    def start_time(self):
+        return float(self.ticks['timestamp'][0]) if len(self.ticks) else None
+
+    @property
+    def duration(self):
+        """Segundos entre la primera y la última muestra."""
+        if len(self.ticks) < 2:
+            return 0.0
+        return float(self.ticks['timestamp'][-1] - self.ticks['timestamp'][0])
+
+    def index_at(self, timestamp):
+        """Índice de la muestra más reciente en 'timestamp' (o la primera)."""
+        index = int(np.searchsorted(self.ticks['timestamp'], timestamp, side='right')) - 1
+        return min(max(index, 0), max(len(self.ticks) - 1, 0))
+
+    def sample(self, index):
+        """Reconstruye la muestra 'index' con el mismo formato que emite SystemMonitor."""
+        row = self.ticks[index]
+        sample = {'timestamp': float(row['timestamp']), 'gpu_brand': self.meta.get('gpu_brand', "NONE")}
+        for name, _ in TICK_FIELDS[1:-1]:
+            sample[name] = _value(row[name], name)
+        names = self.meta.get('gpu_names') or []
+        gpus = []
+        for gpu_index in range(min(int(row['gpu_count']), self.max_gpus)):
+            gpu = {'index': gpu_index, 'brand': sample['gpu_brand'],
+                   'name': names[gpu_index] if gpu_index < len(names) else None}
+            for name, _ in GPU_FIELDS:
+                column = f"gpu{gpu_index}_{name}"
+                gpu[name] = int(row[column]) if name == 'throttle_mask' else _value(row[column], name)
+            gpu['throttle_reasons'] = decode_throttle_reasons(gpu['throttle_mask'])
+            gpus.append(gpu)
+        sample['gpus'] = gpus
+        if 'cpu_cores' in row.dtype.names: # Las grabaciones anteriores no tienen la carga por núcleo.
+            sample['cpu_cores'] = [float(load) for load in row['cpu_cores'][:int(row['core_count'])]]
+        # Solo se graban los totales de E/S, no el desglose por disco o interfaz.
+        sample['disk_io'], sample['net_io'] = {}, {}
+        return sample
+
+    def events_between(self, start, end, kinds=None):
+        """Eventos con marca de tiempo en [start, end], como diccionarios."""
+        timestamps = self.events['timestamp']
+        mask = (timestamps >= start) & (timestamps <= end)
+        if kinds is not None:
+            mask &= np.isin(self.events['kind'], list(kinds))
+        return [{'timestamp': float(e['timestamp']), 'kind': int(e['kind']), 'value': float(e['value']),
+                 'label': e['label'].decode('utf-8', 'ignore'), 'detail': e['detail'].decode('utf-8', 'ignore')}
+                for e in self.events[mask]]
+
+
+class SessionReplay(QObject):
+    """
+    Fuente de muestras para la GUI a partir de una sesión grabada. Expone lo mismo que
+    SystemMonitor usa con la GUI ('delta_available', take_delta() y resync_delta()) y pasa
+    por el mismo DeltaPublisher, de modo que la pestaña Monitor pinta una grabación
+    exactamente igual que los datos en vivo. seek() permite saltar a cualquier muestra.
+    """
+    delta_available = pyqtSignal()
+    position_changed = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    def __init__(self, reader, parent=None, delta_thresholds=None, max_staleness=30.0):
+        super().__init__(parent)
+        self.reader = reader
+        self.position = 0
+        self.speed = 1.0
+        self._deltas = DeltaPublisher(delta_thresholds, max_staleness)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._advance)
+
+    @property
+    def playing(self):
+        return self._timer.isActive()
+
+    def seek(self, index):
+        if not len(self.reader):
+            return
+        self.position = min(max(int(index), 0), len(self.reader) - 1)
+        sample = self.reader.sample(self.position)
+        # El tiempo de la grabación, no el del reloj: la antigüedad máxima se respeta al reproducir.
+        if self._deltas.publish(sample, sample['timestamp']):
+            self.delta_available.emit()
+        self.position_changed.emit(self.position)
+
+    def play(self, speed=1.0):
+        self.speed = max(speed, 0.1)
+        if self.position >= len(self.reader) - 1:
+            self.seek(0)
+        self._schedule()
+
+    def pause(self):
+        self._timer.stop()
+
+    def _schedule(self):
+        if self.position >= len(self.reader) - 1:
+            self.finished.emit()
+            return
+        timestamps = self.reader.ticks['timestamp']
+        gap = float(timestamps[self.position + 1] - timestamps[self.position])
+        self._timer.start(int(min(max(gap, 0.0), 5.0) * 1000 / self.speed))
+
+    def _advance(self):
+        self.seek(self.position + 1)
+        self._schedule()
+
+    def take_delta(self):
+        return self._deltas.take()
+
+    def resync_delta(self):
+        if not len(self.reader):
+            return None
+        sample = self.reader.sample(self.position)
+        return self._deltas.resync(sample, sample['timestamp'])
@@ -0,0 +1,272 @@
+# core/single_instance.py
+#
+# Este módulo se importa antes que Qt en main.py: una segunda instancia solo necesita
+# comprobar el cerrojo y reenviar su orden, así que no debe depender de PyQt6 ni del backend.
+
+import json
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import logging
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from .operation_journal import write_json_atomically
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+# Órdenes que acepta la instancia principal -> parámetros admitidos y su tipo.
+COMMANDS = {
+    'show': {},
+    'apply_profile': {'profile': str},
+    'restore': {},
+    'status': {},
+}
+MAX_MESSAGE_BYTES = 4096
+MAX_REPLY_BYTES = 64 * 1024
+
+ADMINISTRATORS_SID = "*S-1-5-32-544"
+SYSTEM_SID = "*S-1-5-18"
+
+
+class InstanceUnavailable(Exception):
+    """No se pudo hablar con la instancia en marcha (no responde o no hay ninguna)."""
+
+
+def validate_command(message):
+    """
+    Comprueba que 'message' es una de las órdenes de COMMANDS con sus parámetros.
+
+    Raises:
+        ValueError: Si no es un diccionario, la orden no existe o sobra o falla algún parámetro.
+    """
+    if not isinstance(message, dict) or message.get('command') not in COMMANDS:
+        raise ValueError("orden desconocida")
+    expected = COMMANDS[message['command']]
+    params = {key: value for key, value in message.items() if key != 'command'}
+    if set(params) != set(expected):
+        raise ValueError(f"parámetros no válidos para '{message['command']}'")
+    for key, value in params.items():
+        if not isinstance(value, expected[key]):
+            raise ValueError(f"el parámetro '{key}' no es de tipo {expected[key].__name__}")
+    return message
+
+
+def restrict_to_administrators(path):
+    """
+    Deja 'path' accesible solo para los administradores y SYSTEM (en otros sistemas, solo
+    para su propietario). Una carpeta transmite el permiso a lo que se cree dentro. El
+    propietario pasa a ser Administradores: un proceso sin elevar del mismo usuario no
+    puede leerla ni devolverse el acceso.
+
+    Raises:
+        OSError: Si no se pudieron cambiar los permisos.
+    """
+    if sys.platform != "win32":
+        os.chmod(path, 0o700 if os.path.isdir(path) else 0o600)
+        return
+    grant = ":(OI)(CI)F" if os.path.isdir(path) else ":F"
+    for arguments in (["/setowner", ADMINISTRATORS_SID],
+                      ["/inheritance:r", "/grant:r", ADMINISTRATORS_SID + grant, SYSTEM_SID + grant]):
+        result = subprocess.run(["icacls", path] + arguments, capture_output=True, text=True,
+                                creationflags=subprocess.CREATE_NO_WINDOW)
+        if result.returncode != 0:
+            raise OSError(f"icacls {' '.join(arguments)} falló: {(result.stdout or result.stderr).strip()}")
+
+
+class InstanceLock:
+    """
+    Cerrojo de instancia única: un archivo bloqueado en exclusiva por el proceso que lo
+    consigue. El sistema operativo libera el bloqueo si el proceso muere, de modo que un
+    cierre inesperado nunca deja el cerrojo tomado.
+    """
+
+    def __init__(self, app_name="VelocityOS", lock_dir=None):
+        self.lock_dir = lock_dir or os.path.join(os.getenv('APPDATA'), app_name)
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self.lock_file = os.path.join(self.lock_dir, 'instance.lock')
+        self.info_file = os.path.join(self.lock_dir, 'instance.json')
+        # La clave del canal va aparte, en una carpeta que solo pueden leer los administradores.
+        self.key_dir = os.path.join(self.lock_dir, 'ipc')
+        self.key_file = os.path.join(self.key_dir, 'instance.key')
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._fd = None
+
+    def acquire(self):
+        """Intenta tomar el cerrojo sin esperar. Devuelve True si esta es la instancia principal."""
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if sys.platform == "win32":
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        for path in (self.info_file, self.key_file):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                self.logger.error(f"No se pudo eliminar el archivo de la instancia {path}: {e}")
+        try:
+            if sys.platform == "win32":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        os.close(self._fd)
+        self._fd = None
+
+
+class InstanceServer(threading.Thread):
+    """
+    Canal local por el que la instancia principal recibe las órdenes de las siguientes:
+    una tubería con nombre en Windows o un socket Unix en el resto, a través de
+    multiprocessing.connection y autenticado con una clave aleatoria por ejecución.
+
+    La dirección se publica en 'instance.json', junto al cerrojo. La clave va en
+    'ipc\\instance.key', una carpeta que solo pueden leer los administradores: la instancia
+    principal corre elevada y un proceso sin elevar no debe poder darle órdenes.
+
+    Los mensajes son JSON (send_bytes/recv_bytes), nunca pickle: recibir un objeto
+    serializado con pickle permitiría ejecutar código en este proceso. Cada orden es un
+    diccionario {'command', ...} que se valida contra COMMANDS antes de llamar a 'handler'
+    en este hilo; su respuesta (otro diccionario) se envía de vuelta.
+    """
+
+    def __init__(self, lock, handler, mode="gui"):
+        """
+        Args:
+            lock (InstanceLock): Cerrojo ya adquirido; indica dónde publicar la dirección.
+            handler (function): Recibe la orden y devuelve la respuesta. Debe ser rápido:
+                el trabajo largo se programa y se responde enseguida.
+            mode (str): 'gui', 'tray' o 'headless'; se publica para el diagnóstico.
+        """
+        super().__init__(daemon=True, name="InstanceServer")
+        self.lock = lock
+        self.handler = handler
+        self.mode = mode
+        self.authkey = secrets.token_bytes(32)
+        self.listener = Listener(family='AF_PIPE' if sys.platform == "win32" else 'AF_UNIX', authkey=self.authkey)
+        self.address = self.listener.address
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._stopping = threading.Event()
+
+    def start(self):
+        try:
+            os.makedirs(self.lock.key_dir, exist_ok=True)
+            restrict_to_administrators(self.lock.key_dir)
+            if os.path.exists(self.lock.key_file):
+                os.remove(self.lock.key_file)  # Podría tener otros permisos: se crea de nuevo.
+            # O_EXCL: si otro proceso vuelve a crear el archivo entre medias, se falla en lugar de usarlo.
+            fd = os.open(self.lock.key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.authkey.hex())
+        except OSError as e:
+            # Sin la clave protegida no se publica el canal: las demás instancias no podrán
+            # reenviar órdenes, pero la clave tampoco queda al alcance de otros procesos.
+            self.logger.error(f"No se pudo guardar la clave del canal de instancia; no se atenderán órdenes: {e}")
+            self.listener.close()
+            return
+        write_json_atomically(self.lock.info_file, {
+            'pid': os.getpid(),
+            'mode': self.mode,
+            'address': self.address,
+        })
+        super().start()
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if not self._stopping.is_set():
+                    self.logger.warning(f"Conexión de otra instancia rechazada: {e}")
+                continue
+            with conn:
+                if self._stopping.is_set():
+                    break
+                self._serve(conn)
+
+    def _serve(self, conn):
+        try:
+            if not conn.poll(2.0):
+                return
+            try:
+                message = validate_command(json.loads(conn.recv_bytes(MAX_MESSAGE_BYTES).decode('utf-8')))
+            except ValueError as e:  # También JSONDecodeError y UnicodeDecodeError.
+                self.logger.warning(f"Orden de otra instancia descartada: {e}")
+                conn.send_bytes(json.dumps({'ok': False, 'error': f"Orden no válida: {e}"}).encode('utf-8'))
+                return
+            self.logger.info(f"Orden recibida de otra instancia: {message}")
+            try:
+                reply = self.handler(message)
+            except Exception as e:
+                self.logger.error(f"Error al atender la orden {message}: {e}", exc_info=True)
+                reply = {'ok': False, 'error': str(e)}
+            conn.send_bytes(json.dumps(reply).encode('utf-8'))
+        except (EOFError, OSError) as e:
+            # También un mensaje mayor que MAX_MESSAGE_BYTES: recv_bytes lo rechaza con OSError.
+            self.logger.warning(f"La otra instancia cerró la conexión: {e}")
+        except Exception as e:
+            # Una respuesta que no se puede serializar no debe terminar el hilo del servidor.
+            self.logger.warning(f"No se pudo responder a otra instancia: {e}")
+
+    def stop(self):
+        """
+        Deja de aceptar órdenes. accept() no se puede interrumpir: se desbloquea con una conexión
+        propia sin clave. Esa conexión no espera al saludo de autenticación, así que no se queda
+        colgada si el hilo ya salió del bucle y nadie la acepta; accept() la rechaza y el hilo termina.
+        """
+        self._stopping.set()
+        if self.is_alive():
+            try:
+                Client(self.address).close()
+            except Exception:
+                pass
+        self.listener.close()
+        self.join(2.0)
+
+
+def send_command(command, app_name="VelocityOS", lock_dir=None, timeout=2.0, **params):
+    """
+    Envía una orden a la instancia en marcha y devuelve su respuesta.
+
+    La clave del canal solo la pueden leer los administradores: sin elevar, la conexión
+    falla como si la instancia no respondiera.
+
+    Raises:
+        ValueError: Si la orden o sus parámetros no están en COMMANDS.
+        InstanceUnavailable: Si no hay dirección publicada, no se puede conectar o no responde.
+    """
+    message = validate_command(dict(params, command=command))
+    lock_dir = lock_dir or os.path.join(os.getenv('APPDATA'), app_name)
+    try:
+        with open(os.path.join(lock_dir, 'instance.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        with open(os.path.join(lock_dir, 'ipc', 'instance.key'), 'r', encoding='utf-8') as f:
+            authkey = bytes.fromhex(f.read().strip())
+        conn = Client(info['address'], authkey=authkey)
+    except (OSError, ValueError, KeyError, AuthenticationError) as e:
+        raise InstanceUnavailable(f"No se pudo conectar con la instancia en marcha: {e}") from e
+    with conn:
+        try:
+            conn.send_bytes(json.dumps(message).encode('utf-8'))
+            if not conn.poll(timeout):
+                raise InstanceUnavailable(f"La instancia en marcha no respondió en {timeout:g} s.")
+            return json.loads(conn.recv_bytes(MAX_REPLY_BYTES).decode('utf-8'))
+        except (EOFError, OSError, ValueError) as e:
+            raise InstanceUnavailable(f"La instancia en marcha cerró la conexión: {e}") from e
@@ -4,69 +4,225 @@ import subprocess
 import json
 import os
 import sys
+import time
+
+import numpy as np
 from PyQt6.QtCore import QThread, pyqtSignal
 from utils.resource_path import resource_path
+from .operation_journal import write_json_atomically
+
+
+# Métrica agregada -> (función que la extrae del evento 'result', True si "peor" es el mínimo).
+SPEED_TEST_METRICS = {
+    'download_mbps': (lambda r: r.get('download', {}).get('bandwidth', 0) * 8 / 1_000_000, True),
+    'upload_mbps': (lambda r: r.get('upload', {}).get('bandwidth', 0) * 8 / 1_000_000, True),
+    'latency_ms': (lambda r: r.get('ping', {}).get('latency'), False),
+    'jitter_ms': (lambda r: r.get('ping', {}).get('jitter'), False),
+    'packet_loss_pct': (lambda r: r.get('packetLoss'), False),
+}
+
+
+def aggregate_speed_results(results):
+    """
+    Resume varios eventos 'result' del CLI de Ookla.
+
+    Returns:
+        dict: {'runs', 'servers', 'metrics': {métrica: {'median', 'iqr', 'worst', 'values'}}}.
+            Una métrica que ninguna ejecución informó (p. ej. la pérdida de paquetes) no aparece.
+    """
+    metrics = {}
+    for name, (extract, lower_is_worse) in SPEED_TEST_METRICS.items():
+        values = [float(v) for v in (extract(result) for result in results) if v is not None]
+        if not values:
+            continue
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        metrics[name] = {
+            'median': float(median),
+            'iqr': float(q3 - q1),
+            'worst': min(values) if lower_is_worse else max(values),
+            'values': values,
+        }
+    return {
+        'runs': len(results),
+        'servers': [result.get('server', {}).get('name', 'N/A') for result in results],
+        'metrics': metrics,
+    }
+
+
+class SpeedTestServerCache:
+    """
+    Guarda el último servidor elegido por el CLI y la lista de servidores cercanos, para no
+    repetir la selección automática (varios segundos) en cada test.
+    """
+
+    def __init__(self, app_name="VelocityOS", max_age_hours=24):
+        self.cache_dir = os.path.join(os.getenv('APPDATA'), app_name)
+        self.cache_file = os.path.join(self.cache_dir, 'speedtest_servers.json')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_age = max_age_hours * 3600
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Caché de servidores ilegible, se ignora: {e}")
+            return {}
+
+    def _get_fresh(self, key):
+        entry = self._load().get(key)
+        if entry and time.time() - entry.get('saved_at', 0) <= self.max_age:
+            return entry['value']
+        return None
+
+    def _put(self, key, value):
+        data = self._load()
+        data[key] = {'value': value, 'saved_at': time.time()}
+        try:
+            write_json_atomically(self.cache_file, data, indent=4)
+        except OSError as e:
+            self.logger.warning(f"No se pudo guardar la caché de servidores: {e}")
+
+    def selected_server(self):
+        """{'id', 'name'} del último servidor elegido automáticamente, o None si caducó."""
+        return self._get_fresh('selected')
+
+    def save_selected_server(self, server):
+        self._put('selected', {'id': server.get('id'), 'name': server.get('name', 'N/A')})
+
+    def candidates(self):
+        return self._get_fresh('candidates')
+
+    def save_candidates(self, servers):
+        self._put('candidates', [{'id': s.get('id'), 'name': s.get('name', 'N/A')} for s in servers])
+
 
 class SpeedTestWorker(QThread):
     """
     Worker de nivel profesional que utiliza el CLI oficial de Ookla Speedtest
     para garantizar la máxima precisión y una selección de servidor fiable.
+
+    Puede encadenar varias ejecuciones y resumirlas (mediana, IQR y peor caso). El servidor
+    se elige una sola vez: modo 'auto' fija para las siguientes ejecuciones el que eligió el
+    CLI en la primera; 'pinned' reutiliza el de la caché entre sesiones; 'rotate' reparte
+    las ejecuciones entre los 'top_k' servidores más cercanos.
     """
     status_updated = pyqtSignal(str)
     realtime_progress = pyqtSignal(str, float)
     test_finished = pyqtSignal(dict)
     test_error = pyqtSignal(str)
+    latency_sample = pyqtSignal(str, float) # (servidor, latencia en ms) para las sondas de latencia
+    run_started = pyqtSignal(int, int) # (ejecución, total)
+    runs_finished = pyqtSignal(dict) # Resumen de aggregate_speed_results()
 
-    def __init__(self, parent=None):
+    SERVER_MODES = ("auto", "pinned", "rotate")
+
+    def __init__(self, parent=None, runs=1, server_mode="auto", top_k=3, cli_command=None, server_cache=None):
+        """
+        Args:
+            runs (int): Número de tests a encadenar.
+            server_mode (str): 'auto', 'pinned' o 'rotate' (ver la descripción de la clase).
+            top_k (int): Servidores entre los que se rota en modo 'rotate'.
+            cli_command (list | None): Comando del CLI. Por defecto bin/speedtest.exe; se puede
+                sustituir por utils/fake_speedtest.py para reproducir una grabación jsonl.
+            server_cache (SpeedTestServerCache | None): Caché de servidores. Se crea una si no se indica.
+        """
         super().__init__(parent)
         self.logger = logging.getLogger(self.__class__.__name__)
         self._is_running = True
         self.process = None
+        self.server_name = "N/A"
+        self.runs = max(1, runs)
+        self.server_mode = server_mode if server_mode in self.SERVER_MODES else "auto"
+        self.top_k = max(1, top_k)
+        self.cli_command = cli_command
+        self.server_cache = server_cache or SpeedTestServerCache()
+        self._current_server = None
+        self._last_result = None
+
+    def _base_command(self):
+        if self.cli_command:
+            return list(self.cli_command)
+        # Construir la ruta al ejecutable de speedtest de forma robusta
+        speedtest_path = resource_path(os.path.join("bin", "speedtest.exe"))
+
+        self.logger.info(f"Buscando speedtest.exe en: {speedtest_path}")
+
+        if not os.path.exists(speedtest_path):
+            error_msg = f"No se encontró 'speedtest.exe'.\nAsegúrate de que el archivo está en la carpeta 'bin' del proyecto.\nRuta buscada: {speedtest_path}"
+            raise FileNotFoundError(error_msg)
+        return [speedtest_path]
+
+    def _popen(self, command):
+        kwargs = {'creationflags': subprocess.CREATE_NO_WINDOW} if sys.platform == "win32" else {}
+        return subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            **kwargs
+        )
+
+    def _list_servers(self, base_command):
+        """Servidores cercanos según el CLI ('-L'), ordenados por cercanía."""
+        cached = self.server_cache.candidates()
+        if cached:
+            return cached
+        self.status_updated.emit("Buscando los servidores más cercanos...")
+        process = self._popen(base_command + ["--accept-license", "--accept-gdpr", "-L", "-f", "json"])
+        try:
+            output, _ = process.communicate(timeout=60)
+        except subprocess.TimeoutExpired:
+            # communicate() no mata al hijo al caducar: se cierra y se recoge su salida pendiente.
+            process.kill()
+            process.communicate()
+            self.logger.warning("El CLI no devolvió la lista de servidores en 60 s.")
+            return []
+        servers = json.loads(output).get('servers', []) if output.strip() else []
+        if servers:
+            self.server_cache.save_candidates(servers)
+        return [{'id': s.get('id'), 'name': s.get('name', 'N/A')} for s in servers]
+
+    def _plan_servers(self, base_command):
+        """Devuelve el servidor de cada ejecución (None = selección automática del CLI)."""
+        if self.server_mode == "rotate":
+            candidates = self._list_servers(base_command)[:self.top_k]
+            if candidates:
+                return [candidates[i % len(candidates)] for i in range(self.runs)]
+            self.logger.warning("El CLI no devolvió servidores; se usa la selección automática.")
+        elif self.server_mode == "pinned":
+            cached = self.server_cache.selected_server()
+            if cached:
+                return [cached] * self.runs
+        # Solo la primera ejecución elige servidor; las demás se fijan al elegido (ver _run_once).
+        return [None] * self.runs
 
     def run(self):
+        results = []
         try:
             self.logger.info("Iniciando test de velocidad con el CLI oficial de Ookla...")
-            
-            # Construir la ruta al ejecutable de speedtest de forma robusta
-            speedtest_path = resource_path(os.path.join("bin", "speedtest.exe"))
-            
-            self.logger.info(f"Buscando speedtest.exe en: {speedtest_path}")
-
-            if not os.path.exists(speedtest_path):
-                error_msg = f"No se encontró 'speedtest.exe'.\nAsegúrate de que el archivo está en la carpeta 'bin' del proyecto.\nRuta buscada: {speedtest_path}"
-                raise FileNotFoundError(error_msg)
-
-            # Comando para ejecutar el test con salida JSON línea por línea
-            command = [speedtest_path, "--accept-license", "--accept-gdpr", "-f", "jsonl"]
-            
-            self.process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-
-            # Leer la salida del proceso línea por línea
-            for line in iter(self.process.stdout.readline, ''):
+            base_command = self._base_command()
+            plan = self._plan_servers(base_command)
+
+            for index, server in enumerate(plan):
                 if not self._is_running:
-                    self.process.kill()
-                    break
-                if not line:
                     break
-                
-                try:
-                    data = json.loads(line)
-                    self.parse_cli_output(data)
-                except json.JSONDecodeError:
-                    self.logger.warning(f"No se pudo decodificar la línea JSON: {line.strip()}")
-
-            # Esperar a que el proceso termine y comprobar si hubo errores
-            self.process.wait()
-            if self.process.returncode != 0 and self._is_running:
-                stderr_output = self.process.stderr.read()
-                raise Exception(f"El proceso de speedtest falló con código {self.process.returncode}: {stderr_output}")
+                server = server or self._current_server
+                self.run_started.emit(index + 1, len(plan))
+                if len(plan) > 1:
+                    self.status_updated.emit(f"Test {index + 1} de {len(plan)}...")
+                result = self._run_once(base_command, server)
+                if result is not None:
+                    results.append(result)
+
+            if len(plan) > 1 and results and self._is_running:
+                summary = aggregate_speed_results(results)
+                self.status_updated.emit(f"¡{len(results)} tests completados!")
+                self.runs_finished.emit(summary)
 
         except FileNotFoundError as e:
             self.logger.error(str(e))
@@ -76,6 +232,37 @@ class SpeedTestWorker(QThread):
             self.logger.error(error_msg, exc_info=True)
             self.test_error.emit(error_msg)
 
+    def _run_once(self, base_command, server=None):
+        """Ejecuta un test completo y devuelve su evento 'result' (o None si se detuvo)."""
+        # Comando para ejecutar el test con salida JSON línea por línea
+        command = base_command + ["--accept-license", "--accept-gdpr", "-f", "jsonl"]
+        if server and server.get('id') is not None:
+            command += ["-s", str(server['id'])]
+
+        self._last_result = None
+        self.process = self._popen(command)
+
+        # Leer la salida del proceso línea por línea
+        for line in iter(self.process.stdout.readline, ''):
+            if not self._is_running:
+                self.process.kill()
+                break
+            if not line:
+                break
+
+            try:
+                data = json.loads(line)
+                self.parse_cli_output(data)
+            except json.JSONDecodeError:
+                self.logger.warning(f"No se pudo decodificar la línea JSON: {line.strip()}")
+
+        # Esperar a que el proceso termine y comprobar si hubo errores
+        self.process.wait()
+        if self.process.returncode != 0 and self._is_running:
+            stderr_output = self.process.stderr.read()
+            raise Exception(f"El proceso de speedtest falló con código {self.process.returncode}: {stderr_output}")
+        return self._last_result
+
     def parse_cli_output(self, data):
         """Decodifica el JSON de cada línea y emite las señales correspondientes."""
         event_type = data.get('type')
@@ -84,10 +271,17 @@ class SpeedTestWorker(QThread):
             isp = data.get('isp', 'N/A')
             server = data.get('server', {})
             server_name = server.get('name', 'N/A')
+            self.server_name = server_name
+            if self._current_server is None and server.get('id') is not None:
+                # Resultado de la selección automática: se reutiliza en el resto de ejecuciones.
+                self._current_server = {'id': server['id'], 'name': server_name}
+                self.server_cache.save_selected_server(self._current_server)
             self.status_updated.emit(f"ISP: {isp} | Conectando a: {server_name}")
 
         elif event_type == 'ping':
             ping = data.get('ping', {})
+            if 'latency' in ping:
+                self.latency_sample.emit(self.server_name, float(ping['latency']))
             self.status_updated.emit(f"Probando latencia... (Jitter: {ping.get('jitter', 0):.2f} ms)")
 
         elif event_type == 'download' or event_type == 'upload':
@@ -100,6 +294,7 @@ class SpeedTestWorker(QThread):
                  self.status_updated.emit(f"Midiendo velocidad de {test_name}...")
 
         elif event_type == 'result':
+            self._last_result = data
             self.status_updated.emit("¡Test completado!")
             self.test_finished.emit(data)
 
@@ -110,4 +305,4 @@ class SpeedTestWorker(QThread):
             try:
                 self.process.kill()
             except Exception as e:
-                self.logger.error(f"Error al intentar detener el proceso de speedtest: {e}")
\ No newline at end of file
+                self.logger.error(f"Error al intentar detener el proceso de speedtest: {e}")
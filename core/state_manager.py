@@ -3,6 +3,8 @@ import json
 import os
 import logging # Usar logging para consistencia
 
+from .operation_journal import write_json_atomically
+
 class StateManager:
     """Gestiona el guardado y la restauración del estado del sistema."""
     
@@ -18,7 +20,7 @@ class StateManager:
         """Carga el estado desde el archivo JSON."""
         if os.path.exists(self.backup_file):
             try:
-                with open(self.backup_file, 'r') as f:
+                with open(self.backup_file, 'r', encoding='utf-8') as f:
                     return json.load(f)
             except (json.JSONDecodeError, IOError) as e:
                 self.logger.error(f"No se pudo cargar el archivo de estado: {e}")
@@ -29,12 +31,30 @@ class StateManager:
         """Guarda un valor de configuración específico."""
         self.state[key] = value
         try:
-            with open(self.backup_file, 'w') as f:
-                json.dump(self.state, f, indent=4)
+            # Escritura atómica: un corte a mitad no puede dejar el backup truncado.
+            write_json_atomically(self.backup_file, self.state, indent=4)
             self.logger.info(f"Estado guardado: {key} = {value}")
         except IOError as e:
             self.logger.error(f"No se pudo guardar el archivo de estado: {e}")
 
+    def remove_state(self, *keys):
+        """
+        Olvida los valores indicados (ya restaurados). Si no queda nada, elimina el backup
+        para que backup_exists() refleje que el sistema vuelve a su estado original.
+        """
+        if not any(key in self.state for key in keys):
+            return
+        for key in keys:
+            self.state.pop(key, None)
+        if not self.state:
+            self.clear_backup()
+            return
+        try:
+            write_json_atomically(self.backup_file, self.state, indent=4)
+            self.logger.info(f"Estado eliminado: {', '.join(keys)}")
+        except IOError as e:
+            self.logger.error(f"No se pudo guardar el archivo de estado: {e}")
+
     def get_state(self, key, default=None):
         """Obtiene un valor de configuración guardado."""
         return self.state.get(key, default)
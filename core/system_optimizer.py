@@ -1,17 +1,28 @@
 # core/system_optimizer.py
 
-import subprocess
-import re
 import os
-import shutil
+import subprocess
+import sys
+import time
 import psutil
 import ctypes
 from ctypes import wintypes
 
 from .state_manager import StateManager
 from .registry_manager import RegistryManager
+from .command_executor import CommandExecutor
+from .power_scheme import PowerSchemeManager
+from .service_orchestrator import ServiceOrchestrator, WindowsServiceControlManager
+from .process_terminator import ProcessTreeTerminator
+from .temp_cleaner import CleanupPolicy, TempCleaner, TempCleanupScheduler, TempIndex
 
 class SystemOptimizer:
+    # Procesos que nunca se recortan, cierran ni reinician.
+    SYSTEM_CRITICAL_PROCESSES = [
+        'csrss.exe', 'wininit.exe', 'services.exe', 'lsass.exe',
+        'winlogon.exe', 'svchost.exe', 'smss.exe', 'system', 'registry'
+    ]
+
     def __init__(self, state_manager: StateManager, console_logger):
         """
         Inicializa el optimizador del sistema.
@@ -23,8 +34,15 @@ class SystemOptimizer:
         self.state_manager = state_manager
         self.log = console_logger
         self.reg_manager = RegistryManager(console_logger)
+        self.command_executor = CommandExecutor()
         
         self.services_to_manage = [] # Esta lista ahora se llena desde el perfil.
+        self.service_orchestrator = ServiceOrchestrator(
+            WindowsServiceControlManager(self.command_executor), console_logger)
+        self.temp_cleaner = None
+        self.temp_scheduler = None
+        self.process_terminator = ProcessTreeTerminator()
+        self.power_schemes = PowerSchemeManager(self._run_command, console_logger)
         
         self.gaming_features_keys = {
             "GameDVR_Enabled": {
@@ -41,65 +59,147 @@ class SystemOptimizer:
             }
         }
 
-    def _run_command(self, command, ignore_errors=None):
-        """Ejecuta un comando de sistema de forma segura, con opción de ignorar errores esperados."""
+    def _run_command(self, command, ignore_errors=None, timeout=None):
+        """
+        Ejecuta un comando de sistema con tiempo máximo, con opción de ignorar errores
+        esperados. Devuelve la salida, "" si el error se ignora o None.
+        """
+        return self._interpret_result(self.command_executor.run_sync(command, timeout), ignore_errors)
+
+    def _run_commands(self, commands, ignore_errors=None, timeout=None):
+        """Ejecuta a la vez varios comandos independientes. Devuelve sus salidas en el mismo orden."""
+        results = self.command_executor.run_group(commands, timeout)
+        return [self._interpret_result(result, ignore_errors) for result in results]
+
+    def _interpret_result(self, result, ignore_errors=None):
         if ignore_errors is None:
             ignore_errors = []
-            
-        try:
-            result = subprocess.check_output(
-                command, shell=True, text=True, stderr=subprocess.PIPE, 
-                encoding='cp850', creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            return result.strip()
-        except subprocess.CalledProcessError as e:
-            if any(err_code in e.stderr for err_code in ignore_errors):
-                return ""
-            
-            cmd_str = ' '.join(command) if isinstance(command, list) else command
-            self.log(f"[WARN] El comando '{cmd_str}' falló con un error inesperado: {e.stderr.strip()}")
+
+        if result.timed_out:
+            self.log(f"[WARN] El comando '{result.command}' no terminó en {result.duration:.1f} s y se canceló.")
             return None
+        if result.ok:
+            return result.stdout.strip()
+        # 'sc' y otras herramientas escriben el código de error en stdout, no en stderr.
+        if any(err_code in result.stderr or err_code in result.stdout for err_code in ignore_errors):
+            return ""
+        detail = result.stderr.strip() or result.stdout.strip()
+        self.log(f"[WARN] El comando '{result.command}' falló con un error inesperado: {detail}")
+        return None
 
-    def optimize_power_plan(self):
-        """Cambia el plan de energía del sistema a 'Alto Rendimiento' de forma idempotente."""
+    def optimize_power_plan(self, profile=None):
+        """
+        Activa el plan de energía del perfil (creándolo si no existe en el equipo) y aplica
+        sus ajustes individuales en un único lote, guardando los valores originales.
+
+        Args:
+            profile (dict | None): Opción 'power_plan' compilada. 'scheme' puede ser
+                'ultimate', 'high_performance' (por defecto) o 'active'; 'settings' relaciona
+                nombres de PowerSchemeManager.KNOWN_SETTINGS con su valor (AC y batería).
+        """
         self.log("\n[+] Optimizando Plan de Energía...")
-        output = self._run_command("powercfg /getactivescheme")
-        if output is None:
+        profile = profile or {}
+        original_guid = self.power_schemes.active_scheme_guid()
+        if original_guid is None:
             self.log("[-] No se pudo obtener el plan de energía actual.")
             return
 
-        match = re.search(r'([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})', output)
-        if match:
-            current_guid = match.group(1)
-            high_perf_guid = "381b4222-f694-41f0-9685-ff5bb260df2e"
-            if current_guid != high_perf_guid:
-                self.state_manager.save_state('power_plan_guid', current_guid)
-                self.log("[INFO] Plan de energía actual guardado.")
-                self._run_command(f"powercfg /setactive {high_perf_guid}")
-                self.log("[OK] Plan de energía establecido en 'Alto Rendimiento'.")
-            else:
-                self.log("[OK] El plan de 'Alto Rendimiento' ya estaba activo.")
+        saved = self.state_manager.get_state('power_plan')
+        if saved is None:
+            # Primera aplicación desde el último restore: este es el estado a recuperar.
+            saved = {'active_guid': original_guid, 'created_scheme': None, 'settings': []}
+
+        target_guid, created = self.power_schemes.resolve_target_scheme(
+            profile.get('scheme', 'high_performance'), saved.get('created_scheme'))
+        if target_guid is None:
+            self.log("[-] No se pudo preparar un plan de energía de alto rendimiento.")
+            return
+        if created:
+            saved['created_scheme'] = target_guid
+
+        changes = self.power_schemes.plan_changes(target_guid, profile.get('settings'))
+        already_saved = {(c['scheme'], c['setting']) for c in saved['settings']}
+        for change in changes:
+            # Solo se guarda el primer valor original de cada ajuste (la aplicación es idempotente).
+            if (target_guid, change['setting']) not in already_saved:
+                saved['settings'].append({'scheme': target_guid, 'subgroup': change['subgroup'], 'setting': change['setting'],
+                                          'original': change['original'], 'original_dc': change['original_dc']})
+        self.state_manager.save_state('power_plan', saved)
+
+        if target_guid == original_guid and not changes:
+            self.log("[OK] El plan de energía ya estaba optimizado.")
+            return
+        if self.power_schemes.apply_batch(target_guid, changes):
+            model = self.power_schemes.query(target_guid)
+            name = model.name if model and model.name else target_guid
+            self.log(f"[OK] Plan de energía '{name}' activo ({len(changes)} ajustes modificados).")
         else:
-            self.log("[-] No se pudo encontrar el GUID del plan actual en la salida.")
+            self.log("[-] No se pudieron aplicar los ajustes del plan de energía.")
 
     def restore_power_plan(self):
-        """Restaura el plan de energía original."""
+        """Restaura el plan de energía original, los valores de cada ajuste y elimina el plan creado."""
         self.log("\n[+] Restaurando Plan de Energía...")
-        original_guid = self.state_manager.get_state('power_plan_guid')
-        if original_guid:
-            self._run_command(f"powercfg /setactive {original_guid}")
+        saved = self.state_manager.get_state('power_plan')
+        if saved is None and self.state_manager.get_state('power_plan_guid'):
+            # Backups de versiones anteriores solo guardaban el GUID del plan.
+            saved = {'active_guid': self.state_manager.get_state('power_plan_guid'), 'settings': []}
+        if not saved:
+            self.log("[-] No se encontró un plan de energía guardado para restaurar.")
+            return
+        if self.power_schemes.restore(saved):
+            self.state_manager.remove_state('power_plan', 'power_plan_guid')
             self.log("[OK] Plan de energía restaurado al original.")
         else:
-            self.log("[-] No se encontró un plan de energía guardado para restaurar.")
+            self.log("[-] No se pudo restaurar completamente el plan de energía.")
+
+    def update_power_plan(self, previous, profile):
+        """
+        Pasa del plan de energía de un perfil al de otro sin volver antes al original. Los
+        ajustes que solo fijaba el perfil anterior recuperan su valor original y el resto se
+        aplica encima, conservando los originales ya guardados.
+
+        Args:
+            previous (dict): Opción 'power_plan' compilada del perfil activo.
+            profile (dict): Opción 'power_plan' compilada del perfil de destino.
+        """
+        if previous.get('scheme', 'high_performance') != profile.get('scheme', 'high_performance'):
+            # Otro plan de destino: hay que deshacer el anterior (y borrar el que se creó).
+            self.restore_power_plan()
+            self.optimize_power_plan(profile)
+            return
+
+        new_settings = profile.get('settings') or {}
+        dropped = {self.power_schemes.KNOWN_SETTINGS[name][1] for name in (previous.get('settings') or {})
+                   if name not in new_settings and name in self.power_schemes.KNOWN_SETTINGS}
+        saved = self.state_manager.get_state('power_plan')
+        reverted = [change for change in (saved or {}).get('settings', []) if change['setting'] in dropped]
+        if reverted:
+            self.log("\n[+] Devolviendo a su valor original los ajustes de energía que el nuevo perfil no usa...")
+            by_scheme = {}
+            for change in reverted:
+                by_scheme.setdefault(change['scheme'], []).append(
+                    dict(change, value=change.get('original'), dc_value=change.get('original_dc')))
+            # Los valores del plan activo no surten efecto hasta volver a activarlo, y
+            # optimize_power_plan no lo hará si no tiene nada más que cambiar.
+            active_guid = self.power_schemes.active_scheme_guid()
+            if all(self.power_schemes.apply_batch(scheme, changes, activate=scheme == active_guid)
+                   for scheme, changes in by_scheme.items()):
+                saved['settings'] = [change for change in saved['settings'] if change['setting'] not in dropped]
+                self.state_manager.save_state('power_plan', saved)
+                self.log(f"[OK] {len(reverted)} ajustes de energía restaurados.")
+            else:
+                self.log("[-] No se pudieron restaurar algunos ajustes de energía; se conservan en el backup.")
+        self.optimize_power_plan(profile)
 
     def manage_services(self, action='disable', profile=None):
         """Gestiona servicios basándose en el perfil proporcionado."""
-        if not profile or not profile.get('enabled', False):
+        # La restauración no depende del perfil: se revierte todo lo que haya en el backup.
+        if action == 'disable' and (not profile or not profile.get('enabled', False)):
             self.log("\n[INFO] La gestión de servicios está desactivada en este perfil.")
             return
 
-        services_to_manage = profile.get('list', [])
-        if not services_to_manage:
+        services_to_manage = (profile or {}).get('list', [])
+        if action == 'disable' and not services_to_manage:
             self.log("\n[INFO] No hay servicios definidos para gestionar en este perfil.")
             return
 
@@ -107,51 +207,77 @@ class SystemOptimizer:
         self.log(f"\n[+] {log_header} servicios según el perfil...")
 
         if action == 'disable':
+            # 1. Guardar los tipos de inicio originales ANTES de tocar ningún servicio.
             original_states = self.state_manager.get_state('original_service_states', {})
             for service_name in services_to_manage:
                 try:
-                    service = psutil.win_service_get(service_name)
-                    start_type = service.start_type()
-                    
+                    start_type = psutil.win_service_get(service_name).start_type()
                     if service_name not in original_states and start_type != 'disabled':
                         original_states[service_name] = start_type
                         self.log(f"[INFO] Guardando estado de '{service_name}': {start_type}")
-                    
-                    if service.status() == 'running':
-                        self.log(f"[INFO] Deteniendo servicio en ejecución '{service_name}'...")
-                        self._run_command(f'sc stop "{service_name}"')
-                    
-                    if start_type != 'disabled':
-                        self._run_command(f'sc config "{service_name}" start= disabled')
-                        self.log(f"[OK] Servicio '{service_name}' configurado como deshabilitado.")
-                    else:
-                        self.log(f"[OK] Servicio '{service_name}' ya estaba deshabilitado.")
-
                 except psutil.NoSuchProcess:
-                    self.log(f"[INFO] Servicio '{service_name}' no encontrado. Omitiendo.")
+                    pass # El orquestador informará de que no existe.
                 except Exception as e:
-                    self.log(f"[-] Error con el servicio '{service_name}': {e}")
-            
+                    self.log(f"[-] Error leyendo el servicio '{service_name}': {e}")
+
             if original_states:
                 self.state_manager.save_state('original_service_states', original_states)
+
+            # 2. Detener (respetando dependencias y en paralelo) y deshabilitar.
+            start = time.perf_counter()
+            report = self.service_orchestrator.stop_and_disable(services_to_manage)
+            self.log(f"[INFO] Servicios procesados en {time.perf_counter() - start:.2f} s.")
+            return report
         
         elif action == 'restore':
-            original_states = self.state_manager.get_state('original_service_states')
-            if original_states:
-                for service, start_type in original_states.items():
-                    self._run_command(f'sc config "{service}" start= {start_type}', ignore_errors=["1060"])
-                    self.log(f"[OK] Servicio '{service}' restaurado a '{start_type}'.")
-            else:
-                self.log("[-] No hay estados de servicios guardados para restaurar.")
+            return self.restore_services()
+
+    def restore_services(self, names=None):
+        """
+        Restaura el tipo de inicio original de los servicios guardados (o solo de 'names')
+        y los quita del backup.
+        """
+        original_states = self.state_manager.get_state('original_service_states')
+        if not original_states:
+            self.log("[-] No hay estados de servicios guardados para restaurar.")
+            return None
+        selected = {name: start_type for name, start_type in original_states.items() if names is None or name in names}
+        if not selected:
+            return []
+        report = self.service_orchestrator.restore_start_types(selected)
+        finished = {result['service'] for result in report if result['outcome'] in ('restored', 'not_found')}
+        remaining = {name: start_type for name, start_type in original_states.items() if name not in finished}
+        if remaining:
+            self.state_manager.save_state('original_service_states', remaining)
+        else:
+            self.state_manager.remove_state('original_service_states')
+        return report
+
+    def update_services(self, previous, profile):
+        """
+        Deja deshabilitados exactamente los servicios del perfil de destino: restaura los que
+        solo desactivaba el perfil anterior y desactiva los nuevos. Los comunes no se tocan.
+        """
+        previous_list = set(previous.get('list', []))
+        released = previous_list - set(profile.get('list', []))
+        if released:
+            self.log(f"\n[+] Restaurando servicios que el nuevo perfil no desactiva: {', '.join(sorted(released))}")
+            self.restore_services(released)
+        added = [name for name in profile.get('list', []) if name not in previous_list]
+        if added:
+            return self.manage_services('disable', dict(profile, list=added))
+        if not released:
+            self.log("\n[OK] Los servicios ya están como los deja el nuevo perfil.")
 
     def manage_gaming_features(self, action='disable', profile=None):
         """Gestiona características de juego de Windows basándose en el perfil."""
-        if not profile or not profile.get('enabled', False):
+        if action == 'disable' and (not profile or not profile.get('enabled', False)):
             self.log("\n[INFO] La gestión de características de juego está desactivada en este perfil.")
             return
 
         log_header = "Desactivando" if action == 'disable' else "Restaurando"
         self.log(f"\n[+] {log_header} características de juego de Windows...")
+        restored = []
         
         for key_id, props in self.gaming_features_keys.items():
             path, value_name = props["path"], props["value_name"]
@@ -179,35 +305,66 @@ class SystemOptimizer:
                     else:
                         self.reg_manager.set_value(path, value_name, saved_state["value"], saved_state["type"])
                         self.log(f"[OK] Característica '{value_name}' restaurada a su valor original.")
+                    restored.append(state_key)
                 else:
                     self.log(f"[-] No se encontró backup para '{value_name}'.")
 
+        if restored:
+            self.state_manager.remove_state(*restored)
+
+    def _get_temp_cleaner(self):
+        """Crea bajo demanda el índice de temporales (se carga desde disco, sin escanear)."""
+        if self.temp_cleaner is None:
+            temp_folders = [os.environ.get('TEMP'), os.path.join(os.environ.get('SystemRoot', 'C:\\Windows'), 'Temp')]
+            self.temp_cleaner = TempCleaner(TempIndex(temp_folders))
+        return self.temp_cleaner
+
+    def start_temp_scheduler(self):
+        """Arranca el hilo de limpieza en segundo plano si no está en marcha."""
+        if self.temp_scheduler is None or not self.temp_scheduler.is_alive():
+            self.temp_scheduler = TempCleanupScheduler(self._get_temp_cleaner())
+            self.temp_scheduler.start()
+        return self.temp_scheduler
+
+    def stop_temp_scheduler(self):
+        if self.temp_scheduler is not None:
+            self.temp_scheduler.stop()
+
+    def cancel_temp_cleanup(self):
+        """Anula la limpieza de temporales pendiente o periódica del perfil que deja de estar activo."""
+        if self.temp_scheduler is not None:
+            self.temp_scheduler.disarm()
+
+    def temp_files_report(self):
+        """Informe instantáneo (dry-run) de lo que la limpieza borraría, sacado del índice."""
+        report = self._get_temp_cleaner().dry_run()
+        if report['last_refresh'] is None:
+            self.log("[INFO] El índice de temporales aún se está construyendo en segundo plano.")
+            return report
+        indexed_mb = report['indexed_bytes'] / (1024 * 1024)
+        candidate_mb = report['candidate_bytes'] / (1024 * 1024)
+        self.log(f"[INFO] Temporales indexados: {report['indexed_files']} archivos ({indexed_mb:.2f} MB).")
+        self.log(f"[INFO] Según la política actual se borrarían {report['candidate_files']} archivos ({candidate_mb:.2f} MB).")
+        return report
+
     def clean_temp_files(self, profile=None):
-        """Limpia archivos temporales si está habilitado en el perfil."""
+        """
+        Programa la limpieza de archivos temporales si está habilitada en el perfil.
+        El borrado lo hace el hilo de baja prioridad; aquí solo se informa desde el índice.
+        """
         if not profile or not profile.get('enabled', False):
             self.log("\n[INFO] La limpieza de archivos temporales está desactivada en este perfil.")
             return
 
         self.log("\n[+] Limpiando archivos temporales...")
-        temp_folders = [os.environ.get('TEMP'), os.path.join(os.environ.get('SystemRoot', 'C:\\Windows'), 'Temp')]
-        total_deleted_files, total_deleted_size = 0, 0
-
-        for folder in temp_folders:
-            if not folder or not os.path.exists(folder): continue
-            self.log(f"[INFO] Limpiando directorio: {folder}")
-            for filename in os.listdir(folder):
-                file_path = os.path.join(folder, filename)
-                try:
-                    size = os.path.getsize(file_path)
-                    if os.path.isfile(file_path) or os.path.islink(file_path): os.unlink(file_path)
-                    elif os.path.isdir(file_path): shutil.rmtree(file_path)
-                    total_deleted_files += 1
-                    total_deleted_size += size
-                except (PermissionError, OSError): self.log(f"[INFO] Omitido (en uso): {os.path.basename(file_path)}")
-                except Exception as e: self.log(f"[-] Error inesperado al eliminar {os.path.basename(file_path)}: {e}")
-        
-        size_mb = total_deleted_size / (1024 * 1024)
-        self.log(f"[OK] Limpieza completada. Se eliminaron {total_deleted_files} elementos ({size_mb:.2f} MB liberados).")
+        cleaner = self._get_temp_cleaner()
+        cleaner.policy = CleanupPolicy.from_profile(profile)
+        self.temp_files_report()
+        self.start_temp_scheduler().trigger()
+        self.log("[OK] Limpieza programada en segundo plano con prioridad baja. "
+                 f"Solo se borran archivos con más de {cleaner.policy.min_age_hours} h de antigüedad.")
+        if cleaner.policy.repeat_hours:
+            self.log(f"[INFO] La limpieza se repetirá cada {cleaner.policy.repeat_hours} h mientras el perfil siga activo.")
 
     def free_up_ram(self):
         """
@@ -218,10 +375,7 @@ class SystemOptimizer:
         
         try:
             current_user = psutil.Process().username()
-            system_critical_processes = [
-                'csrss.exe', 'wininit.exe', 'services.exe', 'lsass.exe',
-                'winlogon.exe', 'svchost.exe', 'smss.exe', 'system', 'registry'
-            ]
+            system_critical_processes = self.SYSTEM_CRITICAL_PROCESSES
 
             mem_before = psutil.virtual_memory().used
             freed_count = 0
@@ -234,12 +388,7 @@ class SystemOptimizer:
                             p_info['name'].lower() not in system_critical_processes and
                             p_info['pid'] != os.getpid()):
                         
-                        PROCESS_ALL_ACCESS = 0x1F0FFF # Permiso completo para abrir el proceso
-                        handle = ctypes.windll.kernel32.OpenProcess(PROCESS_ALL_ACCESS, False, p_info['pid'])
-                        if handle:
-                            # Llamar a la API de Windows para vaciar el working set del proceso
-                            ctypes.windll.psapi.EmptyWorkingSet(handle)
-                            ctypes.windll.kernel32.CloseHandle(handle)
+                        if self._empty_working_set(p_info['pid']):
                             freed_count += 1
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     # El proceso puede haber terminado o no tenemos permisos, lo ignoramos.
@@ -258,6 +407,101 @@ class SystemOptimizer:
         except Exception as e:
             self.log(f"[ERROR] Ocurrió un error inesperado al liberar RAM: {e}")
     
+    def _empty_working_set(self, pid):
+        """Vacía el working set de un proceso. Devuelve True si se pudo abrir el proceso."""
+        PROCESS_ALL_ACCESS = 0x1F0FFF # Permiso completo para abrir el proceso
+        handle = ctypes.windll.kernel32.OpenProcess(PROCESS_ALL_ACCESS, False, pid)
+        if not handle:
+            return False
+        # Llamar a la API de Windows para vaciar el working set del proceso
+        ctypes.windll.psapi.EmptyWorkingSet(handle)
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+
+    def _check_user_process(self, pid):
+        """Devuelve el psutil.Process si es un proceso del usuario actual que se puede tocar; si no, None."""
+        try:
+            proc = psutil.Process(pid)
+            if (proc.name().lower() in self.SYSTEM_CRITICAL_PROCESSES or pid == os.getpid()
+                    or proc.username() != psutil.Process().username()):
+                self.log(f"[WARN] El proceso {proc.name()} (PID: {pid}) está protegido. No se modificará.")
+                return None
+            return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self.log(f"[WARN] El proceso con PID {pid} ya no existe o no es accesible.")
+            return None
+
+    def trim_process(self, pid):
+        """Recorta el working set de un único proceso (p. ej. uno con una fuga de memoria)."""
+        proc = self._check_user_process(pid)
+        if proc is None:
+            return False
+        try:
+            before = proc.memory_info().rss
+            if not self._empty_working_set(pid):
+                self.log(f"[WARN] No se pudo abrir {proc.name()} para recortar su memoria.")
+                return False
+            freed = max(before - proc.memory_info().rss, 0) / (1024 * 1024)
+            self.log(f"[OK] Memoria de {proc.name()} recortada ({freed:.1f} MB devueltos al sistema).")
+            return True
+        except psutil.Error as e:
+            self.log(f"[WARN] No se pudo recortar la memoria del proceso {pid}: {e}")
+            return False
+
+    def restart_process(self, pid):
+        """
+        Reinicia una aplicación: cierra su árbol de procesos y la vuelve a lanzar con la
+        misma línea de comandos y directorio de trabajo. Bloquea hasta que el árbol se
+        cierra; la GUI usa los tres pasos por separado para cerrarlo en un hilo de trabajo.
+        """
+        target = self.prepare_restart(pid)
+        if target is None:
+            return False
+        return self.relaunch(target, self.close_for_restart(target))
+
+    def prepare_restart(self, pid):
+        """Comprueba el proceso y lee cómo volver a lanzarlo. Devuelve el destino del reinicio o None."""
+        proc = self._check_user_process(pid)
+        if proc is None:
+            return None
+        try:
+            name, cmdline, cwd = proc.name(), proc.cmdline(), proc.cwd()
+        except psutil.Error as e:
+            self.log(f"[WARN] No se pudo leer la línea de comandos del proceso {pid}: {e}")
+            return None
+        if not cmdline:
+            self.log(f"[WARN] {name} no expone su línea de comandos; no se puede reiniciar.")
+            return None
+        return {'name': name, 'root': proc, 'cmdline': cmdline, 'cwd': cwd}
+
+    def close_for_restart(self, target):
+        """
+        Cierra el árbol del proceso y espera a que termine (varios segundos si no responde).
+        Solo se cierran la raíz y sus auxiliares conocidos, nunca otros descendientes ni
+        procesos protegidos. No registra nada en la GUI, así que se puede llamar desde un
+        hilo de trabajo.
+        """
+        tree = self.process_terminator.tree_of(target['root'])
+        if tree is None:
+            return []
+        return self.process_terminator.terminate_trees([tree])
+
+    def relaunch(self, target, report):
+        """Vuelve a lanzar la aplicación si close_for_restart() la cerró por completo."""
+        name = target['name']
+        if not report or report[0]['survivors']:
+            self.log(f"[WARN] {name} no se cerró por completo; no se relanzará.")
+            return False
+        try:
+            flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == "win32" else 0
+            subprocess.Popen(target['cmdline'], cwd=target['cwd'], creationflags=flags, close_fds=True)
+        except OSError as e:
+            self.log(f"[ERROR] {name} se cerró pero no se pudo volver a lanzar: {e}")
+            return False
+        freed = report[0]['freed_bytes'] / (1024 * 1024)
+        self.log(f"[OK] {name} reiniciado ({freed:.1f} MB liberados).")
+        return True
+
     def manage_background_apps(self, profile=None):
         """
         Encuentra y termina procesos en segundo plano definidos en el perfil.
@@ -273,24 +517,20 @@ class SystemOptimizer:
             return
 
         self.log("\n[+] Cerrando aplicaciones en segundo plano para liberar recursos...")
-        killed_count = 0
-        
-        # Hacemos la lista de nombres de ejecutables insensible a mayúsculas/minúsculas
-        apps_to_kill_lower = [app.lower() for app in apps_to_kill]
-
-        for proc in psutil.process_iter(['name', 'pid']):
-            try:
-                if proc.info['name'].lower() in apps_to_kill_lower:
-                    process_to_kill = psutil.Process(proc.info['pid'])
-                    process_to_kill.terminate() # Usar terminate() es más seguro que kill()
-                    self.log(f"[OK] Proceso terminado: {proc.info['name']} (PID: {proc.info['pid']})")
-                    killed_count += 1
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                # El proceso ya no existe o no tenemos permisos para cerrarlo (ej. un proceso del sistema)
-                self.log(f"[WARN] No se pudo terminar el proceso {proc.info['name']}. Puede que ya se haya cerrado o esté protegido.")
-                continue
-        
-        if killed_count > 0:
-            self.log(f"[INFO] Se cerraron {killed_count} procesos/aplicaciones.")
+        # Se espera a que los árboles completos terminen (escalando a kill si hace falta),
+        # de modo que la memoria ya esté libre cuando se ejecute free_up_ram a continuación.
+        report = self.process_terminator.close_applications(apps_to_kill)
+
+        for tree in report:
+            children = f" y {tree['processes'] - 1} procesos hijos" if tree['processes'] > 1 else ""
+            forced = f", {tree['killed']} forzados" if tree['killed'] else ""
+            self.log(f"[OK] Cerrado: {tree['name']} (PID: {tree['pid']}){children}{forced}. "
+                     f"Memoria liberada: {tree['freed_bytes'] / (1024 * 1024):.1f} MB.")
+            if tree['survivors']:
+                self.log(f"[WARN] {tree['survivors']} procesos de {tree['name']} siguen en ejecución. Puede que estén protegidos.")
+
+        if report:
+            total_freed = sum(tree['freed_bytes'] for tree in report) / (1024 * 1024)
+            self.log(f"[INFO] Se cerraron {len(report)} aplicaciones ({total_freed:.1f} MB liberados).")
         else:
-            self.log("[INFO] No se encontraron aplicaciones de la lista en ejecución.")
\ No newline at end of file
+            self.log("[INFO] No se encontraron aplicaciones de la lista en ejecución.")
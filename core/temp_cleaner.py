@@ -0,0 +1,343 @@
+# core/temp_cleaner.py
+
+import ctypes
+import fnmatch
+import json
+import os
+import sys
+import threading
+import time
+import logging
+
+from .operation_journal import write_json_atomically
+
+class CleanupPolicy:
+    """
+    Decide qué entradas del índice de temporales se pueden borrar.
+
+      - min_age_hours: nada modificado (o visto por primera vez) hace menos de este tiempo
+        se toca; protege los archivos que una aplicación acaba de crear y va a reutilizar.
+      - max_age_days: lo que supere esta antigüedad se borra siempre.
+      - size_budget_mb: si tras lo anterior los temporales siguen ocupando más que el
+        presupuesto, se borran los más antiguos (que cumplan min_age_hours) hasta entrar en él.
+      - patterns: reglas por aplicación, en orden, p. ej.
+        {"pattern": "*steam*", "keep": true} o {"pattern": "*.dmp", "max_age_days": 1}.
+      - repeat_hours: si se indica, la limpieza se repite con esta cadencia mientras el
+        perfil siga activo. Por defecto es una limpieza única por aplicación del perfil.
+    """
+
+    def __init__(self, min_age_hours=24, max_age_days=7, size_budget_mb=None, patterns=None, repeat_hours=None):
+        self.min_age_hours = min_age_hours
+        self.max_age_days = max_age_days
+        self.size_budget_mb = size_budget_mb
+        self.patterns = patterns or []
+        self.repeat_hours = repeat_hours
+
+    @classmethod
+    def from_profile(cls, options):
+        """Construye la política a partir de la opción 'temp_files' ya compilada del perfil."""
+        options = options or {}
+        return cls(
+            min_age_hours=options.get('min_age_hours', 24),
+            max_age_days=options.get('max_age_days', 7),
+            size_budget_mb=options.get('size_budget_mb'),
+            patterns=options.get('patterns'),
+            repeat_hours=options.get('repeat_hours'),
+        )
+
+    def _rule_for(self, path):
+        normalized = path.lower()
+        for rule in self.patterns:
+            if fnmatch.fnmatch(normalized, rule.get('pattern', '').lower()):
+                return rule
+        return None
+
+    def select(self, entries, now=None):
+        """
+        Args:
+            entries (dict): ruta -> {'size', 'mtime', 'first_seen', 'last_seen'}.
+
+        Returns:
+            list[tuple[str, dict]]: Entradas a borrar, de la más antigua a la más reciente.
+        """
+        now = time.time() if now is None else now
+        selected, eligible_rest = [], []
+
+        for path, entry in entries.items():
+            rule = self._rule_for(path) or {}
+            if rule.get('keep'):
+                continue
+            # Un archivo recién extraído puede conservar un mtime antiguo: se usa también
+            # el momento en que el índice lo vio por primera vez.
+            age = now - max(entry['mtime'], entry.get('first_seen', 0))
+            if age < rule.get('min_age_hours', self.min_age_hours) * 3600:
+                continue
+            max_age_days = rule.get('max_age_days', self.max_age_days)
+            if max_age_days is not None and age >= max_age_days * 86400:
+                selected.append((path, entry))
+            else:
+                eligible_rest.append((path, entry))
+
+        if self.size_budget_mb is not None:
+            budget = self.size_budget_mb * 1024 * 1024
+            remaining = sum(entry['size'] for entry in entries.values()) - sum(e['size'] for _, e in selected)
+            for path, entry in sorted(eligible_rest, key=lambda item: item[1]['mtime']):
+                if remaining <= budget:
+                    break
+                selected.append((path, entry))
+                remaining -= entry['size']
+
+        return sorted(selected, key=lambda item: item[1]['mtime'])
+
+
+class TempIndex:
+    """
+    Índice persistente de los archivos de las carpetas temporales (ruta, tamaño, mtime,
+    primera y última vez vistos).
+
+    El refresco es incremental: solo se vuelve a listar un directorio cuando su mtime
+    cambió (se crearon, borraron o renombraron entradas). Un subárbol sin cambios cuesta
+    un único stat por directorio.
+    """
+
+    VERSION = 1
+
+    def __init__(self, roots, index_file=None):
+        self.roots = [os.path.normpath(root) for root in roots if root]
+        self.index_file = index_file or os.path.join(os.getenv('APPDATA'), 'VelocityOS', 'temp_index.json')
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.lock = threading.RLock()
+        self.dirs = {}      # directorio -> {'mtime': ns, 'subdirs': [...], 'files': [...]}
+        self.entries = {}   # archivo -> {'size', 'mtime', 'first_seen', 'last_seen'}
+        self.last_refresh = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION and data.get('roots') == self.roots:
+                self.dirs, self.entries = data['dirs'], data['entries']
+                self.last_refresh = data.get('last_refresh')
+        except (json.JSONDecodeError, IOError, KeyError) as e:
+            self.logger.warning(f"Índice de temporales ilegible, se reconstruirá: {e}")
+
+    def save(self):
+        with self.lock:
+            data = {'version': self.VERSION, 'roots': self.roots, 'dirs': self.dirs,
+                    'entries': self.entries, 'last_refresh': self.last_refresh}
+            try:
+                write_json_atomically(self.index_file, data)
+            except IOError as e:
+                self.logger.error(f"No se pudo guardar el índice de temporales: {e}")
+
+    def refresh(self):
+        """
+        Actualiza el índice. Devuelve el número de directorios que hubo que volver a listar.
+        El lock se toma directorio a directorio para que los informes no esperen al recorrido completo.
+        """
+        now = time.time()
+        # En la primera construcción no se sabe cuándo apareció cada archivo: decide solo el mtime.
+        first_seen = now if self.last_refresh is not None else 0
+        rescanned, seen_dirs = 0, set()
+        pending = [root for root in self.roots if os.path.isdir(root)]
+        while pending:
+            directory = pending.pop()
+            seen_dirs.add(directory)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            with self.lock:
+                cached = self.dirs.get(directory)
+                if cached is None or cached['mtime'] != mtime:
+                    cached = self._scan_directory(directory, mtime, now, first_seen)
+                    rescanned += 1
+                pending.extend(cached['subdirs'])
+
+        with self.lock:
+            # Directorios que desaparecieron: se olvidan junto con sus archivos.
+            for directory in set(self.dirs) - seen_dirs:
+                for path in self.dirs.pop(directory)['files']:
+                    self.entries.pop(path, None)
+            self.last_refresh = now
+        return rescanned
+
+    def _scan_directory(self, directory, mtime, now, first_seen):
+        previous_files = set(self.dirs.get(directory, {}).get('files', ()))
+        files, subdirs = [], []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    files.append(entry.path)
+                    known = self.entries.get(entry.path)
+                    self.entries[entry.path] = {
+                        'size': st.st_size,
+                        'mtime': st.st_mtime,
+                        'first_seen': known['first_seen'] if known else first_seen,
+                        'last_seen': now,
+                    }
+        except OSError as e:
+            self.logger.debug(f"No se pudo listar {directory}: {e}")
+        for path in previous_files - set(files):
+            self.entries.pop(path, None)
+        record = {'mtime': mtime, 'subdirs': subdirs, 'files': files}
+        self.dirs[directory] = record
+        return record
+
+    def total_size(self):
+        with self.lock:
+            return sum(entry['size'] for entry in self.entries.values())
+
+    def forget(self, path):
+        with self.lock:
+            self.entries.pop(path, None)
+            parent = self.dirs.get(os.path.dirname(path))
+            if parent and path in parent['files']:
+                parent['files'].remove(path)
+
+
+class TempCleaner:
+    """Aplica una CleanupPolicy sobre un TempIndex: informe instantáneo (dry-run) y borrado."""
+
+    def __init__(self, index, policy=None):
+        self.index = index
+        self.policy = policy or CleanupPolicy()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def dry_run(self):
+        """Informe sin tocar disco: sale del índice tal y como está."""
+        with self.index.lock:
+            candidates = self.policy.select(dict(self.index.entries))
+            return {
+                'indexed_files': len(self.index.entries),
+                'indexed_bytes': sum(e['size'] for e in self.index.entries.values()),
+                'candidate_files': len(candidates),
+                'candidate_bytes': sum(entry['size'] for _, entry in candidates),
+                'last_refresh': self.index.last_refresh,
+            }
+
+    def run(self):
+        """Refresca el índice y borra lo que la política selecciona. Devuelve (archivos, bytes) borrados."""
+        self.index.refresh()
+        with self.index.lock:
+            candidates = self.policy.select(dict(self.index.entries))
+        min_age = self.policy.min_age_hours * 3600
+        deleted_files, deleted_bytes = 0, 0
+        now = time.time()
+
+        for path, entry in candidates:
+            try:
+                # El índice puede ir por detrás: si el archivo se tocó hace poco, se respeta.
+                st = os.stat(path)
+                if now - st.st_mtime < min_age:
+                    continue
+                os.unlink(path)
+                deleted_files += 1
+                deleted_bytes += st.st_size
+                self.index.forget(path)
+            except FileNotFoundError:
+                self.index.forget(path)
+            except (PermissionError, OSError):
+                continue # En uso por otra aplicación.
+
+        self._remove_empty_dirs()
+        self.index.refresh()
+        self.index.save()
+        return deleted_files, deleted_bytes
+
+    def _remove_empty_dirs(self):
+        with self.index.lock:
+            roots = set(self.index.roots)
+            for directory in sorted(self.index.dirs, key=len, reverse=True):
+                if directory in roots:
+                    continue
+                try:
+                    os.rmdir(directory) # Solo funciona si está vacío.
+                except OSError:
+                    pass
+
+
+class TempCleanupScheduler(threading.Thread):
+    """
+    Hilo de baja prioridad que mantiene el índice al día y ejecuta la limpieza fuera del
+    camino crítico de 'Optimizar'. Cada trigger() hace una sola limpieza; solo se repite
+    si la política lo pide ('repeat_hours'), hasta que se llame a disarm(). El resto del
+    tiempo el hilo solo refresca el índice.
+    """
+
+    THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+    def __init__(self, cleaner, interval_hours=6):
+        super().__init__(name="TempCleanupScheduler", daemon=True)
+        self.cleaner = cleaner
+        self.interval = interval_hours * 3600
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._pending = False
+        self._repeat_seconds = None
+        self.last_result = None
+
+    def trigger(self):
+        """
+        Pide una limpieza inmediata (se ejecuta en el hilo de fondo) con la política actual
+        del limpiador. Si la política tiene 'repeat_hours', queda programada con esa cadencia.
+        """
+        repeat_hours = self.cleaner.policy.repeat_hours
+        self._repeat_seconds = repeat_hours * 3600 if repeat_hours else None
+        self._pending = True
+        self._wakeup.set()
+
+    def disarm(self):
+        """Cancela la limpieza pendiente y la periódica (al restaurar o cambiar a un perfil sin 'temp_files')."""
+        self._pending = False
+        self._repeat_seconds = None
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+
+    def _lower_priority(self):
+        """Prioridad de CPU y de E/S mínimas para no competir con el juego."""
+        try:
+            if sys.platform == "win32":
+                kernel32 = ctypes.windll.kernel32
+                kernel32.SetThreadPriority(kernel32.GetCurrentThread(), self.THREAD_MODE_BACKGROUND_BEGIN)
+            elif hasattr(os, 'setpriority'):
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except Exception as e:
+            self.logger.debug(f"No se pudo bajar la prioridad del hilo de limpieza: {e}")
+
+    def run(self):
+        self._lower_priority()
+        # Primer paso: construir/poner al día el índice para que los informes sean instantáneos.
+        self.cleaner.index.refresh()
+        self.cleaner.index.save()
+        while not self._stopping:
+            repeat_seconds = self._repeat_seconds
+            triggered = self._wakeup.wait(repeat_seconds or self.interval)
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            due = self._pending or (not triggered and repeat_seconds is not None and self._repeat_seconds is not None)
+            self._pending = False
+            if not due:
+                self.cleaner.index.refresh()
+                self.cleaner.index.save()
+                continue
+            try:
+                files, size = self.cleaner.run()
+                self.last_result = {'files': files, 'bytes': size, 'timestamp': time.time(), 'triggered': triggered}
+                self.logger.info(f"Limpieza de temporales: {files} archivos ({size / (1024 * 1024):.2f} MB).")
+            except Exception as e:
+                self.logger.error(f"Error en la limpieza de temporales: {e}", exc_info=True)
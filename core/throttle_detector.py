@@ -0,0 +1,252 @@
+# core/throttle_detector.py
+
+import sys
+import time
+import logging
+
+import numpy as np
+import psutil
+
+# Bits de la máscara de throttling de NVML agrupados por causa (ver gpu_telemetry.THROTTLE_REASONS).
+GPU_THERMAL_BITS = 0x0008 | 0x0020 | 0x0040  # hw_slowdown, sw_thermal, hw_thermal
+GPU_POWER_BITS = 0x0004 | 0x0080             # sw_power_cap, hw_power_brake
+
+CAUSE_LABELS = {
+    'thermal': "temperatura",
+    'power': "límite de potencia",
+    'unknown': "causa desconocida",
+}
+
+
+def read_cpu_clocks():
+    """
+    Devuelve (frecuencias actuales por CPU en MHz, frecuencia base, frecuencia máxima).
+    La base y la máxima son None si el sistema no las informa. En Windows psutil solo da
+    una entrada, y su 'max' es la frecuencia base del procesador.
+    """
+    try:
+        per_cpu = psutil.cpu_freq(percpu=True) or []
+    except Exception:
+        per_cpu = []
+    current = np.array([freq.current for freq in per_cpu], dtype=np.float64)
+    limits = per_cpu[0] if per_cpu else None
+    max_mhz = limits.max if limits and limits.max else None
+    base_mhz = max_mhz if sys.platform == "win32" else _sysfs_base_frequency() or max_mhz
+    return current, base_mhz, max_mhz
+
+
+def _sysfs_base_frequency():
+    try:
+        with open("/sys/devices/system/cpu/cpu0/cpufreq/base_frequency", 'r') as f:
+            return int(f.read().strip()) / 1000
+    except (OSError, ValueError):
+        return None
+
+
+def read_cpu_temperature():
+    """Temperatura más alta de los sensores de la CPU (°C), o None si no hay sensores accesibles."""
+    if not hasattr(psutil, "sensors_temperatures"):
+        return None # Windows: psutil no expone los sensores.
+    try:
+        sensors = psutil.sensors_temperatures()
+    except Exception:
+        return None
+    readings = [entry.current for name in ("coretemp", "k10temp", "zenpower", "cpu_thermal")
+                for entry in sensors.get(name, ())]
+    return max(readings) if readings else None
+
+
+def _peak_temperature(temps):
+    temps = temps[~np.isnan(temps)]
+    return f"{float(temps.max()):.0f} °C" if temps.size else "temperatura no disponible"
+
+
+def describe_throttle_event(event):
+    clock = time.strftime("%H:%M:%S", time.localtime(event['timestamp']))
+    cause = CAUSE_LABELS.get(event['cause'], event['cause'])
+    if event['active']:
+        return f"{clock} {event['device']} limitada por {cause}: {event['detail']}"
+    return f"{clock} {event['device']} dejó de estar limitada ({cause}) tras {event['duration']:.0f} s."
+
+
+class ThrottleDetector:
+    """
+    Detecta throttling térmico o de potencia de la CPU y las GPUs sobre una ventana
+    deslizante de las últimas muestras del monitor.
+
+    Cada muestra se guarda en arrays fijos de NumPy y las comprobaciones son operaciones
+    vectorizadas sobre la ventana: un componente se considera limitado cuando la condición
+    se cumple en al menos 'sustain_ratio' de las muestras (un pico aislado no cuenta).
+    update() devuelve los eventos de inicio y de fin, con la marca de tiempo de la muestra
+    para poder cruzarlos con el resto de la telemetría.
+    """
+
+    def __init__(self, window_samples=10, sustain_ratio=0.6, min_samples=5, cpu_load_percent=50,
+                 cpu_freq_ratio=0.9, cpu_temp_limit=95, gpu_temp_limit=85, max_gpus=4):
+        """
+        Args:
+            window_samples (int): Muestras de la ventana (a 1 Hz, segundos).
+            sustain_ratio (float): Fracción de la ventana en la que debe cumplirse la condición.
+            cpu_load_percent (float): Carga mínima de CPU para juzgar su frecuencia (en reposo
+                bajar la frecuencia es lo esperado).
+            cpu_freq_ratio (float): Fracción de la frecuencia base por debajo de la cual la CPU
+                se considera limitada.
+            cpu_temp_limit (float): Temperatura de CPU que atribuye la bajada a causa térmica.
+            gpu_temp_limit (float): Temperatura a partir de la cual se considera limitada una GPU
+                que no informa su máscara de throttling (AMD).
+        """
+        self.window = window_samples
+        self.sustain_ratio = sustain_ratio
+        self.min_samples = min(min_samples, window_samples)
+        self.cpu_load_percent = cpu_load_percent
+        self.cpu_freq_ratio = cpu_freq_ratio
+        self.cpu_temp_limit = cpu_temp_limit
+        self.gpu_temp_limit = gpu_temp_limit
+        self.max_gpus = max_gpus
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.timestamps = np.zeros(window_samples, dtype=np.float64)
+        # CPU: (frecuencia media / base, carga %, temperatura °C)
+        self.cpu = np.full((window_samples, 3), np.nan, dtype=np.float64)
+        # GPU: temperatura °C y máscara de throttling (-1 = la GPU no la informa)
+        self.gpu_temp = np.full((window_samples, max_gpus), np.nan, dtype=np.float64)
+        self.gpu_mask = np.full((window_samples, max_gpus), -1, dtype=np.int64)
+        self.head = 0
+        self.count = 0
+        self.active = {}  # dispositivo -> evento de inicio
+
+    def _append(self, timestamp, cpu_row, gpus):
+        row = self.head
+        self.timestamps[row] = timestamp
+        self.cpu[row] = cpu_row
+        self.gpu_temp[row] = np.nan
+        self.gpu_mask[row] = -1
+        for gpu in gpus[:self.max_gpus]:
+            index = gpu.get('index', 0)
+            if index >= self.max_gpus:
+                continue
+            if gpu.get('temperature') is not None:
+                self.gpu_temp[row, index] = gpu['temperature']
+            if gpu.get('throttle_mask') is not None:
+                self.gpu_mask[row, index] = gpu['throttle_mask']
+        self.head = (self.head + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+
+    def _sustained(self, condition):
+        return self.count >= self.min_samples and condition.sum() >= self.sustain_ratio * self.count
+
+    def update(self, timestamp, cpu_freqs, cpu_usage, base_mhz=None, cpu_temp=None, gpus=(), on_battery=False):
+        """
+        Añade una muestra y evalúa la ventana.
+
+        Args:
+            cpu_freqs (array-like): Frecuencia actual de cada CPU (MHz).
+            base_mhz (float | None): Frecuencia base; sin ella no se evalúa la CPU.
+            cpu_temp (float | None): Temperatura de la CPU, si hay sensores.
+            gpus (list[dict]): Las muestras por GPU del monitor ('temperature', 'throttle_mask').
+
+        Returns:
+            list[dict]: Eventos {'timestamp', 'component', 'device', 'cause', 'active',
+                'detail'} de inicio, y con 'duration' los de fin.
+        """
+        freqs = np.asarray(cpu_freqs, dtype=np.float64)
+        ratio = freqs.mean() / base_mhz if base_mhz and freqs.size else np.nan
+        cpu_row = (ratio, cpu_usage, np.nan if cpu_temp is None else cpu_temp)
+        self._append(timestamp, cpu_row, list(gpus))
+
+        findings = {}
+        cpu_finding = self._check_cpu(on_battery)
+        if cpu_finding:
+            findings["CPU"] = ('cpu',) + cpu_finding
+        for index in range(self.max_gpus):
+            gpu_finding = self._check_gpu(index)
+            if gpu_finding:
+                findings[f"GPU {index}"] = ('gpu',) + gpu_finding
+        return self._transitions(timestamp, findings)
+
+    def _valid(self):
+        return slice(0, self.count) if self.count < self.window else slice(None)
+
+    def _check_cpu(self, on_battery):
+        window = self.cpu[self._valid()]
+        mean_ratio, load, temp = window.T
+        throttled = (load >= self.cpu_load_percent) & (mean_ratio < self.cpu_freq_ratio)
+        if not self._sustained(throttled):
+            return None
+        ratio = float(np.nanmean(mean_ratio[throttled]))
+        detail = f"{ratio * 100:.0f} % de la frecuencia base con carga {float(np.nanmean(load[throttled])):.0f} %"
+        hot = temp[throttled]
+        if np.any(hot >= self.cpu_temp_limit):
+            return 'thermal', f"{detail}, {_peak_temperature(hot)}"
+        if on_battery:
+            return 'power', f"{detail}, funcionando con batería"
+        return 'unknown', detail
+
+    def _check_gpu(self, index):
+        valid = self._valid()
+        masks, temps = self.gpu_mask[valid, index], self.gpu_temp[valid, index]
+        reported = masks >= 0
+        if reported.any():
+            thermal = reported & ((masks & GPU_THERMAL_BITS) != 0)
+            power = reported & ((masks & GPU_POWER_BITS) != 0)
+            if self._sustained(thermal):
+                return 'thermal', f"el driver informa límite térmico ({_peak_temperature(temps)})"
+            if self._sustained(power):
+                return 'power', "el driver informa límite de potencia"
+            return None
+        hot = temps >= self.gpu_temp_limit
+        if self._sustained(hot):
+            return 'thermal', f"{_peak_temperature(temps)} sostenidos (probable throttling térmico)"
+        return None
+
+    def _transitions(self, timestamp, findings):
+        events = []
+        for device, (component, cause, detail) in findings.items():
+            current = self.active.get(device)
+            if current is not None and current['cause'] == cause:
+                continue
+            if current is not None:
+                events.append(self._end(device, timestamp))
+            event = {'timestamp': timestamp, 'component': component, 'device': device,
+                     'cause': cause, 'active': True, 'detail': detail}
+            self.active[device] = event
+            events.append(event)
+        for device in [device for device in self.active if device not in findings]:
+            events.append(self._end(device, timestamp))
+        return events
+
+    def _end(self, device, timestamp):
+        start = self.active.pop(device)
+        return dict(start, timestamp=timestamp, active=False, detail="", duration=timestamp - start['timestamp'])
+
+
+class ThrottleSampler:
+    """
+    Lee lo que el detector necesita además de la muestra del monitor (frecuencias por CPU,
+    temperatura de la CPU y batería). Los sensores de temperatura son lentos de leer: solo
+    se consultan cuando la CPU ya parece limitada, que es cuando sirven para atribuir la causa.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def _on_battery(self):
+        try:
+            battery = psutil.sensors_battery()
+        except Exception:
+            return False
+        return battery is not None and not battery.power_plugged
+
+    def sample(self, data):
+        """Evalúa una muestra de SystemMonitor. Devuelve los eventos de throttling."""
+        freqs, base_mhz, _ = read_cpu_clocks()
+        suspicious = (base_mhz and freqs.size and data['cpu_usage'] >= self.detector.cpu_load_percent
+                      and freqs.mean() < base_mhz * self.detector.cpu_freq_ratio)
+        cpu_temp = read_cpu_temperature() if suspicious else None
+        events = self.detector.update(data['timestamp'], freqs, data['cpu_usage'], base_mhz=base_mhz,
+                                      cpu_temp=cpu_temp, gpus=data.get('gpus') or [],
+                                      on_battery=bool(suspicious) and self._on_battery())
+        for event in events:
+            self.logger.warning(describe_throttle_event(event))
+        return events
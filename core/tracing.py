@@ -0,0 +1,199 @@
+# core/tracing.py
+
+import os
+import time
+import threading
+import itertools
+import logging
+from collections import deque
+
+from .operation_journal import write_json_atomically
+
+
+class _NullSpan:
+    """Span vacío que se devuelve con el trazado desactivado: no mide ni guarda nada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def set_outcome(self, outcome):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Intervalo medido con nombre, categoría, atributos y resultado ('ok' salvo que se indique otro)."""
+
+    __slots__ = ("tracer", "name", "category", "attributes", "outcome", "span_id", "parent_id", "start_ns")
+
+    def __init__(self, tracer, name, category, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.outcome = "ok"
+        self.span_id = None
+        self.parent_id = None
+        self.start_ns = 0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def set_outcome(self, outcome):
+        self.outcome = outcome
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent_id = stack[-1].span_id if stack else None
+        self.span_id = next(self.tracer._ids)
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.outcome = "error"
+            self.attributes['error'] = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self, end_ns)
+        return False
+
+
+class Tracer:
+    """
+    Trazado estructurado con spans anidados (operación > paso > registro/servicio/comando).
+
+    Con el trazado desactivado, span() devuelve siempre el mismo objeto vacío, así que el
+    coste en los puntos instrumentados es una comprobación y una llamada. Activado, cada
+    span cerrado se guarda en un búfer acotado y se exporta en el formato de eventos de
+    trazas de Chrome, que se abre en chrome://tracing, Perfetto o speedscope.
+
+    El anidamiento se sigue por hilo. Los trabajos que corren en otros hilos (servicios en
+    paralelo, comandos en el grupo de intérpretes) aparecen en su propia fila del visor.
+    """
+
+    def __init__(self, enabled=False, max_events=100_000, app_name="VelocityOS"):
+        """
+        Args:
+            enabled (bool): Si se registran spans.
+            max_events (int): Spans que se conservan como máximo (se descartan los más antiguos).
+            app_name (str): Carpeta de %APPDATA% donde se guardan las trazas exportadas.
+        """
+        self.enabled = enabled
+        self.app_name = app_name
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.events = deque(maxlen=max_events)
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._origin_ns = time.perf_counter_ns()
+        self._thread_names = {}
+        self._lanes = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, category="general", **attributes):
+        """
+        Abre un span para usar con 'with'. El span anidado dentro de otro del mismo hilo
+        queda como su hijo.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, category, attributes)
+
+    def _tid(self, lane=None):
+        if lane is None:
+            tid = threading.get_ident()
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+            return tid
+        with self._lock:
+            if lane not in self._lanes:
+                # Identificadores sintéticos pequeños: los de los hilos reales son direcciones de memoria.
+                self._lanes[lane] = len(self._lanes) + 1
+                self._thread_names[self._lanes[lane]] = lane
+            return self._lanes[lane]
+
+    def _finish(self, span, end_ns):
+        args = dict(span.attributes, outcome=span.outcome, span_id=span.span_id)
+        if span.parent_id is not None:
+            args['parent_id'] = span.parent_id
+        self._append(span.name, span.category, span.start_ns, end_ns, args, self._tid())
+
+    def record(self, name, category, start_ns, end_ns, outcome="ok", lane=None, **attributes):
+        """
+        Registra un span ya medido (p. ej. desde un bucle asyncio, donde el anidamiento por
+        hilo no sirve). 'lane' agrupa los spans en una fila propia del visor.
+        """
+        if not self.enabled:
+            return
+        self._append(name, category, start_ns, end_ns,
+                     dict(attributes, outcome=outcome, span_id=next(self._ids)), self._tid(lane))
+
+    def _append(self, name, category, start_ns, end_ns, args, tid):
+        self.events.append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start_ns - self._origin_ns) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': tid,
+            'args': args,
+        })
+
+    def chrome_trace(self):
+        """Devuelve el documento de trazas en formato Chrome trace-event."""
+        pid = os.getpid()
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': self.app_name}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in list(self._thread_names.items())]
+        return {'traceEvents': metadata + list(self.events), 'displayTimeUnit': 'ms'}
+
+    def default_trace_path(self, label="trace"):
+        trace_dir = os.path.join(os.getenv('APPDATA'), self.app_name, 'traces')
+        os.makedirs(trace_dir, exist_ok=True)
+        return os.path.join(trace_dir, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+    def export_chrome_trace(self, path=None, label="trace", clear=True):
+        """
+        Guarda los spans registrados en un archivo JSON de trazas de Chrome.
+
+        Returns:
+            str | None: La ruta del archivo, o None si no había nada que exportar o falló.
+        """
+        if not self.events:
+            return None
+        path = path or self.default_trace_path(label)
+        try:
+            write_json_atomically(path, self.chrome_trace())
+        except OSError as e:
+            self.logger.error(f"No se pudo guardar la traza en '{path}': {e}")
+            return None
+        if clear:
+            self.events.clear()
+        return path
+
+
+# Trazador compartido por todo core/: se activa desde los ajustes o con --trace.
+tracer = Tracer()
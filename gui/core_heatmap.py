@@ -0,0 +1,79 @@
+# gui/core_heatmap.py
+
+import numpy as np
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QImage, QPainter, QColor
+from PyQt6.QtCore import QSize
+
+
+class CoreHeatmap(QWidget):
+    """
+    Mapa de calor de la carga por CPU lógica: una fila por núcleo y una columna por segundo,
+    con la más reciente a la derecha. Se pinta como una sola imagen generada con NumPy
+    (tabla de colores indexada por la carga), no celda a celda.
+    """
+
+    # Carga (%) -> color, interpolado entre los puntos. Colores de la hoja de estilos.
+    COLOR_STOPS = ((0, (39, 41, 61)), (40, (137, 180, 250)), (75, (249, 226, 175)), (100, (243, 139, 168)))
+
+    def __init__(self, columns=120, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.loads = None        # (núcleos, columnas) uint8, circular
+        self.head = 0
+        self.last_timestamp = None
+        self._image_bytes = None # QImage no copia los datos: hay que mantenerlos vivos.
+        loads = np.arange(101)
+        stops, colors = zip(*self.COLOR_STOPS)
+        self._lut = np.stack([np.interp(loads, stops, channel) for channel in zip(*colors)], axis=1).astype(np.uint8)
+        self.setMinimumHeight(60)
+        self.setToolTip("Carga de cada CPU lógica (filas) en los últimos minutos (columnas).")
+
+    def sizeHint(self):
+        cores = self.loads.shape[0] if self.loads is not None else 8
+        return QSize(400, max(60, min(cores * 8, 200)))
+
+    def clear(self):
+        self.loads = None
+        self.last_timestamp = None
+        self.update()
+
+    def push(self, timestamp, loads):
+        """
+        Añade la carga por núcleo de una muestra. Si pasaron varios segundos desde la
+        anterior (no llegó ningún cambio por encima del umbral), se repiten los últimos
+        valores para que el eje horizontal siga siendo tiempo.
+        """
+        if not loads:
+            return
+        values = np.clip(np.rint(loads), 0, 100).astype(np.uint8)
+        if self.loads is None or self.loads.shape[0] != len(values) or \
+                (self.last_timestamp is not None and timestamp < self.last_timestamp):
+            self.loads = np.zeros((len(values), self.columns), dtype=np.uint8)
+            self.head = 0
+            self.last_timestamp = None
+            self.updateGeometry()
+        steps = 1 if self.last_timestamp is None else int(min(max(round(timestamp - self.last_timestamp), 1), self.columns))
+        if steps > 1:
+            previous = self.loads[:, (self.head - 1) % self.columns].copy()
+            for _ in range(steps - 1):
+                self.loads[:, self.head] = previous
+                self.head = (self.head + 1) % self.columns
+        self.loads[:, self.head] = values
+        self.head = (self.head + 1) % self.columns
+        self.last_timestamp = timestamp
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(*self.COLOR_STOPS[0][1]))
+        if self.loads is None:
+            return
+        ordered = np.roll(self.loads, -self.head, axis=1)
+        pixels = np.ascontiguousarray(self._lut[ordered])
+        cores, columns = ordered.shape
+        self._image_bytes = pixels.tobytes()
+        image = QImage(self._image_bytes, columns, cores, columns * 3, QImage.Format.Format_RGB888)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        painter.drawImage(self.rect(), image)
+        painter.end()
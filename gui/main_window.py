@@ -1,28 +1,51 @@
 # gui/main_window.py
 
-import json
 import os
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QTextEdit, QLabel, QTabWidget, QProgressBar, QGroupBox, 
-    QScrollArea, QFrame, QCheckBox, QComboBox, QFormLayout
+    QScrollArea, QFrame, QCheckBox, QComboBox, QFormLayout, QMessageBox, QSpinBox,
+    QSlider, QFileDialog
 )
 from PyQt6.QtGui import QIcon, QFont, QPixmap
-from PyQt6.QtCore import Qt, QSize, QTimer
+from PyQt6.QtCore import Qt, QSize, QTimer, QEvent
 
 from core.state_manager import StateManager
 from core.system_optimizer import SystemOptimizer
 from core.registry_manager import RegistryManager
 from core.network_optimizer import NetworkOptimizer
 from core.gpu_optimizer import GpuOptimizer
+from core.hardware_inventory import HardwareInventory
+from core.app_settings import AppSettings
+from core.metrics_exporter import MetricsExporter
+from core.tracing import tracer
+from core.profile_compiler import ProfileCompiler
+from core.optimization_runner import OptimizationRunner
 from utils import os_detector, startup_manager
 from utils.resource_path import resource_path
 from core.monitor import SystemMonitor
-from core.speed_test_worker import SpeedTestWorker
+from core.gpu_telemetry import describe_throttle_reasons
+from core.monitor_delta import SampleState
+from core.speed_test_worker import SpeedTestServerCache, SpeedTestWorker
+from core.memory_growth import MemoryGrowthTracker, MemoryGrowthMonitor, ProcessRestartWorker
+from core.session_recorder import (SessionRecorder, SessionReader, SessionReplay,
+                                   EVENT_LATENCY, EVENT_FRAME_TIME, EVENT_STEP, EVENT_THROTTLE)
+from core.throttle_detector import CAUSE_LABELS, describe_throttle_event
+from core.core_load import ThreadAttributionWorker
+from core.profile_recommender import ProfileRecommender, ProfileRecommendationWorker, describe_recommendation
+from gui.core_heatmap import CoreHeatmap
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, metrics_port=None, trace=False, monitor=None, metrics_exporter=None):
+        """
+        Args:
+            metrics_port (int | None): Fuerza el exportador de métricas en este puerto.
+            trace (bool): Activa el trazado de las operaciones.
+            monitor (SystemMonitor | None): Monitor ya en marcha (modo bandeja). La ventana
+                solo se conecta a él y no lo detiene al cerrarse.
+            metrics_exporter (MetricsExporter | None): Exportador ya en marcha (modo bandeja).
+        """
         super().__init__()
         self.setWindowTitle("VelocityOS")
         self.setWindowIcon(QIcon(resource_path("assets/icons/velocityos.ico")))
@@ -32,6 +55,22 @@ class MainWindow(QMainWindow):
         self.selected_profile_name = None
         self.selected_profile_id_for_settings = None
         self.gpu_brand_detected = "UNKNOWN"
+        self.metrics_exporter = metrics_exporter
+        self.owns_services = monitor is None
+        self.memory_growth_monitor = None
+        self.memory_suspect = None
+        self.process_restart_worker = None
+        self.monitor_gpu_brand = None
+        self.last_io_alert = None
+        self.active_throttling = {} # dispositivo -> evento de inicio de ThrottleDetector
+        self.core_bottleneck = None # Último episodio de núcleo saturado (con sus hilos, si ya se midieron)
+        self.thread_attribution_worker = None
+        self.profile_recommendation_worker = None
+        self._built_tabs = set()
+        self._monitor_connected = False
+        self.monitor_state = SampleState()
+        self.session_recorder = None
+        self.session_replay = None
 
         # --- Crear widgets de UI básicos ---
         self.tabs = QTabWidget()
@@ -44,12 +83,22 @@ class MainWindow(QMainWindow):
 
         # --- Inicialización del Backend ---
         app_path = sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(sys.argv[0])
-        self.startup_manager = startup_manager.StartupManager("VelocityOS", app_path)
+        self.startup_manager = startup_manager.StartupManager("VelocityOS", app_path, arguments="--tray")
+        if self.startup_manager.update_if_outdated():
+            self.log_to_console("[INFO] Entrada de inicio con Windows actualizada para arrancar en la bandeja.")
         self.state_manager = StateManager()
+        self.app_settings = AppSettings()
+        tracer.enable(trace or (self.app_settings.get('tracing') or {}).get('enabled', False))
         self.reg_manager = RegistryManager(self.log_to_console)
         self.system_optimizer = SystemOptimizer(self.state_manager, self.log_to_console)
         self.network_optimizer = NetworkOptimizer(self.state_manager, self.reg_manager, self.log_to_console)
-        self.gpu_optimizer = GpuOptimizer(self.log_to_console)
+        self.hardware_inventory = HardwareInventory(self.log_to_console)
+        self.gpu_optimizer = GpuOptimizer(self.log_to_console, self.hardware_inventory)
+        self.profile_compiler = ProfileCompiler(resource_path("config"), self.log_to_console)
+        self.optimization_runner = OptimizationRunner(
+            self.state_manager, self.system_optimizer, self.network_optimizer, self.log_to_console,
+            step_observer=self._record_step_metrics
+        )
 
         # --- Cargar datos DESPUÉS de inicializar el backend ---
         self.profiles = self._load_profiles()
@@ -60,15 +109,40 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(self.settings_tab, QIcon(resource_path("assets/icons/settings.png")), "Ajustes")
         self.tabs.setIconSize(QSize(24, 24))
 
-        self.setup_optimization_tab()
-        self.setup_monitor_tab()
-        self.setup_settings_tab()
+        # Solo se construye la pestaña visible; las demás, la primera vez que se muestran.
+        self._tab_builders = {
+            self.optimization_tab: self.setup_optimization_tab,
+            self.monitor_tab: self.setup_monitor_tab,
+            self.settings_tab: self.setup_settings_tab,
+        }
+        self.ensure_tab_built(self.tabs.currentWidget())
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         
         # --- Iniciar hilos al final ---
-        self.monitor_thread = SystemMonitor(self)
-        self.monitor_thread.system_data_updated.connect(self.update_monitor_data)
+        if self.owns_services:
+            self.monitor_thread = SystemMonitor(
+                self, io_alerts=self.app_settings.get('io_alerts'),
+                gpu_slow_interval=self.app_settings.get('gpu_telemetry')['slow_interval_seconds'],
+                inventory=self.hardware_inventory, throttle=self.app_settings.get('throttle_detection'),
+                core_bottleneck=self.app_settings.get('core_bottleneck'))
+        else:
+            self.monitor_thread = monitor
+            self.update_gpu_label(monitor.gpu_brand)
+        # Lo que pinta la pestaña Monitor: el monitor en vivo o una sesión grabada (SessionReplay).
+        self.monitor_source = self.monitor_thread
         self.monitor_thread.gpu_detected.connect(self.update_gpu_label)
-        self.monitor_thread.start()
+        self.monitor_thread.io_saturation_alert.connect(self.handle_io_saturation_alert)
+        self.monitor_thread.throttle_event.connect(self.handle_throttle_event)
+        self.monitor_thread.core_bottleneck.connect(self.handle_core_bottleneck)
+        if self.owns_services:
+            self.monitor_thread.start()
+        self.start_memory_growth_monitor()
+        # Mantiene el índice de temporales al día con prioridad baja; no borra nada hasta que un perfil lo pida.
+        self.system_optimizer.start_temp_scheduler()
+
+        exporter_settings = self.app_settings.get('metrics_exporter', {})
+        if self.metrics_exporter is None and (metrics_port is not None or exporter_settings.get('enabled', False)):
+            self.start_metrics_exporter(metrics_port)
         
         # --- Estado inicial ---
         self.update_button_states()
@@ -78,6 +152,59 @@ class MainWindow(QMainWindow):
         else:
             self.log_to_console("Selecciona un perfil para comenzar.")
 
+        # Se comprueba cuando la ventana ya está en pantalla para poder mostrar el diálogo.
+        QTimer.singleShot(0, self.check_interrupted_operation)
+
+    def ensure_tab_built(self, tab):
+        if tab in self._built_tabs:
+            return
+        self._built_tabs.add(tab)
+        self._tab_builders[tab]()
+
+    def _on_tab_changed(self, index):
+        self.ensure_tab_built(self.tabs.widget(index))
+        self._sync_monitor_delivery()
+
+    def _sync_monitor_delivery(self):
+        """
+        Conecta la GUI al monitor solo mientras la pestaña Monitor está a la vista. Oculta o
+        minimizada, el monitor sigue guardando muestras en su historial pero no se repinta nada.
+        """
+        if getattr(self, 'monitor_source', None) is None:
+            return
+        visible = self.isVisible() and not self.isMinimized() and self.tabs.currentWidget() is self.monitor_tab
+        if visible == self._monitor_connected:
+            return
+        self._monitor_connected = visible
+        if visible:
+            self.monitor_source.delta_available.connect(self._on_monitor_delta)
+            snapshot = self.monitor_source.resync_delta()
+            if snapshot:
+                self.update_monitor_data(snapshot) # Ponerse al día sin esperar a la siguiente muestra.
+        else:
+            self.monitor_source.delta_available.disconnect(self._on_monitor_delta)
+
+    def _set_monitor_source(self, source):
+        """Cambia lo que pinta la pestaña Monitor: el monitor en vivo o una sesión grabada."""
+        if self._monitor_connected:
+            self.monitor_source.delta_available.disconnect(self._on_monitor_delta)
+            self._monitor_connected = False
+        self.monitor_source = source
+        self._sync_monitor_delivery()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._sync_monitor_delivery()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._sync_monitor_delivery()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._sync_monitor_delivery()
+
     def setup_optimization_tab(self):
         main_layout = QVBoxLayout(self.optimization_tab)
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -96,23 +223,20 @@ class MainWindow(QMainWindow):
         self.profile_buttons_layout = QHBoxLayout()
         self.profile_buttons = {}
         
-        profile_icons = {"competitive": resource_path("assets/icons/rocket.png"), "balanced": resource_path("assets/icons/shield.png")}
-        for profile_id, profile_data in self.profiles.items():
-            icon_path = profile_icons.get(profile_id, resource_path("assets/icons/zap.png"))
-            button = QPushButton(QIcon(icon_path), f"  {profile_data['name']}")
-            button.setIconSize(QSize(20, 20))
-            button.setCheckable(True)
-            button.clicked.connect(lambda checked, p_id=profile_id: self.select_profile(p_id))
-            self.profile_buttons_layout.addWidget(button)
-            self.profile_buttons[profile_id] = button
+        for profile_id in self.profiles:
+            self._add_profile_button(profile_id)
             
         self.profile_description_label = QLabel("Selecciona un perfil para ver su descripción.")
         self.profile_description_label.setObjectName("DescriptionLabel")
         self.profile_description_label.setWordWrap(True)
         self.profile_description_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.profile_description_label.setMinimumHeight(60)
+        self.recommend_profile_button = QPushButton(QIcon(resource_path("assets/icons/zap.png")), " Recomendar un perfil para este equipo")
+        self.recommend_profile_button.setToolTip("Mide qué aplicaciones, servicios e interfaces de red usan recursos ahora mismo y genera un perfil a medida.")
+        self.recommend_profile_button.clicked.connect(self.run_profile_recommendation)
         profile_layout.addLayout(self.profile_buttons_layout)
         profile_layout.addWidget(self.profile_description_label)
+        profile_layout.addWidget(self.recommend_profile_button)
         profile_group.setLayout(profile_layout)
         
         actions_group = QGroupBox("2. Aplica la Optimización o Reviértela")
@@ -150,6 +274,16 @@ class MainWindow(QMainWindow):
         scroll_area.setWidget(scroll_content_widget)
         main_layout.addWidget(scroll_area)
 
+    def _add_profile_button(self, profile_id):
+        profile_icons = {"competitive": resource_path("assets/icons/rocket.png"), "balanced": resource_path("assets/icons/shield.png")}
+        icon_path = profile_icons.get(profile_id, resource_path("assets/icons/zap.png"))
+        button = QPushButton(QIcon(icon_path), f"  {self.profiles[profile_id]['name']}")
+        button.setIconSize(QSize(20, 20))
+        button.setCheckable(True)
+        button.clicked.connect(lambda checked, p_id=profile_id: self.select_profile(p_id))
+        self.profile_buttons_layout.addWidget(button)
+        self.profile_buttons[profile_id] = button
+
     def setup_monitor_tab(self):
         layout = QVBoxLayout(self.monitor_tab)
         layout.setContentsMargins(20, 20, 20, 20)
@@ -182,7 +316,20 @@ class MainWindow(QMainWindow):
         self.speed_test_button.clicked.connect(self.start_speed_test)
         self.speed_test_status_label = QLabel("Haz clic para iniciar el test de diagnóstico.")
         self.speed_test_status_label.setObjectName("DescriptionLabel")
+        speed_test_settings = self.app_settings.get('speed_test') or {}
+        self.speed_test_runs_spin = QSpinBox()
+        self.speed_test_runs_spin.setRange(1, 10)
+        self.speed_test_runs_spin.setSuffix(" tests")
+        self.speed_test_runs_spin.setValue(speed_test_settings.get('runs', 1))
+        self.speed_test_server_combo = QComboBox()
+        for mode, text in (("auto", "Servidor automático"), ("pinned", "Último servidor (caché)"),
+                           ("rotate", f"Rotar entre los {speed_test_settings.get('top_k', 3)} más cercanos")):
+            self.speed_test_server_combo.addItem(text, mode)
+        self.speed_test_server_combo.setCurrentIndex(
+            max(0, self.speed_test_server_combo.findData(speed_test_settings.get('server_mode', 'auto'))))
         st_controls_layout.addWidget(self.speed_test_button)
+        st_controls_layout.addWidget(self.speed_test_runs_spin)
+        st_controls_layout.addWidget(self.speed_test_server_combo)
         st_controls_layout.addWidget(self.speed_test_status_label, 1)
         self.st_final_results_label = QLabel("Ping: -- | ISP: -- | Servidor: --")
         self.st_final_results_label.setObjectName("DescriptionLabel")
@@ -198,6 +345,12 @@ class MainWindow(QMainWindow):
         self.gpu_progress = QProgressBar()
         monitoring_layout.addWidget(QLabel("Uso de CPU:"))
         monitoring_layout.addWidget(self.cpu_progress)
+        self.core_heatmap = CoreHeatmap()
+        monitoring_layout.addWidget(self.core_heatmap)
+        self.core_bottleneck_label = QLabel("")
+        self.core_bottleneck_label.setObjectName("DescriptionLabel")
+        self.core_bottleneck_label.setWordWrap(True)
+        monitoring_layout.addWidget(self.core_bottleneck_label)
         monitoring_layout.addSpacing(10)
         monitoring_layout.addWidget(QLabel("Uso de RAM:"))
         monitoring_layout.addWidget(self.ram_progress)
@@ -205,17 +358,104 @@ class MainWindow(QMainWindow):
         self.gpu_label = QLabel("Uso de GPU:") # Etiqueta dinámica
         monitoring_layout.addWidget(self.gpu_label)
         monitoring_layout.addWidget(self.gpu_progress)
+        self.gpu_details_label = QLabel("")
+        self.gpu_details_label.setObjectName("DescriptionLabel")
+        self.gpu_details_label.setWordWrap(True)
+        monitoring_layout.addWidget(self.gpu_details_label)
+        monitoring_layout.addSpacing(10)
+        self.disk_io_label = QLabel("Disco: -- lectura | -- escritura")
+        self.net_io_label = QLabel("Red: -- bajada | -- subida")
+        self.io_alert_label = QLabel("")
+        self.io_alert_label.setObjectName("DescriptionLabel")
+        self.io_alert_label.setWordWrap(True)
+        monitoring_layout.addWidget(self.disk_io_label)
+        monitoring_layout.addWidget(self.net_io_label)
+        monitoring_layout.addWidget(self.io_alert_label)
+        self.throttle_label = QLabel("")
+        self.throttle_label.setObjectName("DescriptionLabel")
+        self.throttle_label.setWordWrap(True)
+        monitoring_layout.addWidget(self.throttle_label)
+        # Aviso de proceso con posible fuga de memoria (oculto hasta que se detecta uno).
+        self.memory_growth_widget = QWidget()
+        memory_growth_layout = QHBoxLayout(self.memory_growth_widget)
+        memory_growth_layout.setContentsMargins(0, 0, 0, 0)
+        self.memory_growth_label = QLabel("")
+        self.memory_growth_label.setObjectName("DescriptionLabel")
+        self.memory_growth_label.setWordWrap(True)
+        self.trim_process_button = QPushButton("Recortar memoria")
+        self.trim_process_button.clicked.connect(self.trim_memory_suspect)
+        self.restart_process_button = QPushButton("Reiniciar")
+        self.restart_process_button.clicked.connect(self.restart_memory_suspect)
+        memory_growth_layout.addWidget(self.memory_growth_label, 1)
+        memory_growth_layout.addWidget(self.trim_process_button)
+        memory_growth_layout.addWidget(self.restart_process_button)
+        self.memory_growth_widget.setVisible(False)
+        monitoring_layout.addWidget(self.memory_growth_widget)
         monitoring_layout.addSpacing(15)
         self.free_ram_button = QPushButton(QIcon(resource_path("assets/icons/zap.png")), " Liberar Memoria RAM")
         self.free_ram_button.setIconSize(QSize(20, 20))
         self.free_ram_button.clicked.connect(self.run_free_ram)
         monitoring_layout.addWidget(self.free_ram_button)
+        self.temp_report_button = QPushButton(QIcon(resource_path("assets/icons/save.png")), " Analizar Archivos Temporales")
+        self.temp_report_button.setIconSize(QSize(20, 20))
+        self.temp_report_button.clicked.connect(self.show_temp_files_report)
+        monitoring_layout.addWidget(self.temp_report_button)
         monitoring_group.setLayout(monitoring_layout)
         
+        session_group = QGroupBox("Grabación de Sesión")
+        session_layout = QVBoxLayout()
+        session_controls = QHBoxLayout()
+        self.record_session_button = QPushButton("⏺ Grabar sesión")
+        self.record_session_button.setCheckable(True)
+        self.record_session_button.setChecked(self.session_recorder is not None)
+        self.record_session_button.toggled.connect(self.toggle_session_recording)
+        self.open_session_button = QPushButton("Abrir grabación...")
+        self.open_session_button.clicked.connect(self.open_recorded_session)
+        self.live_monitor_button = QPushButton("Volver a en vivo")
+        self.live_monitor_button.clicked.connect(self.close_recorded_session)
+        self.live_monitor_button.setVisible(False)
+        session_controls.addWidget(self.record_session_button)
+        session_controls.addWidget(self.open_session_button)
+        session_controls.addWidget(self.live_monitor_button)
+        session_controls.addStretch()
+        # Controles de reproducción (ocultos hasta que se abre una grabación).
+        self.replay_widget = QWidget()
+        replay_layout = QHBoxLayout(self.replay_widget)
+        replay_layout.setContentsMargins(0, 0, 0, 0)
+        self.replay_play_button = QPushButton("▶")
+        self.replay_play_button.clicked.connect(self.toggle_replay_playback)
+        self.replay_slider = QSlider(Qt.Orientation.Horizontal)
+        self.replay_slider.valueChanged.connect(self._on_replay_slider)
+        self.replay_position_label = QLabel("00:00 / 00:00")
+        replay_layout.addWidget(self.replay_play_button)
+        replay_layout.addWidget(self.replay_slider, 1)
+        replay_layout.addWidget(self.replay_position_label)
+        self.replay_widget.setVisible(False)
+        self.replay_events_label = QLabel("")
+        self.replay_events_label.setObjectName("DescriptionLabel")
+        self.replay_events_label.setWordWrap(True)
+        session_layout.addLayout(session_controls)
+        session_layout.addWidget(self.replay_widget)
+        session_layout.addWidget(self.replay_events_label)
+        session_group.setLayout(session_layout)
+
         layout.addWidget(speed_test_group)
         layout.addWidget(monitoring_group)
+        layout.addWidget(session_group)
         layout.addStretch()
 
+        # Avisos que llegaron antes de construir la pestaña.
+        if self.monitor_gpu_brand is not None:
+            self.update_gpu_label(self.monitor_gpu_brand)
+        if self.last_io_alert:
+            self.io_alert_label.setText(f"⚠️ {self.last_io_alert}")
+        if self.active_throttling:
+            self._show_throttling()
+        if self.core_bottleneck:
+            self.core_bottleneck_label.setText(f"⚠️ {self._describe_core_bottleneck(self.core_bottleneck)}")
+        if self.memory_suspect:
+            self._show_memory_suspect()
+
     def setup_settings_tab(self):
         layout = QVBoxLayout(self.settings_tab)
         layout.setContentsMargins(20, 20, 20, 20)
@@ -226,6 +466,19 @@ class MainWindow(QMainWindow):
         self.startup_checkbox.setChecked(self.startup_manager.is_enabled())
         self.startup_checkbox.toggled.connect(self.toggle_startup)
         app_settings_layout.addRow(self.startup_checkbox)
+        exporter_settings = self.app_settings.get('metrics_exporter', {})
+        self.metrics_checkbox = QCheckBox(f"Exponer métricas OpenMetrics (puerto {exporter_settings.get('port', MetricsExporter.DEFAULT_PORT)})")
+        self.metrics_checkbox.setChecked(exporter_settings.get('enabled', False))
+        self.metrics_checkbox.toggled.connect(self.toggle_metrics_exporter)
+        app_settings_layout.addRow(self.metrics_checkbox)
+        self.io_alerts_checkbox = QCheckBox("Avisar cuando el disco o la red estén saturados")
+        self.io_alerts_checkbox.setChecked((self.app_settings.get('io_alerts') or {}).get('enabled', True))
+        self.io_alerts_checkbox.toggled.connect(self.toggle_io_alerts)
+        app_settings_layout.addRow(self.io_alerts_checkbox)
+        self.tracing_checkbox = QCheckBox("Guardar una traza de rendimiento de cada optimización (formato Chrome)")
+        self.tracing_checkbox.setChecked(tracer.enabled)
+        self.tracing_checkbox.toggled.connect(self.toggle_tracing)
+        app_settings_layout.addRow(self.tracing_checkbox)
         app_settings_group.setLayout(app_settings_layout)
         profile_settings_group = QGroupBox("Personalización de Perfiles")
         profile_settings_layout = QVBoxLayout()
@@ -258,26 +511,51 @@ class MainWindow(QMainWindow):
             self.populate_profile_settings(0)
 
     def _load_profiles(self):
-        profiles = {}
         try:
-            config_dir = resource_path("config")
-            if not os.path.exists(config_dir):
-                self.log_to_console(f"[ERROR-FATAL] ¡El directorio de perfiles no existe! Ruta buscada: {config_dir}")
-                return profiles
-            for filename in os.listdir(config_dir):
-                if filename.endswith(".json"):
-                    file_path = os.path.join(config_dir, filename)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            profile = json.load(f)
-                            profiles[profile['id']] = profile
-                    except json.JSONDecodeError as e:
-                        self.log_to_console(f"[ERROR-FATAL] El archivo de perfil '{filename}' tiene un error de sintaxis: {e}")
-                    except KeyError:
-                        self.log_to_console(f"[ERROR-FATAL] El archivo de perfil '{filename}' no tiene una clave 'id'.")
+            return self.profile_compiler.load()
         except Exception as e:
             self.log_to_console(f"[CRITICAL-ERROR] No se pudo procesar la carpeta de perfiles: {e}")
-        return profiles
+            return {}
+
+    def run_profile_recommendation(self):
+        if self.profile_recommendation_worker is not None and self.profile_recommendation_worker.isRunning():
+            return
+        self.recommend_profile_button.setEnabled(False)
+        self.recommend_profile_button.setText(" Analizando el equipo...")
+        self.log_to_console("\n[+] Analizando procesos, servicios, hardware y el historial del monitor para recomendar un perfil...")
+        recommender = ProfileRecommender(self.system_optimizer, self.hardware_inventory,
+                                         monitor_history=self.monitor_thread.get_history(), profiles=self.profiles)
+        self.profile_recommendation_worker = ProfileRecommendationWorker(recommender, self.profile_compiler.user_dir, self)
+        self.profile_recommendation_worker.recommendation_ready.connect(self.handle_profile_recommendation)
+        self.profile_recommendation_worker.recommendation_failed.connect(self.handle_profile_recommendation_failed)
+        self.profile_recommendation_worker.finished.connect(self._reset_recommend_button)
+        self.profile_recommendation_worker.start()
+
+    def handle_profile_recommendation(self, profile, file_path):
+        for line in describe_recommendation(profile):
+            self.log_to_console(line)
+        self.profiles = self._load_profiles()
+        profile_id = profile['id']
+        if profile_id not in self.profiles:
+            return # El compilador ya informó del error en la consola.
+        if profile_id in self.profile_buttons:
+            self.profile_buttons[profile_id].setText(f"  {self.profiles[profile_id]['name']}")
+        else:
+            self._add_profile_button(profile_id)
+            if self.settings_tab in self._built_tabs:
+                self.profile_selector.addItem(self.profiles[profile_id]['name'])
+        self.log_to_console(f"[OK] Perfil '{self.profiles[profile_id]['name']}' guardado en {file_path}.")
+        self.update_button_states()
+        if self.profile_buttons[profile_id].isEnabled():
+            self.profile_buttons[profile_id].setChecked(True)
+            self.select_profile(profile_id)
+
+    def handle_profile_recommendation_failed(self, error):
+        self.log_to_console(f"[ERROR] No se pudo generar el perfil recomendado: {error}")
+
+    def _reset_recommend_button(self):
+        self.recommend_profile_button.setText(" Recomendar un perfil para este equipo")
+        self.recommend_profile_button.setEnabled(True)
 
     def run_free_ram(self):
         self.free_ram_button.setEnabled(False)
@@ -288,6 +566,11 @@ class MainWindow(QMainWindow):
         self.free_ram_button.setText(" Liberar Memoria RAM")
         self.free_ram_button.setEnabled(True)
 
+    def show_temp_files_report(self):
+        self.tabs.setCurrentWidget(self.optimization_tab)
+        self.log_to_console("\n[+] Informe de archivos temporales (sin escanear el disco):")
+        self.system_optimizer.temp_files_report()
+
     def toggle_startup(self, checked):
         if self.startup_manager.set_startup(checked): self.log_to_console(f"[INFO] Inicio con Windows {'activado' if checked else 'desactivado'}.")
         else:
@@ -296,6 +579,53 @@ class MainWindow(QMainWindow):
             self.startup_checkbox.setChecked(not checked)
             self.startup_checkbox.blockSignals(False)
 
+    def start_metrics_exporter(self, port=None):
+        if self.metrics_exporter and self.metrics_exporter.is_running(): return True
+        exporter_settings = self.app_settings.get('metrics_exporter', {})
+        self.metrics_exporter = MetricsExporter(
+            host=exporter_settings.get('host', MetricsExporter.DEFAULT_HOST),
+            port=port or exporter_settings.get('port', MetricsExporter.DEFAULT_PORT)
+        )
+        if not self.metrics_exporter.start():
+            self.log_to_console("[ERROR] No se pudo iniciar el exportador de métricas (¿puerto en uso?).")
+            self.metrics_exporter = None
+            return False
+        self.monitor_thread.add_listener(self.metrics_exporter.update_monitor_sample)
+        self.log_to_console(f"[INFO] Métricas disponibles en http://{self.metrics_exporter.host}:{self.metrics_exporter.port}/metrics")
+        return True
+
+    def stop_metrics_exporter(self):
+        if not self.metrics_exporter: return
+        self.monitor_thread.remove_listener(self.metrics_exporter.update_monitor_sample)
+        self.metrics_exporter.stop()
+        self.metrics_exporter = None
+
+    def toggle_metrics_exporter(self, checked):
+        if checked and not self.start_metrics_exporter():
+            # Solo se recuerda activado si arrancó: si no, cada inicio volvería a fallar.
+            self.metrics_checkbox.blockSignals(True)
+            self.metrics_checkbox.setChecked(False)
+            self.metrics_checkbox.blockSignals(False)
+            return
+        exporter_settings = self.app_settings.get('metrics_exporter', {})
+        exporter_settings['enabled'] = checked
+        self.app_settings.set('metrics_exporter', exporter_settings)
+        if not checked:
+            self.stop_metrics_exporter()
+            self.log_to_console("[INFO] Exportador de métricas desactivado.")
+
+    def toggle_io_alerts(self, checked):
+        io_alerts = self.app_settings.get('io_alerts') or {}
+        io_alerts['enabled'] = checked
+        self.app_settings.set('io_alerts', io_alerts)
+        self.monitor_thread.io_alerts['enabled'] = checked
+
+    def toggle_tracing(self, checked):
+        self.app_settings.set('tracing', {'enabled': checked})
+        tracer.enable(checked)
+        if checked:
+            self.log_to_console("[INFO] Trazado activado. Cada operación guardará su traza en la carpeta 'traces' de VelocityOS.")
+
     def populate_profile_settings(self, index):
         while self.profile_options_layout.rowCount() > 0: self.profile_options_layout.removeRow(0)
         self.profile_options_widgets.clear()
@@ -305,13 +635,11 @@ class MainWindow(QMainWindow):
         if not profile_id: return
         self.selected_profile_id_for_settings = profile_id
         profile_opts = self.profiles[profile_id]['optimizations']
-        option_map = {"power_plan": "Cambiar Plan de Energía a Alto Rendimiento", "services": "Desactivar Servicios Innecesarios", "app_killer": "Cerrar Aplicaciones en Segundo Plano", "ram_optimizer": "Optimizar y Liberar Memoria RAM", "gaming_features": "Desactivar Funciones de Juego de Windows (Game Bar)", "nagle_algorithm": "Aplicar Tweaks de Red (Baja Latencia)", "temp_files": "Limpiar Archivos Temporales"}
+        option_map = {"power_plan": "Cambiar Plan de Energía a Alto Rendimiento", "services": "Desactivar Servicios Innecesarios", "app_killer": "Cerrar Aplicaciones en Segundo Plano", "ram_optimizer": "Optimizar y Liberar Memoria RAM", "gaming_features": "Desactivar Funciones de Juego de Windows (Game Bar)", "nagle_algorithm": "Aplicar Tweaks de Red (Baja Latencia)", "nic_tuning": "Ajustar Propiedades Avanzadas del Adaptador de Red", "temp_files": "Limpiar Archivos Temporales"}
         for key, text in option_map.items():
             if key in profile_opts:
                 checkbox = QCheckBox(text)
-                is_enabled = profile_opts[key]
-                if isinstance(is_enabled, dict): is_enabled = is_enabled.get('enabled', False)
-                checkbox.setChecked(is_enabled)
+                checkbox.setChecked(profile_opts[key]['enabled'])
                 self.profile_options_layout.addRow(checkbox)
                 self.profile_options_widgets[key] = checkbox
 
@@ -319,14 +647,11 @@ class MainWindow(QMainWindow):
         if not self.selected_profile_id_for_settings: return
         profile_id = self.selected_profile_id_for_settings
         profile_data = self.profiles[profile_id]
-        for key, checkbox in self.profile_options_widgets.items():
-            if key in profile_data['optimizations']:
-                if isinstance(profile_data['optimizations'][key], dict): profile_data['optimizations'][key]['enabled'] = checkbox.isChecked()
-                else: profile_data['optimizations'][key] = checkbox.isChecked()
+        flags = {key: checkbox.isChecked() for key, checkbox in self.profile_options_widgets.items()}
         try:
-            config_dir = resource_path("config")
-            file_path = os.path.join(config_dir, f"{profile_id}.json")
-            with open(file_path, 'w', encoding='utf-8') as f: json.dump(profile_data, f, indent=4, ensure_ascii=False)
+            self.profile_compiler.set_enabled_flags(profile_id, flags)
+            # Recompilar: el cambio puede afectar también a los perfiles que heredan de este.
+            self.profiles = self._load_profiles()
             self.log_to_console(f"[INFO] Ajustes del perfil '{profile_data['name']}' guardados.")
             self.save_feedback_label.setText("¡Guardado!")
             self.save_feedback_label.setStyleSheet("color: #a6e3a1; font-weight: bold;")
@@ -343,11 +668,24 @@ class MainWindow(QMainWindow):
         self.st_upload_realtime_label.setText("0.00")
         self.st_final_results_label.setText("Ping: -- | ISP: -- | Servidor: --")
         self.speed_test_status_label.setStyleSheet("color: #cdd6f4;")
-        self.speed_test_worker = SpeedTestWorker(self)
+        speed_test_settings = self.app_settings.get('speed_test') or {}
+        speed_test_settings['runs'] = self.speed_test_runs_spin.value()
+        speed_test_settings['server_mode'] = self.speed_test_server_combo.currentData()
+        self.app_settings.set('speed_test', speed_test_settings)
+        self.speed_test_worker = SpeedTestWorker(
+            self, runs=speed_test_settings['runs'], server_mode=speed_test_settings['server_mode'],
+            top_k=speed_test_settings.get('top_k', 3), cli_command=speed_test_settings.get('cli_command'),
+            server_cache=SpeedTestServerCache(max_age_hours=speed_test_settings.get('server_cache_hours', 24)))
         self.speed_test_worker.status_updated.connect(self.update_speed_test_progress)
+        self.speed_test_worker.runs_finished.connect(self.display_speed_test_summary)
+        self.speed_test_worker.finished.connect(lambda: self.speed_test_button.setEnabled(True))
         self.speed_test_worker.realtime_progress.connect(self.update_realtime_speed)
         self.speed_test_worker.test_finished.connect(self.display_speed_test_results)
         self.speed_test_worker.test_error.connect(self.handle_speed_test_error)
+        if self.metrics_exporter:
+            self.speed_test_worker.test_finished.connect(self.metrics_exporter.update_speed_test)
+            self.speed_test_worker.latency_sample.connect(self.metrics_exporter.observe_latency)
+        self.speed_test_worker.latency_sample.connect(self._record_session_latency)
         self.speed_test_worker.start()
 
     def update_speed_test_progress(self, message): self.speed_test_status_label.setText(message)
@@ -356,7 +694,6 @@ class MainWindow(QMainWindow):
         elif test_type == "upload": self.st_upload_realtime_label.setText(f"{speed_mbps:.2f}")
 
     def display_speed_test_results(self, results):
-        self.speed_test_button.setEnabled(True)
         self.speed_test_status_label.setText("¡Test completado! Resultados finales mostrados.")
         download_info, upload_info, ping_info, server_info, isp_info = results.get('download', {}), results.get('upload', {}), results.get('ping', {}), results.get('server', {}), results.get('client_isp', 'N/A')
         final_download, final_upload, ping, jitter = (download_info.get('bandwidth', 0) * 8) / 1_000_000, (upload_info.get('bandwidth', 0) * 8) / 1_000_000, ping_info.get('latency', 0), ping_info.get('jitter', 0)
@@ -364,18 +701,335 @@ class MainWindow(QMainWindow):
         self.st_upload_realtime_label.setText(f"{final_upload:.2f}")
         self.st_final_results_label.setText(f"Ping: {ping:.2f} ms | Jitter: {jitter:.2f} ms | ISP: {isp_info} | Servidor: {server_info.get('name', 'N/A')}")
 
+    def display_speed_test_summary(self, summary):
+        """Resumen de varios tests: mediana, dispersión (IQR) y peor caso."""
+        metrics = summary['metrics']
+        def describe(name, label, unit):
+            if name not in metrics:
+                return None
+            stats = metrics[name]
+            return f"{label}: {stats['median']:.2f} {unit} (IQR {stats['iqr']:.2f}, peor {stats['worst']:.2f})"
+        download, upload = metrics.get('download_mbps'), metrics.get('upload_mbps')
+        if download and upload:
+            self.st_download_realtime_label.setText(f"{download['median']:.2f}")
+            self.st_upload_realtime_label.setText(f"{upload['median']:.2f}")
+        parts = [describe('download_mbps', "Descarga", "Mbps"), describe('upload_mbps', "Subida", "Mbps"),
+                 describe('latency_ms', "Ping", "ms"), describe('jitter_ms', "Jitter", "ms"),
+                 describe('packet_loss_pct', "Pérdida", "%")]
+        servers = ", ".join(sorted(set(summary['servers'])))
+        self.st_final_results_label.setText(f"Mediana de {summary['runs']} tests ({servers}):\n" + " | ".join(p for p in parts if p))
+        self.speed_test_status_label.setText(f"¡{summary['runs']} tests completados! Se muestra la mediana.")
+
     def handle_speed_test_error(self, error_message):
         self.speed_test_button.setEnabled(True)
         self.speed_test_status_label.setText(f"Error: {error_message}")
         self.speed_test_status_label.setStyleSheet("color: #f38ba8;")
         
-    def update_monitor_data(self, data):
-        self.cpu_progress.setValue(int(data['cpu_usage']))
-        self.ram_progress.setValue(int(data['ram_usage']))
-        self.gpu_progress.setValue(int(data['gpu_usage']))
-        self.gpu_progress.setFormat(f"{int(data['gpu_usage'])}% ({data['gpu_temp']}°C)")
+    def _on_monitor_delta(self):
+        delta = self.monitor_source.take_delta()
+        if delta:
+            self.update_monitor_data(delta)
+
+    def update_monitor_data(self, delta):
+        """Aplica un MonitorDelta y repinta solo los widgets cuyas métricas cambiaron."""
+        state = self.monitor_state
+        state.apply(delta)
+        changed = lambda *keys: delta.full or delta.touches(*keys)
+        if changed('cpu_usage'):
+            self.cpu_progress.setValue(int(state.get('cpu_usage', default=0)))
+        if delta.full:
+            self.core_heatmap.clear() # Otra fuente o un salto: la historia anterior ya no es continua.
+        self.core_heatmap.push(delta.timestamp, state.get('cpu_cores'))
+        if changed('ram_usage'):
+            self.ram_progress.setValue(int(state.get('ram_usage', default=0)))
+        if changed('gpu_usage', 'gpu_temp'):
+            gpu_usage = int(state.get('gpu_usage', default=0))
+            self.gpu_progress.setValue(gpu_usage)
+            self.gpu_progress.setFormat(f"{gpu_usage}% ({state.get('gpu_temp', default=0)}°C)")
+        if changed('gpus'):
+            gpus = state.collection('gpus')
+            self.gpu_details_label.setText(self._format_gpu_details([gpus[index] for index in sorted(gpus)]))
+        if changed('disk_read_bps', 'disk_write_bps'):
+            self.disk_io_label.setText(f"Disco: {self._format_rate(state.get('disk_read_bps', default=0))} lectura | "
+                                       f"{self._format_rate(state.get('disk_write_bps', default=0))} escritura")
+        if changed('net_recv_bps', 'net_sent_bps'):
+            self.net_io_label.setText(f"Red: {self._format_rate(state.get('net_recv_bps', default=0))} bajada | "
+                                      f"{self._format_rate(state.get('net_sent_bps', default=0))} subida")
+
+    def _format_gpu_details(self, gpus):
+        """Relojes, consumo, VRAM y motivos de throttling de la GPU principal (solo NVIDIA los informa)."""
+        if not gpus or gpus[0].get('graphics_clock_mhz') is None:
+            return ""
+        gpu = gpus[0]
+        parts = [f"Núcleo {gpu['graphics_clock_mhz']} MHz | Memoria {gpu['memory_clock_mhz']} MHz"]
+        if gpu.get('power_watts') is not None:
+            limit = f" / {gpu['power_limit_watts']:.0f} W" if gpu.get('power_limit_watts') else ""
+            parts.append(f"{gpu['power_watts']:.0f} W{limit}")
+        if gpu.get('vram_used_bytes') is not None:
+            parts.append(f"VRAM {gpu['vram_used_bytes'] / 1024**3:.1f}/{gpu['vram_total_bytes'] / 1024**3:.1f} GB")
+        text = " | ".join(parts)
+        if gpu.get('throttle_reasons'):
+            text += f"\n⚠️ Limitada por: {describe_throttle_reasons(gpu['throttle_reasons'])}"
+        return text
+
+    def _format_rate(self, bytes_per_sec):
+        return f"{bytes_per_sec / (1024 * 1024):.1f} MB/s"
+
+    def handle_io_saturation_alert(self, alert):
+        device_type = "Disco" if alert['kind'] == 'disk' else "Red"
+        message = (f"{device_type} '{alert['device']}' saturado: {self._format_rate(alert['rate'])} "
+                   f"(umbral {self._format_rate(alert['threshold'])}). Puede haber una actualización en segundo plano.")
+        self.last_io_alert = message
+        if self.monitor_tab in self._built_tabs:
+            self.io_alert_label.setText(f"⚠️ {message}")
+        self.log_to_console(f"[ALERTA] {message}")
+
+    def toggle_session_recording(self, checked):
+        if not checked:
+            self.stop_session_recording()
+            return
+        if self.session_recorder is not None:
+            return
+        settings = self.app_settings.get('session_recording') or {}
+        recorder = SessionRecorder(flush_every=settings.get('flush_every_samples', 30),
+                                   meta={'gpu_brand': self.monitor_thread.gpu_brand})
+        try:
+            recorder.start()
+        except OSError as e:
+            self.log_to_console(f"[ERROR] No se pudo iniciar la grabación de la sesión: {e}")
+            self.record_session_button.blockSignals(True)
+            self.record_session_button.setChecked(False)
+            self.record_session_button.blockSignals(False)
+            return
+        self.session_recorder = recorder
+        self.monitor_thread.add_listener(recorder.record_sample)
+        self.record_session_button.setText("⏹ Detener grabación")
+        self.log_to_console(f"[INFO] Grabando la sesión en {recorder.session_dir}")
+
+    def stop_session_recording(self):
+        if self.session_recorder is None:
+            return
+        self.monitor_thread.remove_listener(self.session_recorder.record_sample)
+        session_dir = self.session_recorder.stop()
+        self.session_recorder = None
+        if self.monitor_tab in self._built_tabs:
+            self.record_session_button.setText("⏺ Grabar sesión")
+        self.log_to_console(f"[OK] Sesión guardada en {session_dir}")
+
+    def _record_session_latency(self, server, latency_ms):
+        if self.session_recorder:
+            self.session_recorder.record_latency(server, latency_ms)
+
+    def open_recorded_session(self):
+        sessions_dir = os.path.join(os.getenv('APPDATA', ''), "VelocityOS", "sessions")
+        session_dir = QFileDialog.getExistingDirectory(self, "Abrir sesión grabada", sessions_dir)
+        if session_dir:
+            self.load_recorded_session(session_dir)
+
+    def load_recorded_session(self, session_dir):
+        """Reproduce una sesión grabada en la pestaña Monitor, por el mismo camino que los datos en vivo."""
+        try:
+            reader = SessionReader(session_dir)
+        except (OSError, ValueError) as e:
+            self.log_to_console(f"[ERROR] No se pudo abrir la sesión grabada: {e}")
+            return False
+        if not len(reader):
+            self.log_to_console("[WARN] La sesión grabada no contiene ninguna muestra.")
+            return False
+        if self.session_replay is not None:
+            self.session_replay.pause()
+            self.session_replay.deleteLater()
+        self.ensure_tab_built(self.monitor_tab)
+        self.session_replay = SessionReplay(reader, self)
+        self.session_replay.position_changed.connect(self._on_replay_position)
+        self.session_replay.finished.connect(lambda: self.replay_play_button.setText("▶"))
+        self.replay_slider.blockSignals(True)
+        self.replay_slider.setRange(0, len(reader) - 1)
+        self.replay_slider.blockSignals(False)
+        self.replay_play_button.setText("▶")
+        self.replay_widget.setVisible(True)
+        self.live_monitor_button.setVisible(True)
+        self._set_monitor_source(self.session_replay)
+        self._on_replay_position(0)
+        self.log_to_console(f"[INFO] Sesión abierta: {len(reader)} muestras ({reader.duration / 60:.1f} min) "
+                            f"y {len(reader.events)} eventos.")
+        return True
+
+    def close_recorded_session(self):
+        if self.session_replay is None:
+            return
+        self.session_replay.pause()
+        self._set_monitor_source(self.monitor_thread)
+        self.session_replay.deleteLater()
+        self.session_replay = None
+        self.replay_widget.setVisible(False)
+        self.live_monitor_button.setVisible(False)
+        self.replay_events_label.setText("")
+
+    def toggle_replay_playback(self):
+        if self.session_replay.playing:
+            self.session_replay.pause()
+            self.replay_play_button.setText("▶")
+        else:
+            self.session_replay.play()
+            self.replay_play_button.setText("⏸")
+
+    def _on_replay_slider(self, index):
+        if self.session_replay is not None and index != self.session_replay.position:
+            self.session_replay.seek(index)
+
+    def _on_replay_position(self, index):
+        reader = self.session_replay.reader
+        self.replay_slider.blockSignals(True)
+        self.replay_slider.setValue(index)
+        self.replay_slider.blockSignals(False)
+        timestamp = float(reader.ticks['timestamp'][index])
+        clock = lambda seconds: f"{int(seconds // 60):02d}:{int(seconds % 60):02d}"
+        self.replay_position_label.setText(f"{clock(timestamp - reader.start_time)} / {clock(reader.duration)}")
+        # Lo que pasó en los últimos segundos: latencias, frames y pasos de aplicar/restaurar.
+        events = reader.events_between(timestamp - 5, timestamp + 1)
+        self.replay_events_label.setText(" | ".join(self._describe_session_event(e) for e in events[-4:]))
+
+    def _describe_session_event(self, event):
+        if event['kind'] == EVENT_LATENCY:
+            return f"Latencia {event['value']:.0f} ms ({event['label']})"
+        if event['kind'] == EVENT_FRAME_TIME:
+            return f"Frame {event['value']:.1f} ms"
+        if event['kind'] == EVENT_STEP:
+            return f"{event['label']}: {event['detail']} ({event['value']:.1f} s)"
+        if event['kind'] == EVENT_THROTTLE:
+            return f"Throttling {event['label']}: {event['detail']}"
+        return event['label']
+
+    def handle_throttle_event(self, event):
+        """La CPU o una GPU empieza o deja de estar limitada por temperatura o potencia."""
+        if event['active']:
+            self.active_throttling[event['device']] = event
+        else:
+            self.active_throttling.pop(event['device'], None)
+        if self.monitor_tab in self._built_tabs:
+            self._show_throttling()
+        if self.session_recorder:
+            self.session_recorder.record_throttle(event)
+        self.log_to_console(f"[{'ALERTA' if event['active'] else 'INFO'}] {describe_throttle_event(event)}")
+
+    def _show_throttling(self):
+        self.throttle_label.setText("\n".join(
+            f"🌡️ {event['device']} limitada por {CAUSE_LABELS.get(event['cause'], event['cause'])}: {event['detail']}"
+            for event in self.active_throttling.values()))
+
+    def handle_core_bottleneck(self, episode):
+        """Un núcleo lleva varios segundos saturado mientras la media es baja: se buscan los hilos responsables."""
+        self.core_bottleneck = episode
+        self.log_to_console(f"[ALERTA] {self._describe_core_bottleneck(episode)}")
+        if self.monitor_tab in self._built_tabs:
+            self.core_bottleneck_label.setText(f"⚠️ {self._describe_core_bottleneck(episode)}")
+        if self.thread_attribution_worker is None or not self.thread_attribution_worker.isRunning():
+            self.thread_attribution_worker = ThreadAttributionWorker(episode, parent=self)
+            self.thread_attribution_worker.threads_ready.connect(self.show_core_bottleneck_threads)
+            self.thread_attribution_worker.start()
+
+    def show_core_bottleneck_threads(self, episode):
+        self.core_bottleneck = episode
+        text = self._describe_core_bottleneck(episode)
+        if self.monitor_tab in self._built_tabs:
+            self.core_bottleneck_label.setText(f"⚠️ {text}")
+        if episode['threads']:
+            self.log_to_console(f"[INFO] Hilos más activos durante el cuello de botella: {self._describe_threads(episode['threads'])}")
+
+    def _describe_core_bottleneck(self, episode):
+        cpu = episode['core']
+        physical = next((index for index, siblings in enumerate(self._smt_siblings()) if cpu in siblings), None)
+        core = f"CPU lógica {cpu}" + (f" (núcleo físico {physical})" if physical is not None else "")
+        text = (f"{core} saturada al {episode['core_load']:.0f} % durante {episode['seconds']:.0f} s mientras "
+                f"la media de la CPU es {episode['average_load']:.0f} %: cuello de botella de un solo hilo.")
+        if episode.get('threads'):
+            text += f"\nHilos más activos: {self._describe_threads(episode['threads'][:3])}"
+        return text
+
+    def _describe_threads(self, threads):
+        return ", ".join(f"{t['name']} (PID {t['pid']}, hilo {t['tid']}) {t['core_percent']:.0f} % de un núcleo"
+                         for t in threads)
+
+    def _smt_siblings(self):
+        try:
+            return self.hardware_inventory.smt_siblings()
+        except Exception:
+            return []
+
+    def start_memory_growth_monitor(self):
+        settings = self.app_settings.get('memory_growth') or {}
+        if not settings.get('enabled', True):
+            return
+        tracker = MemoryGrowthTracker(
+            window=settings.get('window_samples', 360),
+            slope_mb_per_hour=settings.get('slope_mb_per_hour', 50),
+            min_growth_mb=settings.get('min_growth_mb', 25),
+            excluded_names=SystemOptimizer.SYSTEM_CRITICAL_PROCESSES)
+        self.memory_growth_monitor = MemoryGrowthMonitor(tracker, settings.get('interval_seconds', 10))
+        self.memory_growth_monitor.growth_detected.connect(self.handle_memory_growth)
+        self.memory_growth_monitor.start()
+
+    def handle_memory_growth(self, suspect):
+        self.memory_suspect = suspect
+        if self.monitor_tab in self._built_tabs:
+            self._show_memory_suspect()
+        self.log_to_console(f"[ALERTA] Posible fuga de memoria: {self._describe_memory_suspect(suspect)}")
+
+    def _describe_memory_suspect(self, suspect):
+        return (f"'{suspect['name']}' (PID {suspect['pid']}) no deja de crecer: "
+                f"+{suspect['slope_mb_per_hour']:.0f} MB/h, +{suspect['growth_mb']:.0f} MB en "
+                f"{suspect['minutes']:.0f} min (RSS {suspect['rss_mb']:.0f} MB, privados {suspect['private_mb']:.0f} MB).")
+
+    def _show_memory_suspect(self):
+        self.memory_growth_label.setText(f"⚠️ {self._describe_memory_suspect(self.memory_suspect)}")
+        self.memory_growth_widget.setVisible(True)
+
+    def _finish_memory_suspect(self, done, suspect):
+        if not done:
+            return
+        self.memory_growth_monitor.tracker.reset(suspect['key'])
+        # Mientras se reiniciaba pudo llegar otro aviso: ese sigue visible.
+        if self.memory_suspect is suspect:
+            self.memory_suspect = None
+            self.memory_growth_widget.setVisible(False)
+
+    def trim_memory_suspect(self):
+        if self.memory_suspect:
+            self._finish_memory_suspect(self.system_optimizer.trim_process(self.memory_suspect['pid']), self.memory_suspect)
+
+    def restart_memory_suspect(self):
+        if not self.memory_suspect or (self.process_restart_worker is not None and self.process_restart_worker.isRunning()):
+            return
+        suspect = self.memory_suspect
+        reply = QMessageBox.question(
+            self, "Reiniciar aplicación",
+            f"Se cerrará '{suspect['name']}' y se volverá a abrir. Los datos sin guardar se perderán.\n\n¿Continuar?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        target = self.system_optimizer.prepare_restart(suspect['pid'])
+        if target is None:
+            return
+        self.trim_process_button.setEnabled(False)
+        self.restart_process_button.setEnabled(False)
+        self.restart_process_button.setText("Reiniciando...")
+        self.log_to_console(f"[INFO] Cerrando {target['name']} para reiniciarlo...")
+        self.process_restart_worker = ProcessRestartWorker(self.system_optimizer, target, self)
+        self.process_restart_worker.restart_closed.connect(
+            lambda target, report: self.handle_process_restart_closed(suspect, target, report))
+        self.process_restart_worker.start()
+
+    def handle_process_restart_closed(self, suspect, target, report):
+        self.trim_process_button.setEnabled(True)
+        self.restart_process_button.setEnabled(True)
+        self.restart_process_button.setText("Reiniciar")
+        self._finish_memory_suspect(self.system_optimizer.relaunch(target, report), suspect)
 
     def update_gpu_label(self, brand):
+        self.monitor_gpu_brand = brand
+        if self.monitor_tab not in self._built_tabs:
+            return
         if brand == "NVIDIA":
             self.gpu_label.setText("Uso de GPU (NVIDIA):")
         elif brand == "AMD":
@@ -400,7 +1054,31 @@ class MainWindow(QMainWindow):
             self.log_to_console(f"\n[INFO] Se han generado recomendaciones para tu GPU {self.gpu_brand_detected}.")
 
     def closeEvent(self, event):
-        self.monitor_thread.stop()
+        self.system_optimizer.stop_temp_scheduler()
+        self.system_optimizer.command_executor.close()
+        self.stop_session_recording()
+        if self.session_replay is not None:
+            self.session_replay.pause()
+        if self.owns_services:
+            self.stop_metrics_exporter()
+            self.monitor_thread.stop()
+        else:
+            # El monitor y el exportador pertenecen a la bandeja y siguen en marcha.
+            if self._monitor_connected:
+                self.monitor_source.delta_available.disconnect(self._on_monitor_delta)
+                self._monitor_connected = False
+            self.monitor_thread.gpu_detected.disconnect(self.update_gpu_label)
+            self.monitor_thread.io_saturation_alert.disconnect(self.handle_io_saturation_alert)
+            self.monitor_thread.throttle_event.disconnect(self.handle_throttle_event)
+            self.monitor_thread.core_bottleneck.disconnect(self.handle_core_bottleneck)
+        if self.memory_growth_monitor:
+            self.memory_growth_monitor.stop()
+        if self.thread_attribution_worker is not None:
+            self.thread_attribution_worker.wait(3000)
+        if self.process_restart_worker is not None:
+            self.process_restart_worker.wait(10000)
+        if self.profile_recommendation_worker is not None:
+            self.profile_recommendation_worker.wait(5000)
         if hasattr(self, 'speed_test_worker') and self.speed_test_worker.isRunning():
             self.speed_test_worker.stop()
         event.accept()
@@ -408,16 +1086,72 @@ class MainWindow(QMainWindow):
     def select_profile(self, profile_id):
         profile_data = self.profiles[profile_id]
         self.selected_profile_name = profile_data['name']
-        self.profile_description_label.setText(profile_data['description'])
+        active = self.optimization_runner.active_profile()
+        note = "\n\nEste es el perfil aplicado ahora mismo." if active and active['id'] == profile_id else ""
+        self.profile_description_label.setText(profile_data['description'] + note)
         for pid, button in self.profile_buttons.items():
             if pid != profile_id: button.setChecked(False)
         self.update_button_states()
 
+    def _can_select_profiles(self):
+        # Con un perfil activo conocido se puede cambiar a otro directamente. Un backup sin
+        # perfil activo (versiones anteriores) obliga a restaurar antes.
+        return not self.state_manager.backup_exists() or self.optimization_runner.active_profile() is not None
+
     def update_button_states(self):
         has_backup = self.state_manager.backup_exists()
+        active = self.optimization_runner.active_profile()
+        can_select = self._can_select_profiles()
+        selected = next((pid for pid, pdata in self.profiles.items() if pdata['name'] == self.selected_profile_name), None)
         self.restore_button.setEnabled(has_backup)
-        self.optimize_button.setEnabled(not has_backup and self.selected_profile_name is not None)
-        for button in self.profile_buttons.values(): button.setEnabled(not has_backup)
+        self.optimize_button.setEnabled(can_select and selected is not None and (active is None or selected != active['id']))
+        self.optimize_button.setText(" Cambiar a este Perfil" if active else " Optimizar Ahora")
+        for button in self.profile_buttons.values(): button.setEnabled(can_select)
+
+    def _record_step_metrics(self, operation, step, seconds, outcome):
+        if self.metrics_exporter:
+            self.metrics_exporter.record_step_duration(operation, step, seconds, outcome)
+        if self.session_recorder:
+            self.session_recorder.record_step(operation, step, seconds, outcome)
+
+    def check_interrupted_operation(self):
+        """Detecta una aplicación/restauración que quedó a medias y ofrece reanudarla o deshacerla."""
+        interrupted = self.optimization_runner.interrupted_operation()
+        if not interrupted: return
+        steps = interrupted['steps']
+        done = [s['step'] for s in steps if s['status'] == 'done']
+        half_done = [s['step'] for s in steps if s['status'] == 'started']
+        names = {'apply': "la optimización", 'transition': "el cambio de perfil", 'restore': "la restauración", 'rollback': "la reversión"}
+        operation_name = names.get(interrupted['operation'], interrupted['operation'])
+        profile_name = interrupted.get('profile_name')
+        text = (f"La última vez {operation_name}{f' del perfil {profile_name}' if profile_name else ''} no terminó.\n\n"
+                f"Pasos completados: {', '.join(done) or 'ninguno'}\n"
+                f"Paso interrumpido: {', '.join(half_done) or 'ninguno'}")
+
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Warning)
+        box.setWindowTitle("Operación interrumpida")
+        box.setText(text)
+        resume_button = box.addButton("Reanudar", QMessageBox.ButtonRole.AcceptRole)
+        rollback_button = None
+        if interrupted['operation'] == 'apply':
+            rollback_button = box.addButton("Deshacer lo aplicado", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton("Ignorar", QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+
+        clicked = box.clickedButton()
+        self.tabs.setCurrentWidget(self.optimization_tab)
+        self.console_output.clear()
+        if clicked == resume_button:
+            self.optimization_runner.resume(interrupted)
+            self.log_to_console(f"\n=== {operation_name.upper()} REANUDADA Y COMPLETADA ===")
+        elif rollback_button is not None and clicked == rollback_button:
+            self.optimization_runner.rollback(interrupted)
+            self.log_to_console("\n=== CAMBIOS PARCIALES DESHECHOS ===")
+        else:
+            self.optimization_runner.discard_interrupted()
+            self.log_to_console("[INFO] Operación interrumpida descartada. El backup existente se conserva.")
+        self.update_button_states()
 
     def run_optimization(self):
         if not self.selected_profile_name:
@@ -425,30 +1159,83 @@ class MainWindow(QMainWindow):
             return
         profile_id = next((pid for pid, pdata in self.profiles.items() if pdata['name'] == self.selected_profile_name), None)
         if not profile_id: return
-        opts = self.profiles[profile_id]['optimizations']
         self.console_output.clear()
-        self.log_to_console(f"=== INICIANDO OPTIMIZACIÓN CON PERFIL: {self.selected_profile_name} ===")
-        if opts.get('power_plan', False): self.system_optimizer.optimize_power_plan()
-        self.system_optimizer.manage_services('disable', opts.get('services'))
-        self.system_optimizer.manage_background_apps(opts.get('app_killer'))
-        if opts.get('ram_optimizer', False): self.system_optimizer.free_up_ram()
-        self.system_optimizer.manage_gaming_features('disable', opts.get('gaming_features'))
-        self.network_optimizer.manage_nagle_algorithm('disable', opts.get('nagle_algorithm'))
-        self.system_optimizer.clean_temp_files(opts.get('temp_files'))
-        self.log_to_console("\n=== OPTIMIZACIÓN COMPLETADA ===")
+        if self.optimization_runner.active_profile():
+            self.log_to_console(f"=== CAMBIANDO AL PERFIL: {self.selected_profile_name} ===")
+            self.optimization_runner.transition(self.profiles[profile_id])
+            self.log_to_console("\n=== CAMBIO DE PERFIL COMPLETADO ===")
+        else:
+            self.log_to_console(f"=== INICIANDO OPTIMIZACIÓN CON PERFIL: {self.selected_profile_name} ===")
+            self.optimization_runner.apply(self.profiles[profile_id])
+            self.log_to_console("\n=== OPTIMIZACIÓN COMPLETADA ===")
         self.log_to_console("Se recomienda reiniciar el equipo para que todos los cambios surtan efecto.")
-        self.update_button_states()
+        self.select_profile(profile_id) # Actualiza la descripción (perfil activo) y los botones.
         self.show_gpu_recommendations()
 
+    def handle_instance_command(self, message):
+        """
+        Atiende una orden reenviada por otra instancia (ver InstanceCommandService). Responde
+        enseguida; aplicar o restaurar se programa para después de enviar la respuesta.
+        """
+        command = message.get('command')
+        busy = self.optimization_runner.journal.current is not None
+        if command == 'status':
+            active = self.optimization_runner.active_profile()
+            return {'ok': True, 'active_profile': active['name'] if active else None,
+                    'backup': self.state_manager.backup_exists(), 'operation_in_progress': busy,
+                    'profiles': {pid: pdata['name'] for pid, pdata in self.profiles.items()}}
+        if command == 'show':
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
+            return {'ok': True, 'message': "Ventana de VelocityOS en primer plano."}
+        if command not in ('apply_profile', 'restore'):
+            return {'ok': False, 'error': f"Orden desconocida '{command}'."}
+        if busy:
+            return {'ok': False, 'error': "Ya hay una optimización o restauración en curso."}
+        if command == 'restore':
+            if not self.state_manager.backup_exists():
+                return {'ok': False, 'error': "No hay cambios que restaurar."}
+            QTimer.singleShot(0, self._run_forwarded_restore)
+            return {'ok': True, 'message': "Restaurando la configuración original."}
+
+        profile_id = message.get('profile')
+        if profile_id not in self.profiles:
+            return {'ok': False, 'error': f"Perfil desconocido '{profile_id}'. Disponibles: {', '.join(self.profiles)}."}
+        active = self.optimization_runner.active_profile()
+        if active and active['id'] == profile_id:
+            return {'ok': True, 'message': f"El perfil '{self.profiles[profile_id]['name']}' ya está aplicado."}
+        if not self._can_select_profiles():
+            return {'ok': False, 'error': "Hay un backup de una versión anterior: restaura antes de aplicar otro perfil."}
+        QTimer.singleShot(0, lambda: self._run_forwarded_profile(profile_id))
+        return {'ok': True, 'message': f"Aplicando el perfil '{self.profiles[profile_id]['name']}'."}
+
+    def _show_optimization_tab(self):
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+        self.ensure_tab_built(self.optimization_tab)
+        self.tabs.setCurrentWidget(self.optimization_tab)
+
+    def _run_forwarded_profile(self, profile_id):
+        if self.optimization_runner.journal.current is not None:
+            return # Otra operación empezó entre la orden y este momento.
+        self._show_optimization_tab()
+        self.profile_buttons[profile_id].setChecked(True)
+        self.select_profile(profile_id)
+        self.run_optimization()
+
+    def _run_forwarded_restore(self):
+        if self.optimization_runner.journal.current is not None or not self.state_manager.backup_exists():
+            return
+        self._show_optimization_tab()
+        self.run_restore()
+
     def run_restore(self):
         self.console_output.clear()
         self.log_to_console("=== INICIANDO RESTAURACIÓN ===")
-        self.system_optimizer.restore_power_plan()
-        self.system_optimizer.manage_services(action='restore')
-        self.system_optimizer.manage_gaming_features(action='restore')
-        self.network_optimizer.manage_nagle_algorithm(action='restore')
+        self.optimization_runner.restore()
         self.log_to_console("\n[INFO] La limpieza de archivos temporales es una acción permanente.")
-        self.state_manager.clear_backup()
         self.log_to_console("\n=== RESTAURACIÓN COMPLETADA ===")
         self.gpu_recommendations_group.setVisible(False)
         self.selected_profile_name = None
@@ -0,0 +1,189 @@
+# gui/tray.py
+
+import gc
+import sys
+import ctypes
+import logging
+
+import psutil
+from PyQt6.QtWidgets import QApplication, QMenu, QSystemTrayIcon
+from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QObject, QTimer, Qt
+
+from core.app_settings import AppSettings
+from core.metrics_exporter import MetricsExporter
+from core.monitor import SystemMonitor
+from core.state_manager import StateManager
+from utils.resource_path import resource_path
+
+
+class TrayController(QObject):
+    """
+    Modo residente en la bandeja del sistema (el que usa el inicio con Windows).
+
+    Al arrancar solo se crea el icono y, si hacen falta, los servicios de fondo (monitor y
+    exportador de métricas). La ventana principal, con sus pestañas, WMI y el resto del
+    backend, se construye al abrirla desde la bandeja y se destruye al cerrarla; el monitor
+    y el exportador siguen siendo de la bandeja y la ventana solo se conecta a ellos.
+
+    Mientras la ventana está cerrada se mide periódicamente la memoria (RSS) y la CPU del
+    proceso y se avisa en el log si superan los objetivos de reposo.
+    """
+
+    def __init__(self, metrics_port=None, trace=False):
+        """
+        Args:
+            metrics_port (int | None): Fuerza el exportador de métricas en este puerto.
+            trace (bool): Activa el trazado de las operaciones de la ventana.
+        """
+        super().__init__()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.app_settings = AppSettings()
+        self.tray_settings = self.app_settings.get('tray') or {}
+        self.metrics_port = metrics_port
+        self.trace = trace
+        self.window = None
+        self.monitor_thread = None
+        self.metrics_exporter = None
+        self._process = psutil.Process()
+
+        self.tray_icon = QSystemTrayIcon(QIcon(resource_path("assets/icons/velocityos.ico")), self)
+        self.tray_icon.setToolTip("VelocityOS")
+        menu = QMenu()
+        menu.addAction("Abrir VelocityOS", self.open_window)
+        menu.addSeparator()
+        menu.addAction("Salir", self.quit)
+        self.tray_icon.setContextMenu(menu)
+        self.tray_icon.activated.connect(self._on_activated)
+        self._menu = menu
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.timeout.connect(self.check_idle_budget)
+
+    # ------------------------------------------------------------------
+    # Servicios de fondo
+    # ------------------------------------------------------------------
+    def start(self):
+        """Muestra el icono y arranca solo los servicios de fondo configurados."""
+        exporter_settings = self.app_settings.get('metrics_exporter', {})
+        if self.metrics_port is not None or exporter_settings.get('enabled', False):
+            self.metrics_exporter = MetricsExporter(
+                host=exporter_settings.get('host', MetricsExporter.DEFAULT_HOST),
+                port=self.metrics_port or exporter_settings.get('port', MetricsExporter.DEFAULT_PORT)
+            )
+            if not self.metrics_exporter.start():
+                self.logger.error("No se pudo iniciar el exportador de métricas (¿puerto en uso?).")
+                self.metrics_exporter = None
+        if self._needs_background_monitor():
+            self._ensure_monitor()
+
+        self.tray_icon.show()
+        self._process.cpu_percent(None) # Primera lectura: fija la referencia para la siguiente.
+        self.idle_timer.start(int(self.tray_settings.get('idle_check_seconds', 60) * 1000))
+        self.logger.info("VelocityOS en la bandeja del sistema.")
+
+    def _needs_background_monitor(self):
+        return self.metrics_exporter is not None or self.tray_settings.get('background_monitoring', False)
+
+    def _ensure_monitor(self):
+        if self.monitor_thread is None:
+            # Como en la ventana: el inventario (en caché) evita probar librerías de GPU que no aplican.
+            from core.hardware_inventory import HardwareInventory
+            self.monitor_thread = SystemMonitor(
+                io_alerts=self.app_settings.get('io_alerts'),
+                gpu_slow_interval=self.app_settings.get('gpu_telemetry')['slow_interval_seconds'],
+                inventory=HardwareInventory(), throttle=self.app_settings.get('throttle_detection'),
+                core_bottleneck=self.app_settings.get('core_bottleneck'))
+            if self.metrics_exporter:
+                self.monitor_thread.add_listener(self.metrics_exporter.update_monitor_sample)
+            self.monitor_thread.start()
+        return self.monitor_thread
+
+    def _stop_monitor(self):
+        if self.monitor_thread is not None:
+            self.monitor_thread.stop()
+            self.monitor_thread.wait(2000)
+            self.monitor_thread = None
+
+    # ------------------------------------------------------------------
+    # Ventana bajo demanda
+    # ------------------------------------------------------------------
+    def _on_activated(self, reason):
+        if reason in (QSystemTrayIcon.ActivationReason.Trigger, QSystemTrayIcon.ActivationReason.DoubleClick):
+            self.open_window()
+
+    def open_window(self):
+        if self.window is not None:
+            self.window.showNormal()
+            self.window.raise_()
+            self.window.activateWindow()
+            return
+        self.idle_timer.stop()
+        # La importación también se aplaza: arrastra todo el backend de optimización.
+        from gui.main_window import MainWindow
+        self.window = MainWindow(metrics_port=self.metrics_port, trace=self.trace,
+                                 monitor=self._ensure_monitor(), metrics_exporter=self.metrics_exporter)
+        self.window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.window.destroyed.connect(self._on_window_destroyed)
+        self.window.show()
+
+    def _on_window_destroyed(self):
+        # El usuario pudo activar o desactivar el exportador desde los ajustes de la ventana.
+        self.metrics_exporter = self.window.metrics_exporter if self.window is not None else self.metrics_exporter
+        self.window = None
+        if not self._needs_background_monitor():
+            self._stop_monitor()
+        gc.collect()
+        self._release_memory()
+        self._process.cpu_percent(None)
+        self.idle_timer.start()
+
+    def _release_memory(self):
+        """Devuelve al sistema las páginas que dejó la ventana destruida."""
+        if sys.platform == "win32":
+            ctypes.windll.kernel32.SetProcessWorkingSetSize(ctypes.windll.kernel32.GetCurrentProcess(), -1, -1)
+
+    def handle_instance_command(self, message):
+        """Órdenes de otra instancia: las que necesitan el backend abren antes la ventana."""
+        command = message.get('command')
+        if command == 'status':
+            if self.window is not None:
+                return dict(self.window.handle_instance_command(message), window_open=True)
+            active = StateManager().get_state('active_profile')
+            return {'ok': True, 'window_open': False, 'active_profile': active['name'] if active else None}
+        if command == 'show':
+            self.open_window()
+            return {'ok': True, 'message': "Ventana de VelocityOS abierta."}
+        if command not in ('apply_profile', 'restore'):
+            return {'ok': False, 'error': f"Orden desconocida '{command}'."}
+        self.open_window()
+        return self.window.handle_instance_command(message)
+
+    # ------------------------------------------------------------------
+    # Presupuesto de reposo
+    # ------------------------------------------------------------------
+    def idle_usage(self):
+        """Devuelve (RSS en MB, % de CPU desde la última medición) del proceso."""
+        return self._process.memory_info().rss / (1024 * 1024), self._process.cpu_percent(None)
+
+    def check_idle_budget(self):
+        rss_mb, cpu_percent = self.idle_usage()
+        rss_target = self.tray_settings.get('idle_rss_mb_target', 80)
+        cpu_target = self.tray_settings.get('idle_cpu_percent_target', 0.5)
+        if rss_mb > rss_target or cpu_percent > cpu_target:
+            self.logger.warning(f"Consumo en reposo por encima del objetivo: {rss_mb:.1f} MB (objetivo {rss_target} MB), "
+                                f"CPU {cpu_percent:.2f} % (objetivo {cpu_target} %).")
+        else:
+            self.logger.info(f"Consumo en reposo: {rss_mb:.1f} MB, CPU {cpu_percent:.2f} %.")
+        return rss_mb, cpu_percent
+
+    def quit(self):
+        if self.window is not None:
+            self.window.close()
+        self.idle_timer.stop()
+        self._stop_monitor()
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        self.tray_icon.hide()
+        QApplication.instance().quit()
@@ -2,78 +2,207 @@
 
 import sys
 import os
+import time
 import logging
-from PyQt6.QtWidgets import QApplication
-
-# --- CONFIGURACIÓN DE LOGGING ---
-try:
-    log_dir = os.path.join(os.getenv('LOCALAPPDATA'), 'VelocityOS')
-    os.makedirs(log_dir, exist_ok=True) # Crear la carpeta si no existe
-    log_file = os.path.join(log_dir, 'debug.log')
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, mode='w', encoding='utf-8'), # Especificar UTF-8
-            logging.StreamHandler()
-        ]
-    )
-except Exception as e:
-    # Fallback muy básico si el logging falla
-    print(f"FATAL: No se pudo configurar el logging: {e}")
-# ---------------------------------------------
-
-logging.info("Inicio del programa.")
-
-try:
+import argparse
+
+# Solo la biblioteca estándar y el cerrojo de instancia: una segunda instancia reenvía su
+# orden a la que ya está en marcha y sale sin llegar a importar Qt.
+from core.single_instance import InstanceLock, InstanceUnavailable, send_command
+
+
+def parse_arguments(argv):
+    """Lee los argumentos propios de VelocityOS, dejando pasar los de Qt."""
+    parser = argparse.ArgumentParser(prog="VelocityOS")
+    parser.add_argument("--headless", action="store_true",
+                        help="Ejecuta solo los servicios de fondo (monitor y métricas), sin ventana.")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Activa el exportador OpenMetrics en el puerto indicado.")
+    parser.add_argument("--tray", action="store_true",
+                        help="Arranca en la bandeja del sistema; la ventana se crea al abrirla.")
+    parser.add_argument("--trace", action="store_true",
+                        help="Guarda una traza de rendimiento (formato Chrome) de cada optimización.")
+    commands = parser.add_mutually_exclusive_group()
+    commands.add_argument("--apply-profile", metavar="ID", default=None,
+                          help="Aplica el perfil indicado (o cambia a él si ya hay otro activo).")
+    commands.add_argument("--restore", action="store_true",
+                          help="Restaura la configuración original del sistema.")
+    commands.add_argument("--status", action="store_true",
+                          help="Muestra el estado de la instancia en marcha y sale.")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def instance_command(args):
+    """Orden que esta ejecución pide a VelocityOS: (orden, parámetros)."""
+    if args.status:
+        return 'status', {}
+    if args.apply_profile:
+        return 'apply_profile', {'profile': args.apply_profile}
+    if args.restore:
+        return 'restore', {}
+    return 'show', {}
+
+
+def describe_reply(command, reply):
+    if not reply.get('ok'):
+        return f"[ERROR] {reply.get('error', 'La instancia en marcha rechazó la orden.')}"
+    if command == 'status':
+        active = reply.get('active_profile') or "ninguno"
+        busy = " Hay una operación en curso." if reply.get('operation_in_progress') else ""
+        return f"VelocityOS en ejecución (PID {reply.get('pid')}, modo {reply.get('mode')}). Perfil activo: {active}.{busy}"
+    return f"[OK] {reply.get('message', 'Orden enviada a la instancia en marcha.')}"
+
+
+def attach_parent_console():
+    """
+    El ejecutable se genera sin consola (console=False en VelocityOS.spec), así que las
+    respuestas a --status, --apply-profile o --restore no se verían. Se engancha a la
+    consola desde la que se lanzó, si la hay. cmd no espera a las aplicaciones de ventana:
+    la respuesta puede aparecer después del siguiente prompt.
+    """
+    if sys.platform != "win32" or sys.stdout is not None:
+        return # Ya hay salida estándar (p. ej. ejecutando main.py con python.exe).
+    import ctypes
+    ATTACH_PARENT_PROCESS = -1
+    if ctypes.windll.kernel32.AttachConsole(ATTACH_PARENT_PROCESS):
+        sys.stdout = sys.stderr = open("CONOUT$", "w", encoding="utf-8")
+
+
+def forward_to_running_instance(args, attempts=20):
+    """
+    Reenvía la orden a la instancia que tiene el cerrojo. Si acaba de arrancar puede que aún
+    no escuche: se reintenta durante un par de segundos. Devuelve el código de salida.
+    """
+    command, params = instance_command(args)
+    for attempt in range(attempts):
+        try:
+            reply = send_command(command, **params)
+            break
+        except InstanceUnavailable as e:
+            if attempt == attempts - 1:
+                print(f"[ERROR] VelocityOS ya está en ejecución, pero no responde: {e}")
+                return 1
+            time.sleep(0.1)
+    print(describe_reply(command, reply))
+    return 0 if reply.get('ok') else 1
+
+
+def configure_logging():
+    # --- CONFIGURACIÓN DE LOGGING ---
+    # Después del cerrojo: una segunda instancia no debe vaciar el log de la que está en marcha.
+    try:
+        log_dir = os.path.join(os.getenv('LOCALAPPDATA'), 'VelocityOS')
+        os.makedirs(log_dir, exist_ok=True) # Crear la carpeta si no existe
+        log_file = os.path.join(log_dir, 'debug.log')
+
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.FileHandler(log_file, mode='w', encoding='utf-8'), # Especificar UTF-8
+                logging.StreamHandler()
+            ]
+        )
+    except Exception as e:
+        # Fallback muy básico si el logging falla
+        print(f"FATAL: No se pudo configurar el logging: {e}")
+    # ---------------------------------------------
+
+
+def main():
+    """
+    Punto de entrada principal de la aplicación.
+    """
+    args = parse_arguments(sys.argv[1:])
+    instance_lock = InstanceLock()
+    if not instance_lock.acquire():
+        attach_parent_console()
+        sys.exit(forward_to_running_instance(args))
+    if args.status:
+        attach_parent_console()
+        print("VelocityOS no está en ejecución.")
+        sys.exit(1)
+
+    configure_logging()
+    logging.info("Inicio del programa.")
+    try:
+        sys.exit(run_application(args, instance_lock))
+    except Exception as e:
+        # Este bloque atrapará cualquier error catastrófico que ocurra durante la inicialización.
+        logging.critical(f"ERROR FATAL INESPERADO: {e}", exc_info=True)
+        # exc_info=True añade el 'traceback' completo al log para ver exactamente dónde ocurrió el error.
+    finally:
+        instance_lock.release()
+
+
+def run_application(args, instance_lock):
+    """Arranca la instancia principal. Devuelve el código de salida."""
     logging.info("Importando módulos...")
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QTimer
     from utils import admin_checker
-    from gui.main_window import MainWindow
     from utils.resource_path import resource_path
+    from core.instance_bridge import InstanceCommandService
     logging.info("Módulos importados correctamente.")
 
-    def main():
-        """
-        Punto de entrada principal de la aplicación.
-        """
-        logging.info("Entrando en la función main().")
-        
-        # Esta comprobación es una salvaguarda, especialmente para el modo de desarrollo.
-        if not admin_checker.is_admin():
-            logging.critical("Error: La aplicación debe ejecutarse con privilegios de administrador.")
-            # En un futuro, podríamos mostrar un QMessageBox aquí antes de salir.
-            sys.exit(1) # Salir con un código de error.
-        
-        logging.info("Privilegios de administrador confirmados.")
-
-        logging.info("Creando instancia de QApplication.")
-        app = QApplication(sys.argv)
-        
-        logging.info("Cargando hoja de estilos...")
-        try:
-            style_path = resource_path(os.path.join('assets', 'styles', 'main.qss'))
-            with open(style_path, "r", encoding='utf-8') as f:
-                app.setStyleSheet(f.read())
-            logging.info("Hoja de estilos cargada con éxito.")
-        except FileNotFoundError:
-            logging.warning(f"No se encontró el archivo de estilos en {style_path}")
-        except Exception as e:
-            logging.error(f"Error cargando la hoja de estilos: {e}")
+    # Esta comprobación es una salvaguarda, especialmente para el modo de desarrollo.
+    if not admin_checker.is_admin():
+        logging.critical("Error: La aplicación debe ejecutarse con privilegios de administrador.")
+        # En un futuro, podríamos mostrar un QMessageBox aquí antes de salir.
+        return 1 # Salir con un código de error.
+
+    logging.info("Privilegios de administrador confirmados.")
 
+    if args.headless:
+        logging.info("Iniciando en modo sin interfaz.")
+        if args.apply_profile or args.restore:
+            logging.warning("El modo sin interfaz no aplica ni restaura perfiles; se ignora la orden.")
+        from core.headless import HeadlessRunner
+        return HeadlessRunner(metrics_port=args.metrics_port, instance_lock=instance_lock).run()
+
+    logging.info("Creando instancia de QApplication.")
+    app = QApplication(sys.argv)
+
+    logging.info("Cargando hoja de estilos...")
+    try:
+        style_path = resource_path(os.path.join('assets', 'styles', 'main.qss'))
+        with open(style_path, "r", encoding='utf-8') as f:
+            app.setStyleSheet(f.read())
+        logging.info("Hoja de estilos cargada con éxito.")
+    except FileNotFoundError:
+        logging.warning(f"No se encontró el archivo de estilos en {style_path}")
+    except Exception as e:
+        logging.error(f"Error cargando la hoja de estilos: {e}")
+
+    if args.tray:
+        logging.info("Iniciando en la bandeja del sistema.")
+        from gui.tray import TrayController
+        # La aplicación sigue viva en la bandeja aunque se cierre la ventana.
+        app.setQuitOnLastWindowClosed(False)
+        controller = TrayController(metrics_port=args.metrics_port, trace=args.trace)
+        controller.start()
+        mode = "tray"
+    else:
         logging.info("Creando instancia de MainWindow.")
-        window = MainWindow()
+        from gui.main_window import MainWindow
+        controller = MainWindow(metrics_port=args.metrics_port, trace=args.trace)
         logging.info("Mostrando la ventana principal.")
-        window.show()
-        
-        logging.info("Iniciando el bucle de eventos de la aplicación.")
-        sys.exit(app.exec())
-
-    if __name__ == "__main__":
-        logging.info("Bloque __main__ alcanzado. Llamando a main().")
-        main()
-
-except Exception as e:
-    # Este bloque atrapará cualquier error catastrófico que ocurra durante la inicialización.
-    logging.critical(f"ERROR FATAL INESPERADO: {e}", exc_info=True)
-    # exc_info=True añade el 'traceback' completo al log para ver exactamente dónde ocurrió el error.
\ No newline at end of file
+        controller.show()
+        mode = "gui"
+
+    instance_service = InstanceCommandService(instance_lock, controller.handle_instance_command, mode=mode)
+    instance_service.start()
+    command, params = instance_command(args)
+    if command != 'show':
+        # La orden de la línea de comandos se atiende igual que si la reenviara otra instancia.
+        QTimer.singleShot(0, lambda: logging.info(f"Orden '{command}': {controller.handle_instance_command(dict(params, command=command))}"))
+
+    logging.info("Iniciando el bucle de eventos de la aplicación.")
+    exit_code = app.exec()
+    instance_service.stop()
+    return exit_code
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# tests/test_gpu_telemetry.py
+
+import unittest
+
+from core.gpu_telemetry import FakeNvmlProvider, GpuTelemetryCollector, decode_throttle_reasons
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def rtx_device(**overrides):
+    device = {
+        'name': "NVIDIA GeForce RTX 4070",
+        'utilization': (87, 40),
+        'temperature': 71,
+        'clocks': (2610, 10501),
+        'power_usage': 182.5,
+        'power_limit': 200.0,
+        'throttle_reasons': 0x0004 | 0x0001,
+        'memory': (6 * 1024 ** 3, 12 * 1024 ** 3),
+        'pcie_throughput': (3 * 1024 ** 2, 12 * 1024 ** 2),
+    }
+    device.update(overrides)
+    return device
+
+
+class GpuTelemetryCollectorTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def collector(self, *devices, slow_interval=5.0):
+        self.provider = FakeNvmlProvider(list(devices))
+        return GpuTelemetryCollector(self.provider, slow_interval=slow_interval, clock=self.clock)
+
+    def test_sample_normalizes_all_metrics(self):
+        sample, = self.collector(rtx_device()).sample()
+        self.assertEqual(sample['name'], "NVIDIA GeForce RTX 4070")
+        self.assertEqual((sample['usage'], sample['memory_usage'], sample['temperature']), (87, 40, 71))
+        self.assertEqual((sample['graphics_clock_mhz'], sample['memory_clock_mhz']), (2610, 10501))
+        self.assertEqual((sample['power_watts'], sample['power_limit_watts']), (182.5, 200.0))
+        self.assertEqual(sample['vram_total_bytes'], 12 * 1024 ** 3)
+        self.assertEqual(sample['pcie_rx_bps'], 12 * 1024 ** 2)
+        # El reposo no cuenta como throttling.
+        self.assertEqual(sample['throttle_reasons'], ["sw_power_cap"])
+        self.assertEqual(sample['slow_metrics_age'], 0)
+
+    def test_slow_metrics_follow_their_own_cadence(self):
+        collector = self.collector(rtx_device(), slow_interval=5.0)
+        for _ in range(5):
+            collector.sample()
+            self.clock.now += 1.0
+        self.assertEqual(self.provider.calls['temperature'], 5)
+        self.assertEqual(self.provider.calls['memory'], 1)
+
+        self.provider.devices[0]['memory'] = (8 * 1024 ** 3, 12 * 1024 ** 3)
+        sample, = collector.sample()
+        self.assertEqual(self.provider.calls['memory'], 2)
+        self.assertEqual(sample['vram_used_bytes'], 8 * 1024 ** 3)
+
+    def test_cached_slow_metrics_report_their_age(self):
+        collector = self.collector(rtx_device())
+        collector.sample()
+        self.clock.now += 3.0
+        sample, = collector.sample()
+        self.assertEqual(sample['slow_metrics_age'], 3.0)
+        self.assertEqual(sample['power_limit_watts'], 200.0)
+
+    def test_unsupported_metrics_are_not_queried_again(self):
+        collector = self.collector(rtx_device(pcie_throughput=None, power_usage=None))
+        for _ in range(3):
+            sample, = collector.sample()
+            self.clock.now += 10.0
+        self.assertEqual(self.provider.calls['pcie_throughput'], 1)
+        self.assertEqual(self.provider.calls['power_usage'], 1)
+        self.assertIsNone(sample['pcie_tx_bps'])
+        self.assertIsNone(sample['power_watts'])
+
+    def test_transient_errors_keep_the_last_value(self):
+        collector = self.collector(rtx_device())
+        collector.sample()
+        self.provider.devices[0]['temperature'] = RuntimeError("GPU is lost")
+        sample, = collector.sample()
+        self.assertEqual(sample['temperature'], 71)
+        self.assertEqual(self.provider.calls['temperature'], 2)
+
+    def test_multiple_gpus(self):
+        samples = self.collector(rtx_device(), rtx_device(name=None, temperature=55)).sample()
+        self.assertEqual([sample['index'] for sample in samples], [0, 1])
+        self.assertEqual(samples[1]['name'], "GPU 1")
+        self.assertEqual(samples[1]['temperature'], 55)
+
+    def test_shutdown_closes_the_provider(self):
+        collector = self.collector(rtx_device())
+        self.assertTrue(self.provider.initialized)
+        collector.shutdown()
+        self.assertFalse(self.provider.initialized)
+
+
+class ThrottleReasonTests(unittest.TestCase):
+    def test_decode(self):
+        self.assertEqual(decode_throttle_reasons(0), [])
+        self.assertEqual(decode_throttle_reasons(0x0001), [])
+        self.assertEqual(decode_throttle_reasons(0x0001, include_idle=True), ["gpu_idle"])
+        self.assertEqual(decode_throttle_reasons(0x0020 | 0x0040), ["sw_thermal", "hw_thermal"])
+
+
+class MonitorGpuDetectionTests(unittest.TestCase):
+    def test_provider_without_gpus_is_shut_down(self):
+        from core.monitor import SystemMonitor
+
+        provider = FakeNvmlProvider([])
+        monitor = SystemMonitor(gpu_provider=provider)
+        self.assertNotEqual(monitor.gpu_brand, "NVIDIA")
+        self.assertFalse(provider.initialized)
+
+    def test_provider_with_gpus_stays_open(self):
+        from core.monitor import SystemMonitor
+
+        provider = FakeNvmlProvider([rtx_device()])
+        monitor = SystemMonitor(gpu_provider=provider)
+        self.assertEqual(monitor.gpu_brand, "NVIDIA")
+        self.assertTrue(provider.initialized)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# tests/test_nic_tuner.py
+
+import unittest
+
+from core.nic_tuner import NET_CLASS_PATH, InMemoryRegistry, NicPropertyTuner
+
+ADAPTER = f"{NET_CLASS_PATH}\\0001"
+PARAMS = f"{ADAPTER}\\Ndi\\Params"
+
+
+class FakeStateManager:
+    def __init__(self):
+        self.state = {}
+
+    def get_state(self, key):
+        return self.state.get(key)
+
+    def save_state(self, key, value):
+        self.state[key] = value
+
+    def remove_state(self, key):
+        self.state.pop(key, None)
+
+
+def intel_adapter():
+    """Un adaptador con una propiedad enum, una numérica con rango y otra sin valor actual."""
+    return InMemoryRegistry({
+        ADAPTER: {
+            # Nombres de valor con otra capitalización: el registro no las distingue.
+            "NETCFGINSTANCEID": "{11111111-2222-3333-4444-555555555555}",
+            "driverdesc": "Intel(R) Ethernet Controller I225-V",
+            "*InterruptModeration": "1",
+            "*ReceiveBuffers": "512",
+        },
+        f"{PARAMS}\\*InterruptModeration": {"ParamDesc": "Interrupt Moderation", "default": "1", "type": "enum"},
+        f"{PARAMS}\\*InterruptModeration\\Enum": {"0": "Disabled", "1": "Enabled"},
+        f"{PARAMS}\\*ReceiveBuffers": {"ParamDesc": "Receive Buffers", "default": "256", "type": "int",
+                                       "min": "80", "max": "2048"},
+        f"{PARAMS}\\*EEE": {"ParamDesc": "Energy Efficient Ethernet", "default": "1", "type": "enum"},
+        f"{PARAMS}\\*EEE\\Enum": {"0": "Off", "1": "On"},
+        # Claves de la clase de red que no son adaptadores.
+        f"{NET_CLASS_PATH}\\Properties": {},
+        f"{NET_CLASS_PATH}\\0002": {"DriverDesc": "Adaptador sin NetCfgInstanceId"},
+    })
+
+
+class NicPropertyTunerTests(unittest.TestCase):
+    def setUp(self):
+        self.registry = intel_adapter()
+        self.state = FakeStateManager()
+        self.messages = []
+        self.tuner = NicPropertyTuner(self.registry, self.state, self.messages.append)
+
+    def test_read_adapters_ignores_case_of_value_names(self):
+        adapter, = self.tuner.read_adapters()
+        self.assertEqual(adapter['guid'], "{11111111-2222-3333-4444-555555555555}")
+        self.assertEqual(adapter['description'], "Intel(R) Ethernet Controller I225-V")
+        self.assertEqual(adapter['properties']['*ReceiveBuffers']['current'], "512")
+        self.assertIsNone(adapter['properties']['*EEE']['current'])
+
+    def test_unsupported_keywords_are_skipped(self):
+        self.assertEqual(self.tuner.plan({"*FlowControl": 0, "*RSS": 1}), [])
+
+    def test_invalid_targets_are_rejected(self):
+        self.assertEqual(self.tuner.plan({"*ReceiveBuffers": 4096}), [])  # Fuera de rango
+        self.assertEqual(self.tuner.plan({"*ReceiveBuffers": "max"}), [])  # No numérico
+        self.assertEqual(self.tuner.plan({"*InterruptModeration": 2}), [])  # No está en el enum
+
+    def test_targets_already_set_are_skipped(self):
+        # '*EEE' no tiene valor propio: cuenta el valor por defecto del driver.
+        self.assertEqual(self.tuner.plan({"*interruptmoderation": 1, "*ReceiveBuffers": 512, "*EEE": 1}), [])
+
+    def test_plan(self):
+        changes = self.tuner.plan({"*InterruptModeration": 0, "*ReceiveBuffers": 2048})
+        self.assertEqual([(c['keyword'], c['original'], c['value']) for c in changes], [
+            ("*InterruptModeration", "1", "0"),
+            ("*ReceiveBuffers", "512", "2048"),
+        ])
+
+    def test_apply_keeps_only_the_first_original(self):
+        self.tuner.apply({"*ReceiveBuffers": 1024})
+        self.tuner.apply({"*ReceiveBuffers": 2048})
+        self.assertEqual(self.registry.get_value(ADAPTER, "*ReceiveBuffers")[0], "2048")
+        self.assertEqual(self.state.get_state(NicPropertyTuner.STATE_KEY), {ADAPTER: {"*ReceiveBuffers": "512"}})
+
+    def test_restore_deletes_values_that_did_not_exist(self):
+        self.tuner.apply({"*EEE": 0, "*ReceiveBuffers": 1024})
+        self.assertEqual(self.state.get_state(NicPropertyTuner.STATE_KEY)[ADAPTER]["*EEE"],
+                         NicPropertyTuner.DELETE_MARKER)
+
+        self.assertEqual(self.tuner.restore(), 2)
+        self.assertEqual(self.registry.get_value(ADAPTER, "*EEE"), (None, None))
+        self.assertEqual(self.registry.get_value(ADAPTER, "*ReceiveBuffers")[0], "512")
+        self.assertIsNone(self.state.get_state(NicPropertyTuner.STATE_KEY))
+
+    def test_restore_only_some_keywords(self):
+        self.tuner.apply({"*EEE": 0, "*ReceiveBuffers": 1024})
+        self.assertEqual(self.tuner.restore(["*receivebuffers"]), 1)
+        self.assertEqual(self.state.get_state(NicPropertyTuner.STATE_KEY), {ADAPTER: {"*EEE": NicPropertyTuner.DELETE_MARKER}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,223 @@
+# tests/test_power_scheme.py
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from core.power_scheme import PowerSchemeManager, parse_powercfg_list, parse_powercfg_query
+
+try:
+    from core.system_optimizer import SystemOptimizer
+except ImportError:  # winreg: SystemOptimizer solo se importa en Windows.
+    SystemOptimizer = None
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'powercfg')
+
+BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
+SUB_PROCESSOR = "54533251-82be-4824-96c1-47b60b740d00"
+SUB_PCIEXPRESS = "501a4d13-42af-4429-9fd1-a8218c268e20"
+PROCTHROTTLEMIN = "893dee8e-2bef-41e0-89c6-b55d0929964c"
+CPMINCORES = "0cc5b647-c1df-4637-891a-dec35c318583"
+ASPM = "ee12f906-d277-404b-b6da-e5fa1a576df5"
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class ParsePowercfgQueryTests(unittest.TestCase):
+    """El mismo plan grabado en inglés y en español debe dar el mismo modelo."""
+
+    def check_balanced(self, scheme):
+        self.assertEqual(scheme.guid, BALANCED)
+        self.assertEqual(scheme.alias, "SCHEME_BALANCED")
+        self.assertEqual(len(scheme.subgroups), 3)
+        self.assertEqual(scheme.subgroups[SUB_PROCESSOR].alias, "SUB_PROCESSOR")
+
+        minimum = scheme.find_setting(SUB_PROCESSOR, PROCTHROTTLEMIN)
+        self.assertEqual(minimum.alias, "PROCTHROTTLEMIN")
+        self.assertEqual((minimum.minimum, minimum.maximum, minimum.increment), (0, 100, 1))
+        self.assertEqual(minimum.units, "%")
+        self.assertEqual((minimum.ac_value, minimum.dc_value), (5, 5))
+
+        parking = scheme.find_setting(SUB_PROCESSOR, CPMINCORES)
+        self.assertEqual((parking.ac_value, parking.dc_value), (100, 10))
+
+        aspm = scheme.find_setting(SUB_PCIEXPRESS, ASPM)
+        self.assertEqual(aspm.alias, "ASPM")
+        self.assertEqual(sorted(aspm.options), [0, 1, 2])
+        self.assertEqual((aspm.ac_value, aspm.dc_value), (1, 2))
+        self.assertIsNone(aspm.minimum)
+        self.assertTrue(aspm.accepts(0))
+        self.assertFalse(aspm.accepts(3))
+
+    def test_english_output(self):
+        scheme = parse_powercfg_query(read_fixture('qh_balanced_en.txt'))
+        self.check_balanced(scheme)
+        self.assertEqual(scheme.name, "Balanced")
+        self.assertEqual(scheme.find_setting(SUB_PCIEXPRESS, ASPM).options[0], "Off")
+
+    def test_spanish_output(self):
+        scheme = parse_powercfg_query(read_fixture('qh_balanced_es.txt'))
+        self.check_balanced(scheme)
+        self.assertEqual(scheme.name, "Equilibrado")
+        self.assertEqual(scheme.find_setting(SUB_PCIEXPRESS, ASPM).options[2], "Máximo ahorro de energía")
+
+    def test_crlf_output(self):
+        output = read_fixture('qh_balanced_en.txt').replace("\n", "\r\n")
+        self.check_balanced(parse_powercfg_query(output))
+
+    def test_empty_output(self):
+        self.assertIsNone(parse_powercfg_query(""))
+
+
+class ParsePowercfgListTests(unittest.TestCase):
+    def test_list(self):
+        schemes = parse_powercfg_list(read_fixture('list_es.txt'))
+        self.assertEqual(schemes[0], (BALANCED, "Equilibrado", True))
+        self.assertEqual(schemes[1], (PowerSchemeManager.HIGH_PERFORMANCE_GUID, "Alto rendimiento", False))
+        self.assertEqual(len(schemes), 3)
+
+
+class PowerSchemeManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.commands = []
+        self.messages = []
+        self.manager = PowerSchemeManager(self.run_command, self.messages.append)
+
+    def run_command(self, command):
+        self.commands.append(command)
+        if command.startswith("powercfg /qh"):
+            return read_fixture('qh_balanced_en.txt')
+        return ""
+
+    def test_plan_changes_covers_ac_and_dc(self):
+        changes = self.manager.plan_changes(BALANCED, {
+            "min_processor_state": 100,  # AC 5, DC 5
+            "core_parking_min_cores": 100,  # AC 100, DC 10: solo difiere en batería
+            "pcie_link_state": 7,  # Fuera de las opciones
+        })
+        by_name = {change['name']: change for change in changes}
+        self.assertEqual(set(by_name), {"min_processor_state", "core_parking_min_cores"})
+        self.assertEqual(by_name["core_parking_min_cores"]['original_dc'], 10)
+        self.assertEqual(by_name["core_parking_min_cores"]['dc_value'], 100)
+        self.assertTrue(any("pcie_link_state" in message for message in self.messages))
+
+    def test_plan_changes_skips_settings_already_set(self):
+        self.assertEqual(self.manager.plan_changes(BALANCED, {"min_processor_state": 5}), [])
+
+    def test_query_is_cached(self):
+        self.manager.plan_changes(BALANCED, {"min_processor_state": 100})
+        self.manager.plan_changes(BALANCED, {"pcie_link_state": 0})
+        self.assertEqual(sum(command.startswith("powercfg /qh") for command in self.commands), 1)
+
+    def test_apply_batch_sets_ac_and_dc(self):
+        changes = self.manager.plan_changes(BALANCED, {"min_processor_state": 100})
+        self.commands.clear()
+        self.assertTrue(self.manager.apply_batch(BALANCED, changes))
+        self.assertEqual(len(self.commands), 1)
+        batch = self.commands[0].split(" && ")
+        self.assertEqual(batch, [
+            f"powercfg /setacvalueindex {BALANCED} {SUB_PROCESSOR} {PROCTHROTTLEMIN} 100",
+            f"powercfg /setdcvalueindex {BALANCED} {SUB_PROCESSOR} {PROCTHROTTLEMIN} 100",
+            f"powercfg /setactive {BALANCED}",
+        ])
+
+    def test_restore_sets_original_ac_and_dc(self):
+        saved = {'active_guid': BALANCED, 'created_scheme': None, 'settings': [
+            {'scheme': BALANCED, 'subgroup': SUB_PROCESSOR, 'setting': CPMINCORES, 'original': 100, 'original_dc': 10},
+        ]}
+        self.assertTrue(self.manager.restore(saved))
+        self.assertEqual(self.commands[0].split(" && "), [
+            f"powercfg /setacvalueindex {BALANCED} {SUB_PROCESSOR} {CPMINCORES} 100",
+            f"powercfg /setdcvalueindex {BALANCED} {SUB_PROCESSOR} {CPMINCORES} 10",
+            f"powercfg /setactive {BALANCED}",
+        ])
+
+    def test_restore_skips_unknown_originals(self):
+        # Backup de una versión anterior (sin 'original_dc') y un original que no se pudo leer.
+        saved = {'active_guid': BALANCED, 'settings': [
+            {'scheme': BALANCED, 'subgroup': SUB_PROCESSOR, 'setting': PROCTHROTTLEMIN, 'original': 5},
+            {'scheme': BALANCED, 'subgroup': SUB_PCIEXPRESS, 'setting': ASPM, 'original': None, 'original_dc': None},
+        ]}
+        self.assertTrue(self.manager.restore(saved))
+        batch = self.commands[0].split(" && ")
+        self.assertEqual(batch, [
+            f"powercfg /setacvalueindex {BALANCED} {SUB_PROCESSOR} {PROCTHROTTLEMIN} 5",
+            f"powercfg /setactive {BALANCED}",
+        ])
+        self.assertFalse(any("None" in command for command in batch))
+
+    def test_restore_skips_values_of_created_scheme(self):
+        created = "11111111-2222-3333-4444-555555555555"
+        saved = {'active_guid': BALANCED, 'created_scheme': created, 'settings': [
+            {'scheme': created, 'subgroup': SUB_PROCESSOR, 'setting': PROCTHROTTLEMIN, 'original': 5, 'original_dc': 5},
+        ]}
+        self.manager.restore(saved)
+        self.assertEqual(self.commands[0].split(" && "), [
+            f"powercfg /setactive {BALANCED}",
+            f"powercfg /delete {created}",
+        ])
+
+
+@unittest.skipIf(SystemOptimizer is None, "SystemOptimizer necesita Windows")
+class UpdatePowerPlanTests(unittest.TestCase):
+    """Cambio de perfil sobre el mismo plan: el perfil de destino ya no fija un ajuste."""
+
+    def setUp(self):
+        from core.state_manager import StateManager
+
+        appdata = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, appdata, True)
+        patcher = mock.patch.dict(os.environ, {'APPDATA': appdata})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.commands = []
+        self.messages = []
+        self.optimizer = SystemOptimizer(StateManager(), self.messages.append)
+        self.optimizer.power_schemes = PowerSchemeManager(self.run_command, self.messages.append)
+        self.optimizer.state_manager.save_state('power_plan', {'active_guid': BALANCED, 'created_scheme': None, 'settings': [
+            {'scheme': BALANCED, 'subgroup': SUB_PROCESSOR, 'setting': PROCTHROTTLEMIN, 'original': 5, 'original_dc': 5},
+        ]})
+
+    def run_command(self, command):
+        self.commands.append(command)
+        if command == "powercfg /getactivescheme":
+            return f"Power Scheme GUID: {BALANCED}  (Balanced)"
+        if command == "powercfg /list":
+            return read_fixture('list_es.txt')
+        if command.startswith("powercfg /qh"):
+            return read_fixture('qh_balanced_en.txt')
+        return ""
+
+    def test_dropped_setting_is_reverted_and_the_active_scheme_reapplied(self):
+        # El plan de destino ya está activo y no tiene nada más que cambiar.
+        self.optimizer.update_power_plan({'scheme': "active", 'settings': {"min_processor_state": 100}},
+                                         {'scheme': "active", 'settings': {}})
+        batches = [command.split(" && ") for command in self.commands if "/set" in command]
+        self.assertEqual(batches, [[
+            f"powercfg /setacvalueindex {BALANCED} {SUB_PROCESSOR} {PROCTHROTTLEMIN} 5",
+            f"powercfg /setdcvalueindex {BALANCED} {SUB_PROCESSOR} {PROCTHROTTLEMIN} 5",
+            f"powercfg /setactive {BALANCED}",
+        ]])
+        self.assertEqual(self.optimizer.state_manager.get_state('power_plan')['settings'], [])
+        self.assertIn("[OK] El plan de energía ya estaba optimizado.", self.messages)
+
+    def test_dropped_setting_of_an_inactive_scheme_is_not_activated(self):
+        other = "a1841308-3541-4fab-bc81-f71556f20b4a"
+        saved = self.optimizer.state_manager.get_state('power_plan')
+        saved['settings'][0]['scheme'] = other
+        self.optimizer.state_manager.save_state('power_plan', saved)
+        self.optimizer.update_power_plan({'scheme': "active", 'settings': {"min_processor_state": 100}},
+                                         {'scheme': "active", 'settings': {}})
+        batch, = [command.split(" && ") for command in self.commands if "/set" in command]
+        self.assertNotIn(f"powercfg /setactive {other}", batch)
+        self.assertEqual(len(batch), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# tests/test_process_terminator.py
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import psutil
+
+from core.process_terminator import ProcessTreeTerminator
+
+# Cada proceso se lanza desde un enlace al intérprete con el nombre de ejecutable que se quiere
+# simular: el nombre del proceso (psutil.Process.name) es el del enlace.
+CHILD = """
+import signal, sys, time
+if sys.argv[1] == 'ignore':
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+ballast = bytearray(8 * 1024 * 1024)
+print('ready', flush=True)
+time.sleep(60)
+"""
+
+ROOT = """
+import subprocess, sys, time
+children = [subprocess.Popen([path, '-c', sys.argv[1], mode], stdout=subprocess.PIPE, text=True)
+            for path, mode in zip(sys.argv[2::2], sys.argv[3::2])]
+for child in children:
+    child.stdout.readline()
+print('ready', flush=True)
+time.sleep(60)
+"""
+
+
+@unittest.skipIf(sys.platform == "win32", "SIGTERM no se puede ignorar en Windows")
+class ProcessTreeTerminatorTests(unittest.TestCase):
+    """Árbol real: steam.exe -> steamwebhelper.exe (ignora SIGTERM) y game.exe."""
+
+    def setUp(self):
+        self.bin_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.bin_dir, True)
+        self.root = subprocess.Popen(
+            [self.executable("steam.exe"), '-c', ROOT, CHILD,
+             self.executable("steamwebhelper.exe"), 'ignore', self.executable("game.exe"), 'normal'],
+            stdout=subprocess.PIPE, text=True)
+        self.addCleanup(self.kill_all)
+        self.assertEqual(self.root.stdout.readline().strip(), 'ready')
+        self.root_process = psutil.Process(self.root.pid)
+        self.children = {child.name(): child for child in self.root_process.children()}
+        self.terminator = ProcessTreeTerminator(grace_period=0.5, kill_timeout=3.0)
+
+    def executable(self, name):
+        path = os.path.join(self.bin_dir, name)
+        os.symlink(sys.executable, path)
+        return path
+
+    def kill_all(self):
+        for proc in [self.root_process] + list(self.children.values()):
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        self.root.wait()
+        self.root.stdout.close()
+
+    def test_resolve_trees_groups_root_and_helpers(self):
+        tree, = self.terminator.resolve_trees(["Steam.exe"])
+        self.assertEqual(tree['root'].pid, self.root.pid)
+        # El auxiliar conocido va en el árbol; el juego lanzado desde el launcher, no.
+        self.assertEqual({proc.pid for proc in tree['processes']},
+                         {self.root.pid, self.children["steamwebhelper.exe"].pid})
+
+    def test_listed_child_joins_its_ancestor_tree(self):
+        trees = self.terminator.resolve_trees(["steam.exe", "game.exe"])
+        self.assertEqual(len(trees), 1)
+        self.assertIn(self.children["game.exe"].pid, {proc.pid for proc in trees[0]['processes']})
+
+    def test_tree_of_a_single_process_uses_the_same_rules(self):
+        tree = self.terminator.tree_of(self.root_process)
+        self.assertEqual({proc.pid for proc in tree['processes']},
+                         {self.root.pid, self.children["steamwebhelper.exe"].pid})
+        self.assertIsNone(self.terminator.tree_of(psutil.Process()))
+
+    def test_terminate_escalates_to_kill_and_counts_freed_memory(self):
+        trees = self.terminator.resolve_trees(["steam.exe"])
+        report, = self.terminator.terminate_trees(trees)
+        self.assertEqual(report['pid'], self.root.pid)
+        self.assertEqual((report['processes'], report['exited'], report['survivors']), (2, 2, 0))
+        # Solo el auxiliar ignoró terminate() y tuvo que recibir kill().
+        self.assertEqual(report['killed'], 1)
+        self.assertGreater(report['rss_bytes'], 8 * 1024 * 1024)
+        self.assertEqual(report['freed_bytes'], report['rss_bytes'])
+        # El proceso que no era del árbol sigue vivo.
+        self.assertTrue(self.children["game.exe"].is_running())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# tests/test_single_instance.py
+
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from multiprocessing.connection import Client
+
+from core.single_instance import InstanceLock, InstanceServer, send_command, validate_command
+
+
+class ValidateCommandTests(unittest.TestCase):
+    def test_known_commands(self):
+        self.assertEqual(validate_command({'command': 'status'}), {'command': 'status'})
+        validate_command({'command': 'apply_profile', 'profile': "competitive"})
+
+    def test_rejected_commands(self):
+        for message in (["status"], {'command': 'shutdown'}, {'command': 'status', 'profile': "x"},
+                        {'command': 'apply_profile'}, {'command': 'apply_profile', 'profile': 3}):
+            with self.subTest(message=message), self.assertRaises(ValueError):
+                validate_command(message)
+
+
+class InstanceServerTests(unittest.TestCase):
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir, True)
+        self.lock = InstanceLock(lock_dir=self.lock_dir)
+        self.assertTrue(self.lock.acquire())
+        self.addCleanup(self.lock.release)
+        self.received = []
+        self.server = InstanceServer(self.lock, self.handle)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        if not self.server.is_alive():
+            self.skipTest("Proteger la clave del canal (icacls) requiere permisos de administrador")
+
+    def handle(self, message):
+        self.received.append(message)
+        return {'ok': True, 'message': "hecho"}
+
+    def raw_connection(self):
+        with open(self.lock.key_file, 'r', encoding='utf-8') as f:
+            return Client(self.server.address, authkey=bytes.fromhex(f.read()))
+
+    def test_round_trip(self):
+        reply = send_command('apply_profile', lock_dir=self.lock_dir, profile="competitive")
+        self.assertEqual(reply, {'ok': True, 'message': "hecho"})
+        self.assertEqual(self.received, [{'command': 'apply_profile', 'profile': "competitive"}])
+
+    def test_key_is_not_published_with_the_address(self):
+        with open(self.lock.info_file, 'r', encoding='utf-8') as f:
+            self.assertNotIn('authkey', json.load(f))
+        if os.name == 'posix':
+            self.assertEqual(os.stat(self.lock.key_dir).st_mode & 0o777, 0o700)
+
+    def test_pickled_objects_are_never_loaded(self):
+        with self.raw_connection() as conn:
+            conn.send_bytes(pickle.dumps({'command': 'status'}))
+            self.assertFalse(json.loads(conn.recv_bytes())['ok'])
+        self.assertEqual(self.received, [])
+
+    def test_unknown_commands_do_not_reach_the_handler(self):
+        with self.raw_connection() as conn:
+            conn.send_bytes(json.dumps({'command': 'restore', 'path': "C:\\"}).encode('utf-8'))
+            self.assertFalse(json.loads(conn.recv_bytes())['ok'])
+        self.assertEqual(self.received, [])
+        # El servidor sigue atendiendo órdenes válidas.
+        self.assertTrue(send_command('status', lock_dir=self.lock_dir)['ok'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# tests/test_speed_test_worker.py
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from core.speed_test_worker import SpeedTestServerCache, SpeedTestWorker, aggregate_speed_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDING = os.path.join(ROOT, 'tests', 'fixtures', 'speedtest', 'three_servers.jsonl')
+FAKE_CLI = [sys.executable, os.path.join(ROOT, 'utils', 'fake_speedtest.py'), "--replay", RECORDING, "--seed", "0"]
+
+# Grabación: un test por servidor.
+DOWNLOAD_MBPS = {101: 100.0, 202: 200.0, 303: 300.0}
+LATENCY_MS = {101: 10.0, 202: 20.0, 303: 40.0}
+
+
+class RecordingWorker(SpeedTestWorker):
+    """SpeedTestWorker que anota cada línea de comandos que lanza."""
+
+    def __init__(self, **kwargs):
+        super().__init__(cli_command=FAKE_CLI, **kwargs)
+        self.commands = []
+        self.results = []
+        self.summaries = []
+        self.errors = []
+        self.test_finished.connect(self.results.append)
+        self.runs_finished.connect(self.summaries.append)
+        self.test_error.connect(self.errors.append)
+
+    def _popen(self, command):
+        self.commands.append(command[len(FAKE_CLI):])
+        return super()._popen(command)
+
+
+def pinned_server(arguments):
+    return int(arguments[arguments.index("-s") + 1]) if "-s" in arguments else None
+
+
+class SpeedTestWorkerTests(unittest.TestCase):
+    def setUp(self):
+        appdata = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, appdata, True)
+        patcher = mock.patch.dict(os.environ, {'APPDATA': appdata})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = SpeedTestServerCache()
+
+    def run_worker(self, **kwargs):
+        worker = RecordingWorker(server_cache=self.cache, **kwargs)
+        worker.run()  # En el hilo del test: las señales se entregan directamente.
+        self.assertEqual(worker.errors, [])
+        return worker
+
+    def test_auto_pins_the_server_chosen_by_the_first_run(self):
+        worker = self.run_worker(runs=3, server_mode="auto")
+        chosen = worker.results[0]['server']['id']
+        self.assertEqual([pinned_server(command) for command in worker.commands], [None, chosen, chosen])
+        self.assertEqual([result['server']['id'] for result in worker.results], [chosen] * 3)
+        self.assertEqual(self.cache.selected_server()['id'], chosen)
+
+        metrics = worker.summaries[0]['metrics']
+        self.assertEqual(metrics['download_mbps']['median'], DOWNLOAD_MBPS[chosen])
+        self.assertEqual(metrics['download_mbps']['iqr'], 0.0)
+
+    def test_pinned_reuses_the_cached_server(self):
+        self.cache.save_selected_server({'id': 202, 'name': "Barcelona"})
+        worker = self.run_worker(runs=2, server_mode="pinned")
+        self.assertEqual([pinned_server(command) for command in worker.commands], [202, 202])
+        self.assertEqual(worker.summaries[0]['servers'], ["Barcelona", "Barcelona"])
+
+    def test_rotate_spreads_runs_over_the_nearest_servers(self):
+        worker = self.run_worker(runs=4, server_mode="rotate", top_k=3)
+        self.assertIn("-L", worker.commands[0])
+        self.assertEqual([pinned_server(command) for command in worker.commands[1:]], [101, 202, 303, 101])
+        self.assertEqual([server['id'] for server in self.cache.candidates()], [101, 202, 303])
+
+        summary = worker.summaries[0]
+        self.assertEqual(summary['runs'], 4)
+        download = summary['metrics']['download_mbps']
+        self.assertEqual(download['values'], [100.0, 200.0, 300.0, 100.0])
+        self.assertEqual((download['median'], download['iqr'], download['worst']), (150.0, 125.0, 100.0))
+        latency = summary['metrics']['latency_ms']
+        self.assertEqual((latency['median'], latency['worst']), (15.0, 40.0))
+
+    def test_single_run_does_not_aggregate(self):
+        worker = self.run_worker(runs=1)
+        self.assertEqual(len(worker.results), 1)
+        self.assertEqual(worker.summaries, [])
+
+
+class AggregateSpeedResultsTests(unittest.TestCase):
+    def result(self, server_id):
+        return {
+            'server': {'id': server_id, 'name': str(server_id)},
+            'download': {'bandwidth': DOWNLOAD_MBPS[server_id] * 1_000_000 / 8},
+            'ping': {'latency': LATENCY_MS[server_id], 'jitter': 1.0},
+        }
+
+    def test_median_iqr_and_worst(self):
+        summary = aggregate_speed_results([self.result(101), self.result(202), self.result(303)])
+        download = summary['metrics']['download_mbps']
+        self.assertEqual((download['median'], download['iqr'], download['worst']), (200.0, 100.0, 100.0))
+        latency = summary['metrics']['latency_ms']
+        self.assertEqual((latency['median'], latency['iqr'], latency['worst']), (20.0, 15.0, 40.0))
+        # Ninguna ejecución informó de la pérdida de paquetes.
+        self.assertNotIn('packet_loss_pct', summary['metrics'])
+
+
+if __name__ == '__main__':
+    unittest.main()
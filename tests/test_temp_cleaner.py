@@ -0,0 +1,66 @@
+# tests/test_temp_cleaner.py
+
+import threading
+import time
+import unittest
+
+from core.temp_cleaner import CleanupPolicy, TempCleanupScheduler
+
+
+class FakeIndex:
+    def refresh(self):
+        pass
+
+    def save(self):
+        pass
+
+
+class FakeCleaner:
+    def __init__(self, policy):
+        self.index = FakeIndex()
+        self.policy = policy
+        self.runs = 0
+        self.ran = threading.Event()
+
+    def run(self):
+        self.runs += 1
+        self.ran.set()
+        return 1, 1024
+
+
+class TempCleanupSchedulerTests(unittest.TestCase):
+    def scheduler(self, policy, interval_hours=0.5 / 3600):
+        self.cleaner = FakeCleaner(policy)
+        scheduler = TempCleanupScheduler(self.cleaner, interval_hours=interval_hours)
+        scheduler.start()
+        self.addCleanup(scheduler.join, 2.0)
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def wait_for_run(self):
+        self.assertTrue(self.cleaner.ran.wait(2.0))
+        self.cleaner.ran.clear()
+
+    def test_trigger_cleans_once(self):
+        scheduler = self.scheduler(CleanupPolicy())
+        scheduler.trigger()
+        self.wait_for_run()
+        # Varios intervalos de refresco del índice sin nueva petición: no se vuelve a limpiar.
+        self.assertFalse(self.cleaner.ran.wait(2.0))
+        self.assertEqual(self.cleaner.runs, 1)
+        self.assertEqual(scheduler.last_result['files'], 1)
+
+    def test_repeat_hours_keeps_cleaning_until_disarmed(self):
+        scheduler = self.scheduler(CleanupPolicy(repeat_hours=0.2 / 3600), interval_hours=1)
+        scheduler.trigger()
+        self.wait_for_run()
+        self.wait_for_run()
+        scheduler.disarm()
+        # Una limpieza ya en curso al desarmar puede terminar; después no hay más.
+        time.sleep(0.3)
+        self.cleaner.ran.clear()
+        self.assertFalse(self.cleaner.ran.wait(1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# utils/fake_speedtest.py
+"""
+Sustituto del CLI de Ookla que reproduce una grabación jsonl (la salida de
+'speedtest -f jsonl'). Acepta los mismos argumentos que usa SpeedTestWorker, de modo
+que se puede inyectar como 'cli_command':
+
+    [sys.executable, "utils/fake_speedtest.py", "--replay", "grabacion.jsonl"]
+
+Si la grabación contiene varios tests, cada invocación reproduce uno al azar ('--seed'
+lo hace repetible). Con '-s' se reproducen los tests de ese servidor (o cualquiera, con
+el servidor sustituido, si no hay ninguno), y '-L' devuelve los servidores que aparecen
+en la grabación.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+
+def load_runs(path):
+    """Divide la grabación en tests: cada uno termina con su evento 'result'."""
+    runs, current = [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            current.append(event)
+            if event.get('type') == 'result':
+                runs.append(current)
+                current = []
+    return runs
+
+
+def recorded_servers(runs):
+    servers = {}
+    for run in runs:
+        for event in run:
+            server = event.get('server')
+            if server and server.get('id') is not None:
+                servers.setdefault(server['id'], server)
+    return list(servers.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="fake_speedtest")
+    parser.add_argument("--replay", required=True, help="Grabación jsonl a reproducir.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Segundos entre eventos.")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-s", "--server-id", default=None)
+    parser.add_argument("-L", "--servers", action="store_true")
+    parser.add_argument("-f", "--format", default="jsonl")
+    args, _ = parser.parse_known_args(argv)
+
+    runs = load_runs(args.replay)
+    servers = recorded_servers(runs)
+    if args.servers:
+        print(json.dumps({'type': 'serverList', 'servers': servers}))
+        return 0
+    if not runs:
+        print("La grabación no contiene ningún test completo.", file=sys.stderr)
+        return 1
+
+    pinned = None
+    if args.server_id is not None:
+        pinned = next((s for s in servers if str(s['id']) == args.server_id), {'id': args.server_id, 'name': f"Servidor {args.server_id}"})
+        # Si la grabación tiene tests contra ese servidor, se reproduce uno de ellos.
+        runs = [run for run in runs if str(run[0].get('server', {}).get('id')) == args.server_id] or runs
+    run = random.Random(args.seed).choice(runs)
+
+    for event in run:
+        if pinned and 'server' in event:
+            event = dict(event, server=pinned)
+        print(json.dumps(event), flush=True)
+        if args.delay:
+            time.sleep(args.delay)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
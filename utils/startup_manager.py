@@ -6,26 +6,39 @@ import os
 class StartupManager:
     """Gestiona la entrada de la aplicación en el inicio de Windows."""
     
-    def __init__(self, app_name, app_path):
+    def __init__(self, app_name, app_path, arguments=""):
         # La clave del registro para las aplicaciones de inicio del usuario actual
         self.key_path = r"Software\Microsoft\Windows\CurrentVersion\Run"
         self.app_name = app_name
         # Asegurarse de que la ruta esté entre comillas para manejar espacios
-        self.app_path = f'"{app_path}"'
+        self.app_path = f'"{app_path}" {arguments}'.strip()
 
     def _get_key(self, access):
         return winreg.OpenKey(winreg.HKEY_CURRENT_USER, self.key_path, 0, access)
 
-    def is_enabled(self):
-        """Comprueba si la aplicación ya está configurada para iniciarse con Windows."""
+    def _stored_command(self):
+        """Devuelve el comando guardado en el registro, o None si no hay entrada."""
         try:
             with self._get_key(winreg.KEY_READ) as key:
-                winreg.QueryValueEx(key, self.app_name)
-            return True
+                return winreg.QueryValueEx(key, self.app_name)[0]
         except FileNotFoundError:
-            return False
+            return None
         except Exception:
+            return None
+
+    def is_enabled(self):
+        """Comprueba si la aplicación ya está configurada para iniciarse con Windows."""
+        return self._stored_command() is not None
+
+    def update_if_outdated(self):
+        """
+        Reescribe la entrada si existe pero su comando no es el actual (p. ej. una registrada
+        antes de que el inicio usara '--tray'). Devuelve True si la ha actualizado.
+        """
+        stored = self._stored_command()
+        if stored is None or stored == self.app_path:
             return False
+        return self.set_startup(True)
 
     def set_startup(self, enable: bool):
         """Activa o desactiva el inicio con Windows."""